@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, cast, Self
+from typing import List, Self
 
 NUMBER_OF_BITS_IN_BYTE = int(8)
 
@@ -54,21 +54,34 @@ def convert_bits_to_unsigned_int(combined_bits: str) -> int:
 
 def convert_bits_to_signed_int(combined_bits: str) -> int:
     # Extract the substring of the combined bits and convert to a signed integer
-    number_of_bits = len(combined_bits)
-    value = int(combined_bits, 2)
-    if value >= (1 << (number_of_bits - 1)):
-        value -= 1 << number_of_bits
-    return value
+    return convert_unsigned_int_to_signed_int(int(combined_bits, 2), len(combined_bits))
+
+
+def convert_unsigned_int_to_signed_int(unsigned_value: int, number_of_bits: int) -> int:
+    if unsigned_value >= (1 << (number_of_bits - 1)):
+        return unsigned_value - (1 << number_of_bits)
+    return unsigned_value
+
+
+def convert_str_of_bit_to_bytes(str_of_bits: str) -> bytes:
+    """Bits are left aligned: last byte is padded with 0 on the right"""
+    number_of_bytes = (len(str_of_bits) + NUMBER_OF_BITS_IN_BYTE - 1) // NUMBER_OF_BITS_IN_BYTE
+    if number_of_bytes == 0:
+        return b""
+    padded_bits = str_of_bits.ljust(number_of_bytes * NUMBER_OF_BITS_IN_BYTE, "0")
+    return int(padded_bits, 2).to_bytes(number_of_bytes, "big")
 
 
 class DecodedBytesMessage:
+    """Reads bits directly in the bytes of the message, without expanding them to a string of '0'/'1'"""
+
     __key_to_protect_constructor = object()
 
-    def __init__(self, key: object, str_of_bits: str) -> None:
+    def __init__(self, key: object, data: bytes, total_length_in_bits: int) -> None:
         assert key == DecodedBytesMessage.__key_to_protect_constructor, "Class must be instanciated from classmethods"
         self.current_bit_index = 0
-        self.str_of_bits = str_of_bits
-        self.total_length_in_bits = len(self.str_of_bits)
+        self.data = data
+        self.total_length_in_bits = total_length_in_bits
 
     @classmethod
     def from_hex_string(cls, hex_string: str) -> Self:
@@ -77,47 +90,78 @@ class DecodedBytesMessage:
 
     @classmethod
     def from_bit_string(cls, str_of_bits: str) -> Self:
-        return cls(key=cls.__key_to_protect_constructor, str_of_bits=str_of_bits)
+        return cls(key=cls.__key_to_protect_constructor, data=convert_str_of_bit_to_bytes(str_of_bits), total_length_in_bits=len(str_of_bits))
 
     @classmethod
     def from_bytes(cls, hex_bytes: bytes) -> Self:
-        str_of_bit = convert_bytes_to_to_str_of_bit(hex_bytes)
-        return cls.from_bit_string(str_of_bit)
+        return cls(key=cls.__key_to_protect_constructor, data=bytes(hex_bytes), total_length_in_bits=len(hex_bytes) * NUMBER_OF_BITS_IN_BYTE)
+
+    @property
+    def str_of_bits(self) -> str:
+        return convert_bytes_to_to_str_of_bit(self.data)[: self.total_length_in_bits]
 
     @property
     def number_of_bits_remaining_to_decode(self) -> int:
         return self.total_length_in_bits - self.current_bit_index
 
-    def extract_next_bits_to_str_of_bit(self, number_of_bits: int) -> str:
-        bits_extracted = self.str_of_bits[self.current_bit_index : self.current_bit_index + number_of_bits]
-        self.current_bit_index += number_of_bits
-        assert self.number_of_bits_remaining_to_decode >= 0, f"Too many ({-self.current_bit_index}) bits decoded!!"
-        return bits_extracted
+    def _extract_next_bits_to_unsigned_int(self, number_of_bits: int) -> int:
+        if number_of_bits <= 0:
+            raise ValueError(f"Cannot decode an integer on {number_of_bits} bits")
 
-    def get_next_bits_as_ascii_char(self, number_of_chars: int) -> str:
-        all_chars: List[str] = []
+        start_bit = self.current_bit_index
+        end_bit = start_bit + number_of_bits
+        self.current_bit_index = end_bit
+        assert self.number_of_bits_remaining_to_decode >= 0, f"Too many ({-self.number_of_bits_remaining_to_decode}) bits decoded!!"
 
-        size_bits_per_char = 8
+        # Fast path: byte aligned field
+        if not start_bit & 7 and not end_bit & 7:
+            return int.from_bytes(self.data[start_bit >> 3 : end_bit >> 3], "big")
 
-        for _ in range(0, number_of_chars):
-            bits_extracted = self.extract_next_bits_to_str_of_bit(size_bits_per_char)
-            current_char = convert_bits_to_ascii_char(bits_extracted, self.current_bit_index, size_bits_per_char)
-            all_chars.append(current_char)
+        start_byte = start_bit >> 3
+        end_byte = (end_bit + 7) >> 3
+        relevant_bytes_as_int = int.from_bytes(self.data[start_byte:end_byte], "big")
+        return (relevant_bytes_as_int >> ((end_byte << 3) - end_bit)) & ((1 << number_of_bits) - 1)
 
-        string_value = "".join(cast(str, all_chars)).rstrip()
+    def extract_next_bits_to_str_of_bit(self, number_of_bits: int) -> str:
+        if number_of_bits <= 0:
+            return ""
+        return format(self._extract_next_bits_to_unsigned_int(number_of_bits), f"0{number_of_bits}b")
+
+    def extract_next_bits_to_decoded_bytes_message(self, number_of_bits: int) -> "DecodedBytesMessage":
+        start_bit = self.current_bit_index
+        if not start_bit & 7:
+            self.current_bit_index += number_of_bits
+            assert self.number_of_bits_remaining_to_decode >= 0, f"Too many ({-self.number_of_bits_remaining_to_decode}) bits decoded!!"
+            data = self.data[start_bit >> 3 : (start_bit + number_of_bits + 7) >> 3]
+            # Bits of the last byte not part of the sub message are cleared, as in from_bit_string
+            if number_of_bits & 7:
+                data = data[:-1] + bytes([data[-1] & (0xFF << (NUMBER_OF_BITS_IN_BYTE - (number_of_bits & 7))) & 0xFF])
+            return DecodedBytesMessage(key=DecodedBytesMessage.__key_to_protect_constructor, data=data, total_length_in_bits=number_of_bits)
+
+        return DecodedBytesMessage.from_bit_string(self.extract_next_bits_to_str_of_bit(number_of_bits))
 
-        return string_value
+    def get_next_bits_as_ascii_char(self, number_of_chars: int) -> str:
+        start_bit = self.current_bit_index
+
+        # Fast path: byte aligned string
+        if not start_bit & 7:
+            self.current_bit_index += number_of_chars * NUMBER_OF_BITS_IN_BYTE
+            assert self.number_of_bits_remaining_to_decode >= 0, f"Too many ({-self.number_of_bits_remaining_to_decode}) bits decoded!!"
+            start_byte = start_bit >> 3
+            return self.data[start_byte : start_byte + number_of_chars].decode("latin-1").rstrip()
+
+        all_chars = [chr(self._extract_next_bits_to_unsigned_int(NUMBER_OF_BITS_IN_BYTE)) for _ in range(0, number_of_chars)]
+        return "".join(all_chars).rstrip()
 
     def get_next_bits_as_bitset_str(self, size_bits: int) -> str:
-        bits_extracted = self.extract_next_bits_to_str_of_bit(size_bits)
-        return bits_extracted
+        return self.extract_next_bits_to_str_of_bit(size_bits)
 
     def get_next_bits_as_single_int_signed_and_unsigned(self, size_bits: int) -> DecodedIntResult:
-        bits_extracted = self.extract_next_bits_to_str_of_bit(size_bits)
-        return convert_bits_to_signed_and_unsigned_int(bits_extracted)
+        unsigned_value = self._extract_next_bits_to_unsigned_int(size_bits)
+        return DecodedIntResult(signed_value=convert_unsigned_int_to_signed_int(unsigned_value, size_bits), unsigned_value=unsigned_value)
 
     def get_next_bits_as_single_int_signed(self, size_bits: int) -> int:
-        return self.get_next_bits_as_single_int_signed_and_unsigned(size_bits).signed_value
+        return convert_unsigned_int_to_signed_int(self._extract_next_bits_to_unsigned_int(size_bits), size_bits)
 
     def get_next_byte_as_single_int_unsigned(self) -> int:
         return self.get_next_bytes_as_single_int_unsigned(size_bytes=1)
@@ -126,7 +170,7 @@ class DecodedBytesMessage:
         return self.get_next_bits_as_single_int_unsigned(size_bytes * NUMBER_OF_BITS_IN_BYTE)
 
     def get_next_bits_as_single_int_unsigned(self, size_bits: int) -> int:
-        return self.get_next_bits_as_single_int_signed_and_unsigned(size_bits).unsigned_value
+        return self._extract_next_bits_to_unsigned_int(size_bits)
 
     def get_next_bits_as_bool_0_or_1(self, size_bits: int) -> bool:
         as_int = self.get_next_bits_as_single_int_unsigned(size_bits)
@@ -137,10 +181,8 @@ class DecodedBytesMessage:
         all_values: List[DecodedIntResult] = []
 
         for _ in range(0, table_dim):
-            bits_extracted = self.extract_next_bits_to_str_of_bit(size_bits)
-            field_unsigned_value = convert_bits_to_unsigned_int(bits_extracted)
-
-            field_signed_value = convert_bits_to_signed_int(bits_extracted)
+            field_unsigned_value = self._extract_next_bits_to_unsigned_int(size_bits)
+            field_signed_value = convert_unsigned_int_to_signed_int(field_unsigned_value, size_bits)
             all_values.append(DecodedIntResult(signed_value=field_signed_value, unsigned_value=field_unsigned_value))
 
         return all_values
@@ -1,5 +1,6 @@
 # -*-coding:Utf-8 -*
 import fnmatch
+import hashlib
 import os
 import shutil
 import tempfile
@@ -8,6 +9,7 @@ from collections.abc import Generator
 from contextlib import contextmanager
 from datetime import datetime
 from enum import Enum
+from pathlib import Path
 from typing import List, Tuple, cast
 
 import natsort
@@ -84,6 +86,15 @@ def get_files_by_directory_and_file_name_mask(
         return files_paths
 
 
+def compute_file_content_hash(file_full_path: str | Path) -> str:
+    """SHA-256 of the file content, read by chunks"""
+    content_hash = hashlib.sha256()
+    with open(file_full_path, mode="rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
 def get_files_modification_time(files_paths: List[str]) -> List[Tuple[str, datetime]]:
     files_and_modified_time: List[Tuple[str, datetime]] = []
     for file_path in files_paths:
@@ -1,18 +1,27 @@
+import contextlib
 import csv
 from enum import Enum
 import inspect
+import itertools
+import json
+import os
+import shutil
 import textwrap
 import time
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Self, TextIO, Tuple
 
-import pandas
 from logger import logger_config
 from openpyxl import Workbook
 
 from common import file_name_utils, file_utils, json_encoders
 
 EXCEL_LIMIT_NUMBER_OF_LINES = 1048576
+JSON_PART_FILES_NUMBER_OF_ROWS = 20000
+# Rows are written by batches to each file in turn: interleaving JSON encoding and xlsx writing row by row is much slower
+REPORT_ROWS_BATCH_SIZE = 1000
+# Files are written with this suffix, then renamed: a file still open in another application only blocks the renaming
+WRITING_FILE_SUFFIX = ".tmp"
 
 
 def _normalize_table_value(value: Any) -> Any:
@@ -34,32 +43,187 @@ def _get_fieldnames(rows_as_list_dict: List[Dict[str, Any]]) -> List[str]:
     return fieldnames
 
 
-def _write_delimited_file_improved(rows_as_list_dict: List[Dict[str, Any]], output_file_full_path: str, delimiter: str) -> None:
-    with open(output_file_full_path, "w", newline="", encoding="utf-8") as output_file:
-        if not rows_as_list_dict:
-            return
+class _ReportSink:
+    """Files are closed on exit, also if writing fails: then files being written are removed. close() completes the files and returns their full paths"""
 
-        fieldnames = _get_fieldnames(rows_as_list_dict)
-        writer = csv.DictWriter(output_file, fieldnames=fieldnames, delimiter=delimiter)
-        writer.writeheader()
+    def __enter__(self) -> Self:
+        return self
 
-        for row in rows_as_list_dict:
-            writer.writerow({field: _normalize_table_value(row.get(field)) for field in fieldnames})
+    def __exit__(self, exc_type: Optional[type[BaseException]], *exc_info: object) -> None:
+        self.release()
+        if exc_type is not None:
+            for file_full_path in self.get_file_full_paths():
+                if os.path.exists(f"{file_full_path}{WRITING_FILE_SUFFIX}"):
+                    os.remove(f"{file_full_path}{WRITING_FILE_SUFFIX}")
 
+    def get_file_full_paths(self) -> List[str]:
+        return []
 
-def _write_xlsx_file_improved(rows_as_list_dict: List[Dict[str, Any]], xlsx_file_full_path: str) -> None:
-    workbook = Workbook(write_only=True)
-    worksheet = workbook.active
+    def release(self) -> None:
+        pass
 
-    if rows_as_list_dict:
-        fieldnames = _get_fieldnames(rows_as_list_dict)
-        worksheet.append(fieldnames)
 
-        for row in rows_as_list_dict:
-            worksheet.append([_normalize_table_value(row.get(field)) for field in fieldnames])
+class _JsonReportSink(_ReportSink):
+    """Same files as json_encoders.JsonEncodersUtils.serialize_list_objects_in_json, written row by row: the whole list, and parts of JSON_PART_FILES_NUMBER_OF_ROWS rows if there are more rows.
+    Rows of the first part are kept until there are more rows: part files are not written for a single part"""
+
+    def __init__(self, file_path_without_suffix: str) -> None:
+        self.file_path_without_suffix = file_path_without_suffix
+        self.json_file = open(f"{file_path_without_suffix}.json{WRITING_FILE_SUFFIX}", "w", encoding="utf-8")
+        self.json_file.write("[\n")
+        self.part_json_file_full_paths: List[str] = []
+        self.part_json_file: Optional[TextIO] = None
+        self.first_part_rows_json: List[str] = []
+        self.rows_count = 0
+
+    def _open_next_part_json_file(self) -> None:
+        self._close_part_json_file()
+        part_json_file_full_path = f"{self.file_path_without_suffix}_part_{len(self.part_json_file_full_paths)}.json"
+        self.part_json_file_full_paths.append(part_json_file_full_path)
+        self.part_json_file = open(f"{part_json_file_full_path}{WRITING_FILE_SUFFIX}", "w", encoding="utf-8")
+        self.part_json_file.write("[\n")
+
+    def _close_part_json_file(self) -> None:
+        if self.part_json_file is not None:
+            self.part_json_file.write("\n]")
+            self.part_json_file.close()
+            self.part_json_file = None
+
+    def write_row(self, row: Dict[str, Any]) -> None:
+        if self.rows_count:
+            self.json_file.write(",\n")
+        row_json = textwrap.indent(json.dumps(row, indent=4, cls=json_encoders.ListOfObjectsEncoder, ensure_ascii=False), "    ")
+        self.json_file.write(row_json)
+
+        # Part files escape non ASCII characters
+        part_row_json = row_json if row_json.isascii() else textwrap.indent(json.dumps(row, indent=4, cls=json_encoders.ListOfObjectsEncoder), "    ")
+        if self.rows_count < JSON_PART_FILES_NUMBER_OF_ROWS:
+            self.first_part_rows_json.append(part_row_json)
+        else:
+            if self.rows_count == JSON_PART_FILES_NUMBER_OF_ROWS:
+                self._open_next_part_json_file()
+                assert self.part_json_file
+                self.part_json_file.write(",\n".join(self.first_part_rows_json))
+                self.first_part_rows_json.clear()
+
+            if self.rows_count % JSON_PART_FILES_NUMBER_OF_ROWS == 0:
+                self._open_next_part_json_file()
+            else:
+                assert self.part_json_file
+                self.part_json_file.write(",\n")
+            assert self.part_json_file
+            self.part_json_file.write(part_row_json)
+        self.rows_count += 1
+
+    def get_file_full_paths(self) -> List[str]:
+        return [f"{self.file_path_without_suffix}.json"] + self.part_json_file_full_paths
+
+    def close(self) -> List[str]:
+        self.json_file.write("\n]" if self.rows_count else "]")
+        self.json_file.close()
+        self._close_part_json_file()
+        return self.get_file_full_paths()
+
+    def release(self) -> None:
+        self.json_file.close()
+        if self.part_json_file is not None:
+            self.part_json_file.close()
+
+
+class _DelimitedReportSink(_ReportSink):
+    def __init__(self, output_file_full_path: str, delimiter: str, fieldnames: List[str]) -> None:
+        self.output_file_full_path = output_file_full_path
+        self.output_file = open(f"{output_file_full_path}{WRITING_FILE_SUFFIX}", "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.output_file, delimiter=delimiter)
+        if fieldnames:
+            self.writer.writerow(fieldnames)
+
+    def write_row_values(self, row_values: List[Any]) -> None:
+        self.writer.writerow(row_values)
+
+    def get_file_full_paths(self) -> List[str]:
+        return [self.output_file_full_path]
+
+    def close(self) -> List[str]:
+        self.output_file.close()
+        return self.get_file_full_paths()
+
+    def release(self) -> None:
+        self.output_file.close()
+
 
-    workbook.save(xlsx_file_full_path)
-    workbook.close()
+class _XlsxReportSink(_ReportSink):
+    """Rows are split into several sheets (each with the header) when they do not fit in one"""
+
+    def __init__(self, xlsx_file_full_path: str, fieldnames: List[str]) -> None:
+        self.xlsx_file_full_path = xlsx_file_full_path
+        self.fieldnames = fieldnames
+        self.workbook = Workbook(write_only=True)
+        self.worksheet = self.workbook.create_sheet()
+        self.worksheet_rows_count = 0
+        if fieldnames:
+            self.worksheet.append(fieldnames)
+
+    def write_row_values(self, row_values: List[Any]) -> None:
+        if self.worksheet_rows_count == EXCEL_LIMIT_NUMBER_OF_LINES - 1:
+            self.worksheet = self.workbook.create_sheet()
+            self.worksheet.append(self.fieldnames)
+            self.worksheet_rows_count = 0
+        self.worksheet.append(row_values)
+        self.worksheet_rows_count += 1
+
+    def get_file_full_paths(self) -> List[str]:
+        return [self.xlsx_file_full_path]
+
+    def close(self) -> List[str]:
+        self.workbook.save(f"{self.xlsx_file_full_path}{WRITING_FILE_SUFFIX}")
+        self.workbook.close()
+        return self.get_file_full_paths()
+
+    def release(self) -> None:
+        # Worksheets not saved still write rows to their temporary file: they are completed before the workbook is closed
+        for worksheet in self.workbook.worksheets:
+            if not worksheet.closed:
+                worksheet.close()
+        self.workbook.close()
+
+
+def _write_rows_to_report_files(rows_as_list_dict: Iterable[Dict[str, Any]], fieldnames: List[str], file_path_without_suffix: str) -> Tuple[int, List[str]]:
+    """Each row is converted once and written to all files. Returns the number of rows and the full paths of created files (still with WRITING_FILE_SUFFIX)"""
+    with contextlib.ExitStack() as sinks_exit_stack:
+        json_sink = sinks_exit_stack.enter_context(_JsonReportSink(file_path_without_suffix))
+        table_sinks: List[_XlsxReportSink | _DelimitedReportSink] = [
+            sinks_exit_stack.enter_context(_XlsxReportSink(f"{file_path_without_suffix}.xlsx", fieldnames)),
+            sinks_exit_stack.enter_context(_DelimitedReportSink(f"{file_path_without_suffix}.csv", delimiter=";", fieldnames=fieldnames)),
+            sinks_exit_stack.enter_context(_DelimitedReportSink(f"{file_path_without_suffix}.txt", delimiter="\t", fieldnames=fieldnames)),
+        ]
+
+        rows_iterator = iter(rows_as_list_dict)
+        while rows_batch := list(itertools.islice(rows_iterator, REPORT_ROWS_BATCH_SIZE)):
+            for row in rows_batch:
+                json_sink.write_row(row)
+            rows_batch_values = [[_normalize_table_value(row.get(field)) for field in fieldnames] for row in rows_batch]
+            for table_sink in table_sinks:
+                for row_values in rows_batch_values:
+                    table_sink.write_row_values(row_values)
+
+        created_file_full_paths = json_sink.close()
+        for table_sink in table_sinks:
+            created_file_full_paths += table_sink.close()
+    return json_sink.rows_count, created_file_full_paths
+
+
+def _copy_file_waiting_release(source_file_full_path: str, destination_file_full_path: str, move: bool) -> None:
+    while True:
+        try:
+            if move:
+                os.replace(source_file_full_path, destination_file_full_path)
+            else:
+                shutil.copyfile(source_file_full_path, destination_file_full_path)
+            return
+        except PermissionError:
+            logger_config.print_and_log_error(f"File {destination_file_full_path} is used. Release it")
+            time.sleep(1)
 
 
 class SuffixFileNameByDate(Enum):
@@ -69,39 +233,35 @@ class SuffixFileNameByDate(Enum):
 
 
 def save_rows_to_output_files(
-    rows_as_list_dict: List[Dict[str, Any]], file_base_name: str, output_directory_path: str, suffix_file_name_by_date: SuffixFileNameByDate = SuffixFileNameByDate.NO
+    rows_as_list_dict: Iterable[Dict[str, Any]],
+    file_base_name: str,
+    output_directory_path: str,
+    suffix_file_name_by_date: SuffixFileNameByDate = SuffixFileNameByDate.NO,
+    fieldnames: Optional[List[str]] = None,
 ) -> bool:
+    """Rows are read once and written to json, xlsx, csv and txt files in the same pass. Rows can be an iterator: they are only kept in memory if fieldnames are not given.
+    With DO_BOTH, files suffixed by date are copies of the others"""
 
-    if suffix_file_name_by_date == SuffixFileNameByDate.DO_BOTH:
-        return save_rows_to_output_files(rows_as_list_dict, file_base_name, output_directory_path, SuffixFileNameByDate.NO) and save_rows_to_output_files(
-            rows_as_list_dict, file_base_name, output_directory_path, SuffixFileNameByDate.YES
-        )
+    if fieldnames is None:
+        rows_as_list_dict = list(rows_as_list_dict)
+        fieldnames = _get_fieldnames(rows_as_list_dict)
 
+    written_file_base_name = file_base_name
     if suffix_file_name_by_date == SuffixFileNameByDate.YES:
-        file_base_name += file_name_utils.get_file_suffix_with_current_datetime(include_underscore=True)
+        written_file_base_name += file_name_utils.get_file_suffix_with_current_datetime(include_underscore=True)
 
-    with logger_config.stopwatch_with_label(f"{inspect.stack(0)[0].function} for {len(rows_as_list_dict)} lines to {file_base_name}", inform_beginning=True):
+    with logger_config.stopwatch_with_label(f"{inspect.stack(0)[0].function} for {len(fieldnames)} columns to {written_file_base_name}", inform_beginning=True, monitor_ram_usage=True):
         file_utils.create_folder_if_not_exist(output_directory_path)
-        file_path_without_suffix = f"{output_directory_path}/{file_base_name}"
-        try:
-            json_encoders.JsonEncodersUtils.serialize_list_objects_in_json(rows_as_list_dict, f"{file_path_without_suffix}.json")
-        except MemoryError as err:
-            logger_config.print_and_log_exception(err)
-        success = False
-        while not success:
-            try:
-                if len(rows_as_list_dict) < EXCEL_LIMIT_NUMBER_OF_LINES - 1:
-                    with logger_config.stopwatch_with_label(f"Create {file_path_without_suffix}.xlsx", inform_beginning=True, monitor_ram_usage=True):
-                        pandas.DataFrame(rows_as_list_dict).to_excel(f"{file_path_without_suffix}.xlsx", index=False)
-                with logger_config.stopwatch_with_label(f"Create {file_path_without_suffix}.csv", inform_beginning=True, monitor_ram_usage=True):
-                    pandas.DataFrame(rows_as_list_dict).to_csv(f"{file_path_without_suffix}.csv", index=False, sep=";")
-                with logger_config.stopwatch_with_label(f"Create {file_path_without_suffix}.txt", inform_beginning=True, monitor_ram_usage=True):
-                    pandas.DataFrame(rows_as_list_dict).to_csv(f"{file_path_without_suffix}.txt", index=False, sep="\t")
-                # _write_xlsx_file(rows_as_list_dict, f"{file_path_without_suffix}.xlsx")
-                # _write_delimited_file(rows_as_list_dict, f"{file_path_without_suffix}.csv", delimiter=",")
-                # _write_delimited_file(rows_as_list_dict, f"{file_path_without_suffix}.txt", delimiter="\t")
-                success = True
-            except PermissionError:
-                logger_config.print_and_log_error(f"One of the files {file_path_without_suffix} is used. Release it")
-                time.sleep(1)
-        return success
+        file_path_without_suffix = f"{output_directory_path}/{written_file_base_name}"
+        rows_count, created_file_full_paths = _write_rows_to_report_files(rows_as_list_dict, fieldnames, file_path_without_suffix)
+        logger_config.print_and_log_info(f"{rows_count} lines written to {written_file_base_name}")
+
+        for created_file_full_path in created_file_full_paths:
+            _copy_file_waiting_release(f"{created_file_full_path}{WRITING_FILE_SUFFIX}", created_file_full_path, move=True)
+
+        if suffix_file_name_by_date == SuffixFileNameByDate.DO_BOTH:
+            dated_file_path_without_suffix = file_path_without_suffix + file_name_utils.get_file_suffix_with_current_datetime(include_underscore=True)
+            for created_file_full_path in created_file_full_paths:
+                _copy_file_waiting_release(created_file_full_path, dated_file_path_without_suffix + created_file_full_path[len(file_path_without_suffix) :], move=False)
+
+    return True
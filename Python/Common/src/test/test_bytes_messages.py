@@ -50,3 +50,51 @@ def test_decode_bits_message() -> None:
     assert decoded_message.get_next_bits_as_ascii_char(1) == "H"
     assert decoded_message.get_next_bits_as_single_int_unsigned(8) == 0
     assert decoded_message.is_correctly_and_completely_decoded()
+
+
+@pytest.mark.parametrize(
+    "hex_string, size_bits_to_skip, size_bits, expected_unsigned_value, expected_signed_value",
+    [
+        ("12 34 56 78", 0, 32, 0x12345678, 0x12345678),
+        ("12 34 56 78", 8, 16, 0x3456, 0x3456),
+        ("12 34 56 78", 4, 16, 0x2345, 0x2345),
+        ("F2 34 56 78", 0, 4, 0xF, -1),
+        ("12 34 56 78", 3, 13, 0x1234, -3532),
+        ("12 34 56 78", 7, 18, 0x68AC, 0x68AC),
+        ("FF FF FF FF FF FF FF FF FF", 1, 70, (1 << 70) - 1, -1),
+    ],
+)
+def test_decode_int_not_aligned_on_bytes(hex_string: str, size_bits_to_skip: int, size_bits: int, expected_unsigned_value: int, expected_signed_value: int) -> None:
+    decoded_message = bytes_messages.DecodedBytesMessage.from_hex_string(hex_string)
+    if size_bits_to_skip:
+        decoded_message.get_next_bits_as_bitset_str(size_bits_to_skip)
+    assert decoded_message.get_next_bits_as_single_int_signed_and_unsigned(size_bits=size_bits) == bytes_messages.DecodedIntResult(expected_signed_value, expected_unsigned_value)
+
+
+def test_decode_too_many_bits() -> None:
+    decoded_message = bytes_messages.DecodedBytesMessage.from_hex_string("01 02")
+    with pytest.raises(AssertionError):
+        decoded_message.get_next_bits_as_single_int_unsigned(size_bits=17)
+
+
+def test_decode_int_on_0_bit_is_not_possible() -> None:
+    decoded_message = bytes_messages.DecodedBytesMessage.from_hex_string("01 02")
+    with pytest.raises(ValueError):
+        decoded_message.get_next_bits_as_single_int_unsigned(size_bits=0)
+
+
+def test_str_of_bits_and_sub_messages() -> None:
+    decoded_message = bytes_messages.DecodedBytesMessage.from_hex_string("A5 F0 0F")
+    assert decoded_message.str_of_bits == "101001011111000000001111"
+    assert decoded_message.get_next_bits_as_bitset_str(size_bits=4) == "1010"
+
+    not_aligned_sub_message = decoded_message.extract_next_bits_to_decoded_bytes_message(number_of_bits=4)
+    assert not_aligned_sub_message.str_of_bits == "0101"
+
+    aligned_sub_message = decoded_message.extract_next_bits_to_decoded_bytes_message(number_of_bits=11)
+    assert aligned_sub_message.str_of_bits == "11110000000"
+    assert aligned_sub_message.get_next_bits_as_single_int_unsigned(size_bits=11) == 0b11110000000
+    assert aligned_sub_message.is_correctly_and_completely_decoded()
+
+    assert decoded_message.extract_next_bits_to_str_of_bit(number_of_bits=5) == "01111"
+    assert decoded_message.is_correctly_and_completely_decoded()
@@ -0,0 +1,81 @@
+import filecmp
+import gc
+import json
+import os
+import pathlib
+
+import pytest
+from typing import Any, Dict, Iterator, List, TextIO
+from openpyxl import load_workbook
+
+from common import reports_utils
+
+ROWS: List[Dict[str, Any]] = [{"name": "a", "value": 1}, {"name": "é", "other": [1, 2]}, {"name": "c", "value": None}]
+
+
+class TestSaveRowsToOutputFiles:
+
+    def test_all_files_from_iterator(self, tmp_path: pathlib.Path) -> None:
+        assert reports_utils.save_rows_to_output_files(iter(ROWS), "report", str(tmp_path), fieldnames=["name", "value", "other"])
+
+        assert sorted(os.listdir(tmp_path)) == ["report.csv", "report.json", "report.txt", "report.xlsx"]
+        assert json.loads((tmp_path / "report.json").read_text(encoding="utf-8")) == ROWS
+        assert (tmp_path / "report.csv").read_text(encoding="utf-8").splitlines() == ["name;value;other", "a;1;", "é;;1, 2", "c;;"]
+        assert (tmp_path / "report.txt").read_text(encoding="utf-8").splitlines()[0] == "name\tvalue\tother"
+
+    def test_fieldnames_in_order_of_first_appearance(self, tmp_path: pathlib.Path) -> None:
+        reports_utils.save_rows_to_output_files(ROWS, "report", str(tmp_path))
+        assert (tmp_path / "report.csv").read_text(encoding="utf-8").splitlines()[0] == "name;value;other"
+
+    def test_xlsx_split_in_sheets_and_json_split_in_parts(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(reports_utils, "EXCEL_LIMIT_NUMBER_OF_LINES", 3)
+        monkeypatch.setattr(reports_utils, "JSON_PART_FILES_NUMBER_OF_ROWS", 2)
+        reports_utils.save_rows_to_output_files(ROWS, "report", str(tmp_path))
+
+        workbook = load_workbook(tmp_path / "report.xlsx")
+        assert [[row for row in worksheet.iter_rows(values_only=True)] for worksheet in workbook.worksheets] == [
+            [("name", "value", "other"), ("a", 1, None), ("é", None, "1, 2")],
+            [("name", "value", "other"), ("c", None, None)],
+        ]
+        assert json.loads((tmp_path / "report_part_0.json").read_text(encoding="utf-8")) == ROWS[:2]
+        assert json.loads((tmp_path / "report_part_1.json").read_text(encoding="utf-8")) == ROWS[2:]
+
+    def test_no_json_part_for_a_single_part(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(reports_utils, "JSON_PART_FILES_NUMBER_OF_ROWS", 3)
+        reports_utils.save_rows_to_output_files(ROWS, "report", str(tmp_path))
+
+        assert sorted(os.listdir(tmp_path)) == ["report.csv", "report.json", "report.txt", "report.xlsx"]
+        assert json.loads((tmp_path / "report.json").read_text(encoding="utf-8")) == ROWS
+
+    @pytest.mark.filterwarnings("error::pytest.PytestUnraisableExceptionWarning")
+    def test_files_are_closed_when_rows_fail(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        opened_files: List[TextIO] = []
+
+        def open_and_keep_file(*args: Any, **kwargs: Any) -> TextIO:
+            opened_file: TextIO = open(*args, **kwargs)
+            opened_files.append(opened_file)
+            return opened_file
+
+        def get_rows() -> Iterator[Dict[str, Any]]:
+            yield from ROWS
+            raise ValueError("Rows not available")
+
+        monkeypatch.setattr(reports_utils, "JSON_PART_FILES_NUMBER_OF_ROWS", 1)
+        monkeypatch.setattr(reports_utils, "REPORT_ROWS_BATCH_SIZE", 2)
+        monkeypatch.setattr(reports_utils, "open", open_and_keep_file, raising=False)
+        with pytest.raises(ValueError):
+            reports_utils.save_rows_to_output_files(get_rows(), "report", str(tmp_path), fieldnames=["name", "value", "other"])
+
+        # Objects of the failed writing are collected now: an error when they are finalized makes the test fail
+        gc.collect()
+        assert len(opened_files) == 5
+        assert all(opened_file.closed for opened_file in opened_files)
+        assert not os.listdir(tmp_path)
+
+    def test_dated_files_are_copies(self, tmp_path: pathlib.Path) -> None:
+        reports_utils.save_rows_to_output_files(ROWS, "report", str(tmp_path), suffix_file_name_by_date=reports_utils.SuffixFileNameByDate.DO_BOTH)
+
+        dated_file_names = sorted(file_name for file_name in os.listdir(tmp_path) if file_name.startswith("report_"))
+        assert len(dated_file_names) == 4
+        for dated_file_name in dated_file_names:
+            assert filecmp.cmp(tmp_path / dated_file_name, tmp_path / f"report{pathlib.Path(dated_file_name).suffix}", shallow=False)
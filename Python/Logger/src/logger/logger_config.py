@@ -3,10 +3,6 @@
 import datetime
 from warnings import deprecated
 
-# To get line number for logs
-# from inspect import currentframe, getframeinfo
-import inspect
-
 # -*-coding:Utf-8 -*
 import logging
 import os
@@ -16,6 +12,7 @@ import time
 from collections.abc import Generator
 from contextlib import contextmanager
 from functools import wraps
+from types import FrameType
 
 # from warnings import deprecated
 from logging.handlers import RotatingFileHandler
@@ -50,60 +47,73 @@ class MessagesCounterHandler(logging.Handler):
             log_counts_errors_occurences_per_file_and_line[record_file_and_line] += 1
 
 
+def __get_calling_frame(call_stack_frame: int) -> FrameType:
+    """Same frame as inspect.stack()[call_stack_frame] in the caller, without building the whole stack nor reading source files.
+    Frame 0 is the caller of this function"""
+    return sys._getframe(call_stack_frame + 1)
+
+
 def __get_calling_file_name_and_line_number(
     call_stack_context: int = DEFAULT_CALL_STACK_CONTEXT_VALUE,
     call_stack_frame: int = DEFAULT_CALL_STACK_FRAME_VALUE,
 ) -> str:
-    previous_stack = inspect.stack(call_stack_context)[call_stack_frame]
-    file_name = previous_stack.filename
-    line_number = previous_stack.lineno
-    return file_name + ":" + str(line_number)
+    """call_stack_context (number of source lines read by inspect.stack) is kept for compatibility: source lines are not needed"""
+    previous_frame = __get_calling_frame(call_stack_frame)
+    return previous_frame.f_code.co_filename + ":" + str(previous_frame.f_lineno)
 
 
 def __get_calling_file_name() -> str:
-    previous_stack = inspect.stack(1)[1]
-    file_name = previous_stack.filename
-    return file_name
+    return __get_calling_frame(1).f_code.co_filename
 
 
 def __get_calling_line_number() -> int:
-    previous_stack = inspect.stack(1)[1]
-    line_number = previous_stack.lineno
-    return line_number
+    return __get_calling_frame(1).f_lineno
+
+
+def __is_log_level_enabled(log_level: int) -> bool:
+    return logging.getLogger().isEnabledFor(log_level)
 
 
 def print_and_log_critical_and_kill(to_print_and_log: str) -> None:
     """Print in standard output and log in file as info critical, then kill application"""
     log_timestamp = time.asctime(time.localtime(time.time()))
     to_print_and_log = "☠️ " + to_print_and_log
+    calling_file_name_and_line_number = __get_calling_file_name_and_line_number()
 
     # pylint: disable=line-too-long
-    print(log_timestamp + "\t" + __get_calling_file_name_and_line_number() + "\t" + to_print_and_log)
-    print(log_timestamp + "\t" + __get_calling_file_name_and_line_number() + "\t" + "Kill application")
+    print(log_timestamp + "\t" + calling_file_name_and_line_number + "\t" + to_print_and_log)
+    print(log_timestamp + "\t" + calling_file_name_and_line_number + "\t" + "Kill application")
 
-    logging.critical(f"{__get_calling_file_name_and_line_number()} '\t' {to_print_and_log}")
-    logging.critical(f"{__get_calling_file_name_and_line_number()} '\t' Kill application")
+    logging.critical(f"{calling_file_name_and_line_number} '\t' {to_print_and_log}")
+    logging.critical(f"{calling_file_name_and_line_number} '\t' Kill application")
     sys.exit()
 
 
 def print_and_log_info_if(condition: bool, to_print_and_log: str) -> None:
     """Print in standard output and log in file as info level"""
     if condition:
-        log_timestamp = time.asctime(time.localtime(time.time()))
+        print_and_log_info(to_print_and_log=to_print_and_log, call_stack_frame=3)
 
-        # pylint: disable=line-too-long
-        print(log_timestamp + "\t" + __get_calling_file_name_and_line_number() + "\t" + to_print_and_log)
-        logging.info(f"{__get_calling_file_name_and_line_number()} \t {to_print_and_log}")
 
+def print_and_log_info(
+    to_print_and_log: str,
+    do_not_print: bool = False,
+    call_stack_frame: int = DEFAULT_CALL_STACK_FRAME_VALUE,
+) -> None:
+    """Print in standard output and log in file as info level.
+    Nothing is computed when not printed and info level is disabled"""
+    log_enabled = __is_log_level_enabled(logging.INFO)
+    if do_not_print and not log_enabled:
+        return
 
-def print_and_log_info(to_print_and_log: str, do_not_print: bool = False) -> None:
-    """Print in standard output and log in file as info level"""
-    log_timestamp = time.asctime(time.localtime(time.time()))
+    calling_file_name_and_line_number = __get_calling_file_name_and_line_number(call_stack_frame=call_stack_frame)
 
     # pylint: disable=line-too-long
     if not do_not_print:
-        print(log_timestamp + "\t" + __get_calling_file_name_and_line_number() + "\t" + to_print_and_log)
-    logging.info(f"{__get_calling_file_name_and_line_number()} \t {to_print_and_log}")
+        log_timestamp = time.asctime(time.localtime(time.time()))
+        print(log_timestamp + "\t" + calling_file_name_and_line_number + "\t" + to_print_and_log)
+    if log_enabled:
+        logging.info(f"{calling_file_name_and_line_number} \t {to_print_and_log}")
 
 
 def print_and_log_warning_if(condition: bool, to_print_and_log: str, do_not_print: bool = False) -> None:
@@ -120,28 +130,25 @@ def print_and_log_warning(
     do_not_print: bool = False,
     call_stack_frame: int = DEFAULT_CALL_STACK_FRAME_VALUE,
 ) -> None:
-    """Print in standard output and log in file as info level"""
-    log_timestamp = time.asctime(time.localtime(time.time()))
+    """Print in standard output and log in file as warning level.
+    Nothing is computed when not printed and warning level is disabled"""
+    log_enabled = __is_log_level_enabled(logging.WARNING)
+    if do_not_print and not log_enabled:
+        return
+
+    calling_file_name_and_line_number = __get_calling_file_name_and_line_number(call_stack_frame=call_stack_frame)
 
     # pylint: disable=line-too-long
     if not do_not_print:
-        print(
-            log_timestamp
-            + "\t"
-            + "⚠️"
-            + "\t"
-            + __get_calling_file_name_and_line_number(call_stack_frame=call_stack_frame)
-            + "\t"
-            + str()
-            + to_print_and_log
-        )
-    logging.warning(f"{__get_calling_file_name_and_line_number()} \t {to_print_and_log}")
+        log_timestamp = time.asctime(time.localtime(time.time()))
+        print(log_timestamp + "\t" + "⚠️" + "\t" + calling_file_name_and_line_number + "\t" + to_print_and_log)
+    if log_enabled:
+        logging.warning(f"{calling_file_name_and_line_number} \t {to_print_and_log}")
 
 
 def print_and_log_exception(exception_to_print: Exception, additional_text: Optional[str] = None) -> None:
-    log_counts_exceptions_occurences_per_file_and_line[
-        __get_calling_file_name_and_line_number(call_stack_context=0)
-    ] += 1
+    calling_file_name_and_line_number = __get_calling_file_name_and_line_number()
+    log_counts_exceptions_occurences_per_file_and_line[calling_file_name_and_line_number] += 1
 
     if additional_text:
         to_print_and_log = f"Exception raised:{additional_text} "
@@ -153,10 +160,8 @@ def print_and_log_exception(exception_to_print: Exception, additional_text: Opti
     )
 
     log_timestamp = time.asctime(time.localtime(time.time()))
-    print(log_timestamp + "\t" + __get_calling_file_name_and_line_number(call_stack_context=0) + "\t" + "!!ERROR!!")
-    print(
-        log_timestamp + "\t" + __get_calling_file_name_and_line_number(call_stack_context=0) + "\t !!EXCEPTION THROWN!!"
-    )
+    print(log_timestamp + "\t" + calling_file_name_and_line_number + "\t" + "!!ERROR!!")
+    print(log_timestamp + "\t" + calling_file_name_and_line_number + "\t !!EXCEPTION THROWN!!")
 
     logging.exception(exception_to_print)
 
@@ -176,25 +181,23 @@ def print_and_log_error(
     call_stack_context: int = DEFAULT_CALL_STACK_CONTEXT_VALUE,
     call_stack_frame: int = DEFAULT_CALL_STACK_FRAME_VALUE,
 ) -> None:
-    """Print in standard output and log in file as error level"""
-    log_timestamp = time.asctime(time.localtime(time.time()))
+    """Print in standard output and log in file as error level.
+    Nothing is computed when not printed and error level is disabled"""
+    log_enabled = __is_log_level_enabled(logging.ERROR)
+    if do_not_print and not log_enabled:
+        return
+
+    calling_file_name_and_line_number = __get_calling_file_name_and_line_number(
+        call_stack_context=call_stack_context, call_stack_frame=call_stack_frame
+    )
     to_print_and_log = "❌ " + to_print_and_log
     if not do_not_print:
         # print(log_timestamp + "\t" + "!!ERROR!!")
         # pylint: disable=line-too-long
-        print(
-            log_timestamp
-            + "\t"
-            + __get_calling_file_name_and_line_number(
-                call_stack_context=call_stack_context, call_stack_frame=call_stack_frame
-            )
-            + "\t"
-            + str()
-            + to_print_and_log
-        )
-    logging.error(f"{__get_calling_file_name_and_line_number(
-                call_stack_context=call_stack_context, call_stack_frame=call_stack_frame
-            )} \t {to_print_and_log}")
+        log_timestamp = time.asctime(time.localtime(time.time()))
+        print(log_timestamp + "\t" + calling_file_name_and_line_number + "\t" + to_print_and_log)
+    if log_enabled:
+        logging.error(f"{calling_file_name_and_line_number} \t {to_print_and_log}")
 
 
 @contextmanager
@@ -204,9 +207,9 @@ def application_logger(
     log_file_suffix_before_extension: Optional[str] = None,
 ) -> Generator[float, None, None]:
 
-    previous_stack = inspect.stack(0)[2]
-    file_name = previous_stack.filename
-    line_number = previous_stack.lineno
+    previous_frame = __get_calling_frame(2)
+    file_name = previous_frame.f_code.co_filename
+    line_number = previous_frame.f_lineno
 
     if not application_name:
         application_name = os.path.basename(os.path.dirname(file_name))
@@ -271,8 +274,7 @@ def configure_logger_with_random_log_file_suffix(
 
 def configure_logger_not_working(logger_level: int = logging.INFO) -> None:
     """Configure the logger with_random_log_file_suffix"""
-    previous_stack = inspect.stack(1)[2]
-    calling_script_file_name = previous_stack.filename
+    calling_script_file_name = __get_calling_frame(2).f_code.co_filename
     log_file_extension: str = "log"
     log_file_name_prefix = calling_script_file_name
     log_file_name = f"{log_file_name_prefix}_{str(random.randrange(100000))}.{log_file_extension}"
@@ -403,10 +405,10 @@ def stopwatch_with_label(
     if enabled:
         initial_ram_rss = cast(int, psutil.Process(os.getpid()).memory_info().rss)
 
-        previous_stack = inspect.stack(call_stack_context)[call_stack_frame]
-        file_name = previous_stack.filename
-        line_number = previous_stack.lineno
-        calling_file_name_and_line_number = file_name + ":" + str(line_number)
+        # One more frame than inspect.stack() called here
+        calling_file_name_and_line_number = __get_calling_file_name_and_line_number(
+            call_stack_context=call_stack_context, call_stack_frame=call_stack_frame + 1
+        )
 
         if inform_beginning:
             at_beginning_log_timestamp = time.asctime(time.localtime(time.time()))
@@ -502,10 +504,7 @@ def stopwatch_alert_if_exceeds_duration(
 
             log_timestamp = time.asctime(time.localtime(time.time()))
 
-            previous_stack = inspect.stack(0)[2]
-            file_name = previous_stack.filename
-            line_number = previous_stack.lineno
-            calling_file_name_and_line_number = file_name + ":" + str(line_number)
+            calling_file_name_and_line_number = __get_calling_file_name_and_line_number(call_stack_frame=3)
 
             # pylint: disable=line-too-long
             if enable_print:
@@ -587,8 +586,10 @@ def print_and_log_current_ram_usage(
 
     log_timestamp = time.asctime(time.localtime(time.time()))
 
+    calling_file_name_and_line_number = __get_calling_file_name_and_line_number()
+
     # pylint: disable=line-too-long
-    print(log_timestamp + "\t" + __get_calling_file_name_and_line_number() + "\t" + to_print_and_log)
-    logging.info(f"{__get_calling_file_name_and_line_number()} \t {to_print_and_log}")
+    print(log_timestamp + "\t" + calling_file_name_and_line_number + "\t" + to_print_and_log)
+    logging.info(f"{calling_file_name_and_line_number} \t {to_print_and_log}")
 
     return current_ram_rss
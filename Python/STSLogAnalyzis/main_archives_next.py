@@ -9,12 +9,14 @@ from stsloganalyzis.archive import archive_analyzis, decode_archive
 from stsloganalyzis.common import common_filters
 
 OUTPUT_DIRECTORY = "output"
+DECODED_ARCHIVE_CACHE_DIRECTORY = "decoded_archive_cache"
+TOPOLOGY_SNAPSHOT_DIRECTORY = "topology_snapshot"
 
 
 def main() -> None:
     with logger_config.application_logger():
 
-        railway_line, archive_decoder = next_ats_data.get_encoders()
+        railway_line, archive_decoder = next_ats_data.get_encoders(topology_snapshot_directory_path=TOPOLOGY_SNAPSHOT_DIRECTORY)
 
         for date_min, date_max, analysis_label in [
             ("2026-06-18T02:00:00.000", "2026-06-18T02:40:00.000", "FU"),
@@ -24,12 +26,12 @@ def main() -> None:
         ]:
 
             archive_library = (
-                next_ats_data.get_classic_archive_library_base_builder(archive_decoder=archive_decoder).add_archive_file(
-                    file_full_path=r"C:\Users\fr232487\Downloads\2026-06-17&18 ITC\logs_ats\NEXTFileArchiveServer_439.json"
-                )
+                next_ats_data.get_classic_archive_library_base_builder(archive_decoder=archive_decoder)
+                .add_archive_file(file_full_path=r"C:\Users\fr232487\Downloads\2026-06-17&18 ITC\logs_ats\NEXTFileArchiveServer_439.json")
                 # .add_archive_files(directory_path=r"C:\Users\fr232487\Downloads\Archives_site_202-03- 27 au 29", filename_pattern="NEXTFileArchiveServer_*.json")
                 # .add_archive_file(file_full_path=r"C:\Users\fr232487\Downloads\Archives_site_202-03- 27 au 29\CFX00921734_FU.json")
                 # .add_archive_file(file_full_path=r"C:\Users\fr232487\Downloads\Archives_site_202-03- 27 au 29\NEXTFileArchiveServer_238.json")
+                .with_decoded_archive_cache(cache_directory_path=DECODED_ARCHIVE_CACHE_DIRECTORY)
                 .add_sqlarch_archive_lines_filter(
                     decode_archive.DatesFilter.DateBetweenFilter(
                         date_min=parser.parse(date_min),
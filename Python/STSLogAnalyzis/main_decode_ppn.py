@@ -1,16 +1,38 @@
+from typing import Optional
+
 from logger import logger_config
 
 from stsloganalyzis.next_data import (
     next_ats_data,
 )
 from stsloganalyzis.ppn import ppn_log
+from stsloganalyzis.unisig import upper_layer_libraries
+
+UNISIG_JSON_FILE_FULL_PATH = r"D:\temp\GenTel\0.0-RC12-Original_Edition\GenTel\rom\unisig_s58.json"
+# Fichier de log PPN décodé en flux, par lots de lignes (None: seulement la trame d'exemple)
+PPN_LOG_FILE_FULL_PATH: Optional[str] = None
+
+
+def decode_ppn_log_file_by_batches(file_full_path: str, upper_layer_decoding_library: upper_layer_libraries.UpperLayerDecodingLibrary) -> None:
+    decoded_lines_count = 0
+    for batch in ppn_log.iterate_ppn_log_lines_batches(file_full_path=file_full_path, upper_layer_decoding_library=upper_layer_decoding_library, batch_size=ppn_log.PPN_LOG_LINES_BATCH_SIZE):
+        for decoded_line in batch:
+            decoded_line.decode_sdn_or_sna()
+        decoded_lines_count += len(batch)
+        logger_config.print_and_log_info(f"{file_full_path}: {decoded_lines_count} lines decoded, last one at {batch[-1].timestamp}")
 
 
 def main() -> None:
 
+    upper_layer_decoding_library = upper_layer_libraries.UpperLayerDecodingLibrary.from_next_json_file_full_path(json_file_full_path=UNISIG_JSON_FILE_FULL_PATH)
+
+    if PPN_LOG_FILE_FULL_PATH:
+        decode_ppn_log_file_by_batches(file_full_path=PPN_LOG_FILE_FULL_PATH, upper_layer_decoding_library=upper_layer_decoding_library)
+        return
+
     line = "2026-06-02 17:38:09:961 kppn 1.3.3: [99:33 <= 2:33] Received PROFIBUS message [num:169690][mode:SDA][len:28] 1e 85 01 05 49 64 6c 65 20 63 79 63 6c 65 20 74 69 6d 65 6f 75 74 bc 0b 17 6d 17 78"
 
-    decoded_frame = ppn_log.ProfibusLogLine.decode_raw_log_line(line)
+    decoded_frame = ppn_log.ProfibusLogLine.decode_raw_log_line(line, upper_layer_decoding_library)
 
     print(f"Valid frame: {decoded_frame is not None}")
     if decoded_frame:
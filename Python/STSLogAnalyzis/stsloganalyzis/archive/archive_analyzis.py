@@ -3,9 +3,9 @@ from __future__ import annotations
 import copy
 from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import IntEnum
-from typing import Any, Dict, List, Optional, Tuple, cast
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
 
 import humanize
 from common import date_time_formats, reports_utils
@@ -15,6 +15,8 @@ from logger import logger_config
 from stsloganalyzis.archive import constants, decode_archive, decode_message, decode_product_topology_dependant_messages_content, helpers
 from stsloganalyzis.topology import line_topology
 
+CHANGES_REPORT_FIELDNAMES = ["date", "id", "id_msg", "field", "old_value", "new_value", "change_value", "exact_time_delta", "approximative_time_delta", "old_timestamp"]
+
 
 class TrainLocation:
 
@@ -175,18 +177,26 @@ class FieldLastValue:
 
         return has_changed
 
+    def update_timestamp_of_same_value(self, new_timestamp: datetime) -> None:
+        """Same as update_value with the current value, without comparing values"""
+        self.previous_value = self.field_value
+        self.previous_timestamp = self.timestamp
+        self.timestamp = new_timestamp
+
 
 class FieldsLibraryForOneObject:
     def __init__(self, line_id: str) -> None:
         self.object_id = line_id
-        self.last_values: List[FieldLastValue] = []
+        self.last_value_by_field_name: Dict[str, FieldLastValue] = dict()
+        # Raw value of fields last updated from a decoded message: human readable value only depends on it
+        self.last_raw_value_by_field_name: Dict[str, constants.FIELD_TYPE] = dict()
+
+    @property
+    def last_values(self) -> List[FieldLastValue]:
+        return list(self.last_value_by_field_name.values())
 
     def get_field(self, field_name: str) -> Optional[FieldLastValue]:
-        fields_found = [field_found for field_found in self.last_values if field_found.field_name == field_name]
-        if fields_found:
-            assert len(fields_found) == 1
-            return fields_found[0]
-        return None
+        return self.last_value_by_field_name.get(field_name)
 
     def get_latest_value_for_field(self, field_name: str) -> Tuple[Optional[constants.FIELD_TYPE], Optional[datetime]]:
         field_found = self.get_field(field_name)
@@ -195,6 +205,10 @@ class FieldsLibraryForOneObject:
         return None, None
 
     def update_latest_value_for_field(self, field_name: str, field_value: constants.FIELD_TYPE, timestamp: datetime) -> Optional[FieldLastValue]:
+        self.last_raw_value_by_field_name.pop(field_name, None)
+        return self._update_latest_value_for_field(field_name=field_name, field_value=field_value, timestamp=timestamp)
+
+    def _update_latest_value_for_field(self, field_name: str, field_value: constants.FIELD_TYPE, timestamp: datetime) -> Optional[FieldLastValue]:
         field_found = self.get_field(field_name)
         if field_found:
             if field_found.update_value(field_value, timestamp):
@@ -203,9 +217,23 @@ class FieldsLibraryForOneObject:
                 return None
         else:
             new_field = FieldLastValue(object_id=self.object_id, timestamp=timestamp, field_value=field_value, field_name=field_name)
-            self.last_values.append(new_field)
+            self.last_value_by_field_name[field_name] = new_field
             return new_field
 
+    def update_latest_values_for_decoded_message(self, decoded_message: decode_message.DecodedMessage, timestamp: datetime) -> List[FieldLastValue]:
+        """Raw values are compared to the previous ones: only fields whose raw value changed are converted to human readable values"""
+        all_fields_changed: List[FieldLastValue] = []
+        for field_name, raw_value in decoded_message.decoded_fields_flat_directory.items():
+            if field_name in self.last_raw_value_by_field_name and self.last_raw_value_by_field_name[field_name] == raw_value:
+                self.last_value_by_field_name[field_name].update_timestamp_of_same_value(timestamp)
+                continue
+
+            self.last_raw_value_by_field_name[field_name] = raw_value
+            field_changed = self._update_latest_value_for_field(field_name=field_name, field_value=decoded_message.get_field_value_human_readable(field_name), timestamp=timestamp)
+            if field_changed is not None:
+                all_fields_changed.append(field_changed)
+        return all_fields_changed
+
 
 @dataclass
 class SqlArchArchiveLineWithContext:
@@ -215,7 +243,8 @@ class SqlArchArchiveLineWithContext:
     all_fields_changed: List[FieldLastValue]
 
     def __post_init__(self) -> None:
-        self.all_fields_changed = copy.deepcopy(self.all_fields_changed)
+        # Values are immutable: a shallow copy keeps them as they are at this line
+        self.all_fields_changed = [copy.copy(field_changed) for field_changed in self.all_fields_changed]
 
     @property
     def decoded_message(self) -> Optional[decode_message.DecodedMessage]:
@@ -234,8 +263,7 @@ class SqlArchArchiveLineWithContext:
             if not helpers.is_field_name_to_be_ignored(field_name=changed_field.field_name):
 
                 previous_date = changed_field.previous_different_value_timestamp
-                exact_time_delta = date_time_formats.format_duration_timedelta_to_string(self.sql_arch_line.date - previous_date) if previous_date else "NA"
-                approximative_time_delta = humanize.precisedelta(self.sql_arch_line.date - previous_date, minimum_unit="milliseconds") if previous_date else "NA"
+                exact_time_delta, approximative_time_delta = self.archive_analyzis.get_exact_and_approximative_time_deltas(self.sql_arch_line.date - previous_date) if previous_date else ("NA", "NA")
                 old_timestamp = str(previous_date)
                 to_ret.append(
                     OrderedDict(
@@ -272,9 +300,21 @@ class ArchiveAnalyzis:
         self.all_sql_arch_lines_with_context: List[SqlArchArchiveLineWithContext] = []
         self.current_latest_line_by_id: Dict[str, SqlArchArchiveLineWithContext] = dict()
         self.latest_fields_values_by_object_id: Dict[str, FieldsLibraryForOneObject] = dict()
+        # Lines of periodic messages often have the same time delta
+        self.exact_and_approximative_time_deltas_by_time_delta: Dict[timedelta, Tuple[str, str]] = dict()
 
         self.handle_lines()
 
+    def get_exact_and_approximative_time_deltas(self, time_delta: timedelta) -> Tuple[str, str]:
+        exact_and_approximative_time_deltas = self.exact_and_approximative_time_deltas_by_time_delta.get(time_delta)
+        if exact_and_approximative_time_deltas is None:
+            exact_and_approximative_time_deltas = (
+                date_time_formats.format_duration_timedelta_to_string(time_delta),
+                humanize.precisedelta(time_delta, minimum_unit="milliseconds"),
+            )
+            self.exact_and_approximative_time_deltas_by_time_delta[time_delta] = exact_and_approximative_time_deltas
+        return exact_and_approximative_time_deltas
+
     def get_or_create_zone_controller(self, zone_controller_id: str) -> ZoneController:
         zone_controllers_found = [zone_controller for zone_controller in self.zone_controllers if zone_controller.identifier == zone_controller_id]
 
@@ -303,15 +343,17 @@ class ArchiveAnalyzis:
     def update_field_for_line(self, sql_arch_line: decode_archive.SqlArchArchiveLine, field_name: str, field_value: constants.HUMAN_READABLE_FIELD_TYPE) -> List[FieldLastValue]:
         return self.update_fields_for_line(sql_arch_line=sql_arch_line, fields_names_and_values=[(field_name, field_value)])
 
+    def get_or_create_latest_fields_values(self, object_id: str) -> FieldsLibraryForOneObject:
+        if object_id not in self.latest_fields_values_by_object_id:
+            self.latest_fields_values_by_object_id[object_id] = FieldsLibraryForOneObject(object_id)
+        return self.latest_fields_values_by_object_id[object_id]
+
     def update_fields_for_line(self, sql_arch_line: decode_archive.SqlArchArchiveLine, fields_names_and_values: List[Tuple[str, constants.HUMAN_READABLE_FIELD_TYPE]]) -> List[FieldLastValue]:
-        object_id = sql_arch_line.id_field
         timestamp = sql_arch_line.date
 
         all_fields_changed: List[FieldLastValue] = []
 
-        if object_id not in self.latest_fields_values_by_object_id:
-            self.latest_fields_values_by_object_id[object_id] = FieldsLibraryForOneObject(object_id)
-        latest_fields_values = self.latest_fields_values_by_object_id[object_id]
+        latest_fields_values = self.get_or_create_latest_fields_values(sql_arch_line.id_field)
 
         for field_name, field_value in fields_names_and_values:
             field_has_changed = latest_fields_values.update_latest_value_for_field(field_name=field_name, field_value=field_value, timestamp=timestamp)
@@ -323,11 +365,8 @@ class ArchiveAnalyzis:
     def update_latest_raw_fields_for_line(self, sql_arch_line: decode_archive.SqlArchArchiveLine) -> List[FieldLastValue]:
         """returns all fields changed"""
         if sql_arch_line.decoded_message:
-            fields_changed: List[FieldLastValue] = []
-            for field_name in sql_arch_line.decoded_message.decoded_fields_flat_directory.keys():
-                field_value = sql_arch_line.decoded_message.get_field_value_human_readable(field_name)
-                fields_changed += self.update_field_for_line(sql_arch_line=sql_arch_line, field_name=field_name, field_value=field_value)
-            return fields_changed
+            latest_fields_values = self.get_or_create_latest_fields_values(sql_arch_line.id_field)
+            return latest_fields_values.update_latest_values_for_decoded_message(decoded_message=sql_arch_line.decoded_message, timestamp=sql_arch_line.date)
             # for field_name, field_value in sql_arch_line.decoded_message.decoded_fields_flat_directory.items():
             # fields_names_and_values = [pair for pair in ]
             # return self.update_fields_for_line(sql_arch_line=sql_arch_line, fields_names_and_values=fields_names_and_values)
@@ -432,18 +471,22 @@ class ArchiveAnalyzis:
         if output_directory_path is None:
             output_directory_path = self.output_directory_path
 
-        rows_as_list_dict: List[Dict[str, Any]] = []
+        rows_count = 0
 
-        for line_with_context in self.all_sql_arch_lines_with_context:
-            # all_changes_since_previous = line_with_context.sql_arch_line.get_all_changes_since_previous(
-            #    previous_line_for_this_id=line_with_context.previous_line_for_this_id.sql_arch_line if line_with_context.previous_line_for_this_id else None
-            # )
-            all_changes_since_previous = line_with_context.get_all_changes_since_previous()
-            if all_changes_since_previous and line_with_context.sql_arch_line.date.replace(tzinfo=None) > begin_time_to_put_in_reports.replace(tzinfo=None):
-                rows_as_list_dict += all_changes_since_previous
+        def iterate_rows() -> Iterator[Dict[str, Any]]:
+            """Rows are created while report files are written"""
+            nonlocal rows_count
+            for line_with_context in self.all_sql_arch_lines_with_context:
+                if line_with_context.all_fields_changed and line_with_context.sql_arch_line.date.replace(tzinfo=None) > begin_time_to_put_in_reports.replace(tzinfo=None):
+                    all_changes_since_previous = line_with_context.get_all_changes_since_previous()
+                    rows_count += len(all_changes_since_previous)
+                    yield from all_changes_since_previous
 
-        # logger_config.print_and_log_info(f"{len(rows_as_list_dict)} lines changed detected, report created")
         reports_utils.save_rows_to_output_files(
-            rows_as_list_dict=rows_as_list_dict, file_base_name=file_base_name, output_directory_path=output_directory_path, suffix_file_name_by_date=reports_utils.SuffixFileNameByDate.DO_BOTH
+            rows_as_list_dict=iterate_rows(),
+            file_base_name=file_base_name,
+            output_directory_path=output_directory_path,
+            suffix_file_name_by_date=reports_utils.SuffixFileNameByDate.DO_BOTH,
+            fieldnames=CHANGES_REPORT_FIELDNAMES,
         )
-        return len(rows_as_list_dict)
+        return rows_count
@@ -1,16 +1,21 @@
-from typing import List, Dict, TYPE_CHECKING, cast
+import csv
+import functools
+import itertools
+import operator
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Tuple, cast
 
 if TYPE_CHECKING:
     from stsloganalyzis.archive.decode_message import DecodedMessage
 
 
 from stsloganalyzis.archive import decode_specific_message_content
-import csv
 
 from logger import logger_config
 
 ATS_CC_ACTION_SET_MESSAGE_ID = 192
+# Messages of an archive repeat few distinct bitfields
+ACTION_SETS_BITFIELDS_CACHE_MAX_SIZE = 4096
 
 
 class DecodedActionSet(decode_specific_message_content.SpecificMessageContentDecoded):
@@ -19,49 +24,77 @@ class DecodedActionSet(decode_specific_message_content.SpecificMessageContentDec
         self.undecoded_bits_by_error: List[int] = []
         self.action_set_id_with_value_true: List[str] = []
 
+    def copy(self) -> "DecodedActionSet":
+        decoded_action_set = DecodedActionSet()
+        decoded_action_set.fields_with_value.update(self.fields_with_value)
+        decoded_action_set.undecoded_bits_by_error.extend(self.undecoded_bits_by_error)
+        decoded_action_set.action_set_id_with_value_true.extend(self.action_set_id_with_value_true)
+        return decoded_action_set
+
 
 @dataclass
 class ActionSetContentDecoder:
     csv_file_file_path: str
 
-    def decode(self, decoded_message: "DecodedMessage") -> DecodedActionSet:
-        actions_field = cast(str, decoded_message.decoded_fields_flat_directory["Actions"])
-        action_set_decoded = self._decode_actions_bitfield(bitfield=actions_field)
-        return action_set_decoded
-
-    def _decode_actions_bitfield(self, bitfield: str) -> DecodedActionSet:
+    def __post_init__(self) -> None:
+        self.action_set_ids: List[str] = []
+        self.bit_indexes: List[int] = []
+        self._load_action_set_definition()
 
-        decoded_action_set = DecodedActionSet()
-        decoded_bits = set()
+        # Bitfield characters of all action sets (CSV order) are picked in one C call
+        self._action_sets_bits_getter = operator.itemgetter(*self.bit_indexes) if len(self.bit_indexes) > 1 else None
+        # Bit i of the mask is set when bitfield character i is defined in the CSV
+        self._defined_bits_mask = sum(1 << bit_index for bit_index in set(self.bit_indexes))
+        self._minimum_bitfield_length = max(self.bit_indexes) + 1 if self.bit_indexes else 0
+        self._decode_actions_bitfield_once = functools.lru_cache(maxsize=ACTION_SETS_BITFIELDS_CACHE_MAX_SIZE)(self._decode_actions_bitfield)
 
-        # Read the CSV file
+    def _load_action_set_definition(self) -> None:
         with open(self.csv_file_file_path, mode="r", encoding="utf-8") as file:
             csv_reader = csv.DictReader(file, delimiter=";")
+            field_names = csv_reader.fieldnames or []
+            bit_index_column = "NUM_ACTION_SET_ATS" if "NUM_ACTION_SET_ATS" in field_names else "NUM_ATS"
+            action_set_id_column = "ACTION_SET_ID" if "ACTION_SET_ID" in field_names else "ID"
 
-            # Iterate through each row in the CSV
             for csv_row in csv_reader:
+                self.bit_indexes.append(int(csv_row[bit_index_column]))
+                self.action_set_ids.append(csv_row[action_set_id_column])
+
+    def _get_action_sets_bits(self, bitfield: str) -> Tuple[str, ...]:
+        if self._action_sets_bits_getter:
+            return cast(Tuple[str, ...], self._action_sets_bits_getter(bitfield))
+        return tuple(bitfield[bit_index] for bit_index in self.bit_indexes)
+
+    def decode(self, decoded_message: "DecodedMessage") -> DecodedActionSet:
+        actions_field = cast(str, decoded_message.decoded_fields_flat_directory["Actions"])
+        action_set_decoded = self.decode_actions_bitfield(bitfield=actions_field)
+        return action_set_decoded
 
-                num_ats_str = csv_row["NUM_ACTION_SET_ATS"] if "NUM_ACTION_SET_ATS" in csv_row else csv_row["NUM_ATS"]
-                num_ats = int(num_ats_str)
-                # num_ats = int(row["NUM_ATS"])
-                decoded_bits.add(num_ats)  # Track decoded bits
-                bit_value_str = bitfield[num_ats]
-                bit_value_bool = bool(int(bit_value_str))
+    def decode_actions_bitfield(self, bitfield: str) -> DecodedActionSet:
+        """A bitfield already seen is not decoded again, but each call returns its own copy of the result (callers may modify it)"""
+        decoded_action_set = self._decode_actions_bitfield_once(bitfield).copy()
+        for index in decoded_action_set.undecoded_bits_by_error:
+            logger_config.print_and_log_error(f"Warning: Bit at position {index} is '1' but has no corresponding entry in the CSV.")
+        return decoded_action_set
 
-                action_set_id_str = csv_row["ACTION_SET_ID"] if "ACTION_SET_ID" in csv_row else csv_row["ID"]
+    def _decode_actions_bitfield(self, bitfield: str) -> DecodedActionSet:
+        if len(bitfield) < self._minimum_bitfield_length:
+            raise IndexError(f"Bitfield of {len(bitfield)} bits is too short for action set bit {self._minimum_bitfield_length - 1} defined in {self.csv_file_file_path}")
+
+        decoded_action_set = DecodedActionSet()
 
-                # results.append({"ID": row["ID"], "Value": bit_value})
-                decoded_action_set.fields_with_value[action_set_id_str] = bit_value_bool
+        # Reversed so that bit i of the integer is bitfield character i (also rejects characters other than 0 and 1)
+        bitfield_value = int(bitfield[::-1], 2) if bitfield else 0
 
-                if bit_value_str == "1":
-                    # results.append(row["ID"])
-                    action_set_id_str = csv_row["ACTION_SET_ID"] if "ACTION_SET_ID" in csv_row else csv_row["ID"]
-                    decoded_action_set.action_set_id_with_value_true.append(action_set_id_str)
+        action_sets_bits_are_true = list(map("1".__eq__, self._get_action_sets_bits(bitfield)))
+        decoded_action_set.fields_with_value.update(zip(self.action_set_ids, action_sets_bits_are_true))
+        decoded_action_set.action_set_id_with_value_true.extend(itertools.compress(self.action_set_ids, action_sets_bits_are_true))
 
         # Check for any "1" in the bitfield that doesn't have a corresponding entry
-        for index, bit in enumerate(bitfield):
-            if bit == "1" and index not in decoded_bits:
-                decoded_action_set.undecoded_bits_by_error.append(index)
-                logger_config.print_and_log_error(f"Warning: Bit at position {index} is '1' but has no corresponding entry in the CSV.")
+        undecoded_bits_value = bitfield_value & ~self._defined_bits_mask
+        while undecoded_bits_value:
+            lowest_bit = undecoded_bits_value & -undecoded_bits_value
+            index = lowest_bit.bit_length() - 1
+            decoded_action_set.undecoded_bits_by_error.append(index)
+            undecoded_bits_value ^= lowest_bit
 
         return decoded_action_set
@@ -1,8 +1,11 @@
 import json
+import re
 from abc import ABC, abstractmethod
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional, Self, Set, cast
+from typing import Any, Callable, Dict, Iterator, List, Optional, Self, Set, Tuple, cast
 
 from datetime import datetime
 import humanize
@@ -13,9 +16,9 @@ from logger import logger_config
 from stsloganalyzis.archive import (
     helpers,
 )
-from stsloganalyzis.archive import constants, decode_action_set_content, decode_message, decode_xml_message
+from stsloganalyzis.archive import constants, decode_action_set_content, decode_message, decode_xml_message, decoded_archive_cache
 from stsloganalyzis.common import common_filters
-from stsloganalyzis.topology import line_topology
+from stsloganalyzis.topology import line_topology, topology_snapshot
 
 
 class ArchiveLineTag(Enum):
@@ -25,6 +28,33 @@ class ArchiveLineTag(Enum):
     ALARM = "ALARM"
 
 
+def parse_archive_date(raw_date: str) -> datetime:
+    """Archive dates are always ISO formatted (2025-07-21T10:54:18.440+02:00): much faster than dateutil parser"""
+    try:
+        return datetime.fromisoformat(raw_date)
+    except ValueError:
+        return parser.parse(raw_date)
+
+
+class RawLineStringField:
+    """Finds a string field directly in the raw JSON line, without decoding the whole line.
+    Nothing is found (JSON decoding needed) for escaped values, and when the key appears more than once in the line (nested objects): the regex cannot tell which one is at the expected level"""
+
+    def __init__(self, field_name: str) -> None:
+        self.field_name = field_name
+        self._key = '"' + field_name + '":'
+        self._pattern = re.compile(r'[{,]"' + re.escape(field_name) + r'":"([^"\\]*)"')
+
+    def find_value(self, raw_line: str) -> Optional[str]:
+        if raw_line.count(self._key) != 1:
+            return None
+        raw_line_field_match = self._pattern.search(raw_line)
+        return raw_line_field_match.group(1) if raw_line_field_match else None
+
+
+ARCHIVE_LINE_DATE_FIELD = RawLineStringField("date")
+
+
 class SqlArchLineSignalType:
 
     def __init__(self, identifier: str, label: Optional[str] = None) -> None:
@@ -118,12 +148,21 @@ class SqlArchLineStringFieldValueBasedFilter(SqlArchFilter):
         super().__init__()
         self.field_name = field_name
         self.string_filter = common_filters.StringFieldValueBasedFilter(white_or_black_list=white_or_black_list, filter_type=filter_type, field_values=field_values)
+        self._raw_line_field = RawLineStringField(field_name)
+
+    def get_field_raw_value(self, raw_sql_arch_line: str) -> str:
+        field_raw_value = self._raw_line_field.find_value(raw_sql_arch_line)
+        if field_raw_value is not None:
+            return field_raw_value
+
+        # Not a plain string (number, escaped characters, missing or duplicated field...): decode JSON
+        sqlarch_section = self.get_sqlarch_section(raw_sql_arch_line)
+        return str(sqlarch_section.get(self.field_name, ""))
 
     def do_passes(self, raw_sql_arch_line: str, parent: "ArchiveSource") -> bool:
 
         try:
-            sqlarch_section = self.get_sqlarch_section(raw_sql_arch_line)
-            field_raw_value = str(sqlarch_section.get(self.field_name, ""))
+            field_raw_value = self.get_field_raw_value(raw_sql_arch_line)
 
             ret = self.string_filter.do_passes(field_raw_value)
 
@@ -154,9 +193,11 @@ class DatesFilter(SqlArchFilter):
     class DateFilter(SqlArchFilter):
 
         def get_line_date(self, raw_sql_arch_line: str) -> datetime:
-            line_json = json.loads(raw_sql_arch_line)
-            raw_date = line_json.get("date")
-            parsed_date = parser.parse(raw_date)
+            raw_date = ARCHIVE_LINE_DATE_FIELD.find_value(raw_sql_arch_line)
+            if raw_date is None:
+                line_json = json.loads(raw_sql_arch_line)
+                raw_date = line_json.get("date")
+            parsed_date = parse_archive_date(raw_date)
             offset_naive_date = parsed_date.replace(tzinfo=None)
             return offset_naive_date
 
@@ -185,13 +226,102 @@ class ArchiveDecoder:
         self,
         message_manager: decode_message.InvariantMessagesManager,
         xml_message_decoder: decode_xml_message.XmlMessageDecoder,
-        action_set_content_decoder: decode_action_set_content.ActionSetContentDecoder,
-        railway_line: line_topology.Line,
+        action_set_content_decoder: Optional[decode_action_set_content.ActionSetContentDecoder],
+        railway_line: Optional[line_topology.Line],
     ) -> None:
         self.message_manager = message_manager
         self.action_set_content_decoder = action_set_content_decoder
         self.xml_message_decoder = (xml_message_decoder,)
         self.message_decoder = decode_message.MessageDecoder(xml_message_decoder=xml_message_decoder, action_set_content_decoder=self.action_set_content_decoder, railway_line=railway_line)
+        self.railway_line = railway_line
+        self._fingerprint: Optional[str] = None
+
+    def get_fingerprint(self) -> str:
+        """Identifies decoder version, XML schemes and CSV content (used as decoded archive cache key)"""
+        if self._fingerprint is None:
+            self._fingerprint = decoded_archive_cache.compute_decoder_fingerprint(
+                xml_directory_path=self.message_decoder.xml_message_decoder.xml_directory_path,
+                messages_list_csv_file_full_path=self.message_manager.messages_list_csv_file_full_path,
+                action_set_csv_file_full_path=self.action_set_content_decoder.csv_file_file_path if self.action_set_content_decoder else None,
+                topology_fingerprint=topology_snapshot.compute_line_topology_fingerprint(self.railway_line) if self.railway_line else None,
+            )
+        return self._fingerprint
+
+
+ARCHIVE_DECODER_FACTORY_TYPE = Callable[[], ArchiveDecoder]
+
+
+@dataclass
+class ArchiveSourceKeptLine:
+    """Line kept by a worker process, with its JSON content and date already parsed: the parent process only merges it"""
+
+    archive_line_tag: ArchiveLineTag
+    full_raw_archive_line: Optional[str]
+    full_archive_line_as_json: Dict
+    date: datetime
+    invariant_message: Optional[decode_message.InvariantMessage] = None
+    decoded_message: Optional[decode_message.DecodedMessage] = None
+
+
+@dataclass
+class ArchiveSourceDecodingResult:
+    """Compact result of an archive source filtered and decoded in a worker process: kept lines (in source order) with their decoding result, and filters statistics"""
+
+    kept_lines: List[ArchiveSourceKeptLine] = field(default_factory=list)
+    total_sqlarch_lines_processed: int = 0
+    rejected_count_by_filter_index: List[int] = field(default_factory=list)
+    rejected_count_by_item_by_filter_index: List[Dict[str, int]] = field(default_factory=list)
+    ignored_lines_count_by_tag: Dict[ArchiveLineTag, int] = field(default_factory=dict)
+
+
+_worker_archive_decoder: Optional[ArchiveDecoder] = None
+
+
+def _initialize_archive_decoding_worker(archive_decoder_factory: ARCHIVE_DECODER_FACTORY_TYPE) -> None:
+    """Decoder (XML schemes, invariant messages, topology) is built once per worker process"""
+    global _worker_archive_decoder
+    _worker_archive_decoder = archive_decoder_factory()
+
+
+def _filter_and_decode_archive_source_in_worker(
+    archive_input: "ArchiveSource",
+    sqlarch_archive_lines_filters: List["SqlArchFilter"],
+    ignored_archive_line_tags: Set[ArchiveLineTag],
+    decoded_archive_cache_directory_path: Optional[str],
+    keep_raw_lines: bool,
+) -> ArchiveSourceDecodingResult:
+    assert _worker_archive_decoder is not None
+
+    worker_library = ArchiveLibrary()
+    worker_library.label = "Worker"
+    worker_library.sqlarch_archive_lines_filters = sqlarch_archive_lines_filters
+    worker_library.ignored_archive_line_tags = ignored_archive_line_tags
+    worker_library.decoded_archive_cache_directory_path = decoded_archive_cache_directory_path
+    worker_library.handle_input(archive_input)
+    worker_library.decode_all_lines(archive_input, archive_decoder=_worker_archive_decoder)
+
+    result = ArchiveSourceDecodingResult(
+        total_sqlarch_lines_processed=worker_library.total_sqlarch_lines_processed,
+        rejected_count_by_filter_index=[f.rejected_count for f in sqlarch_archive_lines_filters],
+        rejected_count_by_item_by_filter_index=[f.rejected_count_by_item for f in sqlarch_archive_lines_filters],
+        ignored_lines_count_by_tag=worker_library.ignored_lines_count_by_tag,
+    )
+    for archive_line in worker_library.all_archive_lines:
+        assert archive_line.full_archive_line_as_json is not None
+        kept_line = ArchiveSourceKeptLine(
+            archive_line_tag=ArchiveLineTag[archive_line.tag],
+            full_raw_archive_line=archive_line.full_raw_archive_line if keep_raw_lines else None,
+            full_archive_line_as_json=archive_line.full_archive_line_as_json,
+            date=archive_line.date,
+        )
+        if isinstance(archive_line, SqlArchArchiveLine):
+            if archive_line.decoded_message:
+                archive_line.decoded_message.release_xml_decoded_message()
+            kept_line.invariant_message = archive_line.invariant_message
+            kept_line.decoded_message = archive_line.decoded_message
+        result.kept_lines.append(kept_line)
+
+    return result
 
 
 class ArchiveLibrary:
@@ -202,6 +332,8 @@ class ArchiveLibrary:
             self.archive_inputs: List[ArchiveSource] = []
             self.archive_decoder: Optional[ArchiveDecoder] = None
             self.sqlarch_archive_lines_filters: List[SqlArchFilter] = []
+            self.archive_decoder_factory: Optional[ARCHIVE_DECODER_FACTORY_TYPE] = None
+            self.max_workers: Optional[int] = None
 
             self._label_is_forced = False
 
@@ -233,17 +365,40 @@ class ArchiveLibrary:
             self.sqlarch_archive_lines_filters.append(sql_arch_filter)
             return self
 
+        def with_streaming(self, ignored_archive_line_tags: Optional[List[ArchiveLineTag]] = None) -> Self:
+            """Archive files are read line by line, raw text and JSON content of kept lines are released once parsed, and lines with ignored tags are not retained"""
+            self._library.streaming_mode = True
+            self._library.ignored_archive_line_tags = set(ignored_archive_line_tags) if ignored_archive_line_tags else set()
+            return self
+
+        def with_decoded_archive_cache(self, cache_directory_path: str) -> Self:
+            """Decoding results of archive files are stored in (and read from) this directory, see decoded_archive_cache"""
+            self._library.decoded_archive_cache_directory_path = cache_directory_path
+            return self
+
         def add_archive_decoder(self, archive_decoder: ArchiveDecoder) -> Self:
             assert self.archive_decoder is None
             self.archive_decoder = archive_decoder
             return self
 
+        def with_parallel_build(self, archive_decoder_factory: ARCHIVE_DECODER_FACTORY_TYPE, max_workers: Optional[int] = None) -> Self:
+            """Each archive source is filtered and decoded in a process pool. Factory must be a top-level function (it is sent to workers, which build their own decoder)"""
+            self.archive_decoder_factory = archive_decoder_factory
+            self.max_workers = max_workers
+            return self
+
         def build(self) -> "ArchiveLibrary":
             self._library.sqlarch_archive_lines_filters = self.sqlarch_archive_lines_filters
 
+            if self.archive_decoder_factory:
+                self._library.handle_inputs_in_parallel(self.archive_inputs, archive_decoder_factory=self.archive_decoder_factory, max_workers=self.max_workers)
+                self._library.print_filter_stats_and_info()
+                return self._library
+
             for archive_input in self.archive_inputs:
                 self._library.handle_input(archive_input)
-                self._library.decode_all_lines(archive_input, archive_decoder=self.archive_decoder)
+                if self.archive_decoder:
+                    self._library.decode_all_lines(archive_input, archive_decoder=self.archive_decoder)
 
             # if self.archive_decoder:
             #    self._library.decode_all_lines(archive_decoder=self.archive_decoder)
@@ -265,68 +420,167 @@ class ArchiveLibrary:
         self.sqlarch_archive_lines_filters: List[SqlArchFilter] = []
         self.total_sqlarch_lines_processed: int = 0
 
+        self.streaming_mode = False
+        self.ignored_archive_line_tags: Set[ArchiveLineTag] = set()
+        self.ignored_lines_count_by_tag: Dict[ArchiveLineTag, int] = dict()
+
+        self.decoded_archive_cache_directory_path: Optional[str] = None
+
     def handle_input(self, archive_input: "ArchiveSource") -> int:
         self.archive_inputs.append(archive_input)
 
         line_number = 0
-        for line_number, line in enumerate(archive_input.get_all_archive_file_lines()):
+        for line_number, line in enumerate(archive_input.iterate_archive_lines()):
             self._process_archive_raw_line(line_number=line_number, line=line, parent=archive_input)
 
         return line_number
 
+    @logger_config.stopwatch_decorator(inform_beginning=True, monitor_ram_usage=True)
+    def handle_inputs_in_parallel(self, archive_inputs: List["ArchiveSource"], archive_decoder_factory: ARCHIVE_DECODER_FACTORY_TYPE, max_workers: Optional[int] = None) -> None:
+        """Results are merged in inputs order (files are sorted older to newer), so the library is identical to a sequential build"""
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_archive_decoding_worker, initargs=(archive_decoder_factory,)) as executor:
+            results = executor.map(
+                _filter_and_decode_archive_source_in_worker,
+                archive_inputs,
+                [self.sqlarch_archive_lines_filters] * len(archive_inputs),
+                [self.ignored_archive_line_tags] * len(archive_inputs),
+                [self.decoded_archive_cache_directory_path] * len(archive_inputs),
+                [not self.streaming_mode] * len(archive_inputs),
+            )
+            for archive_input, result in zip(archive_inputs, results):
+                self._merge_archive_source_decoding_result(archive_input, result)
+
+    def _merge_archive_source_decoding_result(self, archive_input: "ArchiveSource", result: ArchiveSourceDecodingResult) -> None:
+        self.archive_inputs.append(archive_input)
+
+        self.total_sqlarch_lines_processed += result.total_sqlarch_lines_processed
+        for sqlarch_filter, rejected_count, rejected_count_by_item in zip(self.sqlarch_archive_lines_filters, result.rejected_count_by_filter_index, result.rejected_count_by_item_by_filter_index):
+            sqlarch_filter.rejected_count += rejected_count
+            for item, count in rejected_count_by_item.items():
+                sqlarch_filter.rejected_count_by_item[item] = sqlarch_filter.rejected_count_by_item.get(item, 0) + count
+        for archive_line_tag, ignored_lines_count in result.ignored_lines_count_by_tag.items():
+            self.ignored_lines_count_by_tag[archive_line_tag] = self.ignored_lines_count_by_tag.get(archive_line_tag, 0) + ignored_lines_count
+
+        # Lines were already filtered and parsed by the worker
+        for kept_line in result.kept_lines:
+            archive_line = self._add_archive_line(
+                archive_line_tag=kept_line.archive_line_tag,
+                full_raw_archive_line=kept_line.full_raw_archive_line,
+                parent=archive_input,
+                full_archive_line_as_json=kept_line.full_archive_line_as_json,
+                date=kept_line.date,
+            )
+            if isinstance(archive_line, SqlArchArchiveLine):
+                archive_line.set_decoding_result(invariant_message=kept_line.invariant_message, decoded_message=kept_line.decoded_message)
+
     @logger_config.stopwatch_decorator(inform_beginning=True, monitor_ram_usage=True)
     def decode_all_lines(self, archive_input: "ArchiveSource", archive_decoder: ArchiveDecoder) -> int:
         number_of_lines_decoded = 0
         with logger_config.stopwatch_with_label(f"{self.label}: Decode all {len(archive_input.all_sqlarch_lines)} lines", monitor_ram_usage=True, inform_beginning=True):
 
-            for sqlarch_line in archive_input.all_sqlarch_lines:
-                sqlarch_line.decode_message(archive_decoder)
+            if self.decoded_archive_cache_directory_path and isinstance(archive_input, ArchiveFile):
+                self._decode_all_lines_with_cache(archive_input, archive_decoder=archive_decoder, cache_directory_path=self.decoded_archive_cache_directory_path)
+            else:
+                for sqlarch_line in archive_input.all_sqlarch_lines:
+                    sqlarch_line.decode_message(archive_decoder)
 
         return number_of_lines_decoded
 
+    def _decode_all_lines_with_cache(self, archive_input: "ArchiveFile", archive_decoder: ArchiveDecoder, cache_directory_path: str) -> None:
+        cache = decoded_archive_cache.DecodedArchiveFileCache(
+            cache_directory_path=cache_directory_path, archive_file_full_path=archive_input.file_full_path, decoder_fingerprint=archive_decoder.get_fingerprint()
+        )
+        for sqlarch_line in archive_input.all_sqlarch_lines:
+            decoding_result = cache.get_decoding_result(message_id=sqlarch_line.get_id(), new_state=sqlarch_line.get_new_state_str())
+            if decoding_result:
+                invariant_message, decoded_message = decoding_result
+                sqlarch_line.set_decoding_result(invariant_message=invariant_message, decoded_message=decoded_message)
+            else:
+                sqlarch_line.decode_message(archive_decoder)
+                cache.add_decoding_result(
+                    message_id=sqlarch_line.get_id(), new_state=sqlarch_line.get_new_state_str(), invariant_message=sqlarch_line.invariant_message, decoded_message=sqlarch_line.decoded_message
+                )
+        cache.save()
+
     def _passes_sqlarch_archive_line_filters(self, raw_sql_arch_line: str, parent: "ArchiveSource") -> bool:
         self.total_sqlarch_lines_processed += 1
 
         # Check ID filters
         for f in self.sqlarch_archive_lines_filters:
-            if not f.do_passes(raw_sql_arch_line, parent):
+            if not f.passes(raw_sql_arch_line, parent):
                 return False
 
         return True
 
-    def _process_archive_raw_line(self, line_number: int, line: str, parent: "ArchiveSource") -> None:
+    def _is_ignored_archive_line_tag(self, archive_line_tag: ArchiveLineTag) -> bool:
+        if archive_line_tag in self.ignored_archive_line_tags:
+            self.ignored_lines_count_by_tag[archive_line_tag] = self.ignored_lines_count_by_tag.get(archive_line_tag, 0) + 1
+            return True
+        return False
 
-        archive_line: ArchiveLine
+    def _process_archive_raw_line(self, line_number: int, line: str, parent: "ArchiveSource") -> Optional["ArchiveLine"]:
+
+        if self.ignored_archive_line_tags:
+            if line.startswith(ARCHIVE_VERSION_LINE_PREFIX) and self._is_ignored_archive_line_tag(ArchiveLineTag.VERSIONS):
+                return None
+            if line.startswith(ARCHIVE_SPMQ_LINE_PREFIX) and self._is_ignored_archive_line_tag(ArchiveLineTag.SPMQ):
+                return None
+            if line.startswith(ARCHIVE_ALARM_LINE_PREFIX) and self._is_ignored_archive_line_tag(ArchiveLineTag.ALARM):
+                return None
 
         if line.startswith(ARCHIVE_VERSION_LINE_PREFIX):
-            archive_line = VersionArchiveLine(full_raw_archive_line=line, parent=parent)
-            self.all_version_lines.append(archive_line)
+            archive_line_tag = ArchiveLineTag.VERSIONS
         elif line.startswith(ARCHIVE_SQLARCH_LINE_PREFIX):
-
             if not self._passes_sqlarch_archive_line_filters(raw_sql_arch_line=line, parent=parent):
-                return
+                return None
+            archive_line_tag = ArchiveLineTag.SQLARCH
+        elif line.startswith(ARCHIVE_SPMQ_LINE_PREFIX):
+            archive_line_tag = ArchiveLineTag.SPMQ
+        elif line.startswith(ARCHIVE_ALARM_LINE_PREFIX):
+            archive_line_tag = ArchiveLineTag.ALARM
+        else:
+            logger_config.print_and_log_error(f"{self.label}: Unsupported line {line_number}:" + line)
+            return None
+
+        return self._add_archive_line(archive_line_tag=archive_line_tag, full_raw_archive_line=line, parent=parent)
+
+    def _add_archive_line(
+        self,
+        archive_line_tag: ArchiveLineTag,
+        full_raw_archive_line: Optional[str],
+        parent: "ArchiveSource",
+        full_archive_line_as_json: Optional[Dict] = None,
+        date: Optional[datetime] = None,
+    ) -> "ArchiveLine":
+        archive_line: ArchiveLine
 
-            archive_line = SqlArchArchiveLine(full_raw_archive_line=line, parent=parent)
+        if archive_line_tag == ArchiveLineTag.VERSIONS:
+            archive_line = VersionArchiveLine(full_raw_archive_line=full_raw_archive_line, parent=parent, full_archive_line_as_json=full_archive_line_as_json, date=date)
+            self.all_version_lines.append(archive_line)
+        elif archive_line_tag == ArchiveLineTag.SQLARCH:
+            archive_line = SqlArchArchiveLine(full_raw_archive_line=full_raw_archive_line, parent=parent, full_archive_line_as_json=full_archive_line_as_json, date=date)
             self._last_sqlarch_line_by_id[archive_line.id_field] = archive_line
 
             parent.all_sqlarch_lines.append(archive_line)
             self.all_sqlarch_lines.append(archive_line)
-        elif line.startswith(ARCHIVE_SPMQ_LINE_PREFIX):
-            archive_line = ArchiveLine(full_raw_archive_line=line, parent=parent)
+        elif archive_line_tag == ArchiveLineTag.SPMQ:
+            archive_line = ArchiveLine(full_raw_archive_line=full_raw_archive_line, parent=parent, full_archive_line_as_json=full_archive_line_as_json, date=date)
             self.all_spmq_lines.append(archive_line)
-        elif line.startswith(ARCHIVE_ALARM_LINE_PREFIX):
-            archive_line = ArchiveLine(full_raw_archive_line=line, parent=parent)
-            self.all_alarm_lines.append(archive_line)
         else:
-            logger_config.print_and_log_error(f"{self.label}: Unsupported line {line_number}:" + line)
+            archive_line = ArchiveLine(full_raw_archive_line=full_raw_archive_line, parent=parent, full_archive_line_as_json=full_archive_line_as_json, date=date)
+            self.all_alarm_lines.append(archive_line)
+
+        if self.streaming_mode:
+            archive_line.release_raw_content()
 
         self.all_archive_lines.append(archive_line)
-        archive_line_type = archive_line.tag
+        archive_line_type = ArchiveLineTag[archive_line.tag]
 
         if archive_line_type not in self.all_archive_lines_by_type:
-            self.all_archive_lines_by_type[ArchiveLineTag[archive_line_type]] = []
+            self.all_archive_lines_by_type[archive_line_type] = []
 
-        self.all_archive_lines_by_type[ArchiveLineTag[archive_line_type]].append(archive_line)
+        self.all_archive_lines_by_type[archive_line_type].append(archive_line)
+        return archive_line
 
     def get_all_signal_types(self) -> Set[str]:
         return {line.signal_type_raw for line in self.all_sqlarch_lines}
@@ -335,6 +589,8 @@ class ArchiveLibrary:
         logger_config.print_and_log_info(f"{self.label}: === ArchiveLibrary Filter Statistics and Info ===")
         logger_config.print_and_log_info(f"{self.label}: Total SQLARCH lines processed: {self.total_sqlarch_lines_processed}")
         logger_config.print_and_log_info(f"{self.label}: Lines kept after filtering: {len(self.all_sqlarch_lines)}")
+        for ignored_archive_line_tag, ignored_lines_count in self.ignored_lines_count_by_tag.items():
+            logger_config.print_and_log_info(f"{self.label}: {ignored_archive_line_tag.value} lines not retained: {ignored_lines_count}")
 
         logger_config.print_and_log_info(f"{self.label}: ID Filters:")
         for f in self.sqlarch_archive_lines_filters:
@@ -344,35 +600,46 @@ class ArchiveLibrary:
 
 
 class ArchiveLine:
-    def __init__(self, full_raw_archive_line: str, parent: "ArchiveSource") -> None:
+    def __init__(self, full_raw_archive_line: Optional[str], parent: "ArchiveSource", full_archive_line_as_json: Optional[Dict] = None, date: Optional[datetime] = None) -> None:
+        """full_archive_line_as_json and date, when already parsed (in a worker process), are not parsed again from the raw line"""
         self.parent = parent
-        self.full_raw_archive_line = full_raw_archive_line
+        self.full_raw_archive_line: Optional[str] = full_raw_archive_line
         # Parsing JSON string
-        self.full_archive_line_as_json: Dict = json.loads(full_raw_archive_line)
+        if full_archive_line_as_json is None:
+            assert full_raw_archive_line is not None
+            full_archive_line_as_json = json.loads(full_raw_archive_line)
+        self.full_archive_line_as_json: Optional[Dict] = full_archive_line_as_json
+        assert self.full_archive_line_as_json is not None
 
         # Access global fields
         self.date_raw = self.full_archive_line_as_json["date"]
-        self.date = parser.parse(self.date_raw)
+        self.date = date if date is not None else parse_archive_date(self.date_raw)
         self.tags: List[str] = self.full_archive_line_as_json["tags"]
         self.tag: str = self.tags[0]
 
         self.all_fields_dict: Dict[str, constants.HUMAN_READABLE_FIELD_TYPE] = self.full_archive_line_as_json.get(self.tag, {})
         self.all_fields_dict["date_raw"] = self.date_raw
 
+    def release_raw_content(self) -> None:
+        """Once parsed, only the fields are needed: drop raw text and whole JSON content (streaming mode)"""
+        self.full_raw_archive_line = None
+        self.full_archive_line_as_json = None
+
     def get_date_raw_str(self) -> str:
         return cast(str, self.date_raw)
 
 
 class VersionArchiveLine(ArchiveLine):
-    def __init__(self, full_raw_archive_line: str, parent: "ArchiveSource") -> None:
-        super().__init__(full_raw_archive_line=full_raw_archive_line, parent=parent)
+    def __init__(self, full_raw_archive_line: Optional[str], parent: "ArchiveSource", full_archive_line_as_json: Optional[Dict] = None, date: Optional[datetime] = None) -> None:
+        super().__init__(full_raw_archive_line=full_raw_archive_line, parent=parent, full_archive_line_as_json=full_archive_line_as_json, date=date)
 
 
 class SqlArchArchiveLine(ArchiveLine):
-    def __init__(self, full_raw_archive_line: str, parent: "ArchiveSource") -> None:
-        super().__init__(full_raw_archive_line=full_raw_archive_line, parent=parent)
+    def __init__(self, full_raw_archive_line: Optional[str], parent: "ArchiveSource", full_archive_line_as_json: Optional[Dict] = None, date: Optional[datetime] = None) -> None:
+        super().__init__(full_raw_archive_line=full_raw_archive_line, parent=parent, full_archive_line_as_json=full_archive_line_as_json, date=date)
 
         # Accessing specific fields
+        assert self.full_archive_line_as_json is not None
         self.sqlarch_json_section: Dict[str, str | int] = self.full_archive_line_as_json["SQLARCH"]
 
         # Accessing specific fields
@@ -398,12 +665,18 @@ class SqlArchArchiveLine(ArchiveLine):
         self.invariant_message: Optional[decode_message.InvariantMessage] = None
         self.decoded_message: Optional[decode_message.DecodedMessage] = None
 
-    def decode_message(self, archive_decoder: ArchiveDecoder) -> None:
+    def set_decoding_result(self, invariant_message: Optional[decode_message.InvariantMessage], decoded_message: Optional[decode_message.DecodedMessage]) -> None:
         # Directly copy all items from SQLARCH section into a new dictionary
         self.sqlarch_fields_dict_raw = {f"{key}_raw": value for key, value in self.all_fields_dict.items()}
-        self.invariant_message = archive_decoder.message_manager.get_message_by_id(self.get_id())
-        if self.invariant_message:
-            self.decoded_message = archive_decoder.message_decoder.decode_raw_hexadecimal_message(message_number=self.invariant_message.message_number, hexadecimal_content=self.get_new_state_str())
+        self.invariant_message = invariant_message
+        self.decoded_message = decoded_message
+
+    def decode_message(self, archive_decoder: ArchiveDecoder) -> None:
+        invariant_message = archive_decoder.message_manager.get_message_by_id(self.get_id())
+        decoded_message = None
+        if invariant_message:
+            decoded_message = archive_decoder.message_decoder.decode_raw_hexadecimal_message(message_number=invariant_message.message_number, hexadecimal_content=self.get_new_state_str())
+        self.set_decoding_result(invariant_message=invariant_message, decoded_message=decoded_message)
 
     def get_id(self) -> str:
         return cast(str, self.all_fields_dict.get("id"))
@@ -435,18 +708,30 @@ class SqlArchArchiveLine(ArchiveLine):
 
     def get_all_changes_since_previous(self, previous_line_for_this_id: Optional["SqlArchArchiveLine"]) -> List[OrderedDict[str, Any]]:
         to_ret: List[OrderedDict[str, Any]] = []
-
-        previous_date = previous_line_for_this_id.date if previous_line_for_this_id else None
-        exact_time_delta = date_time_formats.format_duration_timedelta_to_string(self.date - previous_line_for_this_id.date) if previous_line_for_this_id else "NA"
-        approximative_time_delta = humanize.precisedelta(self.date - previous_date, minimum_unit="milliseconds") if previous_date else "NA"
         old_timestamp = previous_line_for_this_id.date_raw if previous_line_for_this_id else None
 
+        # Only computed if a change is found
+        time_deltas: Optional[Tuple[str, str]] = None
+
+        def get_exact_and_approximative_time_deltas() -> Tuple[str, str]:
+            nonlocal time_deltas
+            if time_deltas is None:
+                time_deltas = (
+                    (
+                        date_time_formats.format_duration_timedelta_to_string(self.date - previous_line_for_this_id.date),
+                        humanize.precisedelta(self.date - previous_line_for_this_id.date, minimum_unit="milliseconds"),
+                    )
+                    if previous_line_for_this_id
+                    else ("NA", "NA")
+                )
+            return time_deltas
+
         if self.decoded_message is None:
             # If no decoded message, only show newSt change
             previous_new_st = previous_line_for_this_id.get_new_state_str() if previous_line_for_this_id else "No previous"
             new_new_st = self.get_new_state_str()
             if previous_new_st != new_new_st:
-
+                exact_time_delta, approximative_time_delta = get_exact_and_approximative_time_deltas()
                 to_ret.append(
                     OrderedDict(
                         {
@@ -466,19 +751,21 @@ class SqlArchArchiveLine(ArchiveLine):
         else:
 
             # If decoded message exists, show only decoded message fields that changed
-            for field_name in self.decoded_message.decoded_fields_flat_directory.keys():
+            previous_decoded_message = previous_line_for_this_id.decoded_message if previous_line_for_this_id else None
+            for field_name, raw_value in self.decoded_message.decoded_fields_flat_directory.items():
+
+                # Same raw value: same human readable value
+                if previous_decoded_message and previous_decoded_message.decoded_fields_flat_directory.get(field_name) == raw_value and raw_value is not None:
+                    continue
 
                 # if field_name not in constants.FIELD_FULL_NAMES_TO_EXCLUDE_IN_REPORTS and not any(field_name.startswith(prefix) for prefix in constants.FIELD_NAMES_PREFIXES_TO_EXCLUDE_IN_REPORTS):
                 if not helpers.is_field_name_to_be_ignored(field_name=field_name):
 
                     new_value = self.decoded_message.get_field_value_human_readable(field_name)
-                    previous_value = (
-                        previous_line_for_this_id.decoded_message.get_field_value_human_readable(field_name)
-                        if previous_line_for_this_id and previous_line_for_this_id.decoded_message
-                        else "No previous"
-                    )
+                    previous_value = previous_decoded_message.get_field_value_human_readable(field_name) if previous_decoded_message else "No previous"
 
                     if new_value != previous_value:
+                        exact_time_delta, approximative_time_delta = get_exact_and_approximative_time_deltas()
                         to_ret.append(
                             OrderedDict(
                                 {
@@ -544,6 +831,9 @@ class ArchiveSource(ABC):
     def get_all_archive_file_lines(self) -> List[str]:
         pass
 
+    def iterate_archive_lines(self) -> Iterator[str]:
+        yield from self.get_all_archive_file_lines()
+
 
 class ArchiveLinesSet(ArchiveSource):
     def __init__(self, raw_archives_json_lines: List[str]) -> None:
@@ -563,6 +853,15 @@ class ArchiveFile(ArchiveSource):
     def get_all_archive_file_lines(self) -> List[str]:
         return self._open_and_get_all_archive_file_lines()
 
+    def iterate_archive_lines(self) -> Iterator[str]:
+        number_of_lines = 0
+        with logger_config.stopwatch_with_label(f"Stream archive file lines {self.file_full_path}", monitor_ram_usage=True):
+            with open(self.file_full_path, mode="r", encoding="utf-8") as file:
+                for line in file:
+                    number_of_lines += 1
+                    yield line
+        logger_config.print_and_log_info(f"Archive file {self.file_full_path} has {number_of_lines} lines")
+
     def _open_and_get_all_archive_file_lines(self) -> List[str]:
 
         with logger_config.stopwatch_with_label(f"Open and read archive file lines {self.file_full_path}", monitor_ram_usage=True):
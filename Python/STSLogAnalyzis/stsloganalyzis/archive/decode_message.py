@@ -35,6 +35,7 @@ class InvariantMessage:
 class InvariantMessagesManager:
     def __init__(self, messages_list_csv_file_full_path: str) -> None:
 
+        self.messages_list_csv_file_full_path = messages_list_csv_file_full_path
         self.all_messages: List[InvariantMessage] = []
         self.all_messages_by_id: Dict[str, InvariantMessage] = dict()
 
@@ -58,10 +59,14 @@ class DecodedMessage:
 
     def __init__(self, message_number: int, xml_decoded_message: decode_xml_message.DecodedXmlMessage) -> None:
         self.message_number = message_number
-        self.xml_decoded_message = xml_decoded_message
+        self.xml_decoded_message: Optional[decode_xml_message.DecodedXmlMessage] = xml_decoded_message
         self.decoded_fields_flat_directory: Dict[str, constants.FIELD_TYPE] = {}
         self.hlf_decoded: Optional[datetime.datetime] = None
 
+    def release_xml_decoded_message(self) -> None:
+        """Fields are already copied in flat directory: XML decoded tree is not needed anymore (smaller object to keep or send to another process)"""
+        self.xml_decoded_message = None
+
     def get_field_value_human_readable(self, field_name: str) -> constants.HUMAN_READABLE_FIELD_TYPE:
         field_value_by_name = self.decoded_fields_flat_directory[field_name]
         assert field_value_by_name is not None
@@ -4,7 +4,7 @@ import xml.etree.ElementTree as ET
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import ClassVar, Dict, List, Optional, cast
+from typing import ClassVar, Dict, List, Optional, Tuple, cast
 
 from common import bytes_messages
 from logger import logger_config
@@ -168,6 +168,143 @@ class AlwaysUnsignedTypeForIntegerFieldsManager(SignedOrUnsignedTypeForIntegerFi
         return SignedOrUnsignedTypeForIntegerFieldsManagerBase.TypeDecoding.UNSIGNED_ONLY
 
 
+@dataclass(frozen=True)
+class CompiledXmlField:
+    """Field of a message scheme, with its attributes already parsed and its flat directory names already computed"""
+
+    identifier: str
+    field_class: str
+    size_bits: int
+    dim: int
+    decoding_type: SignedOrUnsignedTypeForIntegerFieldsManagerBase.TypeDecoding
+    # Indexed by record iteration (index 0 only when the parent record has no dimension)
+    field_name_with_record_prefix_by_record_index: Tuple[str, ...]
+    bits_names_by_record_index: Tuple[Tuple[str, ...], ...]
+    table_values_names: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class CompiledXmlSelector:
+    trigger_field: str
+    trigger_value: int
+    record: "CompiledXmlRecord"
+
+
+@dataclass(frozen=True)
+class CompiledXmlRecord:
+    record_class: str
+    identifier: str
+    raw_offset: str
+    raw_dim: Optional[str]
+    dim: int
+    elements: Tuple["CompiledXmlRecord | CompiledXmlSelector | CompiledXmlField", ...]
+
+
+class XmlMessageDecodingPlan:
+    """Message scheme compiled once from its xml file, then reused to decode every message with the same number"""
+
+    def __init__(self, message_number: int, root_record: CompiledXmlRecord) -> None:
+        self.message_number = message_number
+        self.root_record = root_record
+
+    @classmethod
+    def compile(cls, message_number: int, root: ET.Element, signed_or_unsigned_type_for_integer_fields_manager: SignedOrUnsignedTypeForIntegerFieldsManagerBase) -> "XmlMessageDecodingPlan":
+        assert len(root) == 1
+        layer = root[0]
+        assert len(layer) == 1
+        root_record = cls._compile_record(record=layer[0], message_number=message_number, signed_or_unsigned_type_for_integer_fields_manager=signed_or_unsigned_type_for_integer_fields_manager)
+        return cls(message_number=message_number, root_record=root_record)
+
+    @classmethod
+    def _compile_selector(cls, selector: ET.Element, message_number: int, signed_or_unsigned_type_for_integer_fields_manager: SignedOrUnsignedTypeForIntegerFieldsManagerBase) -> CompiledXmlSelector:
+        trigger_value_trigger_element = selector[0]
+        assert trigger_value_trigger_element.get("class")
+        trigger_field = trigger_value_trigger_element.get("case")
+        assert trigger_field
+        trigger_value = int(cast(str, trigger_value_trigger_element.get("value")))
+
+        elements_to_decode = selector[1:]
+        assert len(elements_to_decode) == 1
+        element_to_decode = elements_to_decode[0]
+        assert element_to_decode.tag == "record"
+        return CompiledXmlSelector(
+            trigger_field=trigger_field,
+            trigger_value=trigger_value,
+            record=cls._compile_record(record=element_to_decode, message_number=message_number, signed_or_unsigned_type_for_integer_fields_manager=signed_or_unsigned_type_for_integer_fields_manager),
+        )
+
+    @classmethod
+    def _compile_field(
+        cls,
+        element: ET.Element,
+        record_id: str,
+        record_dim: int,
+        message_number: int,
+        signed_or_unsigned_type_for_integer_fields_manager: SignedOrUnsignedTypeForIntegerFieldsManagerBase,
+    ) -> CompiledXmlField:
+        raw_field_name = cast(str, element.get("id"))
+        field_size_bits = int(element.get("size", 0))
+        field_dim = int(element.get("dim", 1))
+        field_type = element.get("class")
+        assert field_type
+
+        field_name_with_record_prefix_by_record_index = tuple(raw_field_name if record_dim == 1 else f"{record_id}_{record_it}_{raw_field_name}" for record_it in range(0, record_dim))
+        bits_names_by_record_index: Tuple[Tuple[str, ...], ...] = ()
+        if field_type == XmlMessageDecoder.BIG_ENDIAN_BIT_SET:
+            bits_names_by_record_index = tuple(tuple(f"{field_name}_{bit_index}" for bit_index in range(0, field_size_bits)) for field_name in field_name_with_record_prefix_by_record_index)
+
+        table_values_names: Tuple[str, ...] = ()
+        if field_type == XmlMessageDecoder.BIG_ENDIAN_INTEGER and field_dim != 1:
+            long_name_record_prefix = "" if record_dim == 1 else record_id
+            table_values_names = tuple(f"{long_name_record_prefix}{raw_field_name}_{index}" for index in range(0, field_dim))
+
+        return CompiledXmlField(
+            identifier=raw_field_name,
+            field_class=field_type,
+            size_bits=field_size_bits,
+            dim=field_dim,
+            decoding_type=signed_or_unsigned_type_for_integer_fields_manager.get_decoding_type_for_field(message_number=message_number, field_name=raw_field_name),
+            field_name_with_record_prefix_by_record_index=field_name_with_record_prefix_by_record_index,
+            bits_names_by_record_index=bits_names_by_record_index,
+            table_values_names=table_values_names,
+        )
+
+    @classmethod
+    def _compile_record(cls, record: ET.Element, message_number: int, signed_or_unsigned_type_for_integer_fields_manager: SignedOrUnsignedTypeForIntegerFieldsManagerBase) -> CompiledXmlRecord:
+        raw_class = record.get("class")
+        assert raw_class
+        raw_dim = record.get("dim")
+        raw_id = record.get("id")
+        assert raw_id
+        raw_offset = record.get("offset")
+        assert raw_offset
+        assert int(raw_offset) == 0, f"Not supported offset {int(raw_offset)} for record {raw_class} {raw_id} {message_number}"
+        record_dim = int(raw_dim) if raw_dim else 1
+
+        elements: List[CompiledXmlRecord | CompiledXmlSelector | CompiledXmlField] = []
+        for element in record:
+            if element.tag == "record":
+                elements.append(
+                    cls._compile_record(record=element, message_number=message_number, signed_or_unsigned_type_for_integer_fields_manager=signed_or_unsigned_type_for_integer_fields_manager)
+                )
+            elif element.tag == "selector":
+                elements.append(
+                    cls._compile_selector(selector=element, message_number=message_number, signed_or_unsigned_type_for_integer_fields_manager=signed_or_unsigned_type_for_integer_fields_manager)
+                )
+            elif element.tag == "field":
+                elements.append(
+                    cls._compile_field(
+                        element=element,
+                        record_id=raw_id,
+                        record_dim=record_dim,
+                        message_number=message_number,
+                        signed_or_unsigned_type_for_integer_fields_manager=signed_or_unsigned_type_for_integer_fields_manager,
+                    )
+                )
+
+        return CompiledXmlRecord(record_class=raw_class, identifier=raw_id, raw_offset=raw_offset, raw_dim=raw_dim, dim=record_dim, elements=tuple(elements))
+
+
 class XmlMessageDecoder:
 
     BIG_ENDIAN_INTEGER = "BigEndianInteger"
@@ -176,191 +313,164 @@ class XmlMessageDecoder:
 
     _parsed_xml_files_by_path: ClassVar[Dict[str, ET.Element]] = {}
 
-    def __init__(self, xml_directory_path: str, signed_or_unsigned_type_for_integer_fields_manager: Optional[SignedOrUnsignedTypeForIntegerFieldsManagerBase] = None) -> None:
+    def __init__(
+        self,
+        xml_directory_path: str,
+        signed_or_unsigned_type_for_integer_fields_manager: Optional[SignedOrUnsignedTypeForIntegerFieldsManagerBase] = None,
+        build_fields_and_records_objects: bool = True,
+    ) -> None:
+        """build_fields_and_records_objects: set to False when only decoded_fields_flat_directory is used (much faster, all_fields_by_name and all_records_by_name stay empty)"""
         if not signed_or_unsigned_type_for_integer_fields_manager:
             signed_or_unsigned_type_for_integer_fields_manager = AlwaysUnsignedTypeForIntegerFieldsManager()
         self.signed_or_unsigned_type_for_integer_fields_manager = signed_or_unsigned_type_for_integer_fields_manager
+        self.build_fields_and_records_objects = build_fields_and_records_objects
 
         self.xml_directory_path = xml_directory_path
-        self.cached_messages_by_id: Dict[int, ET.Element] = dict()
+        self.decoding_plans_by_message_number: Dict[int, XmlMessageDecodingPlan] = dict()
         self.decoded_xml_message: Optional[DecodedXmlMessage] = None
 
-    def _parse_selector(self, record: ET.Element, parent_record: DecodedXmlMessage.XmlMessageRecordUnit) -> None:
+    def _decode_selector(self, selector: CompiledXmlSelector, parent_record: Optional[DecodedXmlMessage.XmlMessageRecordUnit]) -> None:
 
         decoded_xml_message = cast(DecodedXmlMessage, self.decoded_xml_message)
 
-        trigger_value_trigger_element = record[0]
-        assert trigger_value_trigger_element.get("class")
-        trigger_field = trigger_value_trigger_element.get("case")
-        trigger_value = int(cast(str, trigger_value_trigger_element.get("value")))
-
-        assert trigger_field in decoded_xml_message.decoded_fields_flat_directory
-        if decoded_xml_message.decoded_fields_flat_directory[trigger_field] == trigger_value:
-            elements_to_decode = record[1:]
-            assert len(elements_to_decode) == 1
-            element_to_decode = elements_to_decode[0]
-            assert element_to_decode.tag == "record"
-            self._parse_record(record=element_to_decode, parent_record=parent_record)
+        assert selector.trigger_field in decoded_xml_message.decoded_fields_flat_directory
+        if decoded_xml_message.decoded_fields_flat_directory[selector.trigger_field] == selector.trigger_value:
+            self._decode_record(record=selector.record, parent_record=parent_record)
 
-    def _parse_root(self, root: ET.Element) -> None:
-        assert len(root) == 1
-        self._parse_layer(root[0])
-
-    def _parse_layer(self, layer: ET.Element) -> None:
-        assert len(layer) == 1
-        self._parse_record(layer[0])
-
-    def _parse_string_type_field(self, xml_decoded_field_macro: DecodedXmlMessage.XmlMessageFieldMacro) -> None:
+    def _decode_string_type_field(self, field: CompiledXmlField, field_name_with_record_prefix: str) -> str:
 
         assert self.decoded_xml_message is not None
-        string_value = self.decoded_xml_message.decoded_bytes_message.get_next_bits_as_ascii_char(number_of_chars=xml_decoded_field_macro.dim)
-        self.decoded_xml_message.decoded_fields_flat_directory[xml_decoded_field_macro.field_name_with_record_prefix] = string_value
+        string_value: str = self.decoded_xml_message.decoded_bytes_message.get_next_bits_as_ascii_char(number_of_chars=field.dim)
+        self.decoded_xml_message.decoded_fields_flat_directory[field_name_with_record_prefix] = string_value
+        return string_value
 
-        DecodedXmlMessage.XmlMessageFieldString(field_macro=xml_decoded_field_macro, value=string_value)
-
-    def _parse_bitset_type_field(self, xml_decoded_field_macro: DecodedXmlMessage.XmlMessageFieldMacro) -> None:
+    def _decode_bitset_type_field(self, field: CompiledXmlField, field_name_with_record_prefix: str, bits_names: Tuple[str, ...]) -> str:
 
         assert self.decoded_xml_message is not None
+        decoded_fields_flat_directory = self.decoded_xml_message.decoded_fields_flat_directory
 
-        field_value = self.decoded_xml_message.decoded_bytes_message.get_next_bits_as_bitset_str(size_bits=xml_decoded_field_macro.size_bits)
-        self.decoded_xml_message.decoded_fields_flat_directory[xml_decoded_field_macro.field_name_with_record_prefix] = field_value
+        field_value: str = self.decoded_xml_message.decoded_bytes_message.get_next_bits_as_bitset_str(size_bits=field.size_bits)
+        decoded_fields_flat_directory[field_name_with_record_prefix] = field_value
 
-        for bit_index in range(0, xml_decoded_field_macro.size_bits):
-            self.decoded_xml_message.decoded_fields_flat_directory[f"{xml_decoded_field_macro.field_name_with_record_prefix}_{bit_index}"] = int(field_value[bit_index])
+        for bit_name, bit_value in zip(bits_names, field_value):
+            decoded_fields_flat_directory[bit_name] = int(bit_value)
 
-        DecodedXmlMessage.XmlMessageFieldBitfield(field_macro=xml_decoded_field_macro, value=field_value)
+        return field_value
 
-    def _parse_int_table_type_field(self, xml_decoded_field_macro: DecodedXmlMessage.XmlMessageFieldMacro) -> None:
+    def _decode_int_table_type_field(self, field: CompiledXmlField) -> List[bytes_messages.DecodedIntResult]:
 
         assert self.decoded_xml_message is not None
+        decoded_fields_flat_directory = self.decoded_xml_message.decoded_fields_flat_directory
 
-        # int_value = self.decoded_xml_message.decoded_bytes_message.get_next_bits_as_int_table_signed_and_unsigned(
-        #    table_dim=xml_decoded_field_macro.dim, size_bits=xml_decoded_field_macro.size_bits
-        # )
-        # field = DecodedXmlMessage.XmlMessageFieldInt(
-        #    field_macro=xml_decoded_field_macro, unsigned_value=[value.unsigned_value for value in int_value], signed_value=[value.signed_value for value in int_value]
-        # )
-        # self.decoded_xml_message.decoded_fields_flat_directory[field.long_name] = [value.unsigned_value for value in int_value]
-
-        int_values = self.decoded_xml_message.decoded_bytes_message.get_next_bits_as_int_table_signed_and_unsigned(table_dim=xml_decoded_field_macro.dim, size_bits=xml_decoded_field_macro.size_bits)
-
-        field = DecodedXmlMessage.XmlMessageMultiDimFieldInt(
-            field_macro=xml_decoded_field_macro,
-            int_values=int_values,
+        int_values: List[bytes_messages.DecodedIntResult] = self.decoded_xml_message.decoded_bytes_message.get_next_bits_as_int_table_signed_and_unsigned(
+            table_dim=field.dim, size_bits=field.size_bits
         )
-        for index, int_value in enumerate(int_values):
-            self.decoded_xml_message.decoded_fields_flat_directory[f"{field.long_name}_{index}"] = int_value.unsigned_value
+        for value_name, int_value in zip(field.table_values_names, int_values):
+            decoded_fields_flat_directory[value_name] = int_value.unsigned_value
+        return int_values
 
-    def _parse_single_int_type_field(self, xml_decoded_field_macro: DecodedXmlMessage.XmlMessageFieldMacro) -> None:
+    def _decode_single_int_type_field(self, field: CompiledXmlField, field_name_with_record_prefix: str) -> bytes_messages.DecodedIntResult:
 
         assert self.decoded_xml_message is not None
+        decoded_fields_flat_directory = self.decoded_xml_message.decoded_fields_flat_directory
 
-        field_value = self.decoded_xml_message.decoded_bytes_message.get_next_bits_as_single_int_signed_and_unsigned(size_bits=xml_decoded_field_macro.size_bits)
-        field_signed_value = field_value.signed_value
-        field_unsigned_value = field_value.unsigned_value
-
-        decoding_type = self.signed_or_unsigned_type_for_integer_fields_manager.get_decoding_type_for_field(
-            message_number=self.decoded_xml_message.message_number, field_name=xml_decoded_field_macro.identifier
-        )
-
-        if decoding_type == SignedOrUnsignedTypeForIntegerFieldsManagerBase.TypeDecoding.SIGNED_ONLY:
-            self.decoded_xml_message.decoded_fields_flat_directory[xml_decoded_field_macro.field_name_with_record_prefix] = field_signed_value
-        elif decoding_type == SignedOrUnsignedTypeForIntegerFieldsManagerBase.TypeDecoding.UNSIGNED_ONLY:
-            self.decoded_xml_message.decoded_fields_flat_directory[xml_decoded_field_macro.field_name_with_record_prefix] = field_unsigned_value
-        else:
-            self.decoded_xml_message.decoded_fields_flat_directory[xml_decoded_field_macro.field_name_with_record_prefix + "_as_unsigned"] = field_unsigned_value
-            self.decoded_xml_message.decoded_fields_flat_directory[xml_decoded_field_macro.field_name_with_record_prefix + "_as_signed"] = field_signed_value
-
-        DecodedXmlMessage.XmlMessageFieldInt(field_macro=xml_decoded_field_macro, unsigned_value=field_unsigned_value, signed_value=field_signed_value)
-
-    def _parse_int_type_field(self, xml_decoded_field_macro: DecodedXmlMessage.XmlMessageFieldMacro) -> None:
+        field_value: bytes_messages.DecodedIntResult = self.decoded_xml_message.decoded_bytes_message.get_next_bits_as_single_int_signed_and_unsigned(size_bits=field.size_bits)
 
-        assert self.decoded_xml_message is not None
-        if xml_decoded_field_macro.dim == 1:
-            self._parse_single_int_type_field(xml_decoded_field_macro=xml_decoded_field_macro)
+        if field.decoding_type == SignedOrUnsignedTypeForIntegerFieldsManagerBase.TypeDecoding.SIGNED_ONLY:
+            decoded_fields_flat_directory[field_name_with_record_prefix] = field_value.signed_value
+        elif field.decoding_type == SignedOrUnsignedTypeForIntegerFieldsManagerBase.TypeDecoding.UNSIGNED_ONLY:
+            decoded_fields_flat_directory[field_name_with_record_prefix] = field_value.unsigned_value
         else:
-            self._parse_int_table_type_field(xml_decoded_field_macro=xml_decoded_field_macro)
+            decoded_fields_flat_directory[field_name_with_record_prefix + "_as_unsigned"] = field_value.unsigned_value
+            decoded_fields_flat_directory[field_name_with_record_prefix + "_as_signed"] = field_value.signed_value
 
-    def _parse_field(self, element: ET.Element, xml_message_record_unit: DecodedXmlMessage.XmlMessageRecordUnit, record_prefix: str) -> None:
+        return field_value
 
+    def _create_field_unit(self, field: CompiledXmlField, field_name_with_record_prefix: str, xml_message_record_unit: DecodedXmlMessage.XmlMessageRecordUnit, decoded_value: object) -> None:
         assert self.decoded_xml_message is not None
 
-        raw_field_name = cast(str, element.get("id"))
-        field_size_bits = int(element.get("size", 0))
-        field_dim = int(element.get("dim", 1))
-        field_type = element.get("class")
-        assert field_type
-
-        field_name_with_record_prefix = record_prefix + "_" + raw_field_name if record_prefix else raw_field_name
-
         xml_decoded_field_macro = DecodedXmlMessage.XmlMessageFieldMacro(
-            raw_class=field_type,
+            raw_class=field.field_class,
             parent_record=xml_message_record_unit,
-            raw_dim=field_dim,
-            raw_id=raw_field_name,
-            size_bits=field_size_bits,
+            raw_dim=field.dim,
+            raw_id=field.identifier,
+            size_bits=field.size_bits,
             field_name_with_record_prefix=field_name_with_record_prefix,
             decoded_xml_message=self.decoded_xml_message,
         )
 
+        if field.field_class == self.BIG_ENDIAN_ASCII_CHAR:
+            DecodedXmlMessage.XmlMessageFieldString(field_macro=xml_decoded_field_macro, value=cast(str, decoded_value))
+        elif field.field_class == self.BIG_ENDIAN_BIT_SET:
+            DecodedXmlMessage.XmlMessageFieldBitfield(field_macro=xml_decoded_field_macro, value=cast(str, decoded_value))
+        elif field.field_class == self.BIG_ENDIAN_INTEGER and field.dim == 1:
+            int_value = cast(bytes_messages.DecodedIntResult, decoded_value)
+            DecodedXmlMessage.XmlMessageFieldInt(field_macro=xml_decoded_field_macro, unsigned_value=int_value.unsigned_value, signed_value=int_value.signed_value)
+        elif field.field_class == self.BIG_ENDIAN_INTEGER:
+            DecodedXmlMessage.XmlMessageMultiDimFieldInt(field_macro=xml_decoded_field_macro, int_values=cast(List[List[bytes_messages.DecodedIntResult]], decoded_value))
+
+    def _decode_field(self, field: CompiledXmlField, record_index: int, xml_message_record_unit: Optional[DecodedXmlMessage.XmlMessageRecordUnit]) -> None:
+
+        assert self.decoded_xml_message is not None
+
+        field_name_with_record_prefix = field.field_name_with_record_prefix_by_record_index[record_index]
+        decoded_value: object = None
+
         try:
-            if field_type == self.BIG_ENDIAN_ASCII_CHAR:
-                self._parse_string_type_field(xml_decoded_field_macro=xml_decoded_field_macro)
+            if field.field_class == self.BIG_ENDIAN_ASCII_CHAR:
+                decoded_value = self._decode_string_type_field(field=field, field_name_with_record_prefix=field_name_with_record_prefix)
 
-            elif field_type == self.BIG_ENDIAN_BIT_SET:
-                self._parse_bitset_type_field(xml_decoded_field_macro=xml_decoded_field_macro)
+            elif field.field_class == self.BIG_ENDIAN_BIT_SET:
+                decoded_value = self._decode_bitset_type_field(field=field, field_name_with_record_prefix=field_name_with_record_prefix, bits_names=field.bits_names_by_record_index[record_index])
 
-            elif field_type == self.BIG_ENDIAN_INTEGER:
-                self._parse_int_type_field(xml_decoded_field_macro=xml_decoded_field_macro)
+            elif field.field_class == self.BIG_ENDIAN_INTEGER:
+                if field.dim == 1:
+                    decoded_value = self._decode_single_int_type_field(field=field, field_name_with_record_prefix=field_name_with_record_prefix)
+                else:
+                    decoded_value = self._decode_int_table_type_field(field=field)
 
         except ValueError as val_err:
             # logger_config.print_and_log_exception(val_err)
             logger_config.print_and_log_error(
-                f"Message {self.decoded_xml_message.message_number}: Error when decoding field {raw_field_name} {xml_decoded_field_macro.field_name_with_record_prefix}. {val_err}. {val_err.__class__.__name__}"
+                f"Message {self.decoded_xml_message.message_number}: Error when decoding field {field.identifier} {field_name_with_record_prefix}. {val_err}. {val_err.__class__.__name__}"
             )
-            self.decoded_xml_message.not_decoded_because_error_fields_names.append(raw_field_name)
+            self.decoded_xml_message.not_decoded_because_error_fields_names.append(field.identifier)
+            decoded_value = None
 
-    def _parse_record(self, record: ET.Element, parent_record: Optional[DecodedXmlMessage.XmlMessageRecordUnit] = None) -> None:
-        """Recursively parse records to decode fields."""
-        raw_class = record.get("class")
-        assert raw_class
-        raw_dim = record.get("dim")
-        raw_id = record.get("id")
-        assert raw_id
-        raw_offset = record.get("offset")
-        assert raw_offset
+        if xml_message_record_unit is not None and decoded_value is not None:
+            self._create_field_unit(field=field, field_name_with_record_prefix=field_name_with_record_prefix, xml_message_record_unit=xml_message_record_unit, decoded_value=decoded_value)
 
+    def _decode_record(self, record: CompiledXmlRecord, parent_record: Optional[DecodedXmlMessage.XmlMessageRecordUnit] = None) -> None:
+        """Recursively decode records fields, following the compiled plan."""
         assert self.decoded_xml_message
-        xml_message_record_macro = DecodedXmlMessage.XmlMessageRecordMacro(
-            raw_class=raw_class,
-            raw_dim=raw_dim,
-            raw_id=raw_id,
-            raw_offset=raw_offset,
-            decoded_xml_message=self.decoded_xml_message,
-        )
 
-        if parent_record is None:
-            self.decoded_xml_message.root_record = xml_message_record_macro
-        else:
-            parent_record.records.append(xml_message_record_macro)
+        xml_message_record_macro: Optional[DecodedXmlMessage.XmlMessageRecordMacro] = None
+        if self.build_fields_and_records_objects:
+            xml_message_record_macro = DecodedXmlMessage.XmlMessageRecordMacro(
+                raw_class=record.record_class,
+                raw_dim=record.raw_dim,
+                raw_id=record.identifier,
+                raw_offset=record.raw_offset,
+                decoded_xml_message=self.decoded_xml_message,
+            )
 
-        record_dim = int(record.get("dim", 1))
-        for record_it in range(0, record_dim):
+            if parent_record is None:
+                self.decoded_xml_message.root_record = xml_message_record_macro
+            else:
+                parent_record.records.append(xml_message_record_macro)
 
-            record_prefix = "" if record_dim == 1 else f"{record.get("id")}_{record_it}"
-            xml_message_record_unit = DecodedXmlMessage.XmlMessageRecordUnit(xml_message_record_macro, index=record_it)
+        for record_it in range(0, record.dim):
 
-            for element in record:
-                # logger_config.print_and_log_info(f"current_bit_index {current_bit_index} is {type(current_bit_index)}")
+            xml_message_record_unit = DecodedXmlMessage.XmlMessageRecordUnit(xml_message_record_macro, index=record_it) if xml_message_record_macro else None
 
-                if element.tag == "record":
-                    # logger_config.print_and_log_info(f"{element.tag} found: {element.get("id")}, current_bit_index:{current_bit_index}")
+            for element in record.elements:
+                if isinstance(element, CompiledXmlField):
+                    self._decode_field(field=element, record_index=record_it, xml_message_record_unit=xml_message_record_unit)
+                elif isinstance(element, CompiledXmlRecord):
                     # Recursive call to process nested records
-                    self._parse_record(record=element, parent_record=xml_message_record_unit)
-                elif element.tag == "selector":
-                    self._parse_selector(element, parent_record=xml_message_record_unit)
-                elif element.tag == "field":
-                    self._parse_field(element=element, xml_message_record_unit=xml_message_record_unit, record_prefix=record_prefix)
+                    self._decode_record(record=element, parent_record=xml_message_record_unit)
+                else:
+                    self._decode_selector(element, parent_record=xml_message_record_unit)
 
     @classmethod
     def get_xml_file_root(cls, message_number: int, xml_directory_path: str) -> Optional[ET.Element]:
@@ -380,18 +490,26 @@ class XmlMessageDecoder:
             logger_config.print_and_log_error(f"File {xml_file_path} not found.")
             return None
 
-    def decode_xml_fields_in_message_hexadecimal(self, message_number: int, hexadecimal_content: str) -> Optional[DecodedXmlMessage]:
-
-        assert isinstance(message_number, int), f"message_number is type {type(message_number)}"
-        if message_number not in self.cached_messages_by_id:
+    def get_decoding_plan(self, message_number: int) -> Optional[XmlMessageDecodingPlan]:
+        if message_number not in self.decoding_plans_by_message_number:
             xml_file_root = XmlMessageDecoder.get_xml_file_root(message_number=message_number, xml_directory_path=self.xml_directory_path)
             if xml_file_root is None:
                 return None
-            self.cached_messages_by_id[message_number] = xml_file_root
+            self.decoding_plans_by_message_number[message_number] = XmlMessageDecodingPlan.compile(
+                message_number=message_number, root=xml_file_root, signed_or_unsigned_type_for_integer_fields_manager=self.signed_or_unsigned_type_for_integer_fields_manager
+            )
+
+        return self.decoding_plans_by_message_number[message_number]
+
+    def decode_xml_fields_in_message_hexadecimal(self, message_number: int, hexadecimal_content: str) -> Optional[DecodedXmlMessage]:
+
+        assert isinstance(message_number, int), f"message_number is type {type(message_number)}"
+        decoding_plan = self.get_decoding_plan(message_number=message_number)
+        if decoding_plan is None:
+            return None
 
-        root = self.cached_messages_by_id[message_number]
-        # Traverse the root record and decode
+        # Follow the compiled plan from the root record and decode
         decoded_xml_message = self.decoded_xml_message = DecodedXmlMessage(message_number=message_number, hex_string=hexadecimal_content)
-        self._parse_root(root)
+        self._decode_record(decoding_plan.root_record)
         self.decoded_xml_message = None
         return decoded_xml_message
@@ -0,0 +1,123 @@
+import glob
+import hashlib
+import os
+import pickle
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from common import file_name_utils, file_utils
+from logger import logger_config
+
+from stsloganalyzis.archive import decode_message
+
+# Increase when decoding code changes: all existing caches are ignored
+DECODER_VERSION = 1
+CACHE_KEY_LENGTH = 32
+
+DECODING_RESULT_KEY_TYPE = Tuple[str, str]
+PICKLED_DECODING_RESULT_TYPE = Tuple[bytes, bytes]
+
+
+def compute_directory_content_hash(directory_path: str, filename_pattern: str = "*.xml") -> str:
+    """Any added, removed or modified file changes the hash"""
+    directory_hash = hashlib.sha256()
+    for file_full_path in sorted(glob.glob(os.path.join(directory_path, filename_pattern))):
+        directory_hash.update(os.path.basename(file_full_path).encode())
+        directory_hash.update(file_utils.compute_file_content_hash(file_full_path).encode())
+    return directory_hash.hexdigest()
+
+
+def compute_decoder_fingerprint(
+    xml_directory_path: str, messages_list_csv_file_full_path: Optional[str], action_set_csv_file_full_path: Optional[str], topology_fingerprint: Optional[str] = None
+) -> str:
+    """topology_fingerprint: decoded messages contain topology dependent fields (_Pk, _TB, _TC), the cache must be invalidated when topology CSV files change"""
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"decoder_version:{DECODER_VERSION}".encode())
+    fingerprint.update(compute_directory_content_hash(xml_directory_path).encode())
+    for csv_file_full_path in [messages_list_csv_file_full_path, action_set_csv_file_full_path]:
+        fingerprint.update((file_utils.compute_file_content_hash(csv_file_full_path) if csv_file_full_path and os.path.exists(csv_file_full_path) else "None").encode())
+    fingerprint.update(f"topology:{topology_fingerprint}".encode())
+    return fingerprint.hexdigest()
+
+
+class DecodedArchiveFileCache:
+    """SQLite file storing decoding results of one archive file, by message id and hexadecimal state (decoding only depends on them).
+    File name contains archive file content hash and decoder fingerprint: any change of archive, XML schemes or CSV uses another cache file, and the previous one is removed when it is saved"""
+
+    def __init__(self, cache_directory_path: str, archive_file_full_path: str, decoder_fingerprint: str) -> None:
+        self.archive_file_full_path = archive_file_full_path
+        self.cache_directory_path = cache_directory_path
+        self.archive_file_name = file_name_utils.get_file_name_without_extension_from_full_path(archive_file_full_path)
+
+        cache_key = hashlib.sha256(f"{file_utils.compute_file_content_hash(archive_file_full_path)}{decoder_fingerprint}".encode()).hexdigest()[:CACHE_KEY_LENGTH]
+        self.cache_file_full_path = os.path.join(cache_directory_path, f"{self.archive_file_name}_{cache_key}.sqlite")
+
+        self.pickled_decoding_result_by_key: Dict[DECODING_RESULT_KEY_TYPE, PICKLED_DECODING_RESULT_TYPE] = dict()
+        self.new_pickled_decoding_result_by_key: Dict[DECODING_RESULT_KEY_TYPE, PICKLED_DECODING_RESULT_TYPE] = dict()
+        self.hits_count = 0
+
+        file_utils.create_folder_if_not_exist(cache_directory_path)
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.cache_file_full_path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS decoding_results "
+            "(message_id TEXT NOT NULL, new_state TEXT NOT NULL, invariant_message BLOB NOT NULL, decoded_message BLOB NOT NULL, PRIMARY KEY (message_id, new_state))"
+        )
+        return connection
+
+    def _load(self) -> None:
+        if not os.path.exists(self.cache_file_full_path):
+            return
+
+        connection = self._connect()
+        try:
+            for message_id, new_state, pickled_invariant_message, pickled_decoded_message in connection.execute(
+                "SELECT message_id, new_state, invariant_message, decoded_message FROM decoding_results"
+            ):
+                self.pickled_decoding_result_by_key[(message_id, new_state)] = (pickled_invariant_message, pickled_decoded_message)
+        finally:
+            connection.close()
+        logger_config.print_and_log_info(f"Decoded archive cache {self.cache_file_full_path} has {len(self.pickled_decoding_result_by_key)} decoding results")
+
+    def get_decoding_result(self, message_id: str, new_state: str) -> Optional[Tuple[Optional[decode_message.InvariantMessage], Optional[decode_message.DecodedMessage]]]:
+        pickled_decoding_result = self.pickled_decoding_result_by_key.get((message_id, new_state))
+        if pickled_decoding_result is None:
+            return None
+
+        self.hits_count += 1
+        # Unpickled for each line: lines never share the same decoded message object
+        pickled_invariant_message, pickled_decoded_message = pickled_decoding_result
+        return pickle.loads(pickled_invariant_message), pickle.loads(pickled_decoded_message)
+
+    def add_decoding_result(self, message_id: str, new_state: str, invariant_message: Optional[decode_message.InvariantMessage], decoded_message: Optional[decode_message.DecodedMessage]) -> None:
+        if decoded_message:
+            decoded_message.release_xml_decoded_message()
+        pickled_decoding_result = (pickle.dumps(invariant_message, protocol=pickle.HIGHEST_PROTOCOL), pickle.dumps(decoded_message, protocol=pickle.HIGHEST_PROTOCOL))
+        self.pickled_decoding_result_by_key[(message_id, new_state)] = pickled_decoding_result
+        self.new_pickled_decoding_result_by_key[(message_id, new_state)] = pickled_decoding_result
+
+    def _remove_superseded_cache_files(self) -> None:
+        """Cache files of previous contents of the archive file, or of previous decoders, are never used again"""
+        cache_files_pattern = os.path.join(glob.escape(self.cache_directory_path), f"{glob.escape(self.archive_file_name)}_{'[0-9a-f]' * CACHE_KEY_LENGTH}.sqlite")
+        for cache_file_full_path in glob.glob(cache_files_pattern):
+            if os.path.normcase(os.path.abspath(cache_file_full_path)) != os.path.normcase(os.path.abspath(self.cache_file_full_path)):
+                logger_config.print_and_log_info(f"Remove superseded decoded archive cache {cache_file_full_path}")
+                os.remove(cache_file_full_path)
+
+    def save(self) -> int:
+        """Only results decoded since loading are written"""
+        rows: List[Tuple[str, str, bytes, bytes]] = [(key[0], key[1], value[0], value[1]) for key, value in self.new_pickled_decoding_result_by_key.items()]
+        if rows:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.executemany("INSERT OR REPLACE INTO decoding_results VALUES (?, ?, ?, ?)", rows)
+            finally:
+                connection.close()
+            logger_config.print_and_log_info(f"Decoded archive cache {self.cache_file_full_path}: {len(rows)} new decoding results saved ({self.hits_count} lines decoded from cache)")
+            self._remove_superseded_cache_files()
+
+        self.new_pickled_decoding_result_by_key.clear()
+        return len(rows)
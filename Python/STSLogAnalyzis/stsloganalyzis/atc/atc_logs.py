@@ -1,19 +1,25 @@
 import datetime
 import line_profiler
 import cProfile, pstats, io
+import os
 from pstats import SortKey
 from warnings import deprecated
 from abc import ABC, abstractmethod
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Self, cast, Tuple
+from typing import Any, BinaryIO, Dict, List, Optional, Self, Sequence, cast, Tuple
 
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
 from common import file_name_utils, file_utils, reports_utils, time_utils, date_time_formats
 from logger import logger_config
 
 from stsloganalyzis.common import common_filters
 
 ATC_LOG_FILES_FIELDS_SEPARATOR = ";"
+ATC_LOG_FILES_ENCODING = "ANSI"
 
 VARIABLE_STATE_TYPE = str | int | bool | datetime.datetime | None
 
@@ -21,6 +27,217 @@ VARIABLE_STATE_TYPE = str | int | bool | datetime.datetime | None
 NUMBER_OF_MILLISECONDS_IN_DAY = 24 * 60 * 60 * 100
 JUST_BEFORE_MIDNIGHT_IN_MILLISECONDS = NUMBER_OF_MILLISECONDS_IN_DAY - 1000
 
+# Raw lines of one equipment are kept as Python strings until this count, then converted to columns
+ATC_RESULT_LINES_CHUNK_MAX_SIZE = 100000
+
+HORODATE_FIELDS_NAMES = ["CHEURE", "CDECALAGE", "CDECENNIE", "CJOUR"]
+
+# Timestamp filters fast seek: lines sampled in the file to check that their timestamps increase, and to bound the bisection of byte offsets
+TIMESTAMP_FILTERS_FAST_SEEK_SAMPLES_COUNT = 32
+# Lines just outside timestamp filters are read too, because horodate fixes can move them inside
+TIMESTAMP_FILTERS_FAST_SEEK_MARGIN = datetime.timedelta(minutes=1)
+
+
+def convert_values_to_column(values: Sequence[VARIABLE_STATE_TYPE] | npt.NDArray[Any]) -> npt.NDArray[Any]:
+    """Booleans and integers are stored in typed arrays, other and mixed types as Python objects"""
+    if isinstance(values, np.ndarray):
+        return values
+
+    values_types = set(map(type, values))
+    if values_types == {bool}:
+        return np.array(values, dtype=np.bool_)
+    if values_types == {int}:
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def convert_timestamps_to_column(timestamps: Sequence[Optional[datetime.datetime]] | npt.NDArray[np.datetime64]) -> npt.NDArray[np.datetime64]:
+    """None is stored as NaT"""
+    if isinstance(timestamps, np.ndarray):
+        return timestamps.astype("datetime64[us]")
+    # pandas converts a list of datetime much faster than NumPy
+    return pd.DatetimeIndex(list(timestamps)).to_numpy(dtype="datetime64[us]")
+
+
+def concatenate_columns(columns: List[npt.NDArray[Any]]) -> npt.NDArray[Any]:
+    """Columns of different types are concatenated as Python objects, so that each value keeps its type (booleans are not converted to integers)"""
+    if not columns:
+        return np.empty(0, dtype=object)
+    if len(columns) == 1:
+        return columns[0]
+    if len({column.dtype for column in columns}) > 1:
+        columns = [column.astype(object) for column in columns]
+    return np.concatenate(columns)
+
+
+class VariableColumn:
+    """Values of one variable, on the rows of its equipment columns where the variable is defined"""
+
+    def __init__(self, variable_name: str) -> None:
+        self.variable_name = variable_name
+        self.values: npt.NDArray[Any] = np.empty(0, dtype=object)
+        # None when the variable is defined on all rows of its equipment: value position is row index
+        self.rows: Optional[npt.NDArray[np.int64]] = None
+        self.states_changes_positions: npt.NDArray[np.int64] = np.empty(0, dtype=np.int64)
+        self._values_chunks: List[npt.NDArray[Any]] = []
+        self._rows_chunks: List[npt.NDArray[np.int64]] = []
+
+    def add_values(self, first_row: int, values: npt.NDArray[Any]) -> None:
+        self._values_chunks.append(values)
+        self._rows_chunks.append(np.arange(first_row, first_row + len(values), dtype=np.int64))
+
+    def finalize(self, equipment_rows_count: int) -> None:
+        if not self._values_chunks:
+            return
+
+        self._values_chunks.insert(0, self.values)
+        self._rows_chunks.insert(0, self.get_rows())
+        self.values = concatenate_columns([values for values in self._values_chunks if len(values)])
+        rows = np.concatenate(self._rows_chunks)
+        self.rows = None if len(rows) == equipment_rows_count else rows
+        self._values_chunks.clear()
+        self._rows_chunks.clear()
+
+    def add_values_of_other_column(self, other_column: "VariableColumn", rows_offset: int) -> None:
+        """Values added to other column (not finalized) are added as they were added to this column"""
+        assert not len(other_column.values)
+        self._values_chunks += other_column._values_chunks
+        self._rows_chunks += [rows + rows_offset for rows in other_column._rows_chunks]
+
+    def get_rows(self) -> npt.NDArray[np.int64]:
+        return np.arange(len(self.values), dtype=np.int64) if self.rows is None else self.rows
+
+    def get_row(self, position: int) -> int:
+        return position if self.rows is None else int(self.rows[position])
+
+    def get_position(self, row: int) -> Optional[int]:
+        if self.rows is None:
+            return row if row < len(self.values) else None
+        position = int(np.searchsorted(self.rows, row))
+        return position if position < len(self.rows) and self.rows[position] == row else None
+
+    def get_value(self, position: int) -> VARIABLE_STATE_TYPE:
+        return cast(VARIABLE_STATE_TYPE, self.values[position : position + 1].tolist()[0])
+
+    def compute_states_changes_positions(self) -> None:
+        # First value is the initial state of the variable, kept apart from its states: first change can only be on third value
+        self.states_changes_positions = np.flatnonzero(self.values[2:] != self.values[1:-1]) + 2
+
+
+class EquipmentVariablesColumns:
+    """Result lines of one equipment stored by column: one array by line field (row index is position in these arrays) and one VariableColumn by variable.
+    Lines are added by chunks, chunks are only concatenated by finalize"""
+
+    def __init__(self, equipment: "Equipment") -> None:
+        self.equipment = equipment
+        self.rows_count = 0
+        self.parent_files: List["ATCTestFile"] = []
+        self.columns_by_variable_name: Dict[str, VariableColumn] = dict()
+
+        self.parent_file_indexes: npt.NDArray[np.int32] = np.empty(0, dtype=np.int32)
+        self.line_numbers: npt.NDArray[np.int64] = np.empty(0, dtype=np.int64)
+        self.horodates: npt.NDArray[np.datetime64] = np.empty(0, dtype="datetime64[us]")
+        self.times_according_to_simulation_start: npt.NDArray[np.datetime64] = np.empty(0, dtype="datetime64[us]")
+        # Creation order of lines among all lines of the test result (all equipments)
+        self.result_line_indexes: npt.NDArray[np.int64] = np.empty(0, dtype=np.int64)
+
+        self._parent_file_indexes_chunks: List[npt.NDArray[np.int32]] = []
+        self._line_numbers_chunks: List[npt.NDArray[np.int64]] = []
+        self._horodates_chunks: List[npt.NDArray[np.datetime64]] = []
+        self._times_according_to_simulation_start_chunks: List[npt.NDArray[np.datetime64]] = []
+        self._result_line_indexes_chunks: List[npt.NDArray[np.int64]] = []
+
+    def add_rows(
+        self,
+        parent_file: "ATCTestFile",
+        line_numbers: Sequence[int] | npt.NDArray[np.int64],
+        horodates: Sequence[Optional[datetime.datetime]] | npt.NDArray[np.datetime64],
+        times_according_to_simulation_start: Sequence[Optional[datetime.datetime]] | npt.NDArray[np.datetime64],
+        result_line_indexes: Sequence[int] | npt.NDArray[np.int64],
+        values_by_variable_name: Dict[str, Sequence[VARIABLE_STATE_TYPE] | npt.NDArray[Any]],
+    ) -> None:
+        rows_count = len(line_numbers)
+        if not rows_count:
+            return
+
+        if parent_file not in self.parent_files:
+            self.parent_files.append(parent_file)
+        self._parent_file_indexes_chunks.append(np.full(rows_count, self.parent_files.index(parent_file), dtype=np.int32))
+        self._line_numbers_chunks.append(np.asarray(line_numbers, dtype=np.int64))
+        self._horodates_chunks.append(convert_timestamps_to_column(horodates))
+        self._times_according_to_simulation_start_chunks.append(convert_timestamps_to_column(times_according_to_simulation_start))
+        self._result_line_indexes_chunks.append(np.asarray(result_line_indexes, dtype=np.int64))
+
+        for variable_name, values in values_by_variable_name.items():
+            assert len(values) == rows_count
+            if variable_name not in self.columns_by_variable_name:
+                self.columns_by_variable_name[variable_name] = VariableColumn(variable_name)
+            self.columns_by_variable_name[variable_name].add_values(first_row=self.rows_count, values=convert_values_to_column(values))
+
+        self.rows_count += rows_count
+
+    def add_rows_of_other_variables_columns(self, parent_file: "ATCTestFile", other_variables_columns: "EquipmentVariablesColumns", result_line_indexes_offset: int) -> None:
+        """Rows added to other columns (not finalized, all from parent_file) are added as they were added to these columns.
+        Used to merge columns computed in a worker process"""
+        if not other_variables_columns.rows_count:
+            return
+
+        if parent_file not in self.parent_files:
+            self.parent_files.append(parent_file)
+        self._parent_file_indexes_chunks += [np.full(len(line_numbers), self.parent_files.index(parent_file), dtype=np.int32) for line_numbers in other_variables_columns._line_numbers_chunks]
+        self._line_numbers_chunks += other_variables_columns._line_numbers_chunks
+        self._horodates_chunks += other_variables_columns._horodates_chunks
+        self._times_according_to_simulation_start_chunks += other_variables_columns._times_according_to_simulation_start_chunks
+        self._result_line_indexes_chunks += [result_line_indexes + result_line_indexes_offset for result_line_indexes in other_variables_columns._result_line_indexes_chunks]
+
+        for variable_name, other_column in other_variables_columns.columns_by_variable_name.items():
+            if variable_name not in self.columns_by_variable_name:
+                self.columns_by_variable_name[variable_name] = VariableColumn(variable_name)
+            self.columns_by_variable_name[variable_name].add_values_of_other_column(other_column, rows_offset=self.rows_count)
+
+        self.rows_count += other_variables_columns.rows_count
+
+    def finalize(self) -> None:
+        # Chunks of all line fields are added together
+        if self._line_numbers_chunks:
+            self.parent_file_indexes = np.concatenate([self.parent_file_indexes] + self._parent_file_indexes_chunks)
+            self.line_numbers = np.concatenate([self.line_numbers] + self._line_numbers_chunks)
+            self.horodates = np.concatenate([self.horodates] + self._horodates_chunks)
+            self.times_according_to_simulation_start = np.concatenate([self.times_according_to_simulation_start] + self._times_according_to_simulation_start_chunks)
+            self.result_line_indexes = np.concatenate([self.result_line_indexes] + self._result_line_indexes_chunks)
+            self._parent_file_indexes_chunks.clear()
+            self._line_numbers_chunks.clear()
+            self._horodates_chunks.clear()
+            self._times_according_to_simulation_start_chunks.clear()
+            self._result_line_indexes_chunks.clear()
+
+        for column in self.columns_by_variable_name.values():
+            column.finalize(equipment_rows_count=self.rows_count)
+
+    def get_result_line(self, row: int) -> "ATCTestResultLine":
+        return ATCTestResultLine(
+            parent_file=self.parent_files[self.parent_file_indexes[row]],
+            line_number=int(self.line_numbers[row]),
+            horodate=self.horodates[row].item(),
+            time_according_to_simulation_start=self.times_according_to_simulation_start[row].item(),
+            equipment=self.equipment,
+            row=row,
+        )
+
+    def get_values_by_variable_name(self, row: int) -> Dict[str, VARIABLE_STATE_TYPE]:
+        values_by_variable_name: Dict[str, VARIABLE_STATE_TYPE] = dict()
+        for variable_name, column in self.columns_by_variable_name.items():
+            position = column.get_position(row)
+            if position is not None:
+                values_by_variable_name[variable_name] = column.get_value(position)
+        return values_by_variable_name
+
 
 @dataclass
 class Equipment:
@@ -29,33 +246,35 @@ class Equipment:
     def __post_init__(self) -> None:
         self.name = self.raw_name
         self.variables_library = EquipmentVariablesLibrary(self)
+        self.variables_columns = EquipmentVariablesColumns(self)
 
 
 @dataclass
 class Variable:
+    """States are stored in the column of the variable, VariableState and VariableStateChange objects are only created on demand"""
+
     equipment: Equipment
     name: str
 
-    def __post_init__(self) -> None:
-        self.initial_state: Optional["VariableState"] = None
-        self.states_chronologically_sorted: List[VariableState] = []
-        self.states_changes_chronologically_sorted: List[VariableStateChange] = []
+    @property
+    def column(self) -> VariableColumn:
+        return self.equipment.variables_columns.columns_by_variable_name[self.name]
 
-    @line_profiler.profile
-    def add_state(self, variable_state: "VariableState") -> None:
-        if self.initial_state is None:
-            self.initial_state = variable_state
-        else:
-            # if self.states_chronologically_sorted:
-            # assert self.states_chronologically_sorted[-1].result_line
-            # assert self.states_chronologically_sorted[-1].result_line.horodate
-            # assert variable_state.result_line
-            # assert variable_state.result_line.horodate
-            # assert (
-            #    self.states_chronologically_sorted[-1].result_line.horodate < variable_state.result_line.horodate
-            # ), f"Return to past from {self.states_chronologically_sorted[-1].result_line.horodate} to {variable_state.result_line.horodate}  for {self.states_chronologically_sorted[-1].result_line.parent_file.file_full_path} in {len(self.states_chronologically_sorted)} th line"
+    def get_state(self, position: int) -> "VariableState":
+        return VariableState(variable=self, value=self.column.get_value(position), result_line=self.equipment.variables_columns.get_result_line(self.column.get_row(position)))
 
-            self.states_chronologically_sorted.append(variable_state)
+    @property
+    def initial_state(self) -> Optional["VariableState"]:
+        return self.get_state(0) if len(self.column.values) else None
+
+    @property
+    def states_chronologically_sorted(self) -> List["VariableState"]:
+        """Initial state excluded"""
+        return [self.get_state(position) for position in range(1, len(self.column.values))]
+
+    @property
+    def states_changes_chronologically_sorted(self) -> List["VariableStateChange"]:
+        return [VariableStateChange(previous_state=self.get_state(position - 1), new_state=self.get_state(position)) for position in self.column.states_changes_positions.tolist()]
 
 
 @dataclass
@@ -64,9 +283,6 @@ class VariableState:
     value: VARIABLE_STATE_TYPE
     result_line: "ATCTestResultLine"
 
-    def __post_init__(self) -> None:
-        self.variable.add_state(self)
-
 
 @dataclass
 class VariableStateChange:
@@ -74,8 +290,6 @@ class VariableStateChange:
     new_state: VariableState
 
     def __post_init__(self) -> None:
-        self.variable.states_changes_chronologically_sorted.append(self)
-
         self.previous_state_duration = (
             (self.new_state.result_line.horodate - self.previous_state.result_line.horodate)
             if self.previous_state is not None and self.previous_state.result_line.horodate is not None and self.new_state.result_line.horodate is not None
@@ -123,36 +337,20 @@ class EquipmentVariablesLibrary:
 class ATCVariablesLineDictionary:
     all_fields_names: List[str]
 
-    @staticmethod
-    def get_horodate_from_cheure_etc(all_fields_names_and_values: Dict[str, VARIABLE_STATE_TYPE]) -> Optional[datetime.datetime]:
-
-        c_heure = cast(Optional[int], all_fields_names_and_values.get("CHEURE"))
-        c_decalage = cast(int, all_fields_names_and_values.get("CDECALAGE")) or 0
-        c_decenie = cast(int, all_fields_names_and_values.get("CDECENNIE")) or 0
-        c_jour = cast(int, all_fields_names_and_values.get("CJOUR")) or 0
-
-        if any(elem is None for elem in [c_heure, c_decalage, c_decenie, c_jour]):
-            return None
-
-        return pert_variable_to_timestamp(c_heure=cast(int, c_heure), c_decalage=c_decalage, c_decenie=c_decenie, c_jour=c_jour)
-
-    def get_all_fields_names_and_values_in_data_line(self, value_raw_line: str, test_result: "ATCTestResult") -> Dict[str, VARIABLE_STATE_TYPE]:
-        all_raw_values = value_raw_line.rstrip().split(ATC_LOG_FILES_FIELDS_SEPARATOR)
-        return self.get_all_fields_names_and_values_in_data_raw_fields(all_raw_values=all_raw_values, test_result=test_result)
-
-    def get_all_fields_names_and_values_in_data_raw_fields(self, all_raw_values: List[str], test_result: "ATCTestResult") -> Dict[str, VARIABLE_STATE_TYPE]:
-        all_fields_names_and_values: Dict[str, VARIABLE_STATE_TYPE] = dict()
-
-        assert len(all_raw_values) == len(self.all_fields_names), f"Inconsistency in {','.join(all_raw_values)}"
+    def get_kept_fields_indexes(self, test_result: "ATCTestResult") -> List[int]:
+        """Variables names filters are applied once on fields names, not on each line"""
+        kept_fields_indexes = [field_index for field_index, field_name in enumerate(self.all_fields_names) if test_result.variable_name_must_be_created(field_name)]
+        assert len({self.all_fields_names[field_index] for field_index in kept_fields_indexes}) == len(kept_fields_indexes), f"Duplicated fields in {','.join(self.all_fields_names)}"
+        return kept_fields_indexes
 
-        for variable_index, variable_name in enumerate(self.all_fields_names):
-            if test_result.variable_name_must_be_created(variable_name):
-                variable_raw_value = all_raw_values[variable_index]
-                assert variable_name not in all_fields_names_and_values
-                variable_proper_type_value = convert_to_proper_type(variable_raw_value)
-                all_fields_names_and_values[variable_name] = variable_proper_type_value
+    def convert_all_raw_values_rows_to_columns(self, all_raw_values_rows: Sequence[Sequence[str]], test_result: "ATCTestResult") -> Dict[str, npt.NDArray[Any]]:
+        for all_raw_values in all_raw_values_rows:
+            assert len(all_raw_values) == len(self.all_fields_names), f"Inconsistency in {','.join(all_raw_values)}"
 
-        return all_fields_names_and_values
+        return {
+            self.all_fields_names[field_index]: convert_raw_values_to_column([all_raw_values[field_index] for all_raw_values in all_raw_values_rows])
+            for field_index in self.get_kept_fields_indexes(test_result)
+        }
 
 
 class VariableFilter(ABC):
@@ -197,21 +395,25 @@ class VariableNameFilter(VariableFilter):
 
 @dataclass
 class ATCTestResultLine:
+    """Row of the variables columns of an equipment, only created on demand"""
+
     parent_file: "ATCTestFile"
     line_number: int
     horodate: Optional[datetime.datetime]
     time_according_to_simulation_start: Optional[datetime.datetime]
     equipment: Equipment
+    row: int
 
-    all_fields_names_and_values: Dict[str, VARIABLE_STATE_TYPE]
-
-    @line_profiler.profile
-    def __post_init__(self) -> None:
-        self.all_variables_states: List[VariableState] = []
-        self.test_result.result_lines.append(self)
+    @property
+    def all_fields_names_and_values(self) -> Dict[str, VARIABLE_STATE_TYPE]:
+        return self.equipment.variables_columns.get_values_by_variable_name(self.row)
 
-        for variable_name, variable_value in self.all_fields_names_and_values.items():
-            self.handle_variable_state(variable_name=variable_name, variable_raw_value=variable_value)
+    @property
+    def all_variables_states(self) -> List[VariableState]:
+        return [
+            VariableState(variable=self.equipment.variables_library.get_or_create_variable_by_name(variable_name=variable_name), value=variable_value, result_line=self)
+            for variable_name, variable_value in self.all_fields_names_and_values.items()
+        ]
 
     @property
     @deprecated("not used")
@@ -220,18 +422,25 @@ class ATCTestResultLine:
             return self.horodate
         return self.time_according_to_simulation_start
 
-    @line_profiler.profile
-    def handle_variable_state(self, variable_name: str, variable_raw_value: VARIABLE_STATE_TYPE) -> None:
-        # logger_config.print_and_log_info(f"handle_variable_state, must be kept: {variable_name} {variable_value}")
-        variable = self.equipment.variables_library.get_or_create_variable_by_name(variable_name=variable_name)
-        variable_state = VariableState(variable=variable, value=variable_raw_value, result_line=self)
-        self.all_variables_states.append(variable_state)
-
     @property
     def test_result(self) -> "ATCTestResult":
         return self.parent_file.atc_test_result
 
 
+@dataclass
+class ATCResultLinesChunk:
+    """Lines of one file for one equipment, with the same variables, stored by column. Lines of several chunks of the same file can interleave"""
+
+    equipment: Equipment
+    line_numbers: npt.NDArray[np.int64]
+    values_by_variable_name: Dict[str, npt.NDArray[Any]]
+    times_according_to_simulation_start: Optional[npt.NDArray[np.datetime64]] = None
+
+    def __post_init__(self) -> None:
+        if self.times_according_to_simulation_start is None:
+            self.times_according_to_simulation_start = np.full(len(self.line_numbers), np.datetime64("NaT", "us"))
+
+
 @dataclass
 class ATCTestFile(ABC):
     file_full_path: str
@@ -239,49 +448,10 @@ class ATCTestFile(ABC):
 
     def __post_init__(self) -> None:
         self.file_name = file_name_utils.get_file_name_without_extension_from_full_path(self.file_full_path)
-        self.all_lines: List[ATCTestResultLine] = []
+        self.kept_lines_count = 0
         logger_config.print_and_log_info(f"Build {self.file_name}")
         self.forced_cdecenie_value: Optional[int] = None
         self.forced_cjour_value: Optional[int] = None
-        self.last_chunk_created_timestamp = datetime.datetime.now()
-
-    @line_profiler.profile
-    def add_missing_horodate_fields_and_ensure_incremental_horodate(
-        self, all_fields_names_and_values: Dict[str, VARIABLE_STATE_TYPE], previous_all_fields_names_and_values: Optional[Dict[str, VARIABLE_STATE_TYPE]]
-    ) -> Dict[str, VARIABLE_STATE_TYPE]:
-
-        if "CHEURE" not in all_fields_names_and_values:
-            return all_fields_names_and_values
-
-        is_previous_line_just_before_midnight = previous_all_fields_names_and_values and cast(int, previous_all_fields_names_and_values.get("CHEURE")) > JUST_BEFORE_MIDNIGHT_IN_MILLISECONDS
-        previous_line_cheure = cast(int, previous_all_fields_names_and_values.get("CHEURE")) if previous_all_fields_names_and_values else None
-        current_line_initial_cheure = cast(int, all_fields_names_and_values.get("CHEURE"))
-        is_current_line_just_after_midnight = current_line_initial_cheure < 100
-        change_of_day_detected_with_cheures = previous_line_cheure and is_previous_line_just_before_midnight and is_current_line_just_after_midnight
-
-        if previous_line_cheure and current_line_initial_cheure <= previous_line_cheure and not change_of_day_detected_with_cheures:
-            all_fields_names_and_values["CHEURE"] = previous_line_cheure + 1
-
-            logger_config.print_and_log_info_if(
-                current_line_initial_cheure == previous_line_cheure,
-                f"Fix Cheure from {current_line_initial_cheure} to {all_fields_names_and_values["CHEURE"]} to avoid same date, previous line was {previous_line_cheure}. File:{self.file_name}",
-            )
-            logger_config.print_and_log_info_if(
-                current_line_initial_cheure < previous_line_cheure,
-                f"Fix Cheure from {current_line_initial_cheure} to {all_fields_names_and_values["CHEURE"]} to avoid return to past, previous line was {previous_line_cheure}. File:{self.file_name}",
-            )
-
-        if "CJOUR" not in all_fields_names_and_values and self.forced_cjour_value:
-            if change_of_day_detected_with_cheures:
-                assert previous_all_fields_names_and_values
-                logger_config.print_and_log_info(f"Detect new day from {all_fields_names_and_values.get("CHEURE")} to {previous_all_fields_names_and_values.get("CHEURE")}")
-                self.forced_cjour_value += 1
-            all_fields_names_and_values["CJOUR"] = self.forced_cjour_value
-
-        if "CDECENNIE" not in all_fields_names_and_values and self.forced_cdecenie_value:
-            all_fields_names_and_values["CDECENNIE"] = self.forced_cdecenie_value
-
-        return all_fields_names_and_values
 
     @abstractmethod
     def compute_all_variables_states(self) -> None:
@@ -290,48 +460,182 @@ class ATCTestFile(ABC):
     @logger_config.stopwatch_decorator(inform_beginning=True, monitor_ram_usage=True)
     def open_and_get_all_raw_lines(self) -> List[str]:
 
-        with open(self.file_full_path, mode="r", encoding="ANSI") as file:
+        with open(self.file_full_path, mode="r", encoding=ATC_LOG_FILES_ENCODING) as file:
             all_raw_lines = file.readlines()
             logger_config.print_and_log_info(f"Perturbo file {self.file_full_path} has {len(all_raw_lines)} lines")
             assert all_raw_lines
             return all_raw_lines
 
+    def get_raw_line_timestamp(self, raw_line: str) -> Optional[datetime.datetime]:
+        """Timestamp of a raw line read alone, used by timestamp filters fast seek. None if the file type does not support it"""
+        return None
+
+    def get_timestamp_filters_byte_range(self, first_byte_offset: int) -> Optional[Tuple[int, int]]:
+        """Byte range of the lines that can pass all timestamp filters, found by bisection on the timestamps of lines at sampled byte offsets.
+        None when the whole file must be read: fast seek not enabled, no timestamp filter, or timestamps of sampled lines not increasing"""
+        all_timestamp_filters = self.atc_test_result.variables_timestamp_creation_filters
+        if not self.atc_test_result.timestamp_filters_fast_seek_enabled or not all_timestamp_filters:
+            return None
+
+        date_min = max(timestamp_filter.date_min for timestamp_filter in all_timestamp_filters) - TIMESTAMP_FILTERS_FAST_SEEK_MARGIN
+        date_max = min(timestamp_filter.date_max for timestamp_filter in all_timestamp_filters) + TIMESTAMP_FILTERS_FAST_SEEK_MARGIN
+        file_size = os.path.getsize(self.file_full_path)
+
+        with open(self.file_full_path, mode="rb") as file:
+
+            def get_line_byte_offset_and_timestamp(byte_offset: int) -> Tuple[int, Optional[datetime.datetime]]:
+                # End of file is after all timestamps
+                line_byte_offset, raw_line = read_line_at_byte_offset(file, max(byte_offset, first_byte_offset))
+                return line_byte_offset, self.get_raw_line_timestamp(raw_line.decode(ATC_LOG_FILES_ENCODING)) if raw_line else datetime.datetime.max
+
+            samples_byte_offsets = [
+                first_byte_offset + (file_size - first_byte_offset) * sample_index // TIMESTAMP_FILTERS_FAST_SEEK_SAMPLES_COUNT for sample_index in range(TIMESTAMP_FILTERS_FAST_SEEK_SAMPLES_COUNT)
+            ]
+            samples_timestamps = [get_line_byte_offset_and_timestamp(sample_byte_offset)[1] for sample_byte_offset in samples_byte_offsets]
+            if None in samples_timestamps:
+                logger_config.print_and_log_warning(f"{self.file_name}: no timestamp on sampled lines, whole file is read")
+                return None
+            all_samples_timestamps = cast(List[datetime.datetime], samples_timestamps)
+            if all_samples_timestamps != sorted(all_samples_timestamps):
+                logger_config.print_and_log_warning(f"{self.file_name}: timestamps of sampled lines do not increase, whole file is read")
+                return None
+
+            def get_byte_offset_of_first_line_at_or_after(timestamp: datetime.datetime) -> int:
+                low_byte_offset = max((byte_offset for byte_offset, sample_timestamp in zip(samples_byte_offsets, all_samples_timestamps) if sample_timestamp < timestamp), default=first_byte_offset)
+                high_byte_offset = min((byte_offset for byte_offset, sample_timestamp in zip(samples_byte_offsets, all_samples_timestamps) if sample_timestamp >= timestamp), default=file_size)
+                while low_byte_offset < high_byte_offset:
+                    middle_byte_offset = (low_byte_offset + high_byte_offset) // 2
+                    line_timestamp = get_line_byte_offset_and_timestamp(middle_byte_offset)[1]
+                    # Lines without timestamp stop the bisection: the byte range may be larger than needed
+                    if line_timestamp is None or line_timestamp >= timestamp:
+                        high_byte_offset = middle_byte_offset
+                    else:
+                        low_byte_offset = middle_byte_offset + 1
+                return get_line_byte_offset_and_timestamp(low_byte_offset)[0]
+
+            byte_range = (get_byte_offset_of_first_line_at_or_after(date_min), get_byte_offset_of_first_line_at_or_after(date_max))
+
+        logger_config.print_and_log_info(f"{self.file_name}: fast seek on timestamp filters reads bytes {byte_range[0]} to {byte_range[1]} of {file_size}")
+        return byte_range
+
+    def read_byte_range(self, byte_range: Tuple[int, int]) -> Tuple[int, bytes]:
+        """Content of the byte range, and line number of its first line (lines before are only counted)"""
+        range_start_byte_offset, range_end_byte_offset = byte_range
+        first_line_number = 0
+        with open(self.file_full_path, mode="rb") as file:
+            while file.tell() < range_start_byte_offset:
+                first_line_number += file.read(min(1024 * 1024, range_start_byte_offset - file.tell())).count(b"\n")
+            return first_line_number, file.read(range_end_byte_offset - range_start_byte_offset)
+
+    def get_horodate_field_in_file_order(self, lines_chunks: List[ATCResultLinesChunk], field_name: str, file_order: npt.NDArray[np.int64]) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.bool_]]:
+        """Field values of all lines of chunks in file order, and mask of lines having the field. Horodate fields are only read on chunks with CHEURE, 0 elsewhere"""
+        has_field_by_chunk = [field_name in lines_chunk.values_by_variable_name and "CHEURE" in lines_chunk.values_by_variable_name for lines_chunk in lines_chunks]
+        field_values = np.concatenate(
+            [
+                lines_chunk.values_by_variable_name[field_name].astype(np.int64) if has_field else np.zeros(len(lines_chunk.line_numbers), dtype=np.int64)
+                for lines_chunk, has_field in zip(lines_chunks, has_field_by_chunk)
+            ]
+            + [np.empty(0, dtype=np.int64)]
+        )
+        has_field = np.concatenate([np.full(len(lines_chunk.line_numbers), has_field) for lines_chunk, has_field in zip(lines_chunks, has_field_by_chunk)] + [np.empty(0, dtype=np.bool_)])
+        return field_values[file_order], has_field[file_order]
+
     @line_profiler.profile
-    def create_result_line_if_needed(
-        self,
-        line_number: int,
-        horodate: Optional[datetime.datetime],
-        time_according_to_simulation_start: Optional[datetime.datetime],
-        equipment: Equipment,
-        all_fields_names_and_values: Dict[str, VARIABLE_STATE_TYPE],
-    ) -> None:
+    def add_result_lines_chunks(self, lines_chunks: List[ATCResultLinesChunk]) -> None:
+        """Horodate fields of all lines are fixed at once in file order, then lines passing timestamp filters are added to variables columns of their equipment"""
+        file_order = np.argsort(np.concatenate([lines_chunk.line_numbers for lines_chunk in lines_chunks] + [np.empty(0, dtype=np.int64)]), kind="stable")
+        position_in_file_order_by_line = np.empty(len(file_order), dtype=np.int64)
+        position_in_file_order_by_line[file_order] = np.arange(len(file_order), dtype=np.int64)
+
+        c_heures, has_cheure = self.get_horodate_field_in_file_order(lines_chunks, "CHEURE", file_order)
+        c_decalages, _ = self.get_horodate_field_in_file_order(lines_chunks, "CDECALAGE", file_order)
+        c_decenies, has_cdecennie = self.get_horodate_field_in_file_order(lines_chunks, "CDECENNIE", file_order)
+        c_jours, has_cjour = self.get_horodate_field_in_file_order(lines_chunks, "CJOUR", file_order)
+
+        fixed_c_heures, is_new_day = fix_cheures_and_detect_new_days(c_heures, has_cheure)
+        is_cheure_fixed = fixed_c_heures != c_heures
+        same_cheure_fixes_count = int(np.count_nonzero(is_cheure_fixed[1:] & (c_heures[1:] == fixed_c_heures[:-1])))
+
+        # Forced values are only added on lines with CHEURE
+        is_cjour_forced = has_cheure & ~has_cjour & bool(self.forced_cjour_value)
+        is_cdecennie_forced = has_cheure & ~has_cdecennie & bool(self.forced_cdecenie_value)
+        is_forced_cjour_new_day = is_new_day & is_cjour_forced
+        if self.forced_cjour_value:
+            c_jours = np.where(is_cjour_forced, self.forced_cjour_value + np.cumsum(is_forced_cjour_new_day), c_jours)
+            self.forced_cjour_value += int(np.count_nonzero(is_forced_cjour_new_day))
+        if self.forced_cdecenie_value:
+            c_decenies = np.where(is_cdecennie_forced, self.forced_cdecenie_value, c_decenies)
+
+        return_to_past_fixes_count = np.count_nonzero(is_cheure_fixed) - same_cheure_fixes_count
+        logger_config.print_and_log_info_if(
+            bool(is_cheure_fixed.any() or is_forced_cjour_new_day.any()),
+            f"File:{self.file_name}: fix Cheure of {same_cheure_fixes_count} lines to avoid same date and of {return_to_past_fixes_count} lines to avoid return to past, "
+            f"detect {np.count_nonzero(is_forced_cjour_new_day)} new days",
+        )
 
-        def variable_must_be_ignored_because_timestamp_filters(timestamp: datetime.datetime, all_filters: List[common_filters.DatesFilter.DateBetweenFilter]) -> bool:
-            return all(filter.do_passes(timestamp) for filter in all_filters) if all_filters else True
+        horodates = np.where(has_cheure, pert_variables_to_timestamps(c_heures=fixed_c_heures, c_decalages=c_decalages, c_decenies=c_decenies, c_jours=c_jours), np.datetime64("NaT", "us"))
 
-        if horodate:
-            if not variable_must_be_ignored_because_timestamp_filters(horodate, self.atc_test_result.variables_timestamp_creation_filters):
-                return
-        if time_according_to_simulation_start:
-            if not variable_must_be_ignored_because_timestamp_filters(time_according_to_simulation_start, self.atc_test_result.variables_timestamp_creation_filters):
-                return
+        first_result_line_index = self.atc_test_result.create_result_lines_indexes(len(file_order))
 
-        self.all_lines.append(
-            ATCTestResultLine(
-                line_number=line_number,
-                parent_file=self,
-                horodate=horodate,
-                time_according_to_simulation_start=time_according_to_simulation_start,
-                equipment=equipment,
-                all_fields_names_and_values=all_fields_names_and_values,
+        first_position_of_chunk = 0
+        for lines_chunk in lines_chunks:
+            positions_in_file_order = position_in_file_order_by_line[first_position_of_chunk : first_position_of_chunk + len(lines_chunk.line_numbers)]
+            first_position_of_chunk += len(lines_chunk.line_numbers)
+
+            values_by_variable_name = dict(lines_chunk.values_by_variable_name)
+            if "CHEURE" in values_by_variable_name and is_cheure_fixed[positions_in_file_order].any():
+                values_by_variable_name["CHEURE"] = get_column_with_fixed_values(
+                    values_by_variable_name["CHEURE"], fixed_values=fixed_c_heures[positions_in_file_order], is_fixed=is_cheure_fixed[positions_in_file_order]
+                )
+            # Missing fields are added on all lines of the chunk
+            if is_cjour_forced[positions_in_file_order].any():
+                values_by_variable_name["CJOUR"] = c_jours[positions_in_file_order]
+            if is_cdecennie_forced[positions_in_file_order].any():
+                values_by_variable_name["CDECENNIE"] = c_decenies[positions_in_file_order]
+
+            horodates_column = horodates[positions_in_file_order]
+            times_according_to_simulation_start = cast(npt.NDArray[np.datetime64], lines_chunk.times_according_to_simulation_start)
+            kept_lines_mask = get_timestamps_passing_filters_mask(horodates_column, self.atc_test_result.variables_timestamp_creation_filters) & get_timestamps_passing_filters_mask(
+                times_according_to_simulation_start, self.atc_test_result.variables_timestamp_creation_filters
             )
-        )
 
-        if len(self.all_lines) % 10000 == 0:
-            logger_config.print_and_log_info(
-                f"{len(self.all_lines)} lines created so far. Duration since last chunk {date_time_formats.format_duration_between_timestamps_to_string(self.last_chunk_created_timestamp,datetime.datetime.now())}"
+            lines_chunk.equipment.variables_columns.add_rows(
+                parent_file=self,
+                line_numbers=lines_chunk.line_numbers[kept_lines_mask],
+                horodates=horodates_column[kept_lines_mask],
+                times_according_to_simulation_start=times_according_to_simulation_start[kept_lines_mask],
+                result_line_indexes=first_result_line_index + positions_in_file_order[kept_lines_mask],
+                values_by_variable_name={variable_name: values[kept_lines_mask] for variable_name, values in values_by_variable_name.items()},
             )
-            self.last_chunk_created_timestamp = datetime.datetime.now()
+            self.kept_lines_count += int(np.count_nonzero(kept_lines_mask))
+
+
+@dataclass
+class ATCTestFileVariablesColumnsResult:
+    """Variables columns (not finalized) of the equipments of one ATC test file, computed in a worker process"""
+
+    all_variables_columns: List[EquipmentVariablesColumns]
+    first_result_line_index: int
+    result_lines_count: int
+    kept_lines_count: int
+
+
+def _compute_atc_test_file_variables_columns_in_worker(atc_test_file: ATCTestFile) -> ATCTestFileVariablesColumnsResult:
+    """File is a copy, with its own copy of the test result: all equipments of this copy are created by this file"""
+    first_result_line_index = atc_test_file.atc_test_result.result_lines_count
+    atc_test_file.compute_all_variables_states()
+
+    all_variables_columns = [equipment.variables_columns for equipment in atc_test_file.atc_test_result.equipments_library.all_equipments]
+    for variables_columns in all_variables_columns:
+        # Parent file is the one of the parent process, not this copy (nor the copy of the test result it refers to)
+        variables_columns.parent_files.clear()
+
+    return ATCTestFileVariablesColumnsResult(
+        all_variables_columns=all_variables_columns,
+        first_result_line_index=first_result_line_index,
+        result_lines_count=atc_test_file.atc_test_result.result_lines_count - first_result_line_index,
+        kept_lines_count=atc_test_file.kept_lines_count,
+    )
 
 
 @dataclass
@@ -341,14 +645,16 @@ class ATCTestResult(ABC):
     def __post_init__(self) -> None:
         self.equipments_library = EquipmentsLibrary()
         self.all_variables_unsorted: List[Variable] = []
-        self.all_variables_states_sorted_by_line_number: List[VariableState] = []
-        self._all_variables_states_changes_unsorted: List[VariableStateChange] = []
-        self.all_variables_states_changes_sorted_by_timestamp: List[VariableStateChange] = []
+        self.variables_states_count = 0
+        self.variables_states_changes_count = 0
         self.variables_names_creation_filters: List[VariableNameFilter] = []
         self.variables_timestamp_creation_filters: List[common_filters.DatesFilter.DateBetweenFilter] = []
+        self.timestamp_filters_fast_seek_enabled = False
+        self.parallel_build = False
+        self.parallel_build_max_workers: Optional[int] = None
         self.output_directory_path = "output"
         self.all_atc_test_files: List[ATCTestFile] = []
-        self.result_lines: List[ATCTestResultLine] = []
+        self.result_lines_count = 0
         self.variable_name_must_be_created_cache_result: Dict[str, bool] = {}
 
         logger_config.print_and_log_info(f"Build {self.label}")
@@ -361,44 +667,123 @@ class ATCTestResult(ABC):
         self.variable_name_must_be_created_cache_result[variable_name] = variable_name_must_be_kept_after_filters(variable_name=variable_name, all_filters=self.variables_names_creation_filters)
         return self.variable_name_must_be_created(variable_name=variable_name)
 
+    def create_result_lines_indexes(self, result_lines_count: int) -> int:
+        """Returns first index of the consecutive result lines indexes created"""
+        self.result_lines_count += result_lines_count
+        return self.result_lines_count - result_lines_count
+
     @logger_config.stopwatch_decorator()
     @line_profiler.profile
     def process(self) -> None:
-        for atc_test_file in self.all_atc_test_files:
-            atc_test_file.compute_all_variables_states()
-            logger_config.print_and_log_info(f"In file {atc_test_file.file_name}, {len(atc_test_file.all_lines)} kept")
+        if self.parallel_build:
+            self._compute_all_files_variables_states_in_parallel()
+        else:
+            for atc_test_file in self.all_atc_test_files:
+                atc_test_file.compute_all_variables_states()
+                logger_config.print_and_log_info(f"In file {atc_test_file.file_name}, {atc_test_file.kept_lines_count} kept")
 
         for equipment in self.equipments_library.all_equipments:
+            equipment.variables_columns.finalize()
+            for variable_name in equipment.variables_columns.columns_by_variable_name:
+                equipment.variables_library.get_or_create_variable_by_name(variable_name=variable_name)
             self.all_variables_unsorted += equipment.variables_library.all_variables
 
         self._compute_variables_states()
         self._compute_variables_states_changes()
 
         logger_config.print_and_log_info(f"{len(self.all_variables_unsorted)} variables_unsorted")
-        logger_config.print_and_log_info(f"{len(self.all_variables_states_sorted_by_line_number)} all_variables_states_sorted_by_line_number")
-        logger_config.print_and_log_info(f"{len(self._all_variables_states_changes_unsorted)} _all_variables_states_changes_unsorted")
-        logger_config.print_and_log_info(f"{len(self.all_variables_states_changes_sorted_by_timestamp)} all_variables_states_changes_sorted_by_timestamp")
+        logger_config.print_and_log_info(f"{self.variables_states_count} variables states")
+        logger_config.print_and_log_info(f"{self.variables_states_changes_count} variables states changes")
+
+    @logger_config.stopwatch_decorator(inform_beginning=True, monitor_ram_usage=True)
+    def _compute_all_files_variables_states_in_parallel(self) -> None:
+        """Each file is parsed and reduced to variables columns in a process pool.
+        Results are merged in files order, so the test result is identical to a sequential build"""
+        with ProcessPoolExecutor(max_workers=self.parallel_build_max_workers) as executor:
+            # All results are received before merging: files are sent to workers before any change of this test result
+            all_results = list(executor.map(_compute_atc_test_file_variables_columns_in_worker, self.all_atc_test_files))
+
+        for atc_test_file, result in zip(self.all_atc_test_files, all_results):
+            first_result_line_index = self.create_result_lines_indexes(result.result_lines_count)
+            for variables_columns in result.all_variables_columns:
+                equipment = self.equipments_library.get_or_create_equipment_by_name(variables_columns.equipment.raw_name)
+                equipment.variables_columns.add_rows_of_other_variables_columns(
+                    parent_file=atc_test_file, other_variables_columns=variables_columns, result_line_indexes_offset=first_result_line_index - result.first_result_line_index
+                )
+            atc_test_file.kept_lines_count = result.kept_lines_count
+            logger_config.print_and_log_info(f"In file {atc_test_file.file_name}, {atc_test_file.kept_lines_count} kept")
 
     @logger_config.stopwatch_decorator()
     @line_profiler.profile
     def _compute_variables_states(self) -> None:
-        all_variables_unsorted = [state for variable in self.all_variables_unsorted for state in variable.states_chronologically_sorted]
-        self.all_variables_states_sorted_by_line_number = sorted(all_variables_unsorted, key=lambda state: state.result_line.line_number)
-        assert self.all_variables_states_sorted_by_line_number
+        # Initial state of each variable is not counted in its states
+        self.variables_states_count = sum(max(len(variable.column.values) - 1, 0) for variable in self.all_variables_unsorted)
+        assert self.variables_states_count
 
     @logger_config.stopwatch_decorator(inform_beginning=True, monitor_ram_usage=True)
     @line_profiler.profile
     def _compute_variables_states_changes(self) -> None:
         for variable in self.all_variables_unsorted:
-            previous_state = None
-            for state in variable.states_chronologically_sorted:
-                if previous_state is not None and state.value != previous_state.value:
-                    variable_state_change = VariableStateChange(previous_state, state)
-                    self._all_variables_states_changes_unsorted.append(variable_state_change)
-                previous_state = state
+            variable.column.compute_states_changes_positions()
+        self.variables_states_changes_count = sum(len(variable.column.states_changes_positions) for variable in self.all_variables_unsorted)
+
+    def _get_variables_states_report_columns(
+        self, variables: List[Variable], states_positions_by_variable: List[npt.NDArray[np.int64]], with_previous_state: bool, sort_by_line_number: bool = True
+    ) -> Dict[str, List[Any]]:
+        """Report fields of the given states of the variables, one list by field.
+        Sort by line number is stable: for the same line number, states keep the order of variables then of positions"""
+        fields_chunks: Dict[str, List[npt.NDArray[Any]]] = {
+            field_name: []
+            for field_name in ["variable_index", "position", "line", "horodate", "time_according_to_simulation_start", "value"]
+            + (["previous_value", "previous_state_duration"] if with_previous_state else [])
+        }
+        for variable_index, (variable, states_positions) in enumerate(zip(variables, states_positions_by_variable)):
+            equipment_columns = variable.equipment.variables_columns
+            variable_rows = variable.column.get_rows()
+            states_rows = variable_rows[states_positions]
+            fields_chunks["variable_index"].append(np.full(len(states_positions), variable_index, dtype=np.int64))
+            fields_chunks["position"].append(states_positions)
+            fields_chunks["line"].append(equipment_columns.line_numbers[states_rows])
+            fields_chunks["horodate"].append(equipment_columns.horodates[states_rows])
+            fields_chunks["time_according_to_simulation_start"].append(equipment_columns.times_according_to_simulation_start[states_rows])
+            fields_chunks["value"].append(variable.column.values[states_positions])
+            if with_previous_state:
+                previous_states_rows = variable_rows[states_positions - 1]
+                fields_chunks["previous_value"].append(variable.column.values[states_positions - 1])
+                fields_chunks["previous_state_duration"].append(equipment_columns.horodates[states_rows] - equipment_columns.horodates[previous_states_rows])
+
+        fields = {field_name: concatenate_columns(chunks) for field_name, chunks in fields_chunks.items()}
+        if sort_by_line_number:
+            order_by_line_number = np.argsort(fields["line"], kind="stable")
+            fields = {field_name: field_values[order_by_line_number] for field_name, field_values in fields.items()}
+        return {field_name: field_values.tolist() for field_name, field_values in fields.items()}
+
+    def _get_variables_states_sorted_by_line_number(self, states_changes_only: bool) -> List[Tuple[Variable, int]]:
+        states_positions_by_variable = [
+            variable.column.states_changes_positions if states_changes_only else np.arange(1, len(variable.column.values), dtype=np.int64) for variable in self.all_variables_unsorted
+        ]
+        report_columns = self._get_variables_states_report_columns(variables=self.all_variables_unsorted, states_positions_by_variable=states_positions_by_variable, with_previous_state=False)
+        return [(self.all_variables_unsorted[variable_index], position) for variable_index, position in zip(report_columns["variable_index"], report_columns["position"])]
+
+    @property
+    def all_variables_states_sorted_by_line_number(self) -> List[VariableState]:
+        """Created on demand from variables columns"""
+        return [variable.get_state(position) for variable, position in self._get_variables_states_sorted_by_line_number(states_changes_only=False)]
+
+    @property
+    def all_variables_states_changes_sorted_by_timestamp(self) -> List[VariableStateChange]:
+        """Created on demand from variables columns"""
+        return [
+            VariableStateChange(previous_state=variable.get_state(position - 1), new_state=variable.get_state(position))
+            for variable, position in self._get_variables_states_sorted_by_line_number(states_changes_only=True)
+        ]
 
-        with logger_config.stopwatch_with_label("Order states changes"):
-            self.all_variables_states_changes_sorted_by_timestamp = sorted(self._all_variables_states_changes_unsorted, key=lambda state_change: state_change.new_state.result_line.line_number)
+    @property
+    def result_lines(self) -> List[ATCTestResultLine]:
+        """Created on demand from variables columns, in creation order"""
+        equipments_and_rows = [(equipment, row) for equipment in self.equipments_library.all_equipments for row in range(equipment.variables_columns.rows_count)]
+        result_line_indexes = np.concatenate([equipment.variables_columns.result_line_indexes for equipment in self.equipments_library.all_equipments] + [np.empty(0, dtype=np.int64)])
+        return [equipments_and_rows[position][0].variables_columns.get_result_line(equipments_and_rows[position][1]) for position in np.argsort(result_line_indexes).tolist()]
 
     def create_report_all_variables(self, variables_names_reports_filters: Optional[List[VariableNameFilter]] = None, files_base_name: Optional[str] = None) -> None:
         if variables_names_reports_filters is None:
@@ -412,22 +797,33 @@ class ATCTestResult(ABC):
         self._create_report_all_variables_states_variable_by_rows(variables_names_reports_filters=variables_names_reports_filters, files_base_name=files_base_name)
 
     def _create_report_all_variables_state_changes(self, variables_names_reports_filters: List[VariableNameFilter], files_base_name: str) -> None:
+        variables = [variable for variable in self.all_variables_unsorted if variable_name_must_be_kept_after_filters(variable.name, variables_names_reports_filters)]
+        report_columns = self._get_variables_states_report_columns(
+            variables=variables, states_positions_by_variable=[variable.column.states_changes_positions for variable in variables], with_previous_state=True
+        )
         reports_utils.save_rows_to_output_files(
             rows_as_list_dict=[
                 OrderedDict(
                     {
-                        "horodate": state_change.new_state.result_line.horodate,
-                        "Date according to simulation start": state_change.new_state.result_line.time_according_to_simulation_start,
-                        "line": state_change.new_state.result_line.line_number,
-                        "equipment": state_change.variable.equipment.name,
-                        "variable": state_change.variable.name,
-                        "old_value": state_change.previous_state.value if state_change.previous_state else None,
-                        "new_value": state_change.new_state.value,
-                        "previous_state_duration": state_change.previous_state_duration,
+                        "horodate": horodate,
+                        "Date according to simulation start": time_according_to_simulation_start,
+                        "line": line_number,
+                        "equipment": variables[variable_index].equipment.name,
+                        "variable": variables[variable_index].name,
+                        "old_value": previous_value,
+                        "new_value": value,
+                        "previous_state_duration": previous_state_duration,
                     }
                 )
-                for state_change in self.all_variables_states_changes_sorted_by_timestamp
-                if variable_name_must_be_kept_after_filters(state_change.variable.name, variables_names_reports_filters)
+                for variable_index, horodate, time_according_to_simulation_start, line_number, previous_value, value, previous_state_duration in zip(
+                    report_columns["variable_index"],
+                    report_columns["horodate"],
+                    report_columns["time_according_to_simulation_start"],
+                    report_columns["line"],
+                    report_columns["previous_value"],
+                    report_columns["value"],
+                    report_columns["previous_state_duration"],
+                )
             ],
             file_base_name=f"{files_base_name}_state_changes",
             output_directory_path=self.output_directory_path,
@@ -435,21 +831,26 @@ class ATCTestResult(ABC):
         )
 
     def _create_report_all_variables_states_variable_by_rows(self, variables_names_reports_filters: List[VariableNameFilter], files_base_name: str) -> None:
+        variables = [variable for variable in self.all_variables_unsorted if variable_name_must_be_kept_after_filters(variable.name, variables_names_reports_filters)]
+        report_columns = self._get_variables_states_report_columns(
+            variables=variables, states_positions_by_variable=[np.arange(1, len(variable.column.values), dtype=np.int64) for variable in variables], with_previous_state=False
+        )
 
         reports_utils.save_rows_to_output_files(
             rows_as_list_dict=[
                 OrderedDict(
                     {
-                        "horodate": state.result_line.horodate,
-                        "Date according to simulation start": state.result_line.time_according_to_simulation_start,
-                        "line": state.result_line.line_number,
-                        "equipment": state.variable.equipment.name,
-                        "variable": state.variable.name,
-                        "value": state.value,
+                        "horodate": horodate,
+                        "Date according to simulation start": time_according_to_simulation_start,
+                        "line": line_number,
+                        "equipment": variables[variable_index].equipment.name,
+                        "variable": variables[variable_index].name,
+                        "value": value,
                     }
                 )
-                for state in self.all_variables_states_sorted_by_line_number
-                if variable_name_must_be_kept_after_filters(state.variable.name, variables_names_reports_filters)
+                for variable_index, horodate, time_according_to_simulation_start, line_number, value in zip(
+                    report_columns["variable_index"], report_columns["horodate"], report_columns["time_according_to_simulation_start"], report_columns["line"], report_columns["value"]
+                )
             ],
             file_base_name=f"{files_base_name}_states_variable_by_rows",
             output_directory_path=self.output_directory_path,
@@ -458,20 +859,34 @@ class ATCTestResult(ABC):
 
     def _create_report_all_variables_states_variable_by_column(self, variables_names_reports_filters: List[VariableNameFilter], files_base_name: str) -> None:
 
-        rows_as_list_dict = []
-        # for state in self.all_variables_states_sorted_by_timestamp if variable_name_must_be_kept_after_filters(state.variable.name, variables_names_reports_filters):
-        for result_line in self.result_lines:
-            variables_states = [state for state in result_line.all_variables_states if variable_name_must_be_kept_after_filters(state.variable.name, variables_names_reports_filters)]
-            if variables_states:
-                result_line_dict: Dict[str, VARIABLE_STATE_TYPE] = OrderedDict()
-                rows_as_list_dict.append(result_line_dict)
-                result_line_dict["horodate"] = result_line.horodate
-                result_line_dict["Date according to simulation start"] = result_line.time_according_to_simulation_start
-                result_line_dict["line"] = result_line.line_number
-                result_line_dict["equipment"] = result_line.equipment.name
-
-            for variable_state in variables_states:
-                result_line_dict[variable_state.variable.name] = variable_state.value
+        # Lines of all equipments, by creation order
+        result_line_dict_by_result_line_index: Dict[int, Dict[str, VARIABLE_STATE_TYPE]] = dict()
+        for equipment in self.equipments_library.all_equipments:
+            equipment_columns = equipment.variables_columns
+            horodates = equipment_columns.horodates.tolist()
+            times_according_to_simulation_start = equipment_columns.times_according_to_simulation_start.tolist()
+            line_numbers = equipment_columns.line_numbers.tolist()
+            result_line_dicts: List[Optional[Dict[str, VARIABLE_STATE_TYPE]]] = [None] * equipment_columns.rows_count
+
+            for variable in equipment.variables_library.all_variables:
+                if not variable_name_must_be_kept_after_filters(variable.name, variables_names_reports_filters):
+                    continue
+                for row, value in zip(variable.column.get_rows().tolist(), variable.column.values.tolist()):
+                    result_line_dict = result_line_dicts[row]
+                    if result_line_dict is None:
+                        result_line_dict = OrderedDict()
+                        result_line_dict["horodate"] = horodates[row]
+                        result_line_dict["Date according to simulation start"] = times_according_to_simulation_start[row]
+                        result_line_dict["line"] = line_numbers[row]
+                        result_line_dict["equipment"] = equipment.name
+                        result_line_dicts[row] = result_line_dict
+                    result_line_dict[variable.name] = value
+
+            for result_line_index, result_line_dict in zip(equipment_columns.result_line_indexes.tolist(), result_line_dicts):
+                if result_line_dict is not None:
+                    result_line_dict_by_result_line_index[result_line_index] = result_line_dict
+
+        rows_as_list_dict = [result_line_dict_by_result_line_index[result_line_index] for result_line_index in sorted(result_line_dict_by_result_line_index)]
 
         reports_utils.save_rows_to_output_files(
             rows_as_list_dict=rows_as_list_dict,
@@ -485,36 +900,51 @@ class ATCTestResult(ABC):
             files_base_name = f"{self.label}_variable_{variable.name}"
 
         # all state changes
+        states_changes_report_columns = self._get_variables_states_report_columns(
+            variables=[variable], states_positions_by_variable=[variable.column.states_changes_positions], with_previous_state=True, sort_by_line_number=False
+        )
         reports_utils.save_rows_to_output_files(
             rows_as_list_dict=[
                 OrderedDict(
                     {
-                        "horodate": state_change.new_state.result_line.horodate,
-                        "Date according to simulation start": state_change.new_state.result_line.time_according_to_simulation_start,
-                        "line": state_change.new_state.result_line.line_number,
-                        "old_value": state_change.previous_state.value if state_change.previous_state else None,
-                        "new_value": state_change.new_state.value,
-                        "previous_state_duration": state_change.previous_state_duration,
+                        "horodate": horodate,
+                        "Date according to simulation start": time_according_to_simulation_start,
+                        "line": line_number,
+                        "old_value": previous_value,
+                        "new_value": value,
+                        "previous_state_duration": previous_state_duration,
                     }
                 )
-                for state_change in variable.states_changes_chronologically_sorted
+                for horodate, time_according_to_simulation_start, line_number, previous_value, value, previous_state_duration in zip(
+                    states_changes_report_columns["horodate"],
+                    states_changes_report_columns["time_according_to_simulation_start"],
+                    states_changes_report_columns["line"],
+                    states_changes_report_columns["previous_value"],
+                    states_changes_report_columns["value"],
+                    states_changes_report_columns["previous_state_duration"],
+                )
             ],
             file_base_name=f"{files_base_name}_state_changes",
             output_directory_path=self.output_directory_path,
             suffix_file_name_by_date=reports_utils.SuffixFileNameByDate.DO_BOTH,
         )
 
+        states_report_columns = self._get_variables_states_report_columns(
+            variables=[variable], states_positions_by_variable=[np.arange(1, len(variable.column.values), dtype=np.int64)], with_previous_state=False, sort_by_line_number=False
+        )
         reports_utils.save_rows_to_output_files(
             rows_as_list_dict=[
                 OrderedDict(
                     {
-                        "horodate": state.result_line.horodate,
-                        "Date according to simulation start": state.result_line.time_according_to_simulation_start,
-                        "line": state.result_line.line_number,
-                        "value": state.value,
+                        "horodate": horodate,
+                        "Date according to simulation start": time_according_to_simulation_start,
+                        "line": line_number,
+                        "value": value,
                     }
                 )
-                for state in variable.states_chronologically_sorted
+                for horodate, time_according_to_simulation_start, line_number, value in zip(
+                    states_report_columns["horodate"], states_report_columns["time_according_to_simulation_start"], states_report_columns["line"], states_report_columns["value"]
+                )
             ],
             file_base_name=f"{files_base_name}_all_states",
             output_directory_path=self.output_directory_path,
@@ -539,6 +969,18 @@ class ATCTestResult(ABC):
             self._atc_test_result_created.variables_timestamp_creation_filters.append(timestamp_filter)
             return self
 
+        def with_parallel_build(self, max_workers: Optional[int] = None) -> Self:
+            """Each file is parsed in a process pool, then its variables columns are merged in files order"""
+            self._atc_test_result_created.parallel_build = True
+            self._atc_test_result_created.parallel_build_max_workers = max_workers
+            return self
+
+        def enable_timestamp_filters_fast_seek(self) -> Self:
+            """Only lines around timestamp filters are parsed: their byte offsets are found by bisection on line timestamps.
+            Horodate fixes (CHEURE, new days) then only depend on the lines read"""
+            self._atc_test_result_created.timestamp_filters_fast_seek_enabled = True
+            return self
+
         def build(self) -> "ATCTestResult":
 
             # pr = cProfile.Profile()
@@ -584,6 +1026,92 @@ def pert_variable_to_timestamp(c_heure: int, c_decalage: int, c_decenie: int, c_
     return local_time
 
 
+def pert_variables_to_timestamps(c_heures: npt.NDArray[np.int64], c_decalages: npt.NDArray[np.int64], c_decenies: npt.NDArray[np.int64], c_jours: npt.NDArray[np.int64]) -> npt.NDArray[np.datetime64]:
+    """Same timestamps as pert_variable_to_timestamp on each line"""
+    decades_start_dates = (2000 + c_decenies * 10 - 1970).astype("datetime64[Y]").astype("datetime64[us]")
+    timestamps: npt.NDArray[np.datetime64] = decades_start_dates + c_jours.astype("timedelta64[D]") + (c_heures + c_decalages).astype("timedelta64[ms]")
+    return timestamps
+
+
+def fix_cheures_and_detect_new_days(c_heures: npt.NDArray[np.int64], has_cheure: npt.NDArray[np.bool_]) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.bool_]]:
+    """CHEURE of lines in file order, fixed to be always increasing: a CHEURE not greater than the previous one becomes previous one + 1.
+    Except on change of day (previous line just before midnight and current line just after), and after a line without CHEURE or with CHEURE 0.
+    Such lines start runs where fixed CHEURE - line position is a cumulative maximum.
+    A change of day or a CHEURE 0 depends on fixed CHEURE of the previous line: lines that may start a run are found in one pass,
+    then lines are fixed by segments between them, with one cumulative maximum per segment"""
+    lines_count = len(c_heures)
+    positions = np.arange(lines_count, dtype=np.int64)
+    c_heures_minus_positions = c_heures - positions
+    is_run_start = has_cheure.copy()
+    is_run_start[1:] &= ~has_cheure[:-1]
+    is_new_day = np.zeros(lines_count, dtype=np.bool_)
+    fixed_c_heures = c_heures.copy()
+
+    # Adding run starts only lowers fixed CHEURE: lines fixed with runs split on lines without CHEURE only are an upper bound
+    upper_bound_fixed_c_heures = get_cumulative_maximum_by_runs(c_heures_minus_positions, is_run_start) + positions
+    possible_run_starts = np.zeros(lines_count, dtype=np.bool_)
+    possible_run_starts[1:] = (c_heures[1:] < 100) & ((upper_bound_fixed_c_heures[:-1] > JUST_BEFORE_MIDNIGHT_IN_MILLISECONDS) | (c_heures[:-1] == 0))
+    possible_run_starts &= has_cheure & ~is_run_start
+
+    first_position_of_segment = 0
+    for end_position_of_segment in np.flatnonzero(possible_run_starts).tolist() + [lines_count]:
+        segment = slice(first_position_of_segment, end_position_of_segment)
+        segment_c_heures_minus_positions = c_heures_minus_positions[segment].copy()
+        if first_position_of_segment > 0 and not is_run_start[first_position_of_segment]:
+            # Run continues from the previous segment
+            segment_c_heures_minus_positions[0] = max(segment_c_heures_minus_positions[0], fixed_c_heures[first_position_of_segment - 1] - (first_position_of_segment - 1))
+        fixed_c_heures[segment] = get_cumulative_maximum_by_runs(segment_c_heures_minus_positions, is_run_start[segment]) + positions[segment]
+
+        if end_position_of_segment < lines_count:
+            previous_fixed_c_heure = fixed_c_heures[end_position_of_segment - 1]
+            is_new_day[end_position_of_segment] = previous_fixed_c_heure > JUST_BEFORE_MIDNIGHT_IN_MILLISECONDS
+            is_run_start[end_position_of_segment] = is_new_day[end_position_of_segment] or previous_fixed_c_heure == 0
+        first_position_of_segment = end_position_of_segment
+
+    fixed_c_heures[~has_cheure] = c_heures[~has_cheure]
+    return fixed_c_heures, is_new_day
+
+
+def get_cumulative_maximum_by_runs(values: npt.NDArray[np.int64], is_run_start: npt.NDArray[np.bool_]) -> npt.NDArray[np.int64]:
+    """Cumulative maximum restarted on each run start, in one pass: each run is offset above all previous runs"""
+    if not len(values):
+        return values.copy()
+    runs_offsets = np.cumsum(is_run_start) * (int(values.max() - values.min()) + 1)
+    return np.maximum.accumulate(values + runs_offsets) - runs_offsets
+
+
+def get_column_with_fixed_values(column: npt.NDArray[Any], fixed_values: npt.NDArray[np.int64], is_fixed: npt.NDArray[np.bool_]) -> npt.NDArray[Any]:
+    if column.dtype == np.int64:
+        return fixed_values
+    # Values that are not fixed keep their type (CHEURE 0 and 1 are read as booleans)
+    fixed_column = column.astype(object)
+    fixed_column[is_fixed] = fixed_values[is_fixed].tolist()
+    return convert_values_to_column(fixed_column.tolist())
+
+
+def read_line_at_byte_offset(file: BinaryIO, byte_offset: int) -> Tuple[int, bytes]:
+    """First line beginning at or after the byte offset, with its byte offset. Empty at end of file"""
+    file.seek(max(byte_offset - 1, 0))
+    if byte_offset > 0:
+        # End of the line containing the previous byte
+        file.readline()
+    line_byte_offset = file.tell()
+    return line_byte_offset, file.readline()
+
+
+def decode_raw_lines(raw_bytes: bytes) -> List[str]:
+    """Same lines as reading the file in text mode"""
+    return io.TextIOWrapper(io.BytesIO(raw_bytes), encoding=ATC_LOG_FILES_ENCODING).readlines()
+
+
+def get_timestamps_passing_filters_mask(timestamps: npt.NDArray[np.datetime64], all_filters: List[common_filters.DatesFilter.DateBetweenFilter]) -> npt.NDArray[np.bool_]:
+    """Same result as DateBetweenFilter.do_passes on each timestamp. Unknown timestamps (NaT) are not filtered"""
+    passes_mask = np.ones(len(timestamps), dtype=np.bool_)
+    for timestamp_filter in all_filters:
+        passes_mask &= (timestamps > np.datetime64(timestamp_filter.date_min, "us")) & (timestamps < np.datetime64(timestamp_filter.date_max, "us"))
+    return passes_mask | np.isnat(timestamps)
+
+
 def variable_name_must_be_kept_after_filters(variable_name: str, all_filters: List[VariableNameFilter]) -> bool:
     # if not all_filters:
     #    return True
@@ -606,3 +1134,10 @@ def convert_to_proper_type(value: str) -> VARIABLE_STATE_TYPE:
 
     # Keep as string
     return value
+
+
+def convert_raw_values_to_column(raw_values: Sequence[str] | npt.NDArray[Any]) -> npt.NDArray[Any]:
+    """Same values as convert_to_proper_type on each raw value, but each distinct raw value is only converted once"""
+    codes, distinct_raw_values = pd.factorize(np.asarray(raw_values, dtype=object))
+    assert (codes >= 0).all(), "Missing raw values"
+    return convert_values_to_column([convert_to_proper_type(raw_value) for raw_value in distinct_raw_values])[codes]
@@ -1,8 +1,14 @@
+import csv
+import io
 from dataclasses import dataclass
+from datetime import datetime
 import line_profiler
 
 from typing import List, Self, Optional, cast
 
+import numpy as np
+import pandas as pd
+
 from stsloganalyzis.atc import atc_logs
 from logger import logger_config
 
@@ -15,14 +21,32 @@ class PerturboFile(atc_logs.ATCTestFile):
     def __post_init__(self) -> None:
         super().__post_init__()
         self.variables_line_dictionary: atc_logs.ATCVariablesLineDictionary
-        self.all_values_raw_lines: List[str] = []
-        self.create_dictionary_and_raw_line_values()
-
-    @logger_config.stopwatch_decorator(inform_beginning=True, monitor_ram_usage=True)
-    def create_dictionary_and_raw_line_values(self) -> None:
-        all_raw_lines = self.open_and_get_all_raw_lines()
-        self.variables_line_dictionary = atc_logs.ATCVariablesLineDictionary(all_raw_lines[0].split(atc_logs.ATC_LOG_FILES_FIELDS_SEPARATOR))
-        self.all_values_raw_lines = all_raw_lines[1:]
+        self.create_dictionary()
+
+    def create_dictionary(self) -> None:
+        with open(self.file_full_path, mode="r", encoding=atc_logs.ATC_LOG_FILES_ENCODING) as file:
+            header_raw_line = file.readline()
+        assert header_raw_line
+        self.variables_line_dictionary = atc_logs.ATCVariablesLineDictionary(header_raw_line.split(atc_logs.ATC_LOG_FILES_FIELDS_SEPARATOR))
+
+        with open(self.file_full_path, mode="rb") as file:
+            self.first_values_line_byte_offset = len(file.readline())
+
+    def is_cjour_forced(self) -> bool:
+        """Forced CJOUR is incremented on each change of day detected while fixing lines in file order: the day of a line read alone is not known"""
+        return bool(self.forced_cjour_value) and "CJOUR" not in self.variables_line_dictionary.all_fields_names
+
+    def get_raw_line_timestamp(self, raw_line: str) -> Optional[datetime]:
+        all_fields_names_and_raw_values = dict(zip(self.variables_line_dictionary.all_fields_names, raw_line.split(atc_logs.ATC_LOG_FILES_FIELDS_SEPARATOR)))
+        try:
+            return atc_logs.pert_variable_to_timestamp(
+                c_heure=int(all_fields_names_and_raw_values["CHEURE"]),
+                c_decalage=int(all_fields_names_and_raw_values.get("CDECALAGE", 0)),
+                c_decenie=int(all_fields_names_and_raw_values.get("CDECENNIE", self.forced_cdecenie_value or 0)),
+                c_jour=int(all_fields_names_and_raw_values.get("CJOUR", 0)),
+            )
+        except (KeyError, ValueError):
+            return None
 
     def get_equipment_name(self) -> str:
         return self.equipment_name
@@ -37,20 +61,49 @@ class PerturboFile(atc_logs.ATCTestFile):
         equipment = self.get_equipment(self.atc_test_result)
         assert isinstance(equipment, atc_logs.Equipment)
 
-        previous_all_fields_names_and_values = None
-        for line_number, value_raw_line in enumerate(self.all_values_raw_lines):
-
-            all_fields_names_and_values = self.variables_line_dictionary.get_all_fields_names_and_values_in_data_line(value_raw_line, self.atc_test_result)
-            self.add_missing_horodate_fields_and_ensure_incremental_horodate(all_fields_names_and_values, previous_all_fields_names_and_values)
-
-            self.create_result_line_if_needed(
-                line_number=line_number,
-                horodate=self.variables_line_dictionary.get_horodate_from_cheure_etc(all_fields_names_and_values),
-                time_according_to_simulation_start=None,
-                equipment=equipment,
-                all_fields_names_and_values=all_fields_names_and_values,
-            )
-            previous_all_fields_names_and_values = all_fields_names_and_values
+        all_fields_names = self.variables_line_dictionary.all_fields_names
+        kept_fields_indexes = self.variables_line_dictionary.get_kept_fields_indexes(self.atc_test_result)
+
+        if self.is_cjour_forced():
+            logger_config.print_and_log_info_if(self.atc_test_result.timestamp_filters_fast_seek_enabled, f"{self.file_name}: CJOUR is forced, no fast seek on timestamp filters, whole file is read")
+            byte_range = None
+        else:
+            byte_range = self.get_timestamp_filters_byte_range(first_byte_offset=self.first_values_line_byte_offset)
+        if byte_range is None:
+            first_line_number = 0
+            raw_values_source: str | io.BytesIO = self.file_full_path
+        else:
+            first_file_line_number, raw_values_bytes = self.read_byte_range(byte_range)
+            # Header is not a values line
+            first_line_number = first_file_line_number - 1
+            raw_values_source = io.BytesIO(raw_values_bytes)
+
+        # Only kept columns are parsed, all as raw strings: they are converted by column afterwards
+        raw_values_data_frame = pd.read_csv(
+            raw_values_source,
+            sep=atc_logs.ATC_LOG_FILES_FIELDS_SEPARATOR,
+            header=None,
+            skiprows=1 if byte_range is None else 0,
+            names=list(range(len(all_fields_names))),
+            usecols=kept_fields_indexes if kept_fields_indexes else [0],
+            dtype=str,
+            keep_default_na=False,
+            quoting=csv.QUOTE_NONE,
+            encoding=atc_logs.ATC_LOG_FILES_ENCODING,
+        )
+        assert not raw_values_data_frame.isna().to_numpy().any(), f"Inconsistent number of fields in {self.file_full_path}"
+        logger_config.print_and_log_info(f"Perturbo file {self.file_full_path} has {len(raw_values_data_frame)} values lines")
+
+        values_by_variable_name = dict()
+        for field_index in kept_fields_indexes:
+            raw_values = raw_values_data_frame[field_index]
+            if field_index == len(all_fields_names) - 1:
+                # Lines are right stripped
+                raw_values = raw_values.str.rstrip()
+            values_by_variable_name[all_fields_names[field_index]] = atc_logs.convert_raw_values_to_column(raw_values.to_numpy())
+
+        line_numbers = np.arange(first_line_number, first_line_number + len(raw_values_data_frame), dtype=np.int64)
+        self.add_result_lines_chunks([atc_logs.ATCResultLinesChunk(equipment=equipment, line_numbers=line_numbers, values_by_variable_name=values_by_variable_name)])
 
 
 class PerturboTestResult(atc_logs.ATCTestResult):
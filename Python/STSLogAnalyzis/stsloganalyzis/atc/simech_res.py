@@ -1,9 +1,13 @@
+import mmap
+import re
 from dataclasses import dataclass
 
 from enum import IntEnum, auto, Enum
 
 from datetime import datetime, timedelta
-from typing import List, Self, Dict
+from typing import List, Optional, Self, Dict, Tuple
+
+import numpy as np
 
 from stsloganalyzis.atc import atc_logs
 from logger import logger_config
@@ -35,6 +39,29 @@ class SimechResFileFirstColumnsByIndex(IntEnum):
     EQUIPMENT_OR_SIMECH_SCENARIO_INFO = auto()
 
 
+SIMULATION_START_AT_RAW_LINE_PATTERN = re.compile(rb'^.*SIMULATION_ENDED;"SIMU_START_AT:.*\n?', re.MULTILINE)
+SD_FIELDS_RAW_LINE_PATTERN = re.compile(rb"^[^;\n]*;[^;\n]*;SD_FIELDS;.*\n?", re.MULTILINE)
+
+
+class SimechResEquipmentRawLines:
+    """Raw values of SD lines of one equipment read with the same variables, until they are converted to a chunk of columns"""
+
+    def __init__(self, equipment: atc_logs.Equipment, variables_line_dictionary: atc_logs.ATCVariablesLineDictionary) -> None:
+        self.equipment = equipment
+        self.variables_line_dictionary = variables_line_dictionary
+        self.line_numbers: List[int] = []
+        self.simulation_times_in_ms_since_beginning: List[int] = []
+        self.all_raw_values_rows: List[List[str]] = []
+
+    def convert_to_lines_chunk(self, simulation_start_at_timestamp: datetime, test_result: atc_logs.ATCTestResult) -> atc_logs.ATCResultLinesChunk:
+        return atc_logs.ATCResultLinesChunk(
+            equipment=self.equipment,
+            line_numbers=np.array(self.line_numbers, dtype=np.int64),
+            values_by_variable_name=self.variables_line_dictionary.convert_all_raw_values_rows_to_columns(all_raw_values_rows=self.all_raw_values_rows, test_result=test_result),
+            times_according_to_simulation_start=np.datetime64(simulation_start_at_timestamp, "us") + np.array(self.simulation_times_in_ms_since_beginning, dtype="timedelta64[ms]"),
+        )
+
+
 @dataclass
 class SimechResFile(atc_logs.ATCTestFile):
 
@@ -55,11 +82,37 @@ class SimechResFile(atc_logs.ATCTestFile):
                 self.simulation_start_at_timestamp = datetime.strptime(raw_date_as_str, date_format)
                 logger_config.print_and_log_info(f"simulation_start_at parsed:{self.simulation_start_at_timestamp}")
 
+    def get_raw_line_timestamp(self, raw_line: str) -> Optional[datetime]:
+        try:
+            return self.simulation_start_at_timestamp + timedelta(milliseconds=int(raw_line.split(atc_logs.ATC_LOG_FILES_FIELDS_SEPARATOR)[SimechResFileFirstColumnsByIndex.SIMULATION_TIME_IN_MS]))
+        except ValueError:
+            return None
+
+    def read_raw_lines_around_timestamp_filters(self) -> Optional[Tuple[int, List[str], List[str]]]:
+        """Fast seek on simulation times: line number of the first line that can pass timestamp filters, lines from it, and SD_FIELDS lines before it.
+        None when the whole file must be read"""
+        with open(self.file_full_path, mode="rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as file_content:
+            self._compute_simulation_start_at(all_raw_lines=atc_logs.decode_raw_lines(b"".join(match.group() for match in SIMULATION_START_AT_RAW_LINE_PATTERN.finditer(file_content))))
+            byte_range = self.get_timestamp_filters_byte_range(first_byte_offset=0)
+            if byte_range is None:
+                return None
+            previous_sd_fields_raw_lines = atc_logs.decode_raw_lines(b"".join(match.group() for match in SD_FIELDS_RAW_LINE_PATTERN.finditer(file_content, 0, byte_range[0])))
+
+        first_line_number, raw_bytes = self.read_byte_range(byte_range)
+        return first_line_number, atc_logs.decode_raw_lines(raw_bytes), previous_sd_fields_raw_lines
+
     @logger_config.stopwatch_decorator(inform_beginning=True, monitor_ram_usage=True)
     def compute_all_variables_states(self) -> None:
 
-        all_raw_lines = self.open_and_get_all_raw_lines()
-        self._compute_simulation_start_at(all_raw_lines=all_raw_lines)
+        raw_lines_around_timestamp_filters = (
+            self.read_raw_lines_around_timestamp_filters() if self.atc_test_result.timestamp_filters_fast_seek_enabled and self.atc_test_result.variables_timestamp_creation_filters else None
+        )
+        previous_sd_fields_raw_lines: List[str]
+        if raw_lines_around_timestamp_filters is None:
+            first_line_number, all_raw_lines, previous_sd_fields_raw_lines = 0, self.open_and_get_all_raw_lines(), []
+            self._compute_simulation_start_at(all_raw_lines=all_raw_lines)
+        else:
+            first_line_number, all_raw_lines, previous_sd_fields_raw_lines = raw_lines_around_timestamp_filters
 
         def get_cleaned_equipment_name(full_raw_value: str) -> str:
             # .FROM.PAS_06.VARIABLES[A]
@@ -74,46 +127,60 @@ class SimechResFile(atc_logs.ATCTestFile):
 
             return full_raw_value
 
-        previous_all_fields_names_and_values = None
-        for line_number, raw_line in enumerate(all_raw_lines):
+        lines_chunks: List[atc_logs.ATCResultLinesChunk] = []
+        equipment_raw_lines_by_equipment_name: Dict[str, SimechResEquipmentRawLines] = dict()
+
+        def convert_equipment_raw_lines_to_lines_chunk(equipment_name: str) -> None:
+            equipment_raw_lines = equipment_raw_lines_by_equipment_name.pop(equipment_name)
+            lines_chunks.append(equipment_raw_lines.convert_to_lines_chunk(simulation_start_at_timestamp=self.simulation_start_at_timestamp, test_result=self.atc_test_result))
+
+        def define_equipment_variables(raw_line_split: List[str]) -> None:
+            equipment_name = get_cleaned_equipment_name(raw_line_split[SimechResFileFirstColumnsByIndex.EQUIPMENT_OR_SIMECH_SCENARIO_INFO])
+            logger_config.print_and_log_info_if(
+                (equipment_name in self.variables_line_dictionary_by_equipment),
+                (
+                    f"Redefine variables for {equipment_name}, previously {len(self.variables_line_dictionary_by_equipment[equipment_name].all_fields_names)} variables"
+                    if equipment_name in self.variables_line_dictionary_by_equipment
+                    else "NA"
+                ),
+            )
+            raw_useful_values = [get_cleaned_variable_name(raw_variable) for raw_variable in raw_line_split[SimechResFileFirstColumnsByIndex.EQUIPMENT_OR_SIMECH_SCENARIO_INFO.value + 1 :]]
+            if equipment_name in equipment_raw_lines_by_equipment_name:
+                convert_equipment_raw_lines_to_lines_chunk(equipment_name)
+            self.variables_line_dictionary_by_equipment[equipment_name] = atc_logs.ATCVariablesLineDictionary(all_fields_names=raw_useful_values)
+            logger_config.print_and_log_info(f"For {equipment_name}, {len(raw_useful_values)} variables found")
+
+        # Variables defined before lines read by fast seek
+        for raw_line in previous_sd_fields_raw_lines:
+            define_equipment_variables(raw_line.split(atc_logs.ATC_LOG_FILES_FIELDS_SEPARATOR))
+
+        for line_number, raw_line in enumerate(all_raw_lines, start=first_line_number):
 
             raw_line_split = raw_line.split(atc_logs.ATC_LOG_FILES_FIELDS_SEPARATOR)
             line_simulation_time_in_ms_since_beginning = int(raw_line_split[SimechResFileFirstColumnsByIndex.SIMULATION_TIME_IN_MS])
 
             if raw_line_split[SimechResFileFirstColumnsByIndex.LINE_TYPE] == SimechResFileTypeLine.SD_FIELDS.value:
-                equipment_name = get_cleaned_equipment_name(raw_line_split[SimechResFileFirstColumnsByIndex.EQUIPMENT_OR_SIMECH_SCENARIO_INFO])
-                logger_config.print_and_log_info_if(
-                    (equipment_name in self.variables_line_dictionary_by_equipment),
-                    (
-                        f"Redefine variables for {equipment_name}, previously {len(self.variables_line_dictionary_by_equipment[equipment_name].all_fields_names)} variables"
-                        if equipment_name in self.variables_line_dictionary_by_equipment
-                        else "NA"
-                    ),
-                )
-                raw_useful_values = [get_cleaned_variable_name(raw_variable) for raw_variable in raw_line_split[SimechResFileFirstColumnsByIndex.EQUIPMENT_OR_SIMECH_SCENARIO_INFO.value + 1 :]]
-                self.variables_line_dictionary_by_equipment[equipment_name] = atc_logs.ATCVariablesLineDictionary(all_fields_names=raw_useful_values)
-                logger_config.print_and_log_info(f"For {equipment_name}, {len(raw_useful_values)} variables found")
+                define_equipment_variables(raw_line_split)
             elif raw_line_split[SimechResFileFirstColumnsByIndex.LINE_TYPE] == SimechResFileTypeLine.SD.value:
                 equipment_name = get_cleaned_equipment_name(raw_line_split[SimechResFileFirstColumnsByIndex.EQUIPMENT_OR_SIMECH_SCENARIO_INFO])
-                raw_useful_values = raw_line_split[SimechResFileFirstColumnsByIndex.EQUIPMENT_OR_SIMECH_SCENARIO_INFO.value + 1 :]
-                all_fields_names_and_values = self.variables_line_dictionary_by_equipment[equipment_name].get_all_fields_names_and_values_in_data_raw_fields(
-                    all_raw_values=raw_useful_values, test_result=self.atc_test_result
-                )
-                self.add_missing_horodate_fields_and_ensure_incremental_horodate(all_fields_names_and_values, previous_all_fields_names_and_values)
-                equipment = self.atc_test_result.equipments_library.get_or_create_equipment_by_name(equipment_name)
-
-                time_since_simulation_start = self.simulation_start_at_timestamp + timedelta(milliseconds=line_simulation_time_in_ms_since_beginning)
-
-                self.create_result_line_if_needed(
-                    line_number=line_number,
-                    horodate=self.variables_line_dictionary_by_equipment[equipment_name].get_horodate_from_cheure_etc(all_fields_names_and_values),
-                    time_according_to_simulation_start=time_since_simulation_start,
-                    equipment=equipment,
-                    all_fields_names_and_values=all_fields_names_and_values,
-                )
-                previous_all_fields_names_and_values = all_fields_names_and_values
-
-        pass
+                equipment_raw_lines = equipment_raw_lines_by_equipment_name.get(equipment_name)
+                if equipment_raw_lines is None:
+                    equipment_raw_lines = SimechResEquipmentRawLines(
+                        equipment=self.atc_test_result.equipments_library.get_or_create_equipment_by_name(equipment_name),
+                        variables_line_dictionary=self.variables_line_dictionary_by_equipment[equipment_name],
+                    )
+                    equipment_raw_lines_by_equipment_name[equipment_name] = equipment_raw_lines
+
+                equipment_raw_lines.line_numbers.append(line_number)
+                equipment_raw_lines.simulation_times_in_ms_since_beginning.append(line_simulation_time_in_ms_since_beginning)
+                equipment_raw_lines.all_raw_values_rows.append(raw_line_split[SimechResFileFirstColumnsByIndex.EQUIPMENT_OR_SIMECH_SCENARIO_INFO.value + 1 :])
+                if len(equipment_raw_lines.line_numbers) >= atc_logs.ATC_RESULT_LINES_CHUNK_MAX_SIZE:
+                    convert_equipment_raw_lines_to_lines_chunk(equipment_name)
+
+        for equipment_name in list(equipment_raw_lines_by_equipment_name):
+            convert_equipment_raw_lines_to_lines_chunk(equipment_name)
+
+        self.add_result_lines_chunks(lines_chunks)
 
 
 class SimechResTestResult(atc_logs.ATCTestResult):
@@ -3,7 +3,6 @@ import pandas as pd
 import datetime
 import os
 import re
-from collections import Counter
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Dict, List, Optional, Self, Tuple
@@ -15,6 +14,8 @@ from logger import logger_config
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, Font, PatternFill
 
+from stsloganalyzis.common import time_intervals_binning
+
 # CONTENT_OF_FIELD_IN_CASE_OF_DECODING_ERROR = "!!! Decoding Error !!!"
 
 LIAISON_PATTERN_STR = r".*(?P<liaison_full_name>Liaison (?P<liaison_id>\d+A?B?)).*"
@@ -86,21 +87,11 @@ def plot_bar_graph_list_cck_mpro_lines_by_period(
     start_time = trace_lines[0].decoded_timestamp
     end_time = trace_lines[-1].decoded_timestamp
 
-    # Créer des intervalles de temps
-    interval_start_times: List[datetime.datetime] = []
-    current_time = start_time
-    while current_time <= end_time:
-        interval_start_times.append(current_time)
-        current_time += datetime.timedelta(minutes=interval_minutes)
-
-    # Compter les éléments dans chaque intervalle
-    interval_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = Counter()
-    for trace in trace_lines:
-        for interval_start in interval_start_times:
-            interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-            if interval_start <= trace.decoded_timestamp < interval_end:
-                interval_counts[(interval_start, interval_end)] += 1
-                break
+    # Créer des intervalles de temps et compter les éléments dans chaque intervalle (seuls les intervalles non vides sont gardés)
+    time_intervals = time_intervals_binning.TimeIntervals(start_time=start_time, end_time=end_time, interval_minutes=interval_minutes)
+    interval_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {
+        interval: count for interval, count in zip(time_intervals.intervals, time_intervals.count_by_interval([trace.decoded_timestamp for trace in trace_lines])) if count
+    }
 
     # Préparer les données pour le graphe
     x_labels = [f"{begin.strftime("%H:%M")} - {end.strftime("%H:%M")}" for begin, end in interval_counts.keys()]
@@ -342,37 +333,15 @@ class CckMproTraceLibrary:
         end_time = self.all_processed_lines[-1].decoded_timestamp
 
         # Créer des intervalles de temps
-        interval_start_times: List[datetime.datetime] = []
-        current_time = start_time
-        while current_time <= end_time:
-            interval_start_times.append(current_time)
-            current_time += datetime.timedelta(minutes=interval_minutes)
-
-        # Compter les éléments dans chaque intervalle
-        interval_problems_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {}
-        interval_loss_link_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {}
-
-        # Initialiser les compteurs
-        for interval_start in interval_start_times:
-            interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-            interval_problems_count[(interval_start, interval_end)] = 0
-            interval_loss_link_count[(interval_start, interval_end)] = 0
-
-        # Compter les problèmes d'enchaînement
-        for problem in self.all_problem_enchainement_numero_protocolaire:
-            for interval_start in interval_start_times:
-                interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                if interval_start <= problem.trace_line.decoded_timestamp < interval_end:
-                    interval_problems_count[(interval_start, interval_end)] += 1
-                    break
-
-        # Compter les pertes de lien
-        for loss_link in self.all_temporary_loss_link:
-            for interval_start in interval_start_times:
-                interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                if interval_start <= loss_link.loss_link_event.trace_line.decoded_timestamp < interval_end:
-                    interval_loss_link_count[(interval_start, interval_end)] += 1
-                    break
+        time_intervals = time_intervals_binning.TimeIntervals(start_time=start_time, end_time=end_time, interval_minutes=interval_minutes)
+
+        # Compter les problèmes d'enchaînement et les pertes de lien dans chaque intervalle
+        interval_problems_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+            zip(time_intervals.intervals, time_intervals.count_by_interval([problem.trace_line.decoded_timestamp for problem in self.all_problem_enchainement_numero_protocolaire]))
+        )
+        interval_loss_link_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+            zip(time_intervals.intervals, time_intervals.count_by_interval([loss_link.loss_link_event.trace_line.decoded_timestamp for loss_link in self.all_temporary_loss_link]))
+        )
 
         # Préparer les données pour le graphe
         x_labels = [f"{begin.strftime("%H:%M")} - {end.strftime("%H:%M")}" for begin, end in interval_problems_count.keys()]
@@ -490,24 +459,13 @@ class CckMproTraceLibrary:
 
         start_time = self.all_processed_lines[0].decoded_timestamp
         end_time = self.all_processed_lines[-1].decoded_timestamp
-        interval_start_times: List[datetime.datetime] = []
-        current_time = start_time
-        while current_time <= end_time:
-            interval_start_times.append(current_time)
-            current_time += datetime.timedelta(minutes=interval_minutes)
-
-        interval_loss_link_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {}
-        for interval_start in interval_start_times:
-            interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-            interval_loss_link_count[(interval_start, interval_end)] = 0
-
-        for loss_link in self.all_temporary_loss_link:
-            if maximum_link_loss_duration_to_consider_in_seconds is None or loss_link.duration_in_seconds < maximum_link_loss_duration_to_consider_in_seconds:
-                for interval_start in interval_start_times:
-                    interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                    if interval_start <= loss_link.loss_link_event.trace_line.decoded_timestamp < interval_end:
-                        interval_loss_link_count[(interval_start, interval_end)] += 1
-                        break
+        time_intervals = time_intervals_binning.TimeIntervals(start_time=start_time, end_time=end_time, interval_minutes=interval_minutes)
+        loss_link_timestamps = [
+            loss_link.loss_link_event.trace_line.decoded_timestamp
+            for loss_link in self.all_temporary_loss_link
+            if maximum_link_loss_duration_to_consider_in_seconds is None or loss_link.duration_in_seconds < maximum_link_loss_duration_to_consider_in_seconds
+        ]
+        interval_loss_link_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(zip(time_intervals.intervals, time_intervals.count_by_interval(loss_link_timestamps)))
 
         x_labels = [f"{begin.strftime("%H:%M")} - {end.strftime("%H:%M")}" for begin, end in interval_loss_link_count.keys()]
         y_values = list(interval_loss_link_count.values())
@@ -1,17 +1,24 @@
+import array
 import datetime
+import itertools
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from enum import Enum, auto
-from typing import Dict, List, Optional, Self, Tuple
+from enum import Enum, IntFlag, auto
+from typing import Dict, Iterable, List, Optional, Self, Tuple
 
 import matplotlib.pyplot as plt
+import numpy as np
+import numpy.typing as npt
 import plotly.graph_objects as go
 from common import file_name_utils, string_utils, custom_iterator
 from logger import logger_config
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, Font, PatternFill
 
+from stsloganalyzis.common import time_intervals_binning
+
 # CONTENT_OF_FIELD_IN_CASE_OF_DECODING_ERROR = "!!! Decoding Error !!!"
 
 LIAISON_PATTERN_STR = r".*(?P<liaison_full_name>Liaison (?P<liaison_id>\d+A?B?)).*"
@@ -20,6 +27,62 @@ LIAISON_PATTERN = re.compile(LIAISON_PATTERN_STR)
 LINK_STATE_CHANGE_PATTERN_STR = r".*changement d'état : (?P<old_state>.*) => (?P<new_state>.*)"
 LINK_STATE_CHANGE_PATTERN = re.compile(LINK_STATE_CHANGE_PATTERN_STR)
 
+PROBLEM_ENCHAINEMENT_NUMERO_PROTOCOLAIRE_TEXT = "le msg a un problème de 'enchainement numero protocolaire'"
+CHANGEMENT_ETAT_LIAISON_TEXT = "- changement d'état : "
+
+CCK_MPRO_TRACE_FILE_ENCODING = "ANSI"
+
+
+class CckMproLineEventFlag(IntFlag):
+    PROBLEM_ENCHAINEMENT_NUMERO_PROTOCOLAIRE = 1
+    CHANGEMENT_ETAT_LIAISON = 2
+
+
+# Packed record of a line in compact loading mode (21 bytes per line)
+COMPACT_TRACE_LINE_DTYPE = np.dtype(
+    [
+        ("offset", np.int64),
+        ("timestamp_in_microseconds", np.int64),
+        ("liaison_index", np.int32),
+        ("event_flags", np.uint8),
+    ]
+)
+NO_TIMESTAMP = np.iinfo(np.int64).min
+NO_LIAISON_INDEX = -1
+TIMESTAMPS_EPOCH = datetime.datetime(1970, 1, 1)
+ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def decode_cck_mpro_trace_raw_line(raw_line_bytes: bytes, encoding: str) -> str:
+    """Same text as the line read from the file in text mode: Windows line ending is translated to \\n"""
+    if raw_line_bytes.endswith(b"\r\n"):
+        raw_line_bytes = raw_line_bytes[:-2] + b"\n"
+    return raw_line_bytes.decode(encoding)
+
+
+def decode_cck_mpro_trace_line_timestamp(full_raw_line: str) -> Optional[datetime.datetime]:
+    raw_date_str = full_raw_line[1:23]
+    try:
+        year = int(raw_date_str[:4])
+        month = int(raw_date_str[5:7])
+        day = int(raw_date_str[8:10])
+        hour = int(raw_date_str[11:13])
+        minute = int(raw_date_str[14:16])
+        second = int(raw_date_str[17:19])
+        millisecond = int(raw_date_str[20:22]) * 10
+        return datetime.datetime(year=year, month=month, day=day, hour=hour, minute=minute, second=second, microsecond=millisecond * 1000)
+    except (ValueError, IndexError):
+        return None
+
+
+def get_cck_mpro_trace_line_event_flags(full_raw_line: str) -> CckMproLineEventFlag:
+    event_flags = CckMproLineEventFlag(0)
+    if PROBLEM_ENCHAINEMENT_NUMERO_PROTOCOLAIRE_TEXT in full_raw_line:
+        event_flags |= CckMproLineEventFlag.PROBLEM_ENCHAINEMENT_NUMERO_PROTOCOLAIRE
+    if CHANGEMENT_ETAT_LIAISON_TEXT in full_raw_line:
+        event_flags |= CckMproLineEventFlag.CHANGEMENT_ETAT_LIAISON
+    return event_flags
+
 
 def save_cck_mpro_lines_in_excel(trace_lines: List["CckMproTraceLine"], output_folder_path: str, excel_output_file_name_without_extension: str) -> None:
     """
@@ -80,27 +143,12 @@ def plot_bar_graph_list_cck_mpro_lines_by_period(trace_lines: List["CckMproTrace
     # Déterminer la période totale (du timestamp le plus tôt au plus tard)
     start_time = trace_lines[0].decoded_timestamp
     end_time = trace_lines[-1].decoded_timestamp
+    assert start_time is not None and end_time is not None
 
-    # Créer des intervalles de temps
-    interval_start_times: List[datetime.datetime] = []
-    current_time = start_time
-    while current_time <= end_time:
-        interval_start_times.append(current_time)
-        current_time += datetime.timedelta(minutes=interval_minutes)
-
-    # Compter les éléments dans chaque intervalle
-    interval_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {}
-    for interval_start in interval_start_times:
-        interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-        interval_counts[(interval_start, interval_end)] = 0
-    
-    # Single pass through trace_lines instead of nested loops
-    for trace in trace_lines:
-        for interval_start in interval_start_times:
-            interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-            if interval_start <= trace.decoded_timestamp < interval_end:
-                interval_counts[(interval_start, interval_end)] += 1
-                break
+    # Créer des intervalles de temps et compter les éléments dans chaque intervalle
+    time_intervals = time_intervals_binning.TimeIntervals(start_time=start_time, end_time=end_time, interval_minutes=interval_minutes)
+    timestamps = [trace.decoded_timestamp for trace in trace_lines if trace.decoded_timestamp is not None]
+    interval_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(zip(time_intervals.intervals, time_intervals.count_by_interval(timestamps)))
 
     # Préparer les données pour le graphe
     x_labels = [f"{begin.strftime("%H:%M")} - {end.strftime("%H:%M")}" for begin, end in interval_counts.keys()]
@@ -243,11 +291,17 @@ class CckMproTraceLibrary:
     all_changement_etats_liaisons_mpro: List["CckMproChangementEtatLiaison"] = field(default_factory=list)
     all_changement_etats_liaisons_mpro_per_link: Dict["CckMproLiaison", List["CckMproChangementEtatLiaison"]] = field(default_factory=dict)
     lines_per_liaison: Dict[Optional["CckMproLiaison"], List["CckMproTraceLine"]] = field(default_factory=dict)
+    compact_lines: bool = False
+    parallel_load: bool = False
+    parallel_load_max_workers: Optional[int] = None
 
     def __post_init__(self) -> None:
+        assert self.compact_lines or not self.parallel_load, "Parallel loading is only available with compact lines storage"
         self.all_temporary_loss_link: List[CckMproTemporaryLossLink] = []
         self.all_liaisons: List[CckMproLiaison] = []
         self.liaison_by_identifier: Dict[str, CckMproLiaison] = {}
+        self.liaison_index_by_identifier: Dict[str, int] = {}
+        self.all_compact_processed_files: List["CckMproCompactTraceFile"] = []
 
     def get_or_create_liaison(self, full_name: str, identifier: str) -> "CckMproLiaison":
         if identifier in self.liaison_by_identifier:
@@ -255,15 +309,72 @@ class CckMproTraceLibrary:
 
         liaison = CckMproLiaison(full_name=full_name, identifier=identifier)
         self.liaison_by_identifier[identifier] = liaison
+        self.liaison_index_by_identifier[identifier] = len(self.all_liaisons)
         self.all_liaisons.append(liaison)
         return liaison
 
+    def get_lines_count_per_liaison(self) -> Dict[Optional["CckMproLiaison"], int]:
+        if not self.compact_lines:
+            return {liaison: len(lines) for liaison, lines in self.lines_per_liaison.items()}
+
+        # Index of lines without liaison (-1) is shifted to 0
+        counts = np.zeros(len(self.all_liaisons) + 1, dtype=np.int64)
+        for compact_file in self.all_compact_processed_files:
+            counts += np.bincount(compact_file.compact_lines["liaison_index"] + 1, minlength=len(counts))
+        lines_count_per_liaison: Dict[Optional[CckMproLiaison], int] = {liaison: int(count) for liaison, count in zip(self.all_liaisons, counts[1:]) if count}
+        if counts[0]:
+            lines_count_per_liaison[None] = int(counts[0])
+        return lines_count_per_liaison
+
+    def get_trace_lines(self, event_flags: CckMproLineEventFlag = CckMproLineEventFlag(0), liaison: Optional["CckMproLiaison"] = None) -> List["CckMproTraceLine"]:
+        """Lines having all the event flags (and on the liaison if given). In compact mode, raw text of these lines is read again from their file"""
+        if not self.compact_lines:
+            return [
+                trace_line
+                for trace_line in self.all_processed_lines
+                if get_cck_mpro_trace_line_event_flags(trace_line.full_raw_line) & event_flags == event_flags and (liaison is None or trace_line.liaison == liaison)
+            ]
+
+        trace_lines: List[CckMproTraceLine] = []
+        for compact_file in self.all_compact_processed_files:
+            selected = compact_file.compact_lines["event_flags"] & event_flags == event_flags
+            if liaison is not None:
+                selected &= compact_file.compact_lines["liaison_index"] == self.liaison_index_by_identifier[liaison.identifier]
+            trace_lines += compact_file.get_trace_lines(np.flatnonzero(selected).tolist())
+        return trace_lines
+
+    def _get_lines_time_range(self) -> Optional[Tuple[datetime.datetime, datetime.datetime]]:
+        if not self.compact_lines:
+            # Same range as compact lines: lines without timestamp are ignored
+            timestamps = [trace_line.decoded_timestamp for trace_line in self.all_processed_lines if trace_line.decoded_timestamp is not None]
+            return (min(timestamps), max(timestamps)) if timestamps else None
+
+        all_timestamps_in_microseconds = [compact_file.compact_lines["timestamp_in_microseconds"] for compact_file in self.all_compact_processed_files]
+        timestamps_in_microseconds = np.concatenate(all_timestamps_in_microseconds) if all_timestamps_in_microseconds else np.empty(0, dtype=np.int64)
+        timestamps_in_microseconds = timestamps_in_microseconds[timestamps_in_microseconds != NO_TIMESTAMP]
+        if not len(timestamps_in_microseconds):
+            return None
+        return TIMESTAMPS_EPOCH + int(timestamps_in_microseconds.min()) * ONE_MICROSECOND, TIMESTAMPS_EPOCH + int(timestamps_in_microseconds.max()) * ONE_MICROSECOND
+
     def load_folder(self, folder_full_path: str) -> Self:
+        if self.parallel_load:
+            self._load_folder_in_parallel(folder_full_path)
+            self._log_loading_results()
+            return self
+
         with logger_config.stopwatch_with_label("Load all files", inform_beginning=True, monitor_ram_usage=True):
             file_count = 0
             for dirpath, _, filenames in os.walk(folder_full_path):
                 for file_name in filenames:
                     try:
+                        if self.compact_lines:
+                            compact_cck_file = CckMproCompactTraceFile(parent_folder_full_path=dirpath, file_name=file_name, library=self)
+                            self.all_compact_processed_files.append(compact_cck_file)
+                            self.all_problem_enchainement_numero_protocolaire += compact_cck_file.all_problem_enchainement_numero_protocolaire
+                            self.all_changement_etats_liaisons_mpro += compact_cck_file.all_changement_etats_liaisons_mpro
+                            file_count += 1
+                            continue
+
                         cck_file = CckMproTraceFile(parent_folder_full_path=dirpath, file_name=file_name, library=self)
                         self.all_processed_files.append(cck_file)
                         self.all_processed_lines += cck_file.all_processed_lines
@@ -283,7 +394,7 @@ class CckMproTraceLibrary:
                         logger_config.print_and_log_error(f"Error processing file {dirpath}/{file_name}: {e}")
                         continue
 
-            assert self.all_processed_lines
+            assert self.all_processed_lines or any(len(compact_file.compact_lines) for compact_file in self.all_compact_processed_files)
 
         with logger_config.stopwatch_with_label("Create all_changement_etats_liaisons_mpro_per_link", inform_beginning=True, monitor_ram_usage=True):
             for changement_etat_liaison_mpro in self.all_changement_etats_liaisons_mpro:
@@ -309,19 +420,85 @@ class CckMproTraceLibrary:
                         else:
                             logger_config.print_and_log_error(f"Cannot find change to NOK before {mpro_link_state_change.trace_line.full_raw_line}")
 
+        self._log_loading_results()
+        return self
+
+    @logger_config.stopwatch_decorator(inform_beginning=True, monitor_ram_usage=True)
+    def _load_folder_in_parallel(self, folder_full_path: str) -> None:
+        """Each file is parsed in a process pool. Files are merged in path order (whatever the order workers finish in), so the result is deterministic.
+        Grouping of events per liaison and temporary losses of link are computed in the same merge pass"""
+        all_parent_folders_and_files_names = sorted((dirpath, file_name) for dirpath, _, filenames in os.walk(folder_full_path) for file_name in filenames)
+
+        last_change_to_nok_per_link: Dict[CckMproLiaison, CckMproChangementEtatLiaison] = {}
+        temporary_loss_link_per_link: Dict[CckMproLiaison, List[CckMproTemporaryLossLink]] = {}
+        with ProcessPoolExecutor(max_workers=self.parallel_load_max_workers) as executor:
+            all_events_summaries = executor.map(
+                _summarize_cck_mpro_trace_file_in_worker,
+                [parent_folder_full_path for parent_folder_full_path, _ in all_parent_folders_and_files_names],
+                [file_name for _, file_name in all_parent_folders_and_files_names],
+                itertools.repeat(CCK_MPRO_TRACE_FILE_ENCODING),
+            )
+            for events_summary in all_events_summaries:
+                if events_summary is None:
+                    continue
+                try:
+                    compact_cck_file = CckMproCompactTraceFile(
+                        parent_folder_full_path=events_summary.parent_folder_full_path, file_name=events_summary.file_name, library=self, events_summary=events_summary
+                    )
+                except (IOError, ValueError, KeyError, IndexError) as e:
+                    logger_config.print_and_log_error(f"Error processing file {events_summary.parent_folder_full_path}/{events_summary.file_name}: {e}")
+                    continue
+                self._merge_compact_file_events(compact_cck_file, last_change_to_nok_per_link, temporary_loss_link_per_link)
+
+        # Same order as sequential loading: per liaison, in order of first state change
+        for link in self.all_changement_etats_liaisons_mpro_per_link.keys():  # pylint: disable=consider-iterating-dictionary
+            self.all_temporary_loss_link += temporary_loss_link_per_link.get(link, [])
+
+        assert any(len(compact_file.compact_lines) for compact_file in self.all_compact_processed_files)
+
+    def _merge_compact_file_events(
+        self,
+        compact_cck_file: "CckMproCompactTraceFile",
+        last_change_to_nok_per_link: Dict["CckMproLiaison", CckMproChangementEtatLiaison],
+        temporary_loss_link_per_link: Dict["CckMproLiaison", List[CckMproTemporaryLossLink]],
+    ) -> None:
+        self.all_compact_processed_files.append(compact_cck_file)
+
+        for problem_enchainement_numero_protocolaire in compact_cck_file.all_problem_enchainement_numero_protocolaire:
+            self.all_problem_enchainement_numero_protocolaire.append(problem_enchainement_numero_protocolaire)
+            if problem_enchainement_numero_protocolaire.liaison not in self.all_problem_enchainement_numero_protocolaire_per_link:
+                self.all_problem_enchainement_numero_protocolaire_per_link[problem_enchainement_numero_protocolaire.liaison] = []
+            self.all_problem_enchainement_numero_protocolaire_per_link[problem_enchainement_numero_protocolaire.liaison].append(problem_enchainement_numero_protocolaire)
+
+        for mpro_link_state_change in compact_cck_file.all_changement_etats_liaisons_mpro:
+            link = mpro_link_state_change.liaison
+            self.all_changement_etats_liaisons_mpro.append(mpro_link_state_change)
+            if link not in self.all_changement_etats_liaisons_mpro_per_link:
+                self.all_changement_etats_liaisons_mpro_per_link[link] = []
+            self.all_changement_etats_liaisons_mpro_per_link[link].append(mpro_link_state_change)
+
+            if mpro_link_state_change.new_state == EtatLiaisonMpro.KO:
+                last_change_to_nok_per_link[link] = mpro_link_state_change
+            elif mpro_link_state_change.new_state == EtatLiaisonMpro.OK and mpro_link_state_change.previous_state == EtatLiaisonMpro.KO:
+                if link in last_change_to_nok_per_link:
+                    if link not in temporary_loss_link_per_link:
+                        temporary_loss_link_per_link[link] = []
+                    temporary_loss_link_per_link[link].append(CckMproTemporaryLossLink(loss_link_event=last_change_to_nok_per_link[link], link_back_to_normal_event=mpro_link_state_change))
+                else:
+                    logger_config.print_and_log_error(f"Cannot find change to NOK before {mpro_link_state_change.trace_line.full_raw_line}")
+
+    def _log_loading_results(self) -> None:
         logger_config.print_and_log_info(f"{len(self.all_problem_enchainement_numero_protocolaire)} problems enchainement numero protocolaire")
         logger_config.print_and_log_info(f"{len(self.all_temporary_loss_link)} temporary_loss_link")
         logger_config.print_and_log_info(f"{len(self.all_changement_etats_liaisons_mpro)} changements états liaisons mpro")
         logger_config.print_and_log_info(
-            f"{','.join([key.identifier if key is not None else "None" + ':' + str(len(value)) for key, value in self.lines_per_liaison.items()])} changements états liaisons mpro"
+            f"{','.join([(key.identifier if key is not None else 'None') + ':' + str(count) for key, count in self.get_lines_count_per_liaison().items()])} lines per liaison"
         )
         logger_config.print_and_log_info(f"{len(self.all_problem_enchainement_numero_protocolaire)} all_problem_enchainement_numero_protocolaire")
         logger_config.print_and_log_info(
             f"{','.join([key.identifier if key is not None else "None" + ':' + str(len(value)) for key, value in self.all_problem_enchainement_numero_protocolaire_per_link.items()])} all_problem_enchainement_numero_protocolaire_per_link"
         )
 
-        return self
-
     def plot_problems_and_loss_link_by_period(self, output_folder_path: str, interval_minutes: int = 10, do_show: bool = False) -> None:
         """
         Génère un bar graph montrant les problèmes d'enchaînement et les pertes de lien par intervalle de temps.
@@ -330,46 +507,34 @@ class CckMproTraceLibrary:
             output_folder_path: Chemin du dossier de sortie
             interval_minutes: Intervalle de temps en minutes (par défaut 10)
         """
-        if not self.all_processed_lines:
+        lines_time_range = self._get_lines_time_range()
+        if not lines_time_range:
             logger_config.print_and_log_info("La liste des traces est vide. Aucun fichier créé.")
             return
 
         # Déterminer la période totale
-        start_time = self.all_processed_lines[0].decoded_timestamp
-        end_time = self.all_processed_lines[-1].decoded_timestamp
+        start_time, end_time = lines_time_range
 
         # Créer des intervalles de temps
-        interval_start_times: List[datetime.datetime] = []
-        current_time = start_time
-        while current_time <= end_time:
-            interval_start_times.append(current_time)
-            current_time += datetime.timedelta(minutes=interval_minutes)
-
-        # Compter les éléments dans chaque intervalle
-        interval_problems_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {}
-        interval_loss_link_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {}
-
-        # Initialiser les compteurs
-        for interval_start in interval_start_times:
-            interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-            interval_problems_count[(interval_start, interval_end)] = 0
-            interval_loss_link_count[(interval_start, interval_end)] = 0
-
-        # Compter les problèmes d'enchaînement
-        for problem in self.all_problem_enchainement_numero_protocolaire:
-            for interval_start in interval_start_times:
-                interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                if interval_start <= problem.trace_line.decoded_timestamp < interval_end:
-                    interval_problems_count[(interval_start, interval_end)] += 1
-                    break
-
-        # Compter les pertes de lien
-        for loss_link in self.all_temporary_loss_link:
-            for interval_start in interval_start_times:
-                interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                if interval_start <= loss_link.loss_link_event.trace_line.decoded_timestamp < interval_end:
-                    interval_loss_link_count[(interval_start, interval_end)] += 1
-                    break
+        time_intervals = time_intervals_binning.TimeIntervals(start_time=start_time, end_time=end_time, interval_minutes=interval_minutes)
+
+        # Compter les problèmes d'enchaînement et les pertes de lien dans chaque intervalle
+        interval_problems_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+            zip(
+                time_intervals.intervals,
+                time_intervals.count_by_interval(
+                    [problem.trace_line.decoded_timestamp for problem in self.all_problem_enchainement_numero_protocolaire if problem.trace_line.decoded_timestamp is not None]
+                ),
+            )
+        )
+        interval_loss_link_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+            zip(
+                time_intervals.intervals,
+                time_intervals.count_by_interval(
+                    [loss_link.loss_link_event.trace_line.decoded_timestamp for loss_link in self.all_temporary_loss_link if loss_link.loss_link_event.trace_line.decoded_timestamp is not None]
+                ),
+            )
+        )
 
         # Préparer les données pour le graphe
         x_labels = [f"{begin.strftime("%H:%M")} - {end.strftime("%H:%M")}" for begin, end in interval_problems_count.keys()]
@@ -579,13 +744,12 @@ class CckMproTraceLibrary:
 pass
 
 
-@dataclass
+@dataclass(slots=True)
 class CckMproLiaison:
     full_name: str
     identifier: str
     all_lines: List["CckMproTraceLine"] = field(default_factory=list)
-
-    __slots__ = ('full_name', 'identifier', 'all_lines', 'hash_computed')
+    hash_computed: int = field(init=False, repr=False, compare=False, default=0)
 
     def __post_init__(self) -> None:
         self.hash_computed = hash(self.full_name)
@@ -611,7 +775,7 @@ class CckMproTraceFile:
     def _load_file(self) -> None:
         """Load and process file with streaming to reduce memory usage."""
         with logger_config.stopwatch_with_label(f"Open and read CCK Mpro trace file {self.file_full_path}", inform_beginning=True):
-            with open(self.file_full_path, mode="r", encoding="ANSI") as file:
+            with open(self.file_full_path, mode="r", encoding=CCK_MPRO_TRACE_FILE_ENCODING) as file:
                 for line_number, line in enumerate(file, start=1):
                     if line_number % 100000 == 0:
                         logger_config.print_and_log_info(f"Handle line {self.file_name}:#{line_number}")
@@ -638,9 +802,156 @@ class CckMproTraceFile:
         assert self.all_processed_lines, f"{self.file_full_path} is empty"
 
 
+@dataclass
+class CckMproTraceFileEventsSummary:
+    """
+    Result of the parsing of a trace file in compact mode, independent of any library so that it can be computed in a worker process.
+    Liaison indexes of compact lines refer to file_liaisons_full_names_and_identifiers, only event lines are kept as text.
+    """
+
+    parent_folder_full_path: str
+    file_name: str
+    file_liaisons_full_names_and_identifiers: List[Tuple[str, str]]
+    compact_lines: npt.NDArray[np.void]
+    all_event_lines_numbers_and_raw_lines: List[Tuple[int, str]]
+
+
+def summarize_cck_mpro_trace_file(parent_folder_full_path: str, file_name: str, encoding: Optional[str] = None) -> CckMproTraceFileEventsSummary:
+    file_full_path = parent_folder_full_path + "/" + file_name
+    encoding = encoding or CCK_MPRO_TRACE_FILE_ENCODING
+
+    file_liaisons_full_names_and_identifiers: List[Tuple[str, str]] = []
+    file_liaison_index_by_identifier: Dict[str, int] = {}
+    all_event_lines_numbers_and_raw_lines: List[Tuple[int, str]] = []
+
+    offsets = array.array("q")
+    timestamps_in_microseconds = array.array("q")
+    liaison_indexes = array.array("i")
+    all_event_flags = array.array("B")
+
+    with logger_config.stopwatch_with_label(f"Open and read compact CCK Mpro trace file {file_full_path}", inform_beginning=True):
+        with open(file_full_path, mode="rb") as file:
+            offset = 0
+            for line_number, raw_line_bytes in enumerate(file, start=1):
+                if line_number % 100000 == 0:
+                    logger_config.print_and_log_info(f"Handle line {file_name}:#{line_number}")
+
+                full_raw_line = decode_cck_mpro_trace_raw_line(raw_line_bytes, encoding)
+
+                decoded_timestamp = decode_cck_mpro_trace_line_timestamp(full_raw_line)
+                timestamp_in_microseconds = (decoded_timestamp - TIMESTAMPS_EPOCH) // ONE_MICROSECOND if decoded_timestamp else NO_TIMESTAMP
+
+                liaison_index = NO_LIAISON_INDEX
+                match_liaison_pattern = LIAISON_PATTERN.match(full_raw_line)
+                if match_liaison_pattern:
+                    liaison_identifier = match_liaison_pattern.group("liaison_id")
+                    if liaison_identifier not in file_liaison_index_by_identifier:
+                        file_liaison_index_by_identifier[liaison_identifier] = len(file_liaisons_full_names_and_identifiers)
+                        file_liaisons_full_names_and_identifiers.append((match_liaison_pattern.group("liaison_full_name"), liaison_identifier))
+                    liaison_index = file_liaison_index_by_identifier[liaison_identifier]
+
+                event_flags = get_cck_mpro_trace_line_event_flags(full_raw_line)
+                if event_flags:
+                    all_event_lines_numbers_and_raw_lines.append((line_number, full_raw_line))
+
+                offsets.append(offset)
+                timestamps_in_microseconds.append(timestamp_in_microseconds)
+                liaison_indexes.append(liaison_index)
+                all_event_flags.append(event_flags)
+                offset += len(raw_line_bytes)
+
+    compact_lines = np.empty(len(offsets), dtype=COMPACT_TRACE_LINE_DTYPE)
+    compact_lines["offset"] = np.frombuffer(offsets, dtype=np.int64)
+    compact_lines["timestamp_in_microseconds"] = np.frombuffer(timestamps_in_microseconds, dtype=np.int64)
+    compact_lines["liaison_index"] = np.frombuffer(liaison_indexes, dtype=np.int32)
+    compact_lines["event_flags"] = np.frombuffer(all_event_flags, dtype=np.uint8)
+
+    return CckMproTraceFileEventsSummary(
+        parent_folder_full_path=parent_folder_full_path,
+        file_name=file_name,
+        file_liaisons_full_names_and_identifiers=file_liaisons_full_names_and_identifiers,
+        compact_lines=compact_lines,
+        all_event_lines_numbers_and_raw_lines=all_event_lines_numbers_and_raw_lines,
+    )
+
+
+def _summarize_cck_mpro_trace_file_in_worker(parent_folder_full_path: str, file_name: str, encoding: str) -> Optional[CckMproTraceFileEventsSummary]:
+    try:
+        return summarize_cck_mpro_trace_file(parent_folder_full_path=parent_folder_full_path, file_name=file_name, encoding=encoding)
+    except (IOError, ValueError, KeyError, IndexError) as e:
+        logger_config.print_and_log_error(f"Error processing file {parent_folder_full_path}/{file_name}: {e}")
+        return None
+
+
+class CckMproCompactTraceFile:
+    """
+    Compact loading mode: each line is only kept as its byte offset in the file and a packed record (timestamp, liaison index, event flags),
+    in a NumPy structured array. Only lines with events (state changes, problems) are kept as CckMproTraceLine.
+    Raw text of other lines is read again from the file when needed (Excel exports).
+    """
+
+    def __init__(
+        self, parent_folder_full_path: str, file_name: str, library: "CckMproTraceLibrary", events_summary: Optional[CckMproTraceFileEventsSummary] = None
+    ) -> None:
+        """events_summary, when already computed (in a worker process), avoids reading the file"""
+        self.parent_folder_full_path = parent_folder_full_path
+        self.file_name = file_name
+        self.library = library
+        self.file_full_path = self.parent_folder_full_path + "/" + self.file_name
+        self.all_problem_enchainement_numero_protocolaire: List[CckMproProblemEnchainementNumeroProtocolaire] = []
+        self.all_changement_etats_liaisons_mpro: List[CckMproChangementEtatLiaison] = []
+        self.compact_lines: npt.NDArray[np.void] = np.empty(0, dtype=COMPACT_TRACE_LINE_DTYPE)
+        self._load_events_summary(events_summary or summarize_cck_mpro_trace_file(parent_folder_full_path=parent_folder_full_path, file_name=file_name))
+
+    def __len__(self) -> int:
+        return len(self.compact_lines)
+
+    def _load_events_summary(self, events_summary: CckMproTraceFileEventsSummary) -> None:
+        # Last item maps lines without liaison (NO_LIAISON_INDEX is -1) to themselves
+        library_liaison_index_by_file_liaison_index = np.array(
+            [
+                self.library.liaison_index_by_identifier[self.library.get_or_create_liaison(full_name=full_name, identifier=identifier).identifier]
+                for full_name, identifier in events_summary.file_liaisons_full_names_and_identifiers
+            ]
+            + [NO_LIAISON_INDEX],
+            dtype=np.int32,
+        )
+        self.compact_lines = events_summary.compact_lines
+        self.compact_lines["liaison_index"] = library_liaison_index_by_file_liaison_index[self.compact_lines["liaison_index"]]
+
+        for line_number, full_raw_line in events_summary.all_event_lines_numbers_and_raw_lines:
+            event_trace_line = CckMproTraceLine(parent_file=self, full_raw_line=full_raw_line, line_number=line_number)
+            if event_trace_line.problem_enchainement_numero_protocolaire:
+                self.all_problem_enchainement_numero_protocolaire.append(event_trace_line.problem_enchainement_numero_protocolaire)
+            if event_trace_line.changement_etat_liaison:
+                self.all_changement_etats_liaisons_mpro.append(event_trace_line.changement_etat_liaison)
+
+        logger_config.print_and_log_info(f"{self.file_full_path}: {len(self.compact_lines)} lines found ({self.compact_lines.nbytes} bytes)")
+        assert len(self.compact_lines), f"{self.file_full_path} is empty"
+
+    def get_decoded_timestamp(self, line_index: int) -> Optional[datetime.datetime]:
+        timestamp_in_microseconds = int(self.compact_lines["timestamp_in_microseconds"][line_index])
+        return TIMESTAMPS_EPOCH + timestamp_in_microseconds * ONE_MICROSECOND if timestamp_in_microseconds != NO_TIMESTAMP else None
+
+    def read_raw_lines(self, line_indexes: Iterable[int]) -> List[str]:
+        raw_lines: List[str] = []
+        with open(self.file_full_path, mode="rb") as file:
+            for line_index in line_indexes:
+                file.seek(int(self.compact_lines["offset"][line_index]))
+                raw_lines.append(decode_cck_mpro_trace_raw_line(file.readline(), CCK_MPRO_TRACE_FILE_ENCODING))
+        return raw_lines
+
+    def get_trace_lines(self, line_indexes: List[int]) -> List["CckMproTraceLine"]:
+        """Lines are created again from their raw text, read from the file"""
+        return [
+            CckMproTraceLine(parent_file=self, full_raw_line=full_raw_line, line_number=line_index + 1)
+            for line_index, full_raw_line in zip(line_indexes, self.read_raw_lines(line_indexes))
+        ]
+
+
 @dataclass
 class CckMproTraceLine:
-    parent_file: CckMproTraceFile
+    parent_file: CckMproTraceFile | CckMproCompactTraceFile
     full_raw_line: str
     line_number: int
 
@@ -663,32 +974,21 @@ class CckMproTraceLine:
             return
 
         self._parsed = True
-        raw_date_str = self.full_raw_line[1:23]
-        
-        try:
-            year = int(raw_date_str[:4])
-            month = int(raw_date_str[5:7])
-            day = int(raw_date_str[8:10])
-            hour = int(raw_date_str[11:13])
-            minute = int(raw_date_str[14:16])
-            second = int(raw_date_str[17:19])
-            millisecond = int(raw_date_str[20:22]) * 10
-            self._decoded_timestamp = datetime.datetime(year=year, month=month, day=day, hour=hour, minute=minute, second=second, microsecond=millisecond * 1000)
-        except (ValueError, IndexError):
-            self._decoded_timestamp = None
+        self._decoded_timestamp = decode_cck_mpro_trace_line_timestamp(self.full_raw_line)
 
         match_liaison_pattern = LIAISON_PATTERN.match(self.full_raw_line)
         if match_liaison_pattern:
             self._liaison_full_name = match_liaison_pattern.group("liaison_full_name")
             self._liaison_id = match_liaison_pattern.group("liaison_id")
             self._liaison = self.parent_file.library.get_or_create_liaison(full_name=self._liaison_full_name, identifier=self._liaison_id)
-            if self._liaison:
+            # Compact loading mode does not keep lines in liaisons
+            if self._liaison and isinstance(self.parent_file, CckMproTraceFile):
                 self._liaison.all_lines.append(self)
 
-        if "le msg a un problème de 'enchainement numero protocolaire'" in self.full_raw_line:
+        if PROBLEM_ENCHAINEMENT_NUMERO_PROTOCOLAIRE_TEXT in self.full_raw_line:
             self._problem_enchainement = CckMproProblemEnchainementNumeroProtocolaire(self)
-        
-        if "- changement d'état : " in self.full_raw_line:
+
+        if CHANGEMENT_ETAT_LIAISON_TEXT in self.full_raw_line:
             self._changement_etat = CckMproChangementEtatLiaison(self)
 
     @property
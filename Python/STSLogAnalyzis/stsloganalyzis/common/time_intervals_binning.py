@@ -0,0 +1,50 @@
+import datetime
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def convert_timestamps_to_microseconds_since(timestamps: Sequence[datetime.datetime], origin: datetime.datetime) -> npt.NDArray[np.int64]:
+    # pandas converts a list of datetime much faster than NumPy
+    return ((pd.DatetimeIndex(list(timestamps)) - pd.Timestamp(origin)) // ONE_MICROSECOND).to_numpy(dtype=np.int64)
+
+
+class TimeIntervals:
+    """Consecutive intervals of the same duration: first one begins at start_time, last one contains end_time.
+    Timestamps are binned by integer division of their offset to start_time, instead of being compared to every interval"""
+
+    def __init__(self, start_time: datetime.datetime, end_time: datetime.datetime, interval_minutes: float) -> None:
+        self.start_time = start_time
+        self.end_time = end_time
+        self.interval_duration = datetime.timedelta(minutes=interval_minutes)
+        self.interval_duration_in_microseconds = self.interval_duration // ONE_MICROSECOND
+        assert self.interval_duration_in_microseconds > 0
+
+        self.intervals_count = (end_time - start_time) // self.interval_duration + 1 if end_time >= start_time else 0
+        self.interval_start_times: List[datetime.datetime] = [start_time + self.interval_duration * interval_index for interval_index in range(self.intervals_count)]
+        self.intervals: List[Tuple[datetime.datetime, datetime.datetime]] = [(interval_start, interval_start + self.interval_duration) for interval_start in self.interval_start_times]
+
+    def get_interval_indexes(self, timestamps: Sequence[datetime.datetime]) -> npt.NDArray[np.int64]:
+        """Index of the interval containing each timestamp, -1 if outside all intervals"""
+        offsets_in_microseconds = convert_timestamps_to_microseconds_since(timestamps, origin=self.start_time)
+        interval_indexes = offsets_in_microseconds // self.interval_duration_in_microseconds
+        interval_indexes[(offsets_in_microseconds < 0) | (interval_indexes >= self.intervals_count)] = -1
+        return interval_indexes
+
+    def count_by_interval(self, timestamps: Sequence[datetime.datetime]) -> List[int]:
+        if not timestamps:
+            return [0] * self.intervals_count
+
+        interval_indexes = self.get_interval_indexes(timestamps)
+        counts = np.bincount(interval_indexes[interval_indexes >= 0], minlength=self.intervals_count)
+        return [int(count) for count in counts]
+
+    def count_by_interval_for_each_series(self, timestamps_by_series: Mapping[str, Sequence[datetime.datetime]]) -> Dict[str, List[int]]:
+        """Series without any timestamp inside intervals are not returned. Series are ordered by their first non empty interval (then by input order)"""
+        counts_by_series = {series_name: self.count_by_interval(timestamps) for series_name, timestamps in timestamps_by_series.items()}
+        counts_by_non_empty_series = {series_name: counts for series_name, counts in counts_by_series.items() if any(counts)}
+        return dict(sorted(counts_by_non_empty_series.items(), key=lambda series_and_counts: next(index for index, count in enumerate(series_and_counts[1]) if count)))
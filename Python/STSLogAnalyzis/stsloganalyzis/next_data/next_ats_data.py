@@ -4,28 +4,35 @@ from typing import Tuple, Optional, Dict, Set
 
 from stsloganalyzis.topology import (
     line_topology,
+    topology_snapshot,
 )
 from stsloganalyzis.archive import decode_action_set_content, decode_archive, decode_message, decode_xml_message
 from stsloganalyzis.common import common_filters
 
 
-def get_line_topology() -> line_topology.Line:
+def get_line_topology(topology_snapshot_directory_path: Optional[str] = None) -> line_topology.Line:
 
-    railway_line = line_topology.Line.load_from_csv(
-        segments_csv_full_path=r"D:\NEXT\Data\Csv\NEXT_segment.csv",
-        track_circuits_csv_full_path=r"D:\NEXT\Data\Csv\NEXT_track_circuit.csv",
-        tracking_blocks_csv_full_path=r"D:\NEXT\Data\Csv\NEXT_tracking_block.csv",
-        switches_csv_full_path=r"D:\NEXT\Data\Csv\NEXT_switch.csv",
-        segments_relations_csv_full_path=r"D:\NEXTTS\Data\Csv\NEXT_tsSegmentRelation.csv",
-        tracking_block_on_segments_csv_full_path=r"D:\NEXTTS\Data\Csv\NEXT_tsLocUnitTopo.csv",
-        ignore_tracking_blocks_without_circuits=True,
-    )
+    csv_files_full_paths = {
+        "segments_csv_full_path": r"D:\NEXT\Data\Csv\NEXT_segment.csv",
+        "track_circuits_csv_full_path": r"D:\NEXT\Data\Csv\NEXT_track_circuit.csv",
+        "tracking_blocks_csv_full_path": r"D:\NEXT\Data\Csv\NEXT_tracking_block.csv",
+        "switches_csv_full_path": r"D:\NEXT\Data\Csv\NEXT_switch.csv",
+        "segments_relations_csv_full_path": r"D:\NEXTTS\Data\Csv\NEXT_tsSegmentRelation.csv",
+        "tracking_block_on_segments_csv_full_path": r"D:\NEXTTS\Data\Csv\NEXT_tsLocUnitTopo.csv",
+    }
+
+    if topology_snapshot_directory_path:
+        railway_line = topology_snapshot.load_line_from_csv_with_snapshot(
+            snapshot_directory_path=topology_snapshot_directory_path, ignore_tracking_blocks_without_circuits=True, **csv_files_full_paths
+        )
+    else:
+        railway_line = line_topology.Line.load_from_csv(ignore_tracking_blocks_without_circuits=True, **csv_files_full_paths)
     assert railway_line
     assert isinstance(railway_line, line_topology.Line)
     return railway_line
 
 
-def get_encoders() -> Tuple[line_topology.Line, decode_archive.ArchiveDecoder]:
+def get_encoders(topology_snapshot_directory_path: Optional[str] = None) -> Tuple[line_topology.Line, decode_archive.ArchiveDecoder]:
 
     messages_list_csv_file_full_path = r"D:\NEXT\Data\Csv\NEXT_message.csv"
     xml_directory_path = r"D:\NEXT\Data\Xml"
@@ -49,10 +56,12 @@ def get_encoders() -> Tuple[line_topology.Line, decode_archive.ArchiveDecoder]:
     message_manager = decode_message.InvariantMessagesManager(messages_list_csv_file_full_path=messages_list_csv_file_full_path)
     action_set_content_decoder = decode_action_set_content.ActionSetContentDecoder(csv_file_file_path=r"D:\NEXTTS\Data\Csv\NEXT_tsActionSet.csv")
     xml_message_decoder = decode_xml_message.XmlMessageDecoder(
-        xml_directory_path=xml_directory_path, signed_or_unsigned_type_for_integer_fields_manager=NextSignedOrUnsignedTypeForIntegerFieldsManager()
+        xml_directory_path=xml_directory_path,
+        signed_or_unsigned_type_for_integer_fields_manager=NextSignedOrUnsignedTypeForIntegerFieldsManager(),
+        build_fields_and_records_objects=False,
     )
 
-    railway_line = get_line_topology()
+    railway_line = get_line_topology(topology_snapshot_directory_path=topology_snapshot_directory_path)
 
     archive_decoder = decode_archive.ArchiveDecoder(
         action_set_content_decoder=action_set_content_decoder,
@@ -64,6 +73,12 @@ def get_encoders() -> Tuple[line_topology.Line, decode_archive.ArchiveDecoder]:
     return railway_line, archive_decoder
 
 
+def get_archive_decoder(topology_snapshot_directory_path: Optional[str] = None) -> decode_archive.ArchiveDecoder:
+    """Top-level factory, usable by ArchiveLibrary.Builder.with_parallel_build (with functools.partial to use a topology snapshot)"""
+    _, archive_decoder = get_encoders(topology_snapshot_directory_path=topology_snapshot_directory_path)
+    return archive_decoder
+
+
 def get_classic_archive_library_base_builder(archive_decoder: decode_archive.ArchiveDecoder) -> decode_archive.ArchiveLibrary.Builder:
     archive_library_builder = (
         decode_archive.ArchiveLibrary.Builder()
@@ -1,7 +1,8 @@
 import pandas as pd
+import bisect
 import datetime
 import os
-from collections import Counter, OrderedDict
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Dict, List, Optional, Self, Tuple, cast, Any
@@ -11,6 +12,8 @@ import plotly.graph_objects as go
 from common import file_utils, file_name_utils, reports_utils
 from logger import logger_config
 
+from stsloganalyzis.common import time_intervals_binning
+
 # CONTENT_OF_FIELD_IN_CASE_OF_DECODING_ERROR = "!!! Decoding Error !!!"
 
 
@@ -140,13 +143,14 @@ class TerminalTechniqueArchivesMaintLibrary:
     def __post_init__(self) -> None:
         self.all_processed_lines: List["TerminalTechniqueArchivesMaintLogLine"] = []
         self.all_processed_files: List["TerminalTechniqueArchivesMaintFile"] = []
-        self.currently_opened_alarms: List[TerminalTechniqueClosableAlarm] = []
+        self.currently_opened_alarms_by_full_text: Dict[str, List[TerminalTechniqueClosableAlarm]] = {}
         self.all_mesd_alarms_groups: List["TerminalTechniqueMesdAlarmsGroup"] = []
         self.ignored_end_alarms_without_alarm_begin: List[TerminalTechniqueClosableAlarm] = []
         self.sahara_alarms: List[SaharaTerminalTechniqueAlarm] = []
         self.mccs_hs_alarms: List[TerminalTechniqueMccsHAlarm] = []
         self.sessions_alarms: List[TerminalTechniqueSessionAlarm] = []
         self.equipments_with_alarms: List[TerminalTechniqueEquipmentWithAlarms] = []
+        self.equipment_with_alarms_by_name: Dict[str, TerminalTechniqueEquipmentWithAlarms] = {}
         self.all_back_to_past_detected: List[TerminalTechniqueArchivesMaintLogBackToPast] = []
         self.mccs_alarms_files_names_and_line_numbers: List[Tuple[str, int]] = []
 
@@ -179,25 +183,47 @@ class TerminalTechniqueArchivesMaintLibrary:
         assert self.all_processed_lines
 
         logger_config.print_and_log_info(f"{self.name}: ignored_end_alarms_without_alarm_begin:{len(self.ignored_end_alarms_without_alarm_begin)}")
-        logger_config.print_and_log_info(f"{self.name}: currently_opened_alarms:{len(self.currently_opened_alarms)}")
+        logger_config.print_and_log_info(f"{self.name}: currently_opened_alarms:{self.get_currently_opened_alarms_count()}")
         for equipment in self.equipments_with_alarms:
             logger_config.print_and_log_info(f"{self.name}: Equipment {equipment.name} has {len(equipment.alarms)} alarms")
         assert len(self.ignored_end_alarms_without_alarm_begin) < len(self.all_processed_lines), f"{len(self.ignored_end_alarms_without_alarm_begin)} too meny previously opened alarms"
         assert len(self.ignored_end_alarms_without_alarm_begin) < 50000, f"{len(self.ignored_end_alarms_without_alarm_begin)} ignored previously opened alarms"
-        assert len(self.currently_opened_alarms) < 1000, f"{len(self.currently_opened_alarms)} opened alarms"
+        assert self.get_currently_opened_alarms_count() < 1000, f"{self.get_currently_opened_alarms_count()} opened alarms"
 
         return self
 
     def get_or_create_equipment_with_alarms(self, equipment_name: str) -> "TerminalTechniqueEquipmentWithAlarms":
-        equipments_found = [equipment for equipment in self.equipments_with_alarms if equipment.name == equipment_name]
-        if equipments_found:
-            assert len(equipments_found) == 1
-            return equipments_found[0]
+        equipment_found = self.equipment_with_alarms_by_name.get(equipment_name)
+        if equipment_found:
+            return equipment_found
 
         equipment = TerminalTechniqueEquipmentWithAlarms(name=equipment_name)
         self.equipments_with_alarms.append(equipment)
+        self.equipment_with_alarms_by_name[equipment_name] = equipment
         return equipment
 
+    def open_alarm(self, alarm: TerminalTechniqueClosableAlarm) -> None:
+        self.currently_opened_alarms_by_full_text.setdefault(alarm.full_text, []).append(alarm)
+
+    def pop_currently_opened_alarms(self, alarm_full_text: str) -> List[TerminalTechniqueClosableAlarm]:
+        """All opened alarms with this text, older first. They are not opened anymore"""
+        return self.currently_opened_alarms_by_full_text.pop(alarm_full_text, [])
+
+    def get_currently_opened_alarms_count(self) -> int:
+        return sum(len(opened_alarms) for opened_alarms in self.currently_opened_alarms_by_full_text.values())
+
+    def get_lines_context(
+        self, line: "TerminalTechniqueArchivesMaintLogLine", lines_before: int, lines_after: int, max_time_delta: Optional[datetime.timedelta] = None
+    ) -> List["TerminalTechniqueArchivesMaintLogLine"]:
+        """Lines around this line (included), sliced directly with its index in library. If max_time_delta is set, only lines close enough in time to this line are kept"""
+        context_lines = self.all_processed_lines[max(0, line.line_index_in_library - lines_before) : line.line_index_in_library + lines_after + 1]
+        if max_time_delta is None:
+            return context_lines
+        return [context_line for context_line in context_lines if abs(context_line.decoded_timestamp - line.decoded_timestamp) <= max_time_delta]
+
+    def get_lines_context_as_text(self, line: "TerminalTechniqueArchivesMaintLogLine", lines_before: int, lines_after: int, max_time_delta: Optional[datetime.timedelta] = None) -> str:
+        return "\n".join(context_line.full_raw_line.strip() for context_line in self.get_lines_context(line, lines_before=lines_before, lines_after=lines_after, max_time_delta=max_time_delta))
+
     def export_equipments_with_alarms_to_excel(self, output_folder_path: str, equipment_names_to_ignore: List[str]) -> None:
         """
         Exporte tous les équipements et leurs alarmes dans un fichier Excel.
@@ -336,72 +362,35 @@ class TerminalTechniqueArchivesMaintLibrary:
                 end_time = self.all_processed_lines[-1].decoded_timestamp
 
                 # Créer des intervalles de temps
-                interval_start_times: List[datetime.datetime] = []
-                current_time = start_time
-                while current_time <= end_time:
-                    interval_start_times.append(current_time)
-                    current_time += datetime.timedelta(minutes=interval_minutes)
-
-                # Initialiser les compteurs pour chaque intervalle
-                interval_back_to_past_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {}
-                interval_sahara_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {}
-                interval_equipment_counts: Dict[Tuple[datetime.datetime, datetime.datetime], Dict[str, int]] = {}
-
-                for interval_start in interval_start_times:
-                    interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                    interval_back_to_past_count[(interval_start, interval_end)] = 0
-                    interval_sahara_count[(interval_start, interval_end)] = 0
-                    interval_equipment_counts[(interval_start, interval_end)] = {}
-
-                # Compter les back_to_past_detected
-                for back_to_past in self.all_back_to_past_detected:
-                    timestamp = back_to_past.previous_line.decoded_timestamp
-                    for interval_start in interval_start_times:
-                        interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                        if interval_start <= timestamp < interval_end:
-                            interval_back_to_past_count[(interval_start, interval_end)] += 1
-                            break
+                time_intervals = time_intervals_binning.TimeIntervals(start_time=start_time, end_time=end_time, interval_minutes=interval_minutes)
 
-                # Compter les sahara_alarms
-                for sahara_alarm in self.sahara_alarms:
-                    timestamp = sahara_alarm.raise_line.decoded_timestamp
-                    for interval_start in interval_start_times:
-                        interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                        if interval_start <= timestamp < interval_end:
-                            interval_sahara_count[(interval_start, interval_end)] += 1
-                            break
+                # Compter les back_to_past_detected et les sahara_alarms dans chaque intervalle
+                interval_back_to_past_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+                    zip(time_intervals.intervals, time_intervals.count_by_interval([back_to_past.previous_line.decoded_timestamp for back_to_past in self.all_back_to_past_detected]))
+                )
+                interval_sahara_count: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+                    zip(time_intervals.intervals, time_intervals.count_by_interval([sahara_alarm.raise_line.decoded_timestamp for sahara_alarm in self.sahara_alarms]))
+                )
 
-                # Compter les alarmes par équipement
+                # Compter les alarmes par équipement (équipements en ordre d'apparition)
+                alarms_timestamps_by_equipment_name: Dict[str, List[datetime.datetime]] = {}
                 for equipment in self.equipments_with_alarms:
                     if equipment.name not in equipment_names_to_ignore:
-                        for alarm in equipment.alarms:
-                            timestamp = alarm.raise_line.decoded_timestamp
-                            for interval_start in interval_start_times:
-                                interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                                if interval_start <= timestamp < interval_end:
-                                    if equipment.name not in interval_equipment_counts[(interval_start, interval_end)]:
-                                        interval_equipment_counts[(interval_start, interval_end)][equipment.name] = 0
-                                    interval_equipment_counts[(interval_start, interval_end)][equipment.name] += 1
-                                    break
+                        alarms_timestamps_by_equipment_name.setdefault(equipment.name, []).extend(alarm.raise_line.decoded_timestamp for alarm in equipment.alarms)
+                interval_counts_by_equipment_name = time_intervals.count_by_interval_for_each_series(alarms_timestamps_by_equipment_name)
+                equipment_names = list(interval_counts_by_equipment_name.keys())
 
                 # Préparer les données pour le graphe
                 x_labels = [f"{begin.strftime("('%Y%m%d_%H:%M")} - {end.strftime("%H:%M")}" for begin, end in interval_back_to_past_count.keys()]
                 y_back_to_past = list(interval_back_to_past_count.values())
                 y_sahara = list(interval_sahara_count.values())
 
-                # Récupérer tous les noms d'équipements uniques (en ordre d'apparition)
-                equipment_names: List[str] = []
-                for interval_counts in interval_equipment_counts.values():
-                    for name in interval_counts.keys():
-                        if name not in equipment_names:
-                            equipment_names.append(name)
-
                 # Créer et exporter les données dans un fichier Excel
                 excel_filename = f"{self.name}_stats_alarms_by_period{file_name_utils.get_file_suffix_with_current_datetime()}.xlsx"
 
                 # Préparer les données pour le DataFrame
                 excel_data: List[Dict[str, Any]] = []
-                for (interval_begin, interval_end), back_to_past_count in interval_back_to_past_count.items():
+                for interval_index, ((interval_begin, interval_end), back_to_past_count) in enumerate(interval_back_to_past_count.items()):
                     row_data: Dict[str, Any] = {
                         "Début Intervalle": interval_begin,
                         "Fin Intervalle": interval_end,
@@ -409,8 +398,7 @@ class TerminalTechniqueArchivesMaintLibrary:
                         "Sahara": interval_sahara_count[(interval_begin, interval_end)],
                     }
                     for equipment_name in equipment_names:
-                        count = interval_equipment_counts[(interval_begin, interval_end)].get(equipment_name, 0)
-                        row_data[equipment_name] = count
+                        row_data[equipment_name] = interval_counts_by_equipment_name[equipment_name][interval_index]
                     excel_data.append(row_data)
 
                 df = pd.DataFrame(excel_data)
@@ -442,9 +430,7 @@ class TerminalTechniqueArchivesMaintLibrary:
                 # Ajouter les équipements
                 colors = ["steelblue", "lightseagreen", "mediumseagreen", "lightcoral", "plum", "khaki", "lightcyan", "lightsalmon"]
                 for equipment_idx, equipment_name in enumerate(equipment_names):
-                    y_equipment = [
-                        interval_equipment_counts[(interval_start, interval_start + datetime.timedelta(minutes=interval_minutes))].get(equipment_name, 0) for interval_start in interval_start_times
-                    ]
+                    y_equipment = interval_counts_by_equipment_name[equipment_name]
                     fig_data.append(
                         go.Bar(
                             name=equipment_name,
@@ -481,9 +467,7 @@ class TerminalTechniqueArchivesMaintLibrary:
                 plt.bar([p - 0.4 + width for p in x_pos], y_sahara, width, label="Sahara", color="gold")
 
                 for equipment_idx, equipment_name in enumerate(equipment_names):
-                    y_equipment = [
-                        interval_equipment_counts[(interval_start, interval_start + datetime.timedelta(minutes=interval_minutes))].get(equipment_name, 0) for interval_start in interval_start_times
-                    ]
+                    y_equipment = interval_counts_by_equipment_name[equipment_name]
                     plt.bar([p - 0.4 + width * (2 + equipment_idx) for p in x_pos], y_equipment, width, label=equipment_name, color=colors[equipment_idx % len(colors)])
 
                 plt.xlabel("Intervalles de temps (heure début - heure fin)")
@@ -518,32 +502,14 @@ class TerminalTechniqueArchivesMaintLibrary:
             end_time = self.all_processed_lines[-1].decoded_timestamp
 
             # Créer des intervalles de temps
-            intervals: List[Tuple[datetime.datetime, datetime.datetime]] = []
-            interval_start_times: List[datetime.datetime] = []
-            current_time = start_time
-            while current_time <= end_time:
-                interval_start_time = current_time
-                interval_start_times.append(current_time)
-                current_time += datetime.timedelta(minutes=interval_minutes)
-                interval_end_time = current_time
-                intervals.append((interval_start_time, interval_end_time))
-
-            logger_config.print_and_log_info(f"plot_sahara_alarms_by_period: {len(interval_start_times)} intervals of {interval_minutes} minutes between {start_time} and {end_time}")
-
-            interval_sahara_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = Counter()
+            time_intervals = time_intervals_binning.TimeIntervals(start_time=start_time, end_time=end_time, interval_minutes=interval_minutes)
 
-            for interval in intervals:
-                interval_sahara_counts[interval] = 0
+            logger_config.print_and_log_info(f"plot_sahara_alarms_by_period: {time_intervals.intervals_count} intervals of {interval_minutes} minutes between {start_time} and {end_time}")
 
             # Compter les alarmes SAHARA dans chaque intervalle
-            for sahara_alarm in self.sahara_alarms:
-                timestamp = sahara_alarm.raise_line.decoded_timestamp
-                for interval_start in interval_start_times:
-                    interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                    if interval_start <= timestamp < interval_end:
-                        # logger_config.print_and_log_info(f"plot_sahara_alarms_by_period: Sahara alarm {sahara_alarm.raise_line.full_raw_line} counted in interval {(interval_start, interval_end)}")
-                        interval_sahara_counts[(interval_start, interval_end)] += 1
-                        break
+            interval_sahara_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+                zip(time_intervals.intervals, time_intervals.count_by_interval([sahara_alarm.raise_line.decoded_timestamp for sahara_alarm in self.sahara_alarms]))
+            )
 
             # Préparer les données pour le graphe
             x_labels = [f"{begin.strftime("('%Y%m%d %H:%M")} - {end.strftime("%H:%M")}" for begin, end in interval_sahara_counts.keys()]
@@ -632,27 +598,12 @@ class TerminalTechniqueArchivesMaintLibrary:
                 end_time = self.all_processed_lines[-1].decoded_timestamp
 
                 # Créer des intervalles de temps
-                intervals: List[Tuple[datetime.datetime, datetime.datetime]] = []
-                interval_start_times: List[datetime.datetime] = []
-                current_time = start_time
-                while current_time <= end_time:
-                    interval_start_time = current_time
-                    interval_start_times.append(current_time)
-                    current_time += datetime.timedelta(minutes=interval_minutes)
-                    interval_end_time = current_time
-                    intervals.append((interval_start_time, interval_end_time))
-
-                interval_back_to_past_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = Counter()
-                for interval in intervals:
-                    interval_back_to_past_counts[interval] = 0
+                time_intervals = time_intervals_binning.TimeIntervals(start_time=start_time, end_time=end_time, interval_minutes=interval_minutes)
+
                 # Compter les back_to_past_detected dans chaque intervalle
-                for back_to_past in self.all_back_to_past_detected:
-                    timestamp = back_to_past.previous_line.decoded_timestamp
-                    for interval_start in interval_start_times:
-                        interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                        if interval_start <= timestamp < interval_end:
-                            interval_back_to_past_counts[(interval_start, interval_end)] += 1
-                            break
+                interval_back_to_past_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+                    zip(time_intervals.intervals, time_intervals.count_by_interval([back_to_past.previous_line.decoded_timestamp for back_to_past in self.all_back_to_past_detected]))
+                )
 
                 # Préparer les données pour le graphe
                 x_labels = [f"{begin.strftime("%Y%m%d_%H:%M")} - {end.strftime("%H:%M")}" for begin, end in interval_back_to_past_counts.keys()]
@@ -740,62 +691,18 @@ class TerminalTechniqueArchivesMaintLibrary:
                 end_time = self.all_processed_lines[-1].decoded_timestamp
 
                 # Créer des intervalles de temps
-                intervals: List[Tuple[datetime.datetime, datetime.datetime]] = []
-                interval_start_times: List[datetime.datetime] = []
-                current_time = start_time
-                while current_time <= end_time:
-                    interval_start_time = current_time
-                    interval_start_times.append(current_time)
-                    current_time += datetime.timedelta(minutes=interval_minutes)
-                    interval_end_time = current_time
-                    intervals.append((interval_start_time, interval_end_time))
+                time_intervals = time_intervals_binning.TimeIntervals(start_time=start_time, end_time=end_time, interval_minutes=interval_minutes)
 
                 # Compter les événements dans chaque intervalle
-                interval_sahara_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = Counter()
-                interval_mccs_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = Counter()
-                interval_back_to_past_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = Counter()
-
-                for interval in intervals:
-                    interval_sahara_counts[interval] = 0
-                    interval_mccs_counts[interval] = 0
-                    interval_back_to_past_counts[interval] = 0
-
-                # Compter les sahara_alarms
-                for sahara_alarm in self.sahara_alarms:
-                    timestamp = sahara_alarm.raise_line.decoded_timestamp
-                    for interval_start in interval_start_times:
-                        interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                        if interval_start <= timestamp < interval_end:
-                            interval_sahara_counts[(interval_start, interval_end)] += 1
-                            break
-
-                # Compter les mccs_hs_alarms
-                for mccs_alarm in self.mccs_hs_alarms:
-                    timestamp = mccs_alarm.raise_line.decoded_timestamp
-                    for interval_start in interval_start_times:
-                        interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                        if interval_start <= timestamp < interval_end:
-                            interval_mccs_counts[(interval_start, interval_end)] += 1
-                            break
-
-                # Compter les back_to_past_detected
-                for back_to_past in self.all_back_to_past_detected:
-                    timestamp = back_to_past.previous_line.decoded_timestamp
-                    for interval_start in interval_start_times:
-                        interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                        if interval_start <= timestamp < interval_end:
-                            interval_back_to_past_counts[(interval_start, interval_end)] += 1
-                            break
-
-                # Initialiser les compteurs pour les intervalles manquants
-                for interval_start in interval_start_times:
-                    interval_end = interval_start + datetime.timedelta(minutes=interval_minutes)
-                    if (interval_start, interval_end) not in interval_sahara_counts:
-                        interval_sahara_counts[(interval_start, interval_end)] = 0
-                    if (interval_start, interval_end) not in interval_mccs_counts:
-                        interval_mccs_counts[(interval_start, interval_end)] = 0
-                    if (interval_start, interval_end) not in interval_back_to_past_counts:
-                        interval_back_to_past_counts[(interval_start, interval_end)] = 0
+                interval_sahara_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+                    zip(time_intervals.intervals, time_intervals.count_by_interval([sahara_alarm.raise_line.decoded_timestamp for sahara_alarm in self.sahara_alarms]))
+                )
+                interval_mccs_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+                    zip(time_intervals.intervals, time_intervals.count_by_interval([mccs_alarm.raise_line.decoded_timestamp for mccs_alarm in self.mccs_hs_alarms]))
+                )
+                interval_back_to_past_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = dict(
+                    zip(time_intervals.intervals, time_intervals.count_by_interval([back_to_past.previous_line.decoded_timestamp for back_to_past in self.all_back_to_past_detected]))
+                )
 
                 # Préparer les données pour le graphe
                 x_labels = [f"{begin.strftime("('%Y%m%d_%H:%M")} - {end.strftime("%H:%M")}" for begin, end in interval_sahara_counts.keys()]
@@ -977,7 +884,7 @@ class TerminalTechniqueArchivesMaintLibrary:
             except Exception as e:
                 logger_config.print_and_log_exception(e)
 
-    def export_back_to_past_with_context_to_excel(self, output_folder_path: str) -> None:
+    def export_back_to_past_with_context_to_excel(self, output_folder_path: str, context_lines_count: int = 0, context_max_time_delta: Optional[datetime.timedelta] = None) -> None:
 
         with logger_config.stopwatch_with_label(f"{self.name}: export_back_to_past_with_context_to_excel", inform_beginning=False, enable_print=False, enabled=False):
             try:
@@ -1004,6 +911,10 @@ class TerminalTechniqueArchivesMaintLibrary:
                             ),
                         }
                     )
+                    if context_lines_count:
+                        rows[-1]["Context"] = self.get_lines_context_as_text(
+                            back_to_past.previous_line, lines_before=context_lines_count, lines_after=context_lines_count, max_time_delta=context_max_time_delta
+                        )
 
                 df = pd.DataFrame(rows)
                 filename = f"{self.name}_back_to_past_with_context{file_name_utils.get_file_suffix_with_current_datetime()}.xlsx"
@@ -1013,38 +924,30 @@ class TerminalTechniqueArchivesMaintLibrary:
             except Exception as e:
                 logger_config.print_and_log_exception(e)
 
-    def export_sahara_alarms_with_context_to_excel(self, output_folder_path: str) -> None:
+    def export_sahara_alarms_with_context_to_excel(self, output_folder_path: str, context_lines_count: int = 0, context_max_time_delta: Optional[datetime.timedelta] = None) -> None:
         """
         Exporte toutes les SAHARA alarms dans un fichier Excel avec le contexte:
         - Nombre de MCCS H alarms qui précèdent directement l'alarme SAHARA
         - Nombre de lignes depuis le dernier Back to Past event
+        - Lignes autour de l'alarme (si context_lines_count)
 
         Args:
             output_folder_path: Chemin du dossier de sortie
+            context_lines_count: Nombre de lignes de contexte avant et après l'alarme
+            context_max_time_delta: Ecart de temps maximum des lignes de contexte
         """
         try:
             if not self.sahara_alarms:
                 logger_config.print_and_log_error("Aucune alarme SAHARA. Aucun fichier créé.")
                 return
 
-            with logger_config.stopwatch_with_label(f"{self.name}: Créer une map pour accès rapide aux back_to_past par l'index de la ligne"):
-                # Créer une map pour accès rapide aux back_to_past par l'index de la ligne
-                back_to_past_by_previous_line_index: Dict[int, TerminalTechniqueArchivesMaintLogBackToPast] = {}
-                for back_to_past in self.all_back_to_past_detected:
-                    for line_idx, line in enumerate(self.all_processed_lines):
-                        if line is back_to_past.previous_line:
-                            back_to_past_by_previous_line_index[line_idx] = back_to_past
-                            break
+            # Index des lignes précédant les back_to_past, triés
+            back_to_past_previous_line_indexes = sorted({back_to_past.previous_line.line_index_in_library for back_to_past in self.all_back_to_past_detected})
 
             # Préparer les données pour le DataFrame
             excel_data: List[Dict[str, Any]] = []
             for idx, sahara_alarm in enumerate(self.sahara_alarms):
-                # Trouver l'index de cette alarme dans all_processed_lines
-                sahara_line_idx = None
-                for line_idx, line in enumerate(self.all_processed_lines):
-                    if line is sahara_alarm.raise_line:
-                        sahara_line_idx = line_idx
-                        break
+                sahara_line_idx = sahara_alarm.raise_line.line_index_in_library
 
                 # Compter les MCCS H alarms qui précèdent directement
                 currently_parsed_line_index = sahara_alarm.raise_line.line_number_in_library
@@ -1056,22 +959,13 @@ class TerminalTechniqueArchivesMaintLibrary:
                     mesd_count_preceding += 1
                     currently_parsed_line_index -= 1
 
-                # Compter les lignes depuis le dernier Back to Past
-                lines_since_last_back_to_past = 0
-                if sahara_line_idx is not None:
-                    last_back_to_past_idx = -1
-                    # Trouver le dernier Back to Past avant cette alarme
-                    for btp_idx in sorted(back_to_past_by_previous_line_index.keys()):
-                        if btp_idx < sahara_line_idx:
-                            last_back_to_past_idx = btp_idx
-                        else:
-                            break
-
-                    if last_back_to_past_idx >= 0:
-                        lines_since_last_back_to_past = sahara_line_idx - last_back_to_past_idx
-                    else:
-                        # Pas de Back to Past avant, on compte depuis le début
-                        lines_since_last_back_to_past = sahara_line_idx + 1
+                # Compter les lignes depuis le dernier Back to Past (trouvé par dichotomie)
+                back_to_past_before_count = bisect.bisect_left(back_to_past_previous_line_indexes, sahara_line_idx)
+                if back_to_past_before_count:
+                    lines_since_last_back_to_past = sahara_line_idx - back_to_past_previous_line_indexes[back_to_past_before_count - 1]
+                else:
+                    # Pas de Back to Past avant, on compte depuis le début
+                    lines_since_last_back_to_past = sahara_line_idx + 1
 
                 excel_data.append(
                     {
@@ -1085,6 +979,10 @@ class TerminalTechniqueArchivesMaintLibrary:
                         "Lines Since Last Back to Past": lines_since_last_back_to_past,
                     }
                 )
+                if context_lines_count:
+                    excel_data[-1]["Context"] = self.get_lines_context_as_text(
+                        sahara_alarm.raise_line, lines_before=context_lines_count, lines_after=context_lines_count, max_time_delta=context_max_time_delta
+                    )
 
             # Créer et sauvegarder le fichier Excel
             df = pd.DataFrame(excel_data)
@@ -1166,7 +1064,7 @@ class TerminalTechniqueArchivesMaintFile:
     last_line: Optional["TerminalTechniqueArchivesMaintLogLine"]
 
     def __post_init__(self) -> None:
-        self.file_full_path = self.parent_folder_full_path + "\\" + self.file_name
+        self.file_full_path = os.path.join(self.parent_folder_full_path, self.file_name)
 
         with logger_config.stopwatch_with_label(f"{self.library.name}: Open and read file  {self.file_full_path}", inform_beginning=True, enable_print=False, enabled=False):
             try:
@@ -1196,7 +1094,8 @@ class TerminalTechniqueArchivesMaintLogLine:
     previous_line: Optional["TerminalTechniqueArchivesMaintLogLine"]
 
     def __post_init__(self) -> None:
-        self.line_number_in_library = len(self.parent_file.library.all_processed_lines) + 1
+        self.line_index_in_library = len(self.parent_file.library.all_processed_lines)
+        self.line_number_in_library = self.line_index_in_library + 1
         self.raw_date_str = self.full_raw_line[0:22]
 
         self.full_raw_line_split_by_tab = self.full_raw_line.split("\t")
@@ -1216,18 +1115,16 @@ class TerminalTechniqueArchivesMaintLogLine:
         self.alarm: TerminalTechniqueAlarm = cast("TerminalTechniqueAlarm", None)
 
         if self.alarm_type in [AlarmLineType.FIN_ALA, AlarmLineType.FERM_SESSION]:
-            found_unclosed_alarms = [alarm for alarm in self.parent_file.library.currently_opened_alarms if alarm.full_text == self.alarm_full_text]
+            found_unclosed_alarms = self.parent_file.library.pop_currently_opened_alarms(self.alarm_full_text)
             if found_unclosed_alarms:
                 while len(found_unclosed_alarms) > 1:
                     never_closed_alarm = found_unclosed_alarms[0]
                     logger_config.print_and_log_warning(
                         f"Alarm {never_closed_alarm.full_text} is re-opened at {found_unclosed_alarms[0].raise_line.decoded_timestamp} and not closed between. {len(found_unclosed_alarms)} unclosed alarms found \n({'\n'.join(alarm.raise_line.full_raw_line + " in " + alarm.raise_line.parent_file.file_name + ":"+str(alarm.raise_line.line_number_inside_file)  for alarm in found_unclosed_alarms)}) for {self.alarm_full_text} when trying to close {self.full_raw_line} in {self.parent_file.file_name}:{self.line_number_inside_file}"
                     )
-                    self.parent_file.library.currently_opened_alarms.remove(found_unclosed_alarms[0])
-                    found_unclosed_alarms = [alarm for alarm in self.parent_file.library.currently_opened_alarms if alarm.full_text == self.alarm_full_text]
+                    found_unclosed_alarms = found_unclosed_alarms[1:]
 
                 found_unclosed_alarm = found_unclosed_alarms[0]
-                self.parent_file.library.currently_opened_alarms.remove(found_unclosed_alarm)
                 assert found_unclosed_alarm.end_alarm_line is None
                 self.alarm = found_unclosed_alarm
                 self.alarm.end_alarm_line = self
@@ -1247,17 +1144,19 @@ class TerminalTechniqueArchivesMaintLogLine:
         elif "Absence acquittement SAAT" in self.alarm_full_text:
             self.alarm = SaatMissingAcknowledgmentTerminalTechniqueAlarm(raise_line=self, full_text=self.alarm_full_text, alarm_type=self.alarm_type)
         elif self.alarm_type == AlarmLineType.DEB_ALA and ("MCCS A HS" in self.alarm_full_text or "MCCS B HS" in self.alarm_full_text):
-            self.alarm = TerminalTechniqueMccsHAlarm(raise_line=self, full_text=self.alarm_full_text, alarm_type=self.alarm_type)
-            self.parent_file.library.mccs_hs_alarms.append(self.alarm)
+            mccs_alarm = TerminalTechniqueMccsHAlarm(raise_line=self, full_text=self.alarm_full_text, alarm_type=self.alarm_type)
+            self.alarm = mccs_alarm
+            self.parent_file.library.mccs_hs_alarms.append(mccs_alarm)
 
-            self.parent_file.library.currently_opened_alarms.append(self.alarm)
+            self.parent_file.library.open_alarm(mccs_alarm)
         elif self.alarm_type == AlarmLineType.DEB_ALA:
-            self.alarm = TerminalTechniqueClosableAlarm(raise_line=self, full_text=self.alarm_full_text, alarm_type=self.alarm_type)
-            self.parent_file.library.currently_opened_alarms.append(self.alarm)
+            closable_alarm = TerminalTechniqueClosableAlarm(raise_line=self, full_text=self.alarm_full_text, alarm_type=self.alarm_type)
+            self.alarm = closable_alarm
+            self.parent_file.library.open_alarm(closable_alarm)
         elif self.alarm_type == AlarmLineType.OUV_SESSION:
             session_alarm = TerminalTechniqueSessionAlarm(raise_line=self, full_text=self.alarm_full_text, alarm_type=self.alarm_type)
             self.alarm = session_alarm
-            self.parent_file.library.currently_opened_alarms.append(self.alarm)
+            self.parent_file.library.open_alarm(session_alarm)
             self.parent_file.library.sessions_alarms.append(session_alarm)
 
         elif self.alarm_type in [AlarmLineType.EVT_ALA, AlarmLineType.CMD_ESSAIS, AlarmLineType.CMD_CPT_RENDU]:
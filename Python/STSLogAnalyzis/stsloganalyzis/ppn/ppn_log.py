@@ -2,11 +2,60 @@ import re
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 
 from stsloganalyzis.unisig import decode_unisig, upper_layer_libraries
 
+PPN_LOG_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S:%f"
+
+# Usual layout, decoded in one pass:
+# 2026-05-28 12:37:05:492 kppn 1.3.3: [99:44 => 5:44] Sending PROFIBUS message [num:4138][rt:2363][mode:SDA][len:23] 76 c5 01 05
+PPN_LOG_LINE_PATTERN = re.compile(r"[^\[]*\[(\d+):(\d+) (<=|=>) (\d+):(\d+)\][^\[]*\[num:(\d+)\](?:\[rt:\d+\])?\[mode:(SDN|SDA)\]\[len:(\d+)\]([^\]]*)$")
+
+# Other layouts: each field is searched alone
+SAP_PATTERN = re.compile(r"\[(\d+):(\d+) (<=|=>) (\d+):(\d+)\]")
+SEQUENCE_PATTERN = re.compile(r"\[num:(\d+)\]")
+MODE_PATTERN = re.compile(r"\[mode:(SDN|SDA)\]")
+LENGTH_PATTERN = re.compile(r"\[len:(\d+)\]")
+
+PPN_LOG_LINES_BATCH_SIZE = 10000
+
+
+def decode_ppn_log_timestamp(date_field: str, time_field: str) -> datetime:
+    """Same as strptime with PPN_LOG_TIMESTAMP_FORMAT, but fields are sliced at their fixed position: 1970-01-01 02:18:14:652"""
+    if len(date_field) == 10 and len(time_field) == 12 and date_field[4] == date_field[7] == "-" and time_field[2] == time_field[5] == time_field[8] == ":":
+        return datetime(int(date_field[0:4]), int(date_field[5:7]), int(date_field[8:10]), int(time_field[0:2]), int(time_field[3:5]), int(time_field[6:8]), int(time_field[9:12]) * 1000)
+    return datetime.strptime(f"{date_field} {time_field}", PPN_LOG_TIMESTAMP_FORMAT)
+
+
+def get_source_and_target(sap_match: re.Match[str]) -> Tuple[int, int]:
+    if sap_match.group(3) == "=>":
+        return (int(sap_match.group(1)) << 16) | int(sap_match.group(2)), (int(sap_match.group(4)) << 16) | int(sap_match.group(5))
+    return (int(sap_match.group(4)) << 16) | int(sap_match.group(5)), (int(sap_match.group(1)) << 16) | int(sap_match.group(2))
+
+
+def iterate_ppn_log_lines(file_full_path: str, upper_layer_decoding_library: upper_layer_libraries.UpperLayerDecodingLibrary, encoding: str = "utf-8") -> Iterator["ProfibusLogLine"]:
+    """Raw lines are read and decoded one by one: the whole file is never loaded"""
+    with open(file_full_path, "r", encoding=encoding) as f:
+        for line in f:
+            decoded_line = ProfibusLogLine.decode_raw_log_line(line=line, upper_layer_decoding_library=upper_layer_decoding_library)
+            if decoded_line is not None:
+                yield decoded_line
+
+
+def iterate_ppn_log_lines_batches(
+    file_full_path: str, upper_layer_decoding_library: upper_layer_libraries.UpperLayerDecodingLibrary, batch_size: int = PPN_LOG_LINES_BATCH_SIZE, encoding: str = "utf-8"
+) -> Iterator[List["ProfibusLogLine"]]:
+    batch: List[ProfibusLogLine] = []
+    for decoded_line in iterate_ppn_log_lines(file_full_path=file_full_path, upper_layer_decoding_library=upper_layer_decoding_library, encoding=encoding):
+        batch.append(decoded_line)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 
 class SendingMode(Enum):
     SDA = "SDA"
@@ -22,18 +71,14 @@ class ServiceAccessPoint:
 @dataclass
 class ProfibusLogFile:
     file_full_path: str
+    upper_layer_decoding_library: upper_layer_libraries.UpperLayerDecodingLibrary
     encoding: str = "utf-8"
 
     def __post_init__(self) -> None:
         self.lines: List[ProfibusLogLine] = []
 
     def process(self) -> None:
-        with open(self.file_full_path, "r", encoding=self.encoding) as f:
-            lines = f.readlines()
-            for line in lines:
-                decoded_line = ProfibusLogLine.decode_raw_log_line(line=line)
-                if decoded_line is not None:
-                    self.lines.append(decoded_line)
+        self.lines.extend(iterate_ppn_log_lines(file_full_path=self.file_full_path, upper_layer_decoding_library=self.upper_layer_decoding_library, encoding=self.encoding))
 
 
 @dataclass
@@ -53,67 +98,59 @@ class ProfibusLogLine:
     @staticmethod
     def decode_raw_log_line(line: str, upper_layer_decoding_library: upper_layer_libraries.UpperLayerDecodingLibrary) -> Optional["ProfibusLogLine"]:
 
-        fields = line.split(" ")
+        fields = line.split(" ", 4)
         if len(fields) <= 4:
             print(f"-> bad line format\n{line}")
             return None
 
         # Extract time: 1970-01-01 02:18:14:652
-        timestamp = datetime.strptime(f"{fields[0]} {fields[1]}", "%Y-%m-%d %H:%M:%S:%f")
-
-        # Extract source and target: [99:37 <= 2:37]
-        sap_pattern = re.compile(r"\[(\d+):(\d+) (<=|=>) (\d+):(\d+)\]")
-        match = sap_pattern.search(line)
-        if match:
-            if match.group(3) == "=>":
-                source = (int(match.group(1)) << 16) | int(match.group(2))
-                target = (int(match.group(4)) << 16) | int(match.group(5))
-            else:
-                source = (int(match.group(4)) << 16) | int(match.group(5))
-                target = (int(match.group(1)) << 16) | int(match.group(2))
-        else:
-            source = target = 0
+        timestamp = decode_ppn_log_timestamp(fields[0], fields[1])
 
-        # Extract sequence: [num:43548]
-        seq_pattern = re.compile(r"\[num:(\d+)\]")
-        match = seq_pattern.search(line)
+        match = PPN_LOG_LINE_PATTERN.match(line)
         if match:
-            sequence = int(match.group(1))
-        else:
-            sequence = 0
+            source, target = get_source_and_target(match)
+            return ProfibusLogLine(
+                timestamp=timestamp,
+                source=source,
+                target=target,
+                sequence=int(match.group(6)),
+                mode=SendingMode[match.group(7)],
+                length=int(match.group(8)),
+                bytes_hexa=match.group(9).strip(),
+                upper_layer_decoding_library=upper_layer_decoding_library,
+            )
 
         # Extract mode: [mode:SDA]
-        mode_pattern = re.compile(r"\[mode:(SDN|SDA)\]")
-        match = mode_pattern.search(line)
-        if match:
-            mode = match.group(1)
-        else:
-            mode = ""
+        match = MODE_PATTERN.search(line)
+        if not match:
+            return None
+        mode = match.group(1)
+
+        # Extract source and target: [99:37 <= 2:37]
+        match = SAP_PATTERN.search(line)
+        source, target = get_source_and_target(match) if match else (0, 0)
+
+        # Extract sequence: [num:43548]
+        match = SEQUENCE_PATTERN.search(line)
+        sequence = int(match.group(1)) if match else 0
 
         # Extract length: [len:51]
-        len_pattern = re.compile(r"\[len:(\d+)\]")
-        match = len_pattern.search(line)
-        if match:
-            length = int(match.group(1))
-        else:
-            length = 0
+        match = LENGTH_PATTERN.search(line)
+        length = int(match.group(1)) if match else 0
 
         # Extract trailing bytes
         bytes_hexa = line.split("]")[-1].strip()
 
-        if mode in ("SDA", "SDN"):
-            return ProfibusLogLine(
-                timestamp=timestamp,
-                source=source,
-                target=target,
-                sequence=sequence,
-                mode=SendingMode[mode],
-                length=length,
-                bytes_hexa=bytes_hexa,
-                upper_layer_decoding_library=upper_layer_decoding_library,
-            )
-        else:
-            return None
+        return ProfibusLogLine(
+            timestamp=timestamp,
+            source=source,
+            target=target,
+            sequence=sequence,
+            mode=SendingMode[mode],
+            length=length,
+            bytes_hexa=bytes_hexa,
+            upper_layer_decoding_library=upper_layer_decoding_library,
+        )
 
     def decode_sdn_or_sna(self) -> None:
         if self.mode == SendingMode.SDA:
@@ -5,19 +5,31 @@ import datetime
 import gzip
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Optional, cast
+from typing import Dict, List, Optional, TextIO, Tuple, cast
 
+import numpy as np
+import numpy.typing as npt
 from logger import logger_config
 
+from stsloganalyzis.common import time_intervals_binning
+from stsloganalyzis.ppn import ppn_log
+
 PERIOD_TO_DETECT_LACK_OF_LOGS = datetime.timedelta(seconds=3)  # Example period to detect missing logs
+PERIOD_TO_DETECT_LACK_OF_LOGS_IN_MICROSECONDS = PERIOD_TO_DETECT_LACK_OF_LOGS // time_intervals_binning.ONE_MICROSECOND
+NEAR_GOING_BACK_TO_PAST_TIMESTAMP_IN_MICROSECONDS = 2 * 1000 * 1000
+
+LOG_TIMESTAMPS_ORIGIN = datetime.datetime(1970, 1, 1)
+# One record per log line, log values are kept aside
+PROFIBUS_LOG_LINE_RECORD_DTYPE = np.dtype([("timestamp_us", np.int64), ("file_line_number", np.int64)])
 
 
 @dataclass
 class CabLogs:
     log_files_directory_path: str
     log_files_names: List[str]
-    log_files_prefix: str
+    log_files_prefix: Optional[str]
     label: str = ""
     encoding: str = "utf-8"
     log_unsupported_lines = False
@@ -30,11 +42,39 @@ class ProfibusLogFile:
 
 @dataclass
 class ProfibusLogSession:
+    """Lines of the session are stored as records: ProfibusLogLine objects are only created for lines used by detected events"""
+
     cab_log: CabLogs
-    log_lines: list["ProfibusLogLine"] = field(default_factory=list)
+    file_name: str = ""
+    log_lines_records: npt.NDArray[np.void] = field(default_factory=lambda: np.empty(0, dtype=PROFIBUS_LOG_LINE_RECORD_DTYPE))
+    log_values: List[str] = field(default_factory=list)
     going_back_to_past_groups: List["GoingBackToPastGroup"] = field(default_factory=list)
     missing_logs_events: List["MissingLogs"] = field(default_factory=list)
 
+    def __post_init__(self) -> None:
+        self.log_line_by_index: Dict[int, ProfibusLogLine] = {}
+
+    def get_log_lines_count(self) -> int:
+        return len(self.log_lines_records)
+
+    def get_log_line(self, log_line_index: int) -> "ProfibusLogLine":
+        log_line = self.log_line_by_index.get(log_line_index)
+        if log_line is None:
+            log_line_record = self.log_lines_records[log_line_index]
+            log_line = ProfibusLogLine(
+                timestamp=LOG_TIMESTAMPS_ORIGIN + datetime.timedelta(microseconds=int(log_line_record["timestamp_us"])),
+                log_value=self.log_values[log_line_index],
+                file_name=self.file_name,
+                file_line_number=int(log_line_record["file_line_number"]),
+                log_session=self,
+            )
+            self.log_line_by_index[log_line_index] = log_line
+        return log_line
+
+    @property
+    def log_lines(self) -> List["ProfibusLogLine"]:
+        return [self.get_log_line(log_line_index) for log_line_index in range(self.get_log_lines_count())]
+
 
 @dataclass
 class GoingBackToPastGroup:
@@ -79,46 +119,155 @@ class ProfibusLogLine:
     log_session: ProfibusLogSession
 
 
-def read_log_file(file_path: str, cab_log: CabLogs) -> List[ProfibusLogSession]:
-    log_sessions: List[ProfibusLogSession] = []
-    log_session: Optional[ProfibusLogSession] = None
-    logger_config.print_and_log_info(f"read_log_file: {file_path}")
+def open_log_file(file_path: str, cab_log: CabLogs) -> TextIO:
     if file_path.endswith(".gz"):
-        with gzip.open(file_path, "rt") as f:
-            lines = f.readlines()
-    else:
-        with open(file_path, "r", encoding=cab_log.encoding) as f:
-            lines = f.readlines()
+        return cast(TextIO, gzip.open(file_path, "rt"))
+    return open(file_path, "r", encoding=cab_log.encoding)
 
-    logger_config.print_and_log_info(f"{len(lines)} lines to process in {file_path}")
-    for file_line_number, line in enumerate(lines, start=1):
 
-        file_name = os.path.basename(file_path)
+def create_log_session(cab_log: CabLogs, file_name: str, timestamps: List[datetime.datetime], file_line_numbers: List[int], log_values: List[str]) -> ProfibusLogSession:
+    log_lines_records = np.empty(len(timestamps), dtype=PROFIBUS_LOG_LINE_RECORD_DTYPE)
+    log_lines_records["timestamp_us"] = time_intervals_binning.convert_timestamps_to_microseconds_since(timestamps, origin=LOG_TIMESTAMPS_ORIGIN)
+    log_lines_records["file_line_number"] = file_line_numbers
+    return ProfibusLogSession(cab_log=cab_log, file_name=file_name, log_lines_records=log_lines_records, log_values=log_values)
 
-        if line.startswith("\x00"):
-            if cab_log.log_unsupported_lines:
-                logger_config.print_and_log_error(f"Null characters found at beginning of {file_name} : {file_line_number}. Line: {line}")
-            line = line.lstrip("\x00")
 
-        parts = line.split(" ", 3)
-        if len(parts) < 4:
-            continue
-        timestamp_str = f"{parts[0]} {parts[1]}"
-        try:
-            timestamp = datetime.datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S:%f")
-            log_value = parts[3].strip()
-            profibus_log_line = ProfibusLogLine(timestamp=timestamp, log_value=log_value, file_name=file_name, file_line_number=file_line_number, log_session=log_session)
-            if log_session is None:
-                log_session = ProfibusLogSession(cab_log)
+def read_log_file(file_path: str, cab_log: CabLogs) -> List[ProfibusLogSession]:
+    """Lines are read one by one (the file is never fully loaded), each session is then stored as records"""
+    # Timestamps, file line numbers and log values of each session
+    log_sessions_lines: List[Tuple[List[datetime.datetime], List[int], List[str]]] = []
+    log_session_lines: Optional[Tuple[List[datetime.datetime], List[int], List[str]]] = None
+    file_name = os.path.basename(file_path)
+    logger_config.print_and_log_info(f"read_log_file: {file_path}")
+
+    file_line_number = 0
+    with open_log_file(file_path, cab_log) as f:
+        for file_line_number, line in enumerate(f, start=1):
+
+            if line.startswith("\x00"):
+                if cab_log.log_unsupported_lines:
+                    logger_config.print_and_log_error(f"Null characters found at beginning of {file_name} : {file_line_number}. Line: {line}")
+                line = line.lstrip("\x00")
+
+            parts = line.split(" ", 3)
+            if len(parts) < 4:
+                continue
+            try:
+                timestamp = ppn_log.decode_ppn_log_timestamp(parts[0], parts[1])
+            except ValueError:
+                if cab_log.log_unsupported_lines:
+                    logger_config.print_and_log_error(f"Skipping line {file_line_number} in file {file_path} with invalid timestamp: {line.strip()}")
+                log_session_lines = None
+                continue
+
+            if log_session_lines is None:
+                log_session_lines = ([], [], [])
                 logger_config.print_and_log_info(f"New log session, {file_name}, line {file_line_number}. Timestamp {logger_config.datetime_convenient_log_format(timestamp)}")
-                log_sessions.append(log_session)
-            log_session.log_lines.append(profibus_log_line)
-        except ValueError:
-            if cab_log.log_unsupported_lines:
-                logger_config.print_and_log_error(f"Skipping line {file_line_number} in file {file_path} with invalid timestamp: {line.strip()}")
-            log_session = None
+                log_sessions_lines.append(log_session_lines)
+            log_session_lines[0].append(timestamp)
+            log_session_lines[1].append(file_line_number)
+            log_session_lines[2].append(parts[3].strip())
+
+    logger_config.print_and_log_info(f"{file_line_number} lines processed in {file_path}")
+    return [
+        create_log_session(cab_log=cab_log, file_name=file_name, timestamps=timestamps, file_line_numbers=file_line_numbers, log_values=log_values)
+        for timestamps, file_line_numbers, log_values in log_sessions_lines
+    ]
+
+
+def find_end_of_going_back_to_past_group(
+    timestamps: npt.NDArray[np.int64], deltas: npt.NDArray[np.int64], first_log_line_index: int, going_back_to_past_group_past: int, going_back_to_past_group_present: int
+) -> int:
+    """Index of the first line from first_log_line_index that is outside the group period, or that goes back to past far from the group past timestamp (and starts another group).
+    Lines are checked by growing chunks, because groups usually end soon"""
+    chunk_size = 256
+    chunk_begin = first_log_line_index
+    while chunk_begin < len(timestamps):
+        chunk_end = min(len(timestamps), chunk_begin + chunk_size)
+        chunk_timestamps = timestamps[chunk_begin:chunk_end]
+        ends_group = (
+            (chunk_timestamps < going_back_to_past_group_past)
+            | (chunk_timestamps > going_back_to_past_group_present)
+            | ((deltas[chunk_begin - 1 : chunk_end - 1] < 0) & (chunk_timestamps - going_back_to_past_group_past >= NEAR_GOING_BACK_TO_PAST_TIMESTAMP_IN_MICROSECONDS))
+        )
+        ends_group_indexes = np.flatnonzero(ends_group)
+        if ends_group_indexes.size:
+            return chunk_begin + int(ends_group_indexes[0])
+        chunk_begin = chunk_end
+        chunk_size *= 2
+    return len(timestamps)
+
+
+def detect_missing_logs_in_session(log_session: ProfibusLogSession) -> None:
+    """Only lines with a negative or too long delta to previous line are visited, except inside going back to past groups.
+    Same groups, events and missing logs as comparing each line to the previous one"""
+    timestamps = log_session.log_lines_records["timestamp_us"]
+    deltas = np.diff(timestamps)
+    unusual_delta_log_lines_indexes = np.flatnonzero((deltas < 0) | (deltas > PERIOD_TO_DETECT_LACK_OF_LOGS_IN_MICROSECONDS)) + 1
+
+    def add_missing_logs(log_line_index: int) -> None:
+        previous_line = log_session.get_log_line(log_line_index - 1)
+        log_line = log_session.get_log_line(log_line_index)
+        logger_config.print_and_log_info(
+            f"Missing logs detected between line {previous_line.file_line_number} at {previous_line.timestamp} and line  {log_line.file_line_number} at {log_line.timestamp}"
+        )
+        log_session.missing_logs_events.append(MissingLogs(previous_log_line=previous_line, next_log_line=log_line, missing_log_period=log_line.timestamp - previous_line.timestamp))
+
+    def add_going_back_to_past_event(going_back_to_past_group: GoingBackToPastGroup, log_line_index: int) -> None:
+        log_line = log_session.get_log_line(log_line_index)
+        going_back_to_past_event = GoingBackToPastSingleEvent(
+            going_back_to_past_group=going_back_to_past_group, before_going_back_to_past_log_line=log_session.get_log_line(log_line_index - 1), after_going_back_to_past_log_line=log_line
+        )
+        going_back_to_past_group.going_back_to_past_single_events.append(going_back_to_past_event)
+        going_back_to_past_event.log_lines_with_wrongly_past_timestamp.append(log_line)
+        if deltas[log_line_index - 1] > PERIOD_TO_DETECT_LACK_OF_LOGS_IN_MICROSECONDS:
+            going_back_to_past_event.log_lines_with_wrongly_past_timestamp.append(log_line)
+
+    def create_going_back_to_past_group(log_line_index: int) -> GoingBackToPastGroup:
+        going_back_to_past_group = GoingBackToPastGroup(
+            approximative_past_timestamp=log_session.get_log_line(log_line_index).timestamp, approximative_present_timestamp=log_session.get_log_line(log_line_index - 1).timestamp
+        )
+        log_session.going_back_to_past_groups.append(going_back_to_past_group)
+        add_going_back_to_past_event(going_back_to_past_group, log_line_index)
+        return going_back_to_past_group
+
+    log_line_index = 1
+    while True:
+        position = int(np.searchsorted(unusual_delta_log_lines_indexes, log_line_index))
+        if position == len(unusual_delta_log_lines_indexes):
+            return
+        log_line_index = int(unusual_delta_log_lines_indexes[position])
+        if deltas[log_line_index - 1] > 0:
+            add_missing_logs(log_line_index)
+            log_line_index += 1
+            continue
 
-    return log_sessions
+        going_back_to_past_group = create_going_back_to_past_group(log_line_index)
+        while True:
+            group_end_log_line_index = find_end_of_going_back_to_past_group(
+                timestamps=timestamps,
+                deltas=deltas,
+                first_log_line_index=log_line_index + 1,
+                going_back_to_past_group_past=int(timestamps[log_line_index]),
+                going_back_to_past_group_present=int(timestamps[log_line_index - 1]),
+            )
+            for log_line_in_group_index in range(log_line_index + 1, group_end_log_line_index):
+                add_going_back_to_past_event(going_back_to_past_group, log_line_in_group_index)
+            if group_end_log_line_index == len(timestamps):
+                return
+
+            log_line_index = group_end_log_line_index
+            if going_back_to_past_group.is_during_back_to_past_period(log_session.get_log_line(log_line_index).timestamp):
+                going_back_to_past_group = create_going_back_to_past_group(log_line_index)
+                continue
+
+            logger_config.print_and_log_info(
+                f"{log_session.cab_log.label}: end of current_going_back_to_past_group (that was between {logger_config.datetime_convenient_log_format(going_back_to_past_group.approximative_past_timestamp)} and {logger_config.datetime_convenient_log_format(going_back_to_past_group.approximative_present_timestamp)} and contains {going_back_to_past_group.get_log_lines_with_wrongly_past_timestamp()} lines. Current log timestamp:{logger_config.datetime_convenient_log_format(log_session.get_log_line(log_line_index).timestamp)})"
+            )
+            if deltas[log_line_index - 1] > PERIOD_TO_DETECT_LACK_OF_LOGS_IN_MICROSECONDS:
+                add_missing_logs(log_line_index)
+            log_line_index += 1
+            break
 
 
 def detect_missing_logs(all_log_sessions: List[ProfibusLogSession]) -> None:
@@ -126,68 +275,32 @@ def detect_missing_logs(all_log_sessions: List[ProfibusLogSession]) -> None:
         logger_config.print_and_log_error("No log session found.")
         return
 
-    # log_lines.sort(key=lambda x: x.timestamp)
-
     for log_session in all_log_sessions:
-        if not log_session.log_lines:
+        if not log_session.get_log_lines_count():
             logger_config.print_and_log_error("No log lines found.")
             break
 
-        previous_line = None
-        latest_timestamp_read_in_session: Optional[datetime.datetime] = None
-        current_going_back_to_past_group: Optional[GoingBackToPastGroup] = None
-        current_going_back_to_past_event: Optional[GoingBackToPastSingleEvent] = None
-
-        for log_line in log_session.log_lines:
-
-            if previous_line:
-                if log_line.timestamp < previous_line.timestamp:
-
-                    if current_going_back_to_past_event is None or not (
-                        cast(GoingBackToPastGroup, current_going_back_to_past_group).is_near_past_timestamp(log_line.timestamp)
-                        and cast(GoingBackToPastGroup, current_going_back_to_past_group).is_near_present_timestamp(previous_line.timestamp)
-                    ):
-                        current_going_back_to_past_group = GoingBackToPastGroup(approximative_past_timestamp=log_line.timestamp, approximative_present_timestamp=previous_line.timestamp)
-                        log_session.going_back_to_past_groups.append(current_going_back_to_past_group)
-
-                if current_going_back_to_past_group is not None:
-                    if current_going_back_to_past_group.is_during_back_to_past_period(log_line.timestamp):
-                        current_going_back_to_past_event = GoingBackToPastSingleEvent(
-                            going_back_to_past_group=current_going_back_to_past_group, before_going_back_to_past_log_line=previous_line, after_going_back_to_past_log_line=log_line
-                        )
-                        current_going_back_to_past_group.going_back_to_past_single_events.append(current_going_back_to_past_event)
-                        current_going_back_to_past_event.log_lines_with_wrongly_past_timestamp.append(log_line)
-                    else:
-                        logger_config.print_and_log_info(
-                            f"{log_session.cab_log.label}: end of current_going_back_to_past_group (that was between {logger_config.datetime_convenient_log_format(current_going_back_to_past_group.approximative_past_timestamp)} and {logger_config.datetime_convenient_log_format(current_going_back_to_past_group.approximative_present_timestamp)} and contains {current_going_back_to_past_group.get_log_lines_with_wrongly_past_timestamp()} lines. Current log timestamp:{logger_config.datetime_convenient_log_format(log_line.timestamp)})"
-                        )
-                        current_going_back_to_past_group = None
-                        current_going_back_to_past_event = None
-
-                    # logger_config.print_and_log_info(f"Going back to past logs detected between {previous_line.timestamp} and {log_line.timestamp}")
-
-                if log_line.timestamp - previous_line.timestamp > PERIOD_TO_DETECT_LACK_OF_LOGS:
-                    if current_going_back_to_past_event and (
-                        current_going_back_to_past_group.is_during_back_to_past_period(log_line.timestamp) or current_going_back_to_past_group.is_near_present_timestamp(log_line.timestamp)
-                    ):
-                        current_going_back_to_past_event.log_lines_with_wrongly_past_timestamp.append(log_line)
-                    else:
-                        logger_config.print_and_log_info(
-                            f"Missing logs detected between line {previous_line.file_line_number} at {previous_line.timestamp} and line  {log_line.file_line_number} at {log_line.timestamp}"
-                        )
-                        log_session.missing_logs_events.append(MissingLogs(previous_log_line=previous_line, next_log_line=log_line, missing_log_period=log_line.timestamp - previous_line.timestamp))
-
-            previous_line = log_line
-
-            if latest_timestamp_read_in_session is None or log_line.timestamp > latest_timestamp_read_in_session:
-                latest_timestamp_read_in_session = log_line.timestamp
-
-
-def process_all_cabs_logs(cabs_logs: List[CabLogs]) -> List[ProfibusLogSession]:
+        detect_missing_logs_in_session(log_session)
+
+
+def process_all_cabs_logs(cabs_logs: List[CabLogs], parallel: bool = False, max_workers: Optional[int] = None) -> List[ProfibusLogSession]:
+    """With parallel, each cab is processed in a worker process. Sessions are returned in cabs order in both cases"""
     all_log_sessions: List[ProfibusLogSession] = []
-    for cab_logs in cabs_logs:
-        logger_config.print_and_log_info(f"Process cabs logs {cab_logs.label}")
-        all_log_sessions.extend(process_all_logs(cab_logs))
+    if not parallel:
+        for cab_logs in cabs_logs:
+            logger_config.print_and_log_info(f"Process cabs logs {cab_logs.label}")
+            all_log_sessions.extend(process_all_logs(cab_logs))
+        return all_log_sessions
+
+    logger_config.print_and_log_info(f"Process logs of {len(cabs_logs)} cabs in parallel")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        all_cabs_log_sessions = list(executor.map(process_all_logs, cabs_logs))
+
+    for cab_logs, cab_log_sessions in zip(cabs_logs, all_cabs_log_sessions):
+        # Sessions computed in workers refer to a copy of the cab
+        for log_session in cab_log_sessions:
+            log_session.cab_log = cab_logs
+        all_log_sessions.extend(cab_log_sessions)
     return all_log_sessions
 
 
@@ -229,7 +342,7 @@ def main() -> None:
             )
         ]
 
-        log_sessions: List[ProfibusLogSession] = process_all_cabs_logs(cabs_logs=cabs_logs)
+        log_sessions: List[ProfibusLogSession] = process_all_cabs_logs(cabs_logs=cabs_logs, parallel=True)
 
         """CabLogs(
             log_files_directory_path=r"D:\GitHub\yanndanielou-programmation\Python\ProfibusLogAnalyzis\Input\ppn_250210\ppn\cab 1B", log_files_prefix="cab", label="cab 1B", encoding="ANSI"
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import bisect
 import csv
+import functools
+import heapq
+import itertools
 from dataclasses import dataclass, field
 from enum import Enum, unique, StrEnum
 from pathlib import Path
@@ -8,6 +12,8 @@ from typing import Dict, List, Optional, Tuple, cast
 
 from logger import logger_config
 
+SEGMENTS_DISTANCES_CACHE_MAX_SIZE = 100000
+
 
 @unique
 class LineDirection(StrEnum):
@@ -291,15 +297,15 @@ class ExactLocation:
         return f"No TB defined at {self.segment.identifier}/{self.abscissa}"
 
     def get_track_circuit_id_none_if_no(self) -> Optional[str]:
-        tracking_block = self.segment.line.get_tracking_block_by_segment_and_abscissa(segment=self.segment, abscissa=self.abscissa)
-        if tracking_block:
-            return tracking_block.track_circuit_id
+        track_circuit = self.segment.line.get_track_circuit_by_segment_and_abscissa(segment=self.segment, abscissa=self.abscissa)
+        if track_circuit:
+            return track_circuit.identifier
         return None
 
     def get_track_circuit_id_string_if_no(self) -> str:
-        tracking_block = self.segment.line.get_tracking_block_by_segment_and_abscissa(segment=self.segment, abscissa=self.abscissa)
-        if tracking_block:
-            return tracking_block.track_circuit_id
+        track_circuit = self.segment.line.get_track_circuit_by_segment_and_abscissa(segment=self.segment, abscissa=self.abscissa)
+        if track_circuit:
+            return track_circuit.identifier
         return f"No TB thus TC defined at {self.segment.identifier}/{self.abscissa}"
 
 
@@ -340,7 +346,12 @@ class Line:
     tracking_blocks: List[TrackingBlock]
     switches: Dict[str, Switch]
     not_created_tracking_blocks_ids_without_track_circuits: List[str]
-    tracking_block_on_segments_csv_full_path: str | Path
+    tracking_block_on_segments_csv_full_path: Optional[str | Path]
+    loaded_tracking_block_on_segments: Optional[List[TrackingBlockOnSegment]] = None
+    check_consistency: bool = True
+    # Source of the line (topology fingerprint of decoded archive cache)
+    csv_files_full_paths: Optional[List[str | Path]] = None
+    ignore_tracking_blocks_without_circuits: bool = False
 
     def __post_init__(self) -> None:
         self.tracking_block_by_id = {b.identifier: b for b in self.tracking_blocks}
@@ -352,14 +363,20 @@ class Line:
 
         self.tracking_block_on_segments: List[TrackingBlockOnSegment] = []
 
-        if self.tracking_block_on_segments_csv_full_path is not None:
+        if self.loaded_tracking_block_on_segments is not None:
+            self.tracking_block_on_segments = self.loaded_tracking_block_on_segments
+        elif self.tracking_block_on_segments_csv_full_path is not None:
             self.tracking_block_on_segments = TrackingBlockOnSegment.load_from_csv(self.tracking_block_on_segments_csv_full_path, self)
 
+        self._build_tracking_block_on_segments_index()
+        self._build_segments_graph()
+
         self.occurences_of_not_found_tracking_block_in_segment: Dict[Tuple[Segment, int], int] = dict()
         logger_config.print_and_log_info(repr(self))
 
-        consistency_errors = self.compute_consistency_errors()
-        logger_config.print_and_log_info(f"{len(consistency_errors)} consistency errors detected")
+        if self.check_consistency:
+            consistency_errors = self.compute_consistency_errors()
+            logger_config.print_and_log_info(f"{len(consistency_errors)} consistency errors detected")
 
     def __repr__(self) -> str:
         return (
@@ -379,9 +396,14 @@ class Line:
             return None
 
         if origin_segment_direction == SegmentDirection.BOTH:
-            distance_direction_in_up = self.get_distance_in_cm_between_to_locations(origin=origin, destination=destination, origin_segment_direction=SegmentDirection.INCREASING_OFFSET)
-            distance_direction_in_down = self.get_distance_in_cm_between_to_locations(origin=origin, destination=destination, origin_segment_direction=SegmentDirection.DECREASING_OFFSET)
-            return min(i for i in [distance_direction_in_up, distance_direction_in_down] if i is not None)
+            distance_direction_in_up = self.get_distance_in_cm_between_to_locations(
+                origin=origin, destination=destination, origin_segment_direction=SegmentDirection.INCREASING_OFFSET, maximum_distance_in_cm=maximum_distance_in_cm
+            )
+            distance_direction_in_down = self.get_distance_in_cm_between_to_locations(
+                origin=origin, destination=destination, origin_segment_direction=SegmentDirection.DECREASING_OFFSET, maximum_distance_in_cm=maximum_distance_in_cm
+            )
+            found_distances = [i for i in [distance_direction_in_up, distance_direction_in_down] if i is not None]
+            return min(found_distances) if found_distances else None
 
         if origin.segment == destination.segment:
             if origin_segment_direction == SegmentDirection.INCREASING_OFFSET:
@@ -397,98 +419,83 @@ class Line:
                     logger_config.print_and_log_error(f"Tried to reach {destination} from {origin} in wrong direction {origin_segment_direction}")
                     return None
 
-        else:
-            distance_to_end_of_origin_segment = origin.get_distance_to_end_of_segment_in_cm(origin_segment_direction)
-            maximum_distance_in_cm -= distance_to_end_of_origin_segment
-            if origin_segment_direction == SegmentDirection.INCREASING_OFFSET:
+        distance_to_end_of_origin_segment = origin.get_distance_to_end_of_segment_in_cm(origin_segment_direction)
+        crossed_segments_length_by_destination_segment_direction = self._get_crossed_segments_length_in_cm_between_segments(
+            origin.segment, destination.segment, origin_segment_direction, maximum_distance_in_cm
+        )
 
-                downstream_normal = origin.segment.downstream_normal
-                distance_to_downstream_normal = None
-                downstream_reverse = origin.segment.downstream_reverse
-                distance_to_downstream_reverse = None
-
-                if downstream_normal is not None:
-                    if origin.segment.downstream_normal_same_direction:
-                        distance_to_downstream_normal = self.get_distance_in_cm_between_to_locations(
-                            origin=downstream_normal.min_abscissa_exact_location,
-                            destination=destination,
-                            origin_segment_direction=origin_segment_direction,
-                            maximum_distance_in_cm=maximum_distance_in_cm,
-                        )
-                    else:
-                        distance_to_downstream_normal = self.get_distance_in_cm_between_to_locations(
-                            origin=downstream_normal.max_abscissa_exact_location,
-                            destination=destination,
-                            origin_segment_direction=origin_segment_direction.get_opposite_direction(),
-                            maximum_distance_in_cm=maximum_distance_in_cm,
-                        )
-
-                if downstream_reverse is not None:
-                    if origin.segment.downstream_reverse_same_direction:
-                        distance_to_downstream_reverse = self.get_distance_in_cm_between_to_locations(
-                            origin=downstream_reverse.min_abscissa_exact_location,
-                            destination=destination,
-                            origin_segment_direction=origin_segment_direction,
-                            maximum_distance_in_cm=maximum_distance_in_cm,
-                        )
-                    else:
-                        distance_to_downstream_reverse = self.get_distance_in_cm_between_to_locations(
-                            origin=downstream_reverse.max_abscissa_exact_location,
-                            destination=destination,
-                            origin_segment_direction=origin_segment_direction.get_opposite_direction(),
-                            maximum_distance_in_cm=maximum_distance_in_cm,
-                        )
-
-                if distance_to_downstream_normal is None and distance_to_downstream_reverse is None:
-                    logger_config.print_and_log_info(f"End of path reached at {origin} {origin_segment_direction}. Remaining distance {maximum_distance_in_cm}", do_not_print=True)
-                    return None
-                return min(i for i in [distance_to_downstream_normal, distance_to_downstream_reverse] if i is not None) + distance_to_end_of_origin_segment
+        distances: List[int] = []
+        for destination_segment_direction, crossed_segments_length in crossed_segments_length_by_destination_segment_direction.items():
+            distance_to_destination_segment = distance_to_end_of_origin_segment + crossed_segments_length
+            if distance_to_destination_segment >= maximum_distance_in_cm:
+                continue
+            # Destination segment is entered by its end opposite to the travel direction
+            distances.append(distance_to_destination_segment + destination.get_distance_to_end_of_segment_in_cm(destination_segment_direction.get_opposite_direction()))
 
-            else:
-                assert origin_segment_direction == SegmentDirection.DECREASING_OFFSET
-                upstream_normal = origin.segment.upstream_normal
-                distance_to_upstream_normal = None
-                upstream_reverse = origin.segment.upstream_reverse
-                distance_to_upstream_reverse = None
-
-                if upstream_normal is not None:
-                    if origin.segment.upstream_normal_same_direction:
-                        distance_to_upstream_normal = self.get_distance_in_cm_between_to_locations(
-                            origin=upstream_normal.min_abscissa_exact_location,
-                            destination=destination,
-                            origin_segment_direction=origin_segment_direction,
-                            maximum_distance_in_cm=maximum_distance_in_cm,
-                        )
-                    else:
-                        distance_to_upstream_normal = self.get_distance_in_cm_between_to_locations(
-                            origin=upstream_normal.max_abscissa_exact_location,
-                            destination=destination,
-                            origin_segment_direction=origin_segment_direction.get_opposite_direction(),
-                            maximum_distance_in_cm=maximum_distance_in_cm,
-                        )
-
-                if upstream_reverse is not None:
-                    if origin.segment.upstream_reverse_same_direction:
-                        distance_to_upstream_reverse = self.get_distance_in_cm_between_to_locations(
-                            origin=upstream_reverse.min_abscissa_exact_location,
-                            destination=destination,
-                            origin_segment_direction=origin_segment_direction,
-                            maximum_distance_in_cm=maximum_distance_in_cm,
-                        )
-                    else:
-                        distance_to_upstream_reverse = self.get_distance_in_cm_between_to_locations(
-                            origin=upstream_reverse.max_abscissa_exact_location,
-                            destination=destination,
-                            origin_segment_direction=origin_segment_direction.get_opposite_direction(),
-                            maximum_distance_in_cm=maximum_distance_in_cm,
-                        )
-
-                if distance_to_upstream_normal is None and distance_to_upstream_reverse is None:
-                    logger_config.print_and_log_info(f"End of path reached at {origin} {origin_segment_direction}. Remaining distance {maximum_distance_in_cm}", do_not_print=True)
-                    return None
-                return min(i for i in [distance_to_upstream_normal, distance_to_upstream_reverse] if i is not None) + distance_to_end_of_origin_segment
+        if not distances:
+            logger_config.print_and_log_info(f"No path from {origin} {origin_segment_direction} to {destination} within {maximum_distance_in_cm}", do_not_print=True)
+            return None
+        return min(distances)
 
-        return None
+    def _build_segments_graph(self) -> None:
+        """
+        Construit, pour chaque segment et sens de parcours, les segments atteints en sortant du segment et leur sens de parcours.
+        """
+        self._next_segments_and_directions: Dict[Tuple[Segment, SegmentDirection], List[Tuple[Segment, SegmentDirection]]] = dict()
+        for segment in self.segments:
+            neighbours_by_direction = {
+                SegmentDirection.INCREASING_OFFSET: [
+                    (segment.downstream_normal, segment.downstream_normal_same_direction),
+                    (segment.downstream_reverse, segment.downstream_reverse_same_direction),
+                ],
+                SegmentDirection.DECREASING_OFFSET: [
+                    (segment.upstream_normal, segment.upstream_normal_same_direction),
+                    (segment.upstream_reverse, segment.upstream_reverse_same_direction),
+                ],
+            }
+            for direction, neighbours in neighbours_by_direction.items():
+                self._next_segments_and_directions[(segment, direction)] = [
+                    (neighbour, direction if same_direction else direction.get_opposite_direction()) for neighbour, same_direction in neighbours if neighbour is not None
+                ]
+
+        self._get_crossed_segments_length_in_cm_between_segments = functools.lru_cache(maxsize=SEGMENTS_DISTANCES_CACHE_MAX_SIZE)(self._compute_crossed_segments_length_in_cm_between_segments)
+
+    def _compute_crossed_segments_length_in_cm_between_segments(
+        self, origin_segment: Segment, destination_segment: Segment, origin_segment_direction: SegmentDirection, maximum_distance_in_cm: int
+    ) -> Dict[SegmentDirection, int]:
+        """
+        Dijkstra sur les couples (segment, sens de parcours) : longueur minimale des segments traversés entre la sortie du segment d'origine
+        et l'entrée dans le segment de destination, par sens de parcours dans le segment de destination.
+        Le parcours s'arrête à maximum_distance_in_cm : les longueurs supérieures ne sont pas retournées.
+        """
+        crossed_segments_length_by_destination_segment_direction: Dict[SegmentDirection, int] = dict()
+        visited: set[Tuple[Segment, SegmentDirection]] = set()
+        # Counter breaks ties, segments are not comparable
+        tie_breaker = itertools.count()
+        heap: List[Tuple[int, int, Segment, SegmentDirection]] = []
+        for next_segment, next_direction in self._next_segments_and_directions[(origin_segment, origin_segment_direction)]:
+            heapq.heappush(heap, (0, next(tie_breaker), next_segment, next_direction))
+
+        while heap and len(crossed_segments_length_by_destination_segment_direction) < 2:
+            crossed_segments_length, _, segment, direction = heapq.heappop(heap)
+            if crossed_segments_length >= maximum_distance_in_cm:
+                break
+            if (segment, direction) in visited:
+                continue
+            visited.add((segment, direction))
+
+            if segment == destination_segment:
+                crossed_segments_length_by_destination_segment_direction[direction] = crossed_segments_length
+                continue
+
+            next_crossed_segments_length = crossed_segments_length + segment.length_in_cm
+            if next_crossed_segments_length >= maximum_distance_in_cm:
+                continue
+            for next_segment, next_direction in self._next_segments_and_directions[(segment, direction)]:
+                if (next_segment, next_direction) not in visited:
+                    heapq.heappush(heap, (next_crossed_segments_length, next(tie_breaker), next_segment, next_direction))
+
+        return crossed_segments_length_by_destination_segment_direction
 
     def get_segment(self, segment: Segment | str | int) -> Segment:
         segment_obj: Segment
@@ -516,7 +523,7 @@ class Line:
     ) -> Optional[TrackingBlock]:
 
         segment = self.get_segment(segment)
-        matches = [relation for relation in self.tracking_block_on_segments if relation.segment == segment and relation.abs_begin <= abscissa < relation.abs_end]
+        matches = self._get_tracking_block_on_segments_at(segment, abscissa)
 
         if not matches:
             if (segment, abscissa) not in self.occurences_of_not_found_tracking_block_in_segment:
@@ -539,6 +546,49 @@ class Line:
 
         return matches[0].tracking_block
 
+    def get_track_circuit_by_segment_and_abscissa(
+        self,
+        segment: Segment | str | int,
+        abscissa: int,
+    ) -> Optional[TrackingCircuit]:
+        tracking_block = self.get_tracking_block_by_segment_and_abscissa(segment=segment, abscissa=abscissa)
+        if tracking_block:
+            return tracking_block.tracking_circuit
+        return None
+
+    def _build_tracking_block_on_segments_index(self) -> None:
+        """
+        Indexe les TrackingBlockOnSegment par segment, triés par abs_begin, pour une recherche par bisection.
+
+        Les segments dont des relations se chevauchent sont mémorisés : la recherche y parcourt toutes les relations du segment,
+        afin de toujours détecter les correspondances multiples.
+        """
+        self._tracking_block_on_segments_by_segment: Dict[Segment, List[TrackingBlockOnSegment]] = dict()
+        self._tracking_block_on_segments_abs_begins_by_segment: Dict[Segment, List[int]] = dict()
+        self._segments_with_overlapping_tracking_block_on_segments: set[Segment] = set()
+
+        for relation in self.tracking_block_on_segments:
+            self._tracking_block_on_segments_by_segment.setdefault(relation.segment, []).append(relation)
+
+        for segment, relations in self._tracking_block_on_segments_by_segment.items():
+            relations.sort(key=lambda relation: relation.abs_begin)
+            self._tracking_block_on_segments_abs_begins_by_segment[segment] = [relation.abs_begin for relation in relations]
+            if any(previous.abs_end > current.abs_begin for previous, current in zip(relations, relations[1:])):
+                self._segments_with_overlapping_tracking_block_on_segments.add(segment)
+
+    def _get_tracking_block_on_segments_at(self, segment: Segment, abscissa: int) -> List[TrackingBlockOnSegment]:
+        relations = self._tracking_block_on_segments_by_segment.get(segment)
+        if not relations:
+            return []
+
+        if segment in self._segments_with_overlapping_tracking_block_on_segments:
+            return [relation for relation in relations if relation.abs_begin <= abscissa < relation.abs_end]
+
+        index = bisect.bisect_right(self._tracking_block_on_segments_abs_begins_by_segment[segment], abscissa) - 1
+        if index >= 0 and abscissa < relations[index].abs_end:
+            return [relations[index]]
+        return []
+
     @logger_config.stopwatch_decorator(inform_beginning=True)
     def compute_consistency_errors(self) -> List[ConsistencyError]:
         consistency_errors: List[ConsistencyError] = []
@@ -603,6 +653,15 @@ class Line:
             switches=switches_dict,
             not_created_tracking_blocks_ids_without_track_circuits=not_created_tracking_blocks_ids_without_track_circuits,
             tracking_block_on_segments_csv_full_path=tracking_block_on_segments_csv_full_path,
+            csv_files_full_paths=[
+                segments_csv_full_path,
+                segments_relations_csv_full_path,
+                track_circuits_csv_full_path,
+                tracking_blocks_csv_full_path,
+                switches_csv_full_path,
+                tracking_block_on_segments_csv_full_path,
+            ],
+            ignore_tracking_blocks_without_circuits=ignore_tracking_blocks_without_circuits,
         )
 
 
@@ -0,0 +1,371 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from common import file_utils
+from logger import logger_config
+
+from stsloganalyzis.topology import line_topology
+
+# Increase when snapshot content or format changes: all existing snapshots are rebuilt
+TOPOLOGY_SNAPSHOT_VERSION = 1
+
+TOPOLOGY_SNAPSHOT_MAGIC = b"STSTOPO"
+
+NO_INDEX = -1
+NO_BOOL = -1
+
+
+def compute_topology_fingerprint(csv_files_full_paths: List[str | Path], ignore_tracking_blocks_without_circuits: bool) -> str:
+    """Any change of snapshot version, loading option or CSV content changes the fingerprint"""
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"topology_snapshot_version:{TOPOLOGY_SNAPSHOT_VERSION}".encode())
+    fingerprint.update(f"ignore_tracking_blocks_without_circuits:{ignore_tracking_blocks_without_circuits}".encode())
+    for csv_file_full_path in csv_files_full_paths:
+        fingerprint.update(file_utils.compute_file_content_hash(csv_file_full_path).encode())
+    return fingerprint.hexdigest()
+
+
+def compute_line_topology_fingerprint(line: line_topology.Line) -> Optional[str]:
+    """None when the CSV files the line was loaded from are not known"""
+    if line.csv_files_full_paths is None:
+        return None
+    return compute_topology_fingerprint(line.csv_files_full_paths, ignore_tracking_blocks_without_circuits=line.ignore_tracking_blocks_without_circuits)
+
+
+def _to_optional_str(value: str) -> Optional[str]:
+    return value if value else None
+
+
+def _to_optional_line_direction(value: str) -> Optional[line_topology.LineDirection]:
+    return line_topology.LineDirection(value) if value else None
+
+
+def _to_optional_bool(value: int) -> Optional[bool]:
+    return None if value == NO_BOOL else bool(value)
+
+
+def _str_array(values: List[Optional[str]]) -> npt.NDArray[np.str_]:
+    """None is stored as empty string (CSV loading also turns empty values into None)"""
+    return np.array([value if value is not None else "" for value in values], dtype=np.str_)
+
+
+def _optional_bool_array(values: List[Optional[bool]]) -> npt.NDArray[np.int8]:
+    return np.array([NO_BOOL if value is None else int(value) for value in values], dtype=np.int8)
+
+
+def line_to_snapshot_arrays(line: line_topology.Line) -> Dict[str, npt.NDArray[np.generic]]:
+    """Integer-indexed arrays: references between topology elements are stored as indexes in their arrays"""
+    segment_index_by_segment = {segment: index for index, segment in enumerate(line.segments)}
+    track_circuit_index_by_id = {track_circuit.identifier: index for index, track_circuit in enumerate(line.track_circuits)}
+    tracking_block_index_by_id = {tracking_block.identifier: index for index, tracking_block in enumerate(line.tracking_blocks)}
+    switches = list(line.switches.values())
+
+    def segments_indexes(neighbours: List[Optional[line_topology.Segment]]) -> npt.NDArray[np.int64]:
+        return np.array([segment_index_by_segment[neighbour] if neighbour is not None else NO_INDEX for neighbour in neighbours], dtype=np.int64)
+
+    return {
+        "segment_identifier": _str_array([segment.identifier for segment in line.segments]),
+        "segment_num_segment": np.array([segment.num_segment for segment in line.segments], dtype=np.int64),
+        "segment_direction": _str_array([segment.direction for segment in line.segments]),
+        "segment_pk_abs_start": np.array([segment.pk_abs_start for segment in line.segments], dtype=np.float64),
+        "segment_pk_abs_end": np.array([segment.pk_abs_end for segment in line.segments], dtype=np.float64),
+        "segment_length_in_cm": np.array([segment.length_in_cm for segment in line.segments], dtype=np.int64),
+        "segment_upstream_normal": segments_indexes([segment.upstream_normal for segment in line.segments]),
+        "segment_upstream_reverse": segments_indexes([segment.upstream_reverse for segment in line.segments]),
+        "segment_downstream_normal": segments_indexes([segment.downstream_normal for segment in line.segments]),
+        "segment_downstream_reverse": segments_indexes([segment.downstream_reverse for segment in line.segments]),
+        "segment_upstream_normal_same_direction": _optional_bool_array([segment.upstream_normal_same_direction for segment in line.segments]),
+        "segment_upstream_reverse_same_direction": _optional_bool_array([segment.upstream_reverse_same_direction for segment in line.segments]),
+        "segment_downstream_normal_same_direction": _optional_bool_array([segment.downstream_normal_same_direction for segment in line.segments]),
+        "segment_downstream_reverse_same_direction": _optional_bool_array([segment.downstream_reverse_same_direction for segment in line.segments]),
+        "track_circuit_identifier": _str_array([track_circuit.identifier for track_circuit in line.track_circuits]),
+        "track_circuit_label": _str_array([track_circuit.label for track_circuit in line.track_circuits]),
+        "track_circuit_occupancy_id": _str_array([track_circuit.occupancy_id for track_circuit in line.track_circuits]),
+        "track_circuit_direction_id": _str_array([track_circuit.direction_id for track_circuit in line.track_circuits]),
+        "track_circuit_default_direction": _str_array([track_circuit.default_direction.value for track_circuit in line.track_circuits]),
+        "track_circuit_zone_failure_id": _str_array([track_circuit.zone_failure_id for track_circuit in line.track_circuits]),
+        "track_circuit_failure_id": _str_array([track_circuit.failure_id for track_circuit in line.track_circuits]),
+        "track_circuit_turnback": np.array([track_circuit.turnback for track_circuit in line.track_circuits], dtype=np.bool_),
+        "track_circuit_steering": _str_array([track_circuit.steering.value if track_circuit.steering else None for track_circuit in line.track_circuits]),
+        "track_circuit_extension_id": _str_array([track_circuit.extension_id for track_circuit in line.track_circuits]),
+        "track_circuit_representation": _str_array([track_circuit.representation for track_circuit in line.track_circuits]),
+        "track_circuit_authorized_acknowledgement_rights": _str_array([track_circuit.authorized_acknowledgement_rights for track_circuit in line.track_circuits]),
+        "track_circuit_denied_acknowledgement_rights": _str_array([track_circuit.denied_acknowledgement_rights for track_circuit in line.track_circuits]),
+        "track_circuit_virtual": np.array([track_circuit.virtual for track_circuit in line.track_circuits], dtype=np.bool_),
+        "tracking_block_identifier": _str_array([tracking_block.identifier for tracking_block in line.tracking_blocks]),
+        "tracking_block_label": _str_array([tracking_block.label for tracking_block in line.tracking_blocks]),
+        "tracking_block_type": _str_array([tracking_block.type for tracking_block in line.tracking_blocks]),
+        "tracking_block_track_circuit": np.array([track_circuit_index_by_id[tracking_block.track_circuit_id] for tracking_block in line.tracking_blocks], dtype=np.int64),
+        "tracking_block_isotropic": np.array([tracking_block.isotropic for tracking_block in line.tracking_blocks], dtype=np.bool_),
+        "tracking_block_border": np.array([tracking_block.border for tracking_block in line.tracking_blocks], dtype=np.bool_),
+        "tracking_block_steering": _str_array([tracking_block.steering.value if tracking_block.steering else None for tracking_block in line.tracking_blocks]),
+        "tracking_block_extension_id": _str_array([tracking_block.extension_id for tracking_block in line.tracking_blocks]),
+        "not_created_tracking_block_identifier": _str_array(list(line.not_created_tracking_blocks_ids_without_track_circuits)),
+        "switch_identifier": _str_array([switch.identifier for switch in switches]),
+        "switch_label": _str_array([switch.label for switch in switches]),
+        "switch_normal_id": _str_array([switch.normal_id for switch in switches]),
+        "switch_reverse_id": _str_array([switch.reverse_id for switch in switches]),
+        "switch_forcing_id": _str_array([switch.forcing_id for switch in switches]),
+        "switch_trailable": np.array([switch.trailable for switch in switches], dtype=np.bool_),
+        "switch_convergency_direction": _str_array([switch.convergency_direction.value if switch.convergency_direction else None for switch in switches]),
+        "tracking_block_on_segment_identifier": _str_array([relation.identifier for relation in line.tracking_block_on_segments]),
+        "tracking_block_on_segment_tracking_block": np.array([tracking_block_index_by_id[relation.tracking_block.identifier] for relation in line.tracking_block_on_segments], dtype=np.int64),
+        "tracking_block_on_segment_segment": np.array([segment_index_by_segment[relation.segment] for relation in line.tracking_block_on_segments], dtype=np.int64),
+        "tracking_block_on_segment_abs_begin": np.array([relation.abs_begin for relation in line.tracking_block_on_segments], dtype=np.int64),
+        "tracking_block_on_segment_abs_end": np.array([relation.abs_end for relation in line.tracking_block_on_segments], dtype=np.int64),
+    }
+
+
+def line_from_snapshot_arrays(arrays: Dict[str, npt.NDArray[np.generic]]) -> line_topology.Line:
+    segments: List[line_topology.Segment] = [
+        line_topology.Segment(identifier=identifier, num_segment=num_segment, direction=direction, pk_abs_start=pk_abs_start, pk_abs_end=pk_abs_end, length_in_cm=length_in_cm)
+        for identifier, num_segment, direction, pk_abs_start, pk_abs_end, length_in_cm in zip(
+            arrays["segment_identifier"].tolist(),
+            arrays["segment_num_segment"].tolist(),
+            arrays["segment_direction"].tolist(),
+            arrays["segment_pk_abs_start"].tolist(),
+            arrays["segment_pk_abs_end"].tolist(),
+            arrays["segment_length_in_cm"].tolist(),
+        )
+    ]
+
+    def to_segment(index: int) -> Optional[line_topology.Segment]:
+        return segments[index] if index != NO_INDEX else None
+
+    for segment, upstream_normal, upstream_reverse, downstream_normal, downstream_reverse, upstream_normal_same, upstream_reverse_same, downstream_normal_same, downstream_reverse_same in zip(
+        segments,
+        arrays["segment_upstream_normal"].tolist(),
+        arrays["segment_upstream_reverse"].tolist(),
+        arrays["segment_downstream_normal"].tolist(),
+        arrays["segment_downstream_reverse"].tolist(),
+        arrays["segment_upstream_normal_same_direction"].tolist(),
+        arrays["segment_upstream_reverse_same_direction"].tolist(),
+        arrays["segment_downstream_normal_same_direction"].tolist(),
+        arrays["segment_downstream_reverse_same_direction"].tolist(),
+    ):
+        segment.upstream_normal = to_segment(upstream_normal)
+        segment.upstream_reverse = to_segment(upstream_reverse)
+        segment.downstream_normal = to_segment(downstream_normal)
+        segment.downstream_reverse = to_segment(downstream_reverse)
+        segment.upstream_normal_same_direction = _to_optional_bool(upstream_normal_same)
+        segment.upstream_reverse_same_direction = _to_optional_bool(upstream_reverse_same)
+        segment.downstream_normal_same_direction = _to_optional_bool(downstream_normal_same)
+        segment.downstream_reverse_same_direction = _to_optional_bool(downstream_reverse_same)
+
+    track_circuits: List[line_topology.TrackingCircuit] = [
+        line_topology.TrackingCircuit(
+            identifier=identifier,
+            label=label,
+            occupancy_id=occupancy_id,
+            direction_id=_to_optional_str(direction_id),
+            default_direction=line_topology.LineDirection(default_direction),
+            zone_failure_id=zone_failure_id,
+            failure_id=failure_id,
+            turnback=turnback,
+            steering=_to_optional_line_direction(steering),
+            extension_id=_to_optional_str(extension_id),
+            representation=_to_optional_str(representation),
+            authorized_acknowledgement_rights=_to_optional_str(authorized_acknowledgement_rights),
+            denied_acknowledgement_rights=_to_optional_str(denied_acknowledgement_rights),
+            virtual=virtual,
+        )
+        for (
+            identifier,
+            label,
+            occupancy_id,
+            direction_id,
+            default_direction,
+            zone_failure_id,
+            failure_id,
+            turnback,
+            steering,
+            extension_id,
+            representation,
+            authorized_acknowledgement_rights,
+            denied_acknowledgement_rights,
+            virtual,
+        ) in zip(
+            arrays["track_circuit_identifier"].tolist(),
+            arrays["track_circuit_label"].tolist(),
+            arrays["track_circuit_occupancy_id"].tolist(),
+            arrays["track_circuit_direction_id"].tolist(),
+            arrays["track_circuit_default_direction"].tolist(),
+            arrays["track_circuit_zone_failure_id"].tolist(),
+            arrays["track_circuit_failure_id"].tolist(),
+            arrays["track_circuit_turnback"].tolist(),
+            arrays["track_circuit_steering"].tolist(),
+            arrays["track_circuit_extension_id"].tolist(),
+            arrays["track_circuit_representation"].tolist(),
+            arrays["track_circuit_authorized_acknowledgement_rights"].tolist(),
+            arrays["track_circuit_denied_acknowledgement_rights"].tolist(),
+            arrays["track_circuit_virtual"].tolist(),
+        )
+    ]
+
+    tracking_blocks: List[line_topology.TrackingBlock] = []
+    for identifier, label, block_type, track_circuit_index, isotropic, border, steering, extension_id in zip(
+        arrays["tracking_block_identifier"].tolist(),
+        arrays["tracking_block_label"].tolist(),
+        arrays["tracking_block_type"].tolist(),
+        arrays["tracking_block_track_circuit"].tolist(),
+        arrays["tracking_block_isotropic"].tolist(),
+        arrays["tracking_block_border"].tolist(),
+        arrays["tracking_block_steering"].tolist(),
+        arrays["tracking_block_extension_id"].tolist(),
+    ):
+        track_circuit = track_circuits[track_circuit_index]
+        tracking_block = line_topology.TrackingBlock(
+            identifier=identifier,
+            label=_to_optional_str(label),
+            type=_to_optional_str(block_type),
+            track_circuit_id=track_circuit.identifier,
+            isotropic=isotropic,
+            border=border,
+            steering=_to_optional_line_direction(steering),
+            extension_id=_to_optional_str(extension_id),
+            tracking_circuit=track_circuit,
+        )
+        tracking_blocks.append(tracking_block)
+        track_circuit.tracking_blocks.append(tracking_block)
+
+    switches: List[line_topology.Switch] = [
+        line_topology.Switch(
+            identifier=identifier,
+            label=_to_optional_str(label),
+            normal_id=_to_optional_str(normal_id),
+            reverse_id=_to_optional_str(reverse_id),
+            forcing_id=_to_optional_str(forcing_id),
+            trailable=trailable,
+            convergency_direction=_to_optional_line_direction(convergency_direction),
+        )
+        for identifier, label, normal_id, reverse_id, forcing_id, trailable, convergency_direction in zip(
+            arrays["switch_identifier"].tolist(),
+            arrays["switch_label"].tolist(),
+            arrays["switch_normal_id"].tolist(),
+            arrays["switch_reverse_id"].tolist(),
+            arrays["switch_forcing_id"].tolist(),
+            arrays["switch_trailable"].tolist(),
+            arrays["switch_convergency_direction"].tolist(),
+        )
+    ]
+
+    tracking_block_on_segments: List[line_topology.TrackingBlockOnSegment] = [
+        line_topology.TrackingBlockOnSegment(identifier=identifier, tracking_block=tracking_blocks[tracking_block_index], segment=segments[segment_index], abs_begin=abs_begin, abs_end=abs_end)
+        for identifier, tracking_block_index, segment_index, abs_begin, abs_end in zip(
+            arrays["tracking_block_on_segment_identifier"].tolist(),
+            arrays["tracking_block_on_segment_tracking_block"].tolist(),
+            arrays["tracking_block_on_segment_segment"].tolist(),
+            arrays["tracking_block_on_segment_abs_begin"].tolist(),
+            arrays["tracking_block_on_segment_abs_end"].tolist(),
+        )
+    ]
+
+    return line_topology.Line(
+        segments=segments,
+        track_circuits=track_circuits,
+        track_circuit_by_id={track_circuit.identifier: track_circuit for track_circuit in track_circuits},
+        tracking_blocks=tracking_blocks,
+        switches={switch.identifier: switch for switch in switches},
+        not_created_tracking_blocks_ids_without_track_circuits=arrays["not_created_tracking_block_identifier"].tolist(),
+        tracking_block_on_segments_csv_full_path=None,
+        loaded_tracking_block_on_segments=tracking_block_on_segments,
+        # Consistency errors were already reported when the snapshot was built
+        check_consistency=False,
+    )
+
+
+def _write_array(file: BinaryIO, array: npt.NDArray[np.generic]) -> None:
+    np.lib.format.write_array(file, np.ascontiguousarray(array), version=(1, 0), allow_pickle=False)
+
+
+def _read_array(file: BinaryIO, file_full_path: str | Path) -> npt.NDArray[np.generic]:
+    """Memory-maps the array at the current position of the file, and moves after it"""
+    np.lib.format.read_magic(file)
+    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+    assert not fortran_order
+    offset = file.tell()
+    if int(np.prod(shape)) == 0:
+        return np.empty(shape, dtype=dtype)
+    array: npt.NDArray[np.generic] = np.memmap(file_full_path, dtype=dtype, mode="r", offset=offset, shape=shape)
+    file.seek(offset + array.nbytes)
+    return array
+
+
+def save_snapshot(arrays: Dict[str, npt.NDArray[np.generic]], snapshot_file_full_path: str | Path) -> None:
+    """File content: magic, version, then arrays in .npy format (names array first). Written in a temporary file, then renamed"""
+    temporary_file_full_path = f"{snapshot_file_full_path}.tmp"
+    with open(temporary_file_full_path, mode="wb") as file:
+        file.write(TOPOLOGY_SNAPSHOT_MAGIC)
+        file.write(np.array([TOPOLOGY_SNAPSHOT_VERSION], dtype="<u4").tobytes())
+        _write_array(file, _str_array(list(arrays.keys())))
+        for array in arrays.values():
+            _write_array(file, array)
+    os.replace(temporary_file_full_path, snapshot_file_full_path)
+
+
+def load_snapshot(snapshot_file_full_path: str | Path) -> Dict[str, npt.NDArray[np.generic]]:
+    with open(snapshot_file_full_path, mode="rb") as file:
+        if file.read(len(TOPOLOGY_SNAPSHOT_MAGIC)) != TOPOLOGY_SNAPSHOT_MAGIC:
+            raise ValueError(f"{snapshot_file_full_path} is not a topology snapshot")
+        version = int(np.frombuffer(file.read(4), dtype="<u4")[0])
+        if version != TOPOLOGY_SNAPSHOT_VERSION:
+            raise ValueError(f"{snapshot_file_full_path} has topology snapshot version {version} instead of {TOPOLOGY_SNAPSHOT_VERSION}")
+        names = _read_array(file, snapshot_file_full_path).tolist()
+        return {name: _read_array(file, snapshot_file_full_path) for name in names}
+
+
+@logger_config.stopwatch_decorator(inform_beginning=True, monitor_ram_usage=True)
+def load_line_from_csv_with_snapshot(
+    snapshot_directory_path: str,
+    segments_csv_full_path: str | Path,
+    segments_relations_csv_full_path: str | Path,
+    track_circuits_csv_full_path: str | Path,
+    tracking_blocks_csv_full_path: str | Path,
+    switches_csv_full_path: str | Path,
+    tracking_block_on_segments_csv_full_path: str | Path,
+    ignore_tracking_blocks_without_circuits: bool = False,
+) -> line_topology.Line:
+    """
+    Same as Line.load_from_csv, but the line is loaded from a snapshot file when the CSV files have not changed since the snapshot was built.
+    The snapshot file name contains the fingerprint of the CSV files contents: any change of CSV builds another snapshot.
+    """
+    csv_files_full_paths: List[str | Path] = [
+        segments_csv_full_path,
+        segments_relations_csv_full_path,
+        track_circuits_csv_full_path,
+        tracking_blocks_csv_full_path,
+        switches_csv_full_path,
+        tracking_block_on_segments_csv_full_path,
+    ]
+    fingerprint = compute_topology_fingerprint(csv_files_full_paths, ignore_tracking_blocks_without_circuits=ignore_tracking_blocks_without_circuits)
+    snapshot_file_full_path = os.path.join(snapshot_directory_path, f"line_topology_{fingerprint[:32]}.bin")
+
+    line: line_topology.Line
+    if os.path.exists(snapshot_file_full_path):
+        try:
+            line = line_from_snapshot_arrays(load_snapshot(snapshot_file_full_path))
+            line.csv_files_full_paths = csv_files_full_paths
+            line.ignore_tracking_blocks_without_circuits = ignore_tracking_blocks_without_circuits
+            logger_config.print_and_log_info(f"Line topology loaded from snapshot {snapshot_file_full_path}")
+            return line
+        except (ValueError, KeyError, OSError) as err:
+            logger_config.print_and_log_warning(f"Topology snapshot {snapshot_file_full_path} can not be loaded ({err}), rebuilt from CSV files")
+
+    line = line_topology.Line.load_from_csv(
+        segments_csv_full_path=segments_csv_full_path,
+        segments_relations_csv_full_path=segments_relations_csv_full_path,
+        track_circuits_csv_full_path=track_circuits_csv_full_path,
+        tracking_blocks_csv_full_path=tracking_blocks_csv_full_path,
+        switches_csv_full_path=switches_csv_full_path,
+        tracking_block_on_segments_csv_full_path=tracking_block_on_segments_csv_full_path,
+        ignore_tracking_blocks_without_circuits=ignore_tracking_blocks_without_circuits,
+    )
+    file_utils.create_folder_if_not_exist(snapshot_directory_path)
+    save_snapshot(line_to_snapshot_arrays(line), snapshot_file_full_path)
+    logger_config.print_and_log_info(f"Line topology snapshot {snapshot_file_full_path} saved")
+    return line
@@ -249,8 +249,7 @@ class UpperLayerTelegram(SdaUnisigMessage):
         if packets_definitions:
 
             packet_definition = packets_definitions[0]
-            nid_content_as_bit_str = self.byte_message_decoded.extract_next_bits_to_str_of_bit(number_of_bits=l_packet)
-            stm_byte_message_decoded = bytes_messages.DecodedBytesMessage.from_bit_string(nid_content_as_bit_str)
+            stm_byte_message_decoded = self.byte_message_decoded.extract_next_bits_to_decoded_bytes_message(number_of_bits=l_packet)
             logger_config.print_and_log_info(f"STM found:{nid_stm}, packet length:{l_packet}")
 
             fields_names_and_values: Dict[str, str | int] = {}
@@ -1,4 +1,8 @@
 import logging
+from pathlib import Path
+from typing import Dict
+
+import pytest
 
 from logger import logger_config
 
@@ -6,3 +10,50 @@ from logger import logger_config
 def pytest_configure(config):
     """Configure the shared logger before any tests run."""
     logger_config.configure_logger_with_exact_file_name("pytest_tests.log", logger_level=logging.INFO)
+
+
+@pytest.fixture(name="small_line_csv_files_fixture")
+def small_line_csv_files(tmp_path: Path) -> Dict[str, Path]:
+    csv_contents = {
+        "segment.csv": ["SEGMENT_ID;NUM_SEGMENT;DIRECTION;PK_ABS_START;PK_ABS_END;LENGTH", "SEG_1;1;UP;0;100;1000", "SEG_2;2;UP;100;200;1000", "SEG_3;3;DOWN;200;250;500"],
+        "segment_relation.csv": [
+            "SEGMENT_ID;SEGMENT_AMONT_NORMAL_ID;SEGMENT_AMONT_REVERSE_ID;SEGMENT_AVAL_NORMAL_ID;SEGMENT_AVAL_REVERSE_ID;"
+            "MEME_SENS_AMONT_NORMAL;MEME_SENS_AMONT_REVERSE;MEME_SENS_AVAL_NORMAL;MEME_SENS_AVAL_REVERSE",
+            "1;;;2;;;;TRUE;",
+            "2;1;;3;;TRUE;;FALSE;",
+            "3;;;2;;;;FALSE;",
+        ],
+        "track_circuit.csv": [
+            "ID;LABEL;OCCUPANCY_ID;DIRECTION_ID;DEFAULT_DIRECTION;ZONE_FAILURE_ID;FAILURE_ID;TURNBACK;STEERING;EXTENSION_ID;REPRESENTATION;"
+            "AUTHORIZED_ACKNOWLEDGEMENT_RIGHTS;DENIED_ACKNOWLEDGEMENT_RIGHTS;VIRTUAL",
+            "TC_A;A;OCC_A;;UP;ZF;F;0;;;;;;0",
+            "TC_B;B;OCC_B;DIR_B;DOWN;ZF;F;1;UP;;;;;0",
+        ],
+        "tracking_block.csv": [
+            "ID;LABEL;TYPE;TRACK_CIRCUIT_ID;ISOTROPIC;BORDER;STEERING;EXTENSION_ID",
+            "TB_1;;;TC_A;0;0;;",
+            "TB_2;;;TC_A;0;0;;",
+            "TB_3;;;TC_B;0;0;;",
+            "TB_4;;;TC_B;0;0;;",
+        ],
+        "switch.csv": ["ID;LABEL;NORMAL_ID;REVERSE_ID;FORCING_ID;TRAILABLE;CONVERGENCY_DIRECTION", "SW_1;1;N;R;;1;UP"],
+        "tracking_block_on_segment.csv": [
+            "ID;TB_ID;SEGMENT_ID;ABS_BEGIN;ABS_END",
+            "R_3;TB_3;1;600;1000",
+            "R_1;TB_1;1;0;300",
+            "R_2;TB_2;1;300;600",
+            "R_4;TB_4;2;0;500",
+            "R_5;TB_1;2;400;1000",
+        ],
+    }
+    for file_name, lines in csv_contents.items():
+        (tmp_path / file_name).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    return {
+        "segments_csv_full_path": tmp_path / "segment.csv",
+        "segments_relations_csv_full_path": tmp_path / "segment_relation.csv",
+        "track_circuits_csv_full_path": tmp_path / "track_circuit.csv",
+        "tracking_blocks_csv_full_path": tmp_path / "tracking_block.csv",
+        "switches_csv_full_path": tmp_path / "switch.csv",
+        "tracking_block_on_segments_csv_full_path": tmp_path / "tracking_block_on_segment.csv",
+    }
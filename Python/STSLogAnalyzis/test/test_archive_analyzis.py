@@ -1,7 +1,10 @@
 import pytest
 
+from datetime import datetime, timedelta
+from typing import Dict, List
+
 from stsloganalyzis.topology import line_topology
-from stsloganalyzis.archive import archive_analyzis, decode_archive
+from stsloganalyzis.archive import archive_analyzis, constants, decode_archive, decode_message, decode_xml_message
 
 OUTPUT_DIRECTORY = "output"
 
@@ -55,3 +58,34 @@ class TestArchiveAnalysis:
         analysis.create_reports_all_sqlarch_changes_since_previous(
             output_directory_path=OUTPUT_DIRECTORY,
         )
+
+
+def create_decoded_message(decoded_fields_flat_directory: Dict[str, constants.FIELD_TYPE]) -> decode_message.DecodedMessage:
+    decoded_message = decode_message.DecodedMessage(message_number=1, xml_decoded_message=decode_xml_message.DecodedXmlMessage(message_number=1, hex_string="01"))
+    decoded_message.decoded_fields_flat_directory.update(decoded_fields_flat_directory)
+    return decoded_message
+
+
+class TestFieldsLibraryForOneObject:
+
+    def test_only_changed_fields_are_returned(self) -> None:
+        fields_library = archive_analyzis.FieldsLibraryForOneObject("M_OBJ")
+        timestamp = datetime(2026, 6, 18, 2, 0, 0)
+
+        def update(decoded_fields_flat_directory: Dict[str, constants.FIELD_TYPE], seconds: int) -> List[str]:
+            fields_changed = fields_library.update_latest_values_for_decoded_message(create_decoded_message(decoded_fields_flat_directory), timestamp + timedelta(seconds=seconds))
+            return [field_changed.field_name for field_changed in fields_changed]
+
+        assert update({"A": 1, "B": [1, 2]}, 0) == ["A", "B"]
+        assert not update({"A": 1, "B": [1, 2]}, 1)
+        assert update({"A": 1, "B": [1, 3]}, 2) == ["B"]
+
+        field_a = fields_library.get_field("A")
+        assert field_a
+        assert field_a.timestamp == timestamp + timedelta(seconds=2)
+        assert field_a.previous_timestamp == timestamp + timedelta(seconds=1)
+
+        # A value set by another way than a decoded message is compared again
+        fields_library.update_latest_value_for_field(field_name="A", field_value="other", timestamp=timestamp + timedelta(seconds=3))
+        assert update({"A": 1, "B": [1, 3]}, 4) == ["A"]
+        assert field_a.previous_different_value == "other"
@@ -1,8 +1,14 @@
 import datetime
+import io
+import pathlib
+import random
+from typing import List, Optional, Tuple, cast
 
+import numpy as np
 import pytest
 
-from stsloganalyzis.atc import atc_logs
+from stsloganalyzis.atc import atc_logs, perturbo
+from stsloganalyzis.common import common_filters
 
 
 class TestDecodeTimestamp:
@@ -22,3 +28,227 @@ class TestDecodeTimestamp:
     def test_decode_pert_timestamp(self, c_heure: int, c_decalage: int, c_decenie: int, c_jour: int, expected_timetamp: datetime.datetime) -> None:
         decoded_timestamp = atc_logs.pert_variable_to_timestamp(c_heure=c_heure, c_decalage=c_decalage, c_decenie=c_decenie, c_jour=c_jour)
         assert decoded_timestamp == expected_timetamp
+
+    def test_decode_pert_timestamps_same_as_each_line(self) -> None:
+        random_generator = random.Random(0)
+        all_lines_fields = [
+            (random_generator.randrange(atc_logs.NUMBER_OF_MILLISECONDS_IN_DAY), random_generator.choice([0, 3600000, 7200000]), random_generator.randrange(4), random_generator.randrange(3650))
+            for _ in range(500)
+        ]
+        c_heures, c_decalages, c_decenies, c_jours = (np.array(field_values, dtype=np.int64) for field_values in zip(*all_lines_fields))
+        decoded_timestamps = atc_logs.pert_variables_to_timestamps(c_heures=c_heures, c_decalages=c_decalages, c_decenies=c_decenies, c_jours=c_jours)
+        assert decoded_timestamps.tolist() == [atc_logs.pert_variable_to_timestamp(*line_fields) for line_fields in all_lines_fields]
+
+
+def fix_cheures_line_by_line(c_heures: List[Optional[int]]) -> Tuple[List[Optional[int]], List[bool]]:
+    fixed_c_heures: List[Optional[int]] = []
+    is_new_day: List[bool] = []
+    for c_heure in c_heures:
+        previous_c_heure = fixed_c_heures[-1] if fixed_c_heures else None
+        is_change_of_day = previous_c_heure and previous_c_heure > atc_logs.JUST_BEFORE_MIDNIGHT_IN_MILLISECONDS and c_heure is not None and c_heure < 100
+        if c_heure is not None and previous_c_heure and c_heure <= previous_c_heure and not is_change_of_day:
+            c_heure = previous_c_heure + 1
+        fixed_c_heures.append(c_heure)
+        is_new_day.append(bool(is_change_of_day))
+    return fixed_c_heures, is_new_day
+
+
+class TestFixCheures:
+
+    def test_fix_same_and_past_cheures(self) -> None:
+        fixed_c_heures, is_new_day = atc_logs.fix_cheures_and_detect_new_days(np.array([10, 10, 5, 20, 0, 7], dtype=np.int64), np.array([True, True, True, True, False, True]))
+        assert fixed_c_heures.tolist() == [10, 11, 12, 20, 0, 7]
+        assert not is_new_day.any()
+
+    def test_new_day_after_fixed_cheure(self) -> None:
+        just_before_midnight = atc_logs.JUST_BEFORE_MIDNIGHT_IN_MILLISECONDS
+        c_heures = np.array([just_before_midnight, just_before_midnight, 50, 0, 0, 3], dtype=np.int64)
+        fixed_c_heures, is_new_day = atc_logs.fix_cheures_and_detect_new_days(c_heures, np.ones(len(c_heures), dtype=np.bool_))
+        assert fixed_c_heures.tolist() == [just_before_midnight, just_before_midnight + 1, 50, 51, 52, 53]
+        assert is_new_day.tolist() == [False, False, True, False, False, False]
+
+    def test_cheures_0_after_cheure_0_are_not_fixed(self) -> None:
+        c_heures: List[Optional[int]] = [0, 0, 0, 40, 30, None, 0, 0, 200, 0, 0, atc_logs.JUST_BEFORE_MIDNIGHT_IN_MILLISECONDS + 10, 0, 0]
+        has_cheure = np.array([c_heure is not None for c_heure in c_heures])
+        fixed_c_heures, is_new_day = atc_logs.fix_cheures_and_detect_new_days(np.array([c_heure or 0 for c_heure in c_heures], dtype=np.int64), has_cheure)
+        expected_fixed_c_heures, expected_is_new_day = fix_cheures_line_by_line(c_heures)
+        assert fixed_c_heures[has_cheure].tolist() == [c_heure for c_heure in expected_fixed_c_heures if c_heure is not None]
+        assert fixed_c_heures[has_cheure].tolist() == [0, 0, 0, 40, 41, 0, 0, 200, 201, 202, atc_logs.JUST_BEFORE_MIDNIGHT_IN_MILLISECONDS + 10, 0, 0]
+        assert is_new_day.tolist() == expected_is_new_day
+        assert is_new_day.tolist() == [False] * 12 + [True, False]
+
+    def test_same_as_fixing_each_line(self) -> None:
+        random_generator = random.Random(0)
+        c_heures: List[Optional[int]] = []
+        c_heure = 0
+        for _ in range(3000):
+            # Lines just after midnight are followed by lines just before next midnight
+            if c_heure < 1000:
+                c_heure = atc_logs.JUST_BEFORE_MIDNIGHT_IN_MILLISECONDS - random_generator.randrange(2000)
+            c_heure += random_generator.choice([-100, 0, 100, 200])
+            if c_heure >= atc_logs.NUMBER_OF_MILLISECONDS_IN_DAY:
+                c_heure = random_generator.choice([0, 50, 150])
+            c_heures.append(random_generator.choice([c_heure, c_heure, c_heure, 0, None]))
+
+        has_cheure = np.array([c_heure is not None for c_heure in c_heures])
+        fixed_c_heures, is_new_day = atc_logs.fix_cheures_and_detect_new_days(np.array([c_heure or 0 for c_heure in c_heures], dtype=np.int64), has_cheure)
+        expected_fixed_c_heures, expected_is_new_day = fix_cheures_line_by_line(c_heures)
+        assert fixed_c_heures[has_cheure].tolist() == [c_heure for c_heure in expected_fixed_c_heures if c_heure is not None]
+        assert is_new_day.tolist() == expected_is_new_day
+        assert is_new_day.sum() > 10
+
+
+class TestVariablesColumns:
+
+    def test_convert_values_to_column(self) -> None:
+        assert atc_logs.convert_values_to_column([True, False]).dtype == bool
+        assert atc_logs.convert_values_to_column([3, 4]).dtype == int
+        mixed_column = atc_logs.convert_values_to_column([True, 2, "a"])
+        assert mixed_column.dtype == object
+        assert mixed_column.tolist() == [True, 2, "a"]
+
+    def test_convert_raw_values_to_column_same_as_converting_each_value(self) -> None:
+        raw_values = ["VRAI", "12", "FAUX", "12", "true", "ab", "VRAI"]
+        assert atc_logs.convert_raw_values_to_column(raw_values).tolist() == [atc_logs.convert_to_proper_type(raw_value) for raw_value in raw_values]
+        assert atc_logs.convert_raw_values_to_column(["0", "1", "0"]).tolist() == [False, True, False]
+        assert atc_logs.convert_raw_values_to_column(["12", "7", "12"]).dtype == int
+
+    def test_concatenate_columns_keeps_values_types(self) -> None:
+        column = atc_logs.concatenate_columns([atc_logs.convert_values_to_column([True, False]), atc_logs.convert_values_to_column([2])])
+        assert [type(value) for value in column.tolist()] == [bool, bool, int]
+
+    def test_states_changes_positions_exclude_initial_state(self) -> None:
+        variable_column = atc_logs.VariableColumn("VAR")
+        variable_column.add_values(first_row=0, values=atc_logs.convert_values_to_column([0, 1, 1, 2, 2, 1]))
+        variable_column.finalize(equipment_rows_count=6)
+        variable_column.compute_states_changes_positions()
+        assert variable_column.states_changes_positions.tolist() == [3, 5]
+
+    def test_variable_defined_on_part_of_equipment_rows(self) -> None:
+        equipment = atc_logs.Equipment(raw_name="PAS_06_A")
+        parent_file = cast(atc_logs.ATCTestFile, None)
+        equipment.variables_columns.add_rows(
+            parent_file=parent_file,
+            line_numbers=[1, 2],
+            horodates=[None, None],
+            times_according_to_simulation_start=[None, None],
+            result_line_indexes=[0, 2],
+            values_by_variable_name={"X": [1, 2], "Y": ["a", "b"]},
+        )
+        equipment.variables_columns.add_rows(
+            parent_file=parent_file,
+            line_numbers=[5],
+            horodates=[datetime.datetime(2026, 3, 29)],
+            times_according_to_simulation_start=[None],
+            result_line_indexes=[4],
+            values_by_variable_name={"X": [True], "W": [7]},
+        )
+        equipment.variables_columns.finalize()
+
+        assert equipment.variables_columns.rows_count == 3
+        assert equipment.variables_columns.columns_by_variable_name["X"].rows is None
+        assert equipment.variables_columns.columns_by_variable_name["X"].values.tolist() == [1, 2, True]
+        assert equipment.variables_columns.columns_by_variable_name["W"].get_rows().tolist() == [2]
+        assert equipment.variables_columns.get_values_by_variable_name(row=2) == {"X": True, "W": 7}
+        assert equipment.variables_columns.get_values_by_variable_name(row=0) == {"X": 1, "Y": "a"}
+        assert equipment.variables_columns.get_result_line(row=2).horodate == datetime.datetime(2026, 3, 29)
+        assert equipment.variables_columns.get_result_line(row=0).horodate is None
+
+
+def write_perturbo_file(perturbo_file_full_path: str, random_generator: random.Random, c_jour: Optional[int] = None) -> None:
+    with open(perturbo_file_full_path, mode="w", encoding="latin-1") as perturbo_file:
+        perturbo_file.write("CHEURE;CDECALAGE;VALUE;OTHER_VALUE\n" if c_jour is None else "CHEURE;CDECALAGE;CJOUR;VALUE;OTHER_VALUE\n")
+        c_heure = 3600000
+        for _ in range(5000):
+            c_heure += random_generator.choice([10, 20, 30])
+            perturbo_file.write(f"{c_heure};0;{'' if c_jour is None else f'{c_jour};'}{random_generator.choice(['a', 'b', 'c'])};{random_generator.choice(['0', '1', '2'])}\n")
+
+
+class TestTimestampFiltersFastSeek:
+
+    def test_read_line_at_byte_offset(self) -> None:
+        file = io.BytesIO(b"ab\ncd\nef")
+        assert atc_logs.read_line_at_byte_offset(file, 0) == (0, b"ab\n")
+        assert atc_logs.read_line_at_byte_offset(file, 1) == (3, b"cd\n")
+        assert atc_logs.read_line_at_byte_offset(file, 3) == (3, b"cd\n")
+        assert atc_logs.read_line_at_byte_offset(file, 7) == (8, b"")
+
+    def test_same_lines_as_whole_file_read(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(atc_logs, "ATC_LOG_FILES_ENCODING", "latin-1")
+        perturbo_file_full_path = str(tmp_path / "perturbo.txt")
+        write_perturbo_file(perturbo_file_full_path, random.Random(0), c_jour=2291)
+
+        def build_test_result(fast_seek: bool) -> atc_logs.ATCTestResult:
+            builder = perturbo.PerturboTestResult.Builder(label="fast_seek" if fast_seek else "whole_file").add_file(
+                file_full_path=perturbo_file_full_path, equipment_name="EQPT", forced_cdecenie_value=2
+            )
+            builder.add_timestamp_filter(common_filters.DatesFilter.DateBetweenFilter(date_min=datetime.datetime(2026, 4, 10, 1, 1, 10), date_max=datetime.datetime(2026, 4, 10, 1, 1, 20)))
+            if fast_seek:
+                builder.enable_timestamp_filters_fast_seek()
+            return builder.build()
+
+        whole_file_columns = build_test_result(fast_seek=False).equipments_library.all_equipments[0].variables_columns
+        fast_seek_columns = build_test_result(fast_seek=True).equipments_library.all_equipments[0].variables_columns
+        assert 0 < whole_file_columns.rows_count < 1000
+        assert fast_seek_columns.line_numbers.tolist() == whole_file_columns.line_numbers.tolist()
+        assert fast_seek_columns.horodates.tolist() == whole_file_columns.horodates.tolist()
+        assert fast_seek_columns.columns_by_variable_name["VALUE"].values.tolist() == whole_file_columns.columns_by_variable_name["VALUE"].values.tolist()
+
+    def test_same_lines_as_whole_file_read_after_midnight_with_forced_cjour(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(atc_logs, "ATC_LOG_FILES_ENCODING", "latin-1")
+        perturbo_file_full_path = str(tmp_path / "perturbo.txt")
+        # Change of day in the last lines of the file, after the last sampled line
+        lines_after_midnight_count = 800
+        c_heures = [(atc_logs.NUMBER_OF_MILLISECONDS_IN_DAY + (line_index - 30000 + lines_after_midnight_count) * 100) % atc_logs.NUMBER_OF_MILLISECONDS_IN_DAY for line_index in range(30000)]
+        with open(perturbo_file_full_path, mode="w", encoding="latin-1") as perturbo_file:
+            perturbo_file.write("CHEURE;CDECALAGE;VALUE\n")
+            perturbo_file.write("".join(f"{c_heure};0;{line_index % 7}\n" for line_index, c_heure in enumerate(c_heures)))
+
+        def build_test_result(fast_seek: bool) -> atc_logs.ATCTestResult:
+            builder = perturbo.PerturboTestResult.Builder(label="fast_seek" if fast_seek else "whole_file").add_file(
+                file_full_path=perturbo_file_full_path, equipment_name="EQPT", forced_cdecenie_value=2, forced_cjour_at_beginning_value=2291
+            )
+            builder.add_timestamp_filter(common_filters.DatesFilter.DateBetweenFilter(date_min=datetime.datetime(2026, 4, 11, 0, 1, 5), date_max=datetime.datetime(2026, 4, 11, 0, 1, 6)))
+            if fast_seek:
+                builder.enable_timestamp_filters_fast_seek()
+            return builder.build()
+
+        whole_file_columns = build_test_result(fast_seek=False).equipments_library.all_equipments[0].variables_columns
+        fast_seek_columns = build_test_result(fast_seek=True).equipments_library.all_equipments[0].variables_columns
+        assert whole_file_columns.rows_count == 9
+        assert fast_seek_columns.line_numbers.tolist() == whole_file_columns.line_numbers.tolist()
+        assert fast_seek_columns.horodates.tolist() == whole_file_columns.horodates.tolist()
+
+
+class TestParallelBuild:
+
+    def test_parallel_build_is_identical_to_sequential_build(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(atc_logs, "ATC_LOG_FILES_ENCODING", "latin-1")
+        random_generator = random.Random(0)
+        perturbo_files_full_paths = [str(tmp_path / f"perturbo_{file_index}.txt") for file_index in range(3)]
+        for perturbo_file_full_path in perturbo_files_full_paths:
+            write_perturbo_file(perturbo_file_full_path, random_generator)
+
+        def build_test_result(parallel_build: bool) -> atc_logs.ATCTestResult:
+            builder = perturbo.PerturboTestResult.Builder(label="parallel" if parallel_build else "sequential")
+            for perturbo_file_full_path, equipment_name in zip(perturbo_files_full_paths, ["EQPT_A", "EQPT_B", "EQPT_A"]):
+                builder.add_file(file_full_path=perturbo_file_full_path, equipment_name=equipment_name, forced_cdecenie_value=2, forced_cjour_at_beginning_value=2291)
+            if parallel_build:
+                builder.with_parallel_build(max_workers=2)
+            return builder.build()
+
+        sequential_test_result = build_test_result(parallel_build=False)
+        parallel_test_result = build_test_result(parallel_build=True)
+        assert [equipment.name for equipment in parallel_test_result.equipments_library.all_equipments] == ["EQPT_A", "EQPT_B"]
+        assert parallel_test_result.variables_states_changes_count == sequential_test_result.variables_states_changes_count
+        for parallel_equipment, sequential_equipment in zip(parallel_test_result.equipments_library.all_equipments, sequential_test_result.equipments_library.all_equipments):
+            parallel_columns, sequential_columns = parallel_equipment.variables_columns, sequential_equipment.variables_columns
+            assert [parallel_file.file_full_path for parallel_file in parallel_columns.parent_files] == [sequential_file.file_full_path for sequential_file in sequential_columns.parent_files]
+            assert all(parallel_file in parallel_test_result.all_atc_test_files for parallel_file in parallel_columns.parent_files)
+            assert parallel_columns.parent_file_indexes.tolist() == sequential_columns.parent_file_indexes.tolist()
+            assert parallel_columns.line_numbers.tolist() == sequential_columns.line_numbers.tolist()
+            assert parallel_columns.horodates.tolist() == sequential_columns.horodates.tolist()
+            assert parallel_columns.result_line_indexes.tolist() == sequential_columns.result_line_indexes.tolist()
+            for variable_name, sequential_column in sequential_columns.columns_by_variable_name.items():
+                assert parallel_columns.columns_by_variable_name[variable_name].values.tolist() == sequential_column.values.tolist()
+                assert parallel_columns.columns_by_variable_name[variable_name].states_changes_positions.tolist() == sequential_column.states_changes_positions.tolist()
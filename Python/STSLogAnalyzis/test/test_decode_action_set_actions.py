@@ -1,6 +1,53 @@
+from pathlib import Path
+
+import pytest
+
 from stsloganalyzis.archive import decode_action_set_content, decode_message, decode_xml_message
 
 
+@pytest.fixture(name="small_action_set_decoder_fixture")
+def small_action_set_decoder(tmp_path: Path) -> decode_action_set_content.ActionSetContentDecoder:
+    csv_file_path = tmp_path / "tsActionSet.csv"
+    csv_file_path.write_text("ID;NUM_ATS\nAS_STOP;0\nAS_END_OF_RUN;1\nAS_SKIP;4\n", encoding="utf-8")
+    return decode_action_set_content.ActionSetContentDecoder(csv_file_file_path=str(csv_file_path))
+
+
+class TestSmallActionSet:
+    def test_all_action_sets_have_a_value(self, small_action_set_decoder_fixture: decode_action_set_content.ActionSetContentDecoder) -> None:
+        decoded_action_set = small_action_set_decoder_fixture.decode_actions_bitfield("100010")
+        assert decoded_action_set.fields_with_value == {"AS_STOP": True, "AS_END_OF_RUN": False, "AS_SKIP": True}
+        assert decoded_action_set.action_set_id_with_value_true == ["AS_STOP", "AS_SKIP"]
+        assert not decoded_action_set.undecoded_bits_by_error
+
+    def test_undecoded_bits(self, small_action_set_decoder_fixture: decode_action_set_content.ActionSetContentDecoder) -> None:
+        decoded_action_set = small_action_set_decoder_fixture.decode_actions_bitfield("011101")
+        assert decoded_action_set.action_set_id_with_value_true == ["AS_END_OF_RUN"]
+        assert decoded_action_set.undecoded_bits_by_error == [2, 3, 5]
+
+    def test_too_short_bitfield(self, small_action_set_decoder_fixture: decode_action_set_content.ActionSetContentDecoder) -> None:
+        with pytest.raises(IndexError):
+            small_action_set_decoder_fixture.decode_actions_bitfield("1100")
+
+    def test_same_bitfield_decoded_once_without_shared_result(self, small_action_set_decoder_fixture: decode_action_set_content.ActionSetContentDecoder) -> None:
+        decoded_action_sets = []
+        for bitfield in ["10000", "01001", "10000"]:
+            decoded_message = decode_message.DecodedMessage(
+                message_number=decode_action_set_content.ATS_CC_ACTION_SET_MESSAGE_ID,
+                xml_decoded_message=decode_xml_message.DecodedXmlMessage(message_number=decode_action_set_content.ATS_CC_ACTION_SET_MESSAGE_ID, hex_string="01"),
+            )
+            decoded_message.decoded_fields_flat_directory["Actions"] = bitfield
+            decoded_action_sets.append(small_action_set_decoder_fixture.decode(decoded_message))
+
+        assert [decoded_action_set.action_set_id_with_value_true for decoded_action_set in decoded_action_sets] == [["AS_STOP"], ["AS_END_OF_RUN", "AS_SKIP"], ["AS_STOP"]]
+        assert small_action_set_decoder_fixture._decode_actions_bitfield_once.cache_info().misses == 2
+
+        decoded_action_sets[0].fields_with_value["AS_STOP"] = False
+        decoded_action_sets[0].action_set_id_with_value_true.clear()
+        assert decoded_action_sets[2].fields_with_value["AS_STOP"] is True
+        assert decoded_action_sets[2].action_set_id_with_value_true == ["AS_STOP"]
+        assert small_action_set_decoder_fixture.decode_actions_bitfield("10000").action_set_id_with_value_true == ["AS_STOP"]
+
+
 class TestRiyl:
 
     def test_first_bit(self) -> None:
@@ -1,11 +1,17 @@
 import datetime
+import functools
+import os
+import pathlib
 
 import pytest
 
-from typing import cast
+from typing import Callable, Dict, List, Optional, cast
+
+from dateutil import parser
 
 from stsloganalyzis.next_data import next_ats_data
-from stsloganalyzis.archive import decode_archive, decode_message, decode_xml_message
+from stsloganalyzis.archive import decode_archive, decode_message, decode_xml_message, decoded_archive_cache
+from stsloganalyzis.common import common_filters
 from stsloganalyzis.topology import line_topology
 
 archive_line_str_message_zc_ats_tracking_status = '{"SQLARCH":{"caller":"","catAla":0,"eqp":"PAS 05","eqpId":"EQ_PAS_05_PAS_05","exeSt":"","id":"M_PAS_05_ZC_ATS_TRACKING_STATUS_TRAINS_ID","jdb":false,"label":"PAS_05 : ZC ATS TRACKING STATUS TRAINS ID [161]","loc":"PAS 05","locale":"2025-07-21T10:54:18.439+02:00","newSt":"14 09 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 04 E4 44 00 01 19 40 27 EC ","oldSt":"","orders":"","sigT":"TSA","tstamp":"2025-07-21T10:54:18.000+02:00","utc_locale":"2025-07-21T08:54:18.439+01:00"},"date":"2025-07-21T10:54:18.440+02:00","tags":["SQLARCH"]}'
@@ -28,6 +34,265 @@ class IgnoredTestDecodeOneArchiveFile:
         pass
 
 
+class TestStreamingArchiveLibrary:
+    archive_version_line = '{"VERSIONS":{"ATS":"1.0"},"date":"2025-07-21T10:54:18.000+02:00","tags":["VERSIONS"]}'
+    archive_alarm_line = '{"ALARM":{"id":"ALARM_1"},"date":"2025-07-21T10:54:18.100+02:00","tags":["ALARM"]}'
+
+    def test_raw_content_is_released_and_ignored_tags_not_retained(self) -> None:
+        archive_library = (
+            decode_archive.ArchiveLibrary.Builder()
+            .add_raw_archives_json_lines([self.archive_version_line, archive_line_str_message_zc_ats_tracking_status, self.archive_alarm_line, archive_line_str_message_ats_pae_action_set])
+            .with_streaming(ignored_archive_line_tags=[decode_archive.ArchiveLineTag.ALARM])
+            .add_sqlarch_archive_lines_filter(
+                decode_archive.SignalTypeFilter(white_or_black_list=common_filters.WhiteOrBlackListFilterType.BLACKLIST, field_values=["TCA"], filter_type=common_filters.StringFilterType.EQUALS_TO)
+            )
+            .build()
+        )
+        assert len(archive_library.all_version_lines) == 1
+        assert not archive_library.all_alarm_lines
+        assert archive_library.ignored_lines_count_by_tag == {decode_archive.ArchiveLineTag.ALARM: 1}
+        assert len(archive_library.all_sqlarch_lines) == 1
+        assert len(archive_library.all_archive_lines_by_type[decode_archive.ArchiveLineTag.SQLARCH]) == 1
+
+        sqlarch_line = archive_library.all_sqlarch_lines[0]
+        assert sqlarch_line.full_raw_archive_line is None
+        assert sqlarch_line.full_archive_line_as_json is None
+        assert sqlarch_line.get_id() == "M_PAS_05_ZC_ATS_TRACKING_STATUS_TRAINS_ID"
+        assert sqlarch_line.get_date_raw_str() == "2025-07-21T10:54:18.440+02:00"
+
+
+def get_archive_decoder_without_invariant_messages(messages_list_csv_file_full_path: str, xml_directory_path: str, railway_line: Optional[line_topology.Line] = None) -> decode_archive.ArchiveDecoder:
+    """Top-level factory (usable in worker processes) of a decoder knowing no message: lines are kept without being decoded"""
+    return decode_archive.ArchiveDecoder(
+        message_manager=decode_message.InvariantMessagesManager(messages_list_csv_file_full_path=messages_list_csv_file_full_path),
+        xml_message_decoder=decode_xml_message.XmlMessageDecoder(xml_directory_path=xml_directory_path),
+        action_set_content_decoder=None,
+        railway_line=railway_line,
+    )
+
+
+@pytest.fixture(name="archive_decoder_without_invariant_messages_factory")
+def archive_decoder_without_invariant_messages_factory_fixture(tmp_path: pathlib.Path) -> decode_archive.ARCHIVE_DECODER_FACTORY_TYPE:
+    messages_list_csv_file_full_path = tmp_path / "messages.csv"
+    messages_list_csv_file_full_path.write_text("ID;MESSAGE_INDEX\n")
+    xml_directory_path = tmp_path / "xml"
+    xml_directory_path.mkdir()
+    return functools.partial(get_archive_decoder_without_invariant_messages, str(messages_list_csv_file_full_path), str(xml_directory_path))
+
+
+class TestParallelArchiveLibrary:
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_parallel_build_keeps_lines_parsed_in_workers(self, archive_decoder_without_invariant_messages_factory: decode_archive.ARCHIVE_DECODER_FACTORY_TYPE, streaming: bool) -> None:
+        archive_version_line = '{"VERSIONS":{"ATS":"1.0"},"date":"2025-07-21T10:54:18.000+02:00","tags":["VERSIONS"]}'
+        archives_json_lines_sets = [
+            [archive_version_line, archive_line_str_message_zc_ats_tracking_status, archive_line_str_message_ats_pae_action_set],
+            [archive_line_str_message_lc_ats_sso_versions, archive_line_str_message_pae_ats_spe_oper],
+        ]
+
+        def get_builder() -> decode_archive.ArchiveLibrary.Builder:
+            builder = decode_archive.ArchiveLibrary.Builder()
+            if streaming:
+                builder.with_streaming()
+            for archives_json_lines in archives_json_lines_sets:
+                builder.add_raw_archives_json_lines(archives_json_lines)
+            return builder
+
+        sequential_archive_library = get_builder().add_archive_decoder(archive_decoder_without_invariant_messages_factory()).build()
+        parallel_archive_library = get_builder().with_parallel_build(archive_decoder_without_invariant_messages_factory, max_workers=2).build()
+
+        assert len(parallel_archive_library.all_version_lines) == 1
+        assert [(line.get_id(), line.date, line.all_fields_dict) for line in parallel_archive_library.all_sqlarch_lines] == [
+            (line.get_id(), line.date, line.all_fields_dict) for line in sequential_archive_library.all_sqlarch_lines
+        ]
+        assert [line.full_raw_archive_line for line in parallel_archive_library.all_archive_lines] == [line.full_raw_archive_line for line in sequential_archive_library.all_archive_lines]
+        assert all(line.parent is archive_input for archive_input in parallel_archive_library.archive_inputs for line in archive_input.all_sqlarch_lines)
+        for sqlarch_line in parallel_archive_library.all_sqlarch_lines:
+            assert sqlarch_line.invariant_message is None
+            assert sqlarch_line.sqlarch_fields_dict_raw["id_raw"] == sqlarch_line.get_id()
+
+    def test_parallel_build_is_identical_to_sequential_build(self) -> None:
+        archives_json_lines_sets = [
+            [archive_line_str_message_zc_ats_tracking_status, archive_line_str_message_ats_pae_action_set],
+            [archive_line_str_message_lc_ats_sso_versions, archive_line_str_message_pae_ats_spe_oper],
+        ]
+
+        def get_builder() -> decode_archive.ArchiveLibrary.Builder:
+            builder = decode_archive.ArchiveLibrary.Builder().add_sqlarch_archive_lines_filter(
+                decode_archive.SignalTypeFilter(white_or_black_list=common_filters.WhiteOrBlackListFilterType.BLACKLIST, field_values=["TCA"], filter_type=common_filters.StringFilterType.EQUALS_TO)
+            )
+            for archives_json_lines in archives_json_lines_sets:
+                builder.add_raw_archives_json_lines(archives_json_lines)
+            return builder
+
+        sequential_archive_library = get_builder().add_archive_decoder(archive_decoder).build()
+        parallel_archive_library = get_builder().with_parallel_build(next_ats_data.get_archive_decoder, max_workers=2).build()
+
+        assert [line.get_id() for line in parallel_archive_library.all_sqlarch_lines] == [line.get_id() for line in sequential_archive_library.all_sqlarch_lines]
+        assert parallel_archive_library.total_sqlarch_lines_processed == 4
+        assert parallel_archive_library.sqlarch_archive_lines_filters[0].rejected_count == 1
+        for parallel_line, sequential_line in zip(parallel_archive_library.all_sqlarch_lines, sequential_archive_library.all_sqlarch_lines):
+            assert parallel_line.invariant_message == sequential_line.invariant_message
+            assert parallel_line.decoded_message
+            assert sequential_line.decoded_message
+            assert parallel_line.decoded_message.decoded_fields_flat_directory == sequential_line.decoded_message.decoded_fields_flat_directory
+
+
+class TestDecodedArchiveCache:
+    def test_decoding_results_are_reloaded_and_invalidated_when_scheme_changes(self, tmp_path: pathlib.Path) -> None:
+        archive_file_full_path = str(tmp_path / "archive.json")
+        with open(archive_file_full_path, mode="w", encoding="utf-8") as archive_file:
+            archive_file.write(archive_line_str_message_zc_ats_tracking_status + "\n")
+        xml_directory_path = tmp_path / "xml"
+        xml_directory_path.mkdir()
+        (xml_directory_path / "MsgId161scheme.xml").write_text("<Message/>")
+        cache_directory_path = str(tmp_path / "cache")
+
+        decoder_fingerprint = decoded_archive_cache.compute_decoder_fingerprint(xml_directory_path=str(xml_directory_path), messages_list_csv_file_full_path=None, action_set_csv_file_full_path=None)
+        cache = decoded_archive_cache.DecodedArchiveFileCache(cache_directory_path=cache_directory_path, archive_file_full_path=archive_file_full_path, decoder_fingerprint=decoder_fingerprint)
+        assert cache.get_decoding_result(message_id="M_ID", new_state="01") is None
+
+        decoded_message = decode_message.DecodedMessage(message_number=161, xml_decoded_message=decode_xml_message.DecodedXmlMessage(message_number=161, hex_string="01"))
+        decoded_message.decoded_fields_flat_directory["Field"] = 1
+        cache.add_decoding_result(message_id="M_ID", new_state="01", invariant_message=decode_message.InvariantMessage(message_id="M_ID", message_number=161), decoded_message=decoded_message)
+        assert cache.save() == 1
+
+        reloaded_cache = decoded_archive_cache.DecodedArchiveFileCache(
+            cache_directory_path=cache_directory_path, archive_file_full_path=archive_file_full_path, decoder_fingerprint=decoder_fingerprint
+        )
+        decoding_result = reloaded_cache.get_decoding_result(message_id="M_ID", new_state="01")
+        assert decoding_result
+        invariant_message, reloaded_decoded_message = decoding_result
+        assert invariant_message == decode_message.InvariantMessage(message_id="M_ID", message_number=161)
+        assert reloaded_decoded_message
+        assert reloaded_decoded_message.decoded_fields_flat_directory == {"Field": 1}
+
+        (xml_directory_path / "MsgId161scheme.xml").write_text("<Message></Message>")
+        new_decoder_fingerprint = decoded_archive_cache.compute_decoder_fingerprint(
+            xml_directory_path=str(xml_directory_path), messages_list_csv_file_full_path=None, action_set_csv_file_full_path=None
+        )
+        assert new_decoder_fingerprint != decoder_fingerprint
+        invalidated_cache = decoded_archive_cache.DecodedArchiveFileCache(
+            cache_directory_path=cache_directory_path, archive_file_full_path=archive_file_full_path, decoder_fingerprint=new_decoder_fingerprint
+        )
+        assert invalidated_cache.get_decoding_result(message_id="M_ID", new_state="01") is None
+
+    def test_archive_library_cache_is_invalidated_when_topology_changes(
+        self, tmp_path: pathlib.Path, archive_decoder_without_invariant_messages_factory: Callable[..., decode_archive.ArchiveDecoder], small_line_csv_files_fixture: Dict[str, pathlib.Path]
+    ) -> None:
+        archive_file_full_path = str(tmp_path / "archive.json")
+        with open(archive_file_full_path, mode="w", encoding="utf-8") as archive_file:
+            archive_file.write(archive_line_str_message_zc_ats_tracking_status + "\n")
+        cache_directory_path = tmp_path / "cache"
+
+        def build_archive_library() -> decode_archive.ArchiveLibrary:
+            railway_line = line_topology.Line.load_from_csv(ignore_tracking_blocks_without_circuits=False, **small_line_csv_files_fixture)
+            archive_decoder = archive_decoder_without_invariant_messages_factory(railway_line=railway_line)
+            return decode_archive.ArchiveLibrary.Builder().add_archive_file(archive_file_full_path).add_archive_decoder(archive_decoder).with_decoded_archive_cache(str(cache_directory_path)).build()
+
+        build_archive_library()
+        build_archive_library()
+        previous_cache_files = list(cache_directory_path.glob("*.sqlite"))
+        assert len(previous_cache_files) == 1
+
+        with open(small_line_csv_files_fixture["switches_csv_full_path"], mode="a", encoding="utf-8") as switches_csv_file:
+            switches_csv_file.write("SW_2;2;N;R;;0;DOWN\n")
+        archive_library = build_archive_library()
+        cache_files = list(cache_directory_path.glob("*.sqlite"))
+        assert len(cache_files) == 1
+        assert cache_files != previous_cache_files
+        assert len(archive_library.all_sqlarch_lines) == 1
+
+    def test_superseded_cache_file_is_removed_when_archive_changes(self, tmp_path: pathlib.Path) -> None:
+        archive_file_full_path = str(tmp_path / "archive.json")
+        other_archive_file_full_path = str(tmp_path / "archive_2.json")
+        for file_full_path in [archive_file_full_path, other_archive_file_full_path]:
+            with open(file_full_path, mode="w", encoding="utf-8") as archive_file:
+                archive_file.write(archive_line_str_message_zc_ats_tracking_status + "\n")
+        xml_directory_path = tmp_path / "xml"
+        xml_directory_path.mkdir()
+        (xml_directory_path / "MsgId161scheme.xml").write_text("<Message/>")
+        cache_directory_path = str(tmp_path / "cache")
+        decoder_fingerprint = decoded_archive_cache.compute_decoder_fingerprint(xml_directory_path=str(xml_directory_path), messages_list_csv_file_full_path=None, action_set_csv_file_full_path=None)
+
+        def save_cache(file_full_path: str) -> str:
+            cache = decoded_archive_cache.DecodedArchiveFileCache(cache_directory_path=cache_directory_path, archive_file_full_path=file_full_path, decoder_fingerprint=decoder_fingerprint)
+            cache.add_decoding_result(message_id="M_ID", new_state="01", invariant_message=decode_message.InvariantMessage(message_id="M_ID", message_number=161), decoded_message=None)
+            assert cache.save() == 1
+            return os.path.basename(cache.cache_file_full_path)
+
+        other_archive_cache_file_name = save_cache(other_archive_file_full_path)
+        previous_cache_file_name = save_cache(archive_file_full_path)
+        assert sorted(os.listdir(cache_directory_path)) == sorted([previous_cache_file_name, other_archive_cache_file_name])
+
+        with open(archive_file_full_path, mode="a", encoding="utf-8") as archive_file:
+            archive_file.write(archive_line_str_message_zc_ats_tracking_status + "\n")
+        cache_file_name = save_cache(archive_file_full_path)
+        assert cache_file_name != previous_cache_file_name
+        assert sorted(os.listdir(cache_directory_path)) == sorted([cache_file_name, other_archive_cache_file_name])
+
+
+class TestFiltersOnRawLine:
+    @pytest.fixture(name="archive_source")
+    def archive_source_fixture(self) -> decode_archive.ArchiveSource:
+        return decode_archive.ArchiveLinesSet(raw_archives_json_lines=[])
+
+    def test_parse_archive_date(self) -> None:
+        assert decode_archive.parse_archive_date("2025-07-21T10:54:18.440+02:00") == parser.parse("2025-07-21T10:54:18.440+02:00")
+        assert decode_archive.parse_archive_date("21/07/2025 10:54") == parser.parse("21/07/2025 10:54")
+
+    @pytest.mark.parametrize(
+        "filter_type, field_values, expected_passes",
+        [
+            (common_filters.StringFilterType.EQUALS_TO, ["M_TRAIN_CC_9_ATS_CC_ACTION_SET"], True),
+            (common_filters.StringFilterType.EQUALS_TO, ["M_TRAIN_CC_9"], False),
+            (common_filters.StringFilterType.CONTAINS, ["ACTION_SET"], True),
+            (common_filters.StringFilterType.BEGIN_WITH_STRING, ["M_PAS"], False),
+        ],
+    )
+    def test_id_filter(self, archive_source: decode_archive.ArchiveSource, filter_type: common_filters.StringFilterType, field_values: List[str], expected_passes: bool) -> None:
+        id_filter = decode_archive.IdFilter(field_values=field_values, filter_type=filter_type, white_or_black_list=common_filters.WhiteOrBlackListFilterType.WHITELIST)
+        assert id_filter.passes(raw_sql_arch_line=archive_line_str_message_ats_pae_action_set, parent=archive_source) == expected_passes
+        assert id_filter.rejected_count == (0 if expected_passes else 1)
+
+    def test_field_value_not_a_plain_string(self, archive_source: decode_archive.ArchiveSource) -> None:
+        cat_ala_filter = decode_archive.SqlArchLineStringFieldValueBasedFilter(
+            white_or_black_list=common_filters.WhiteOrBlackListFilterType.WHITELIST, field_name="catAla", field_values=["0"], filter_type=common_filters.StringFilterType.EQUALS_TO
+        )
+        assert cat_ala_filter.passes(raw_sql_arch_line=archive_line_str_message_ats_pae_action_set, parent=archive_source)
+
+        label_filter = decode_archive.SqlArchLineStringFieldValueBasedFilter(
+            white_or_black_list=common_filters.WhiteOrBlackListFilterType.WHITELIST, field_name="label", field_values=['Quoted "label"'], filter_type=common_filters.StringFilterType.EQUALS_TO
+        )
+        assert label_filter.passes(raw_sql_arch_line='{"SQLARCH":{"id":"ID","label":"Quoted \\"label\\""},"date":"2025-07-21T13:06:13.490+02:00","tags":["SQLARCH"]}', parent=archive_source)
+
+    def test_nested_duplicate_field(self, archive_source: decode_archive.ArchiveSource) -> None:
+        raw_sql_arch_line = '{"SQLARCH":{"details":{"id":"NESTED_ID","date":"2000-01-01T00:00:00.000+02:00"},"id":"ID"},"date":"2025-07-21T13:06:13.490+02:00","tags":["SQLARCH"]}'
+        assert decode_archive.ARCHIVE_LINE_DATE_FIELD.find_value(raw_sql_arch_line) is None
+
+        id_filter = decode_archive.IdFilter(field_values="ID", filter_type=common_filters.StringFilterType.EQUALS_TO, white_or_black_list=common_filters.WhiteOrBlackListFilterType.WHITELIST)
+        assert id_filter.get_field_raw_value(raw_sql_arch_line) == "ID"
+
+        dates_filter = decode_archive.DatesFilter.DateBetweenFilter(date_min=parser.parse("2025-07-21T13:00:00.000"), date_max=parser.parse("2025-07-21T13:10:00.000"))
+        assert dates_filter.passes(raw_sql_arch_line=raw_sql_arch_line, parent=archive_source)
+
+    def test_nested_field_with_not_plain_string_top_level_field(self, archive_source: decode_archive.ArchiveSource) -> None:
+        sig_type_filter = decode_archive.SignalTypeFilter(
+            white_or_black_list=common_filters.WhiteOrBlackListFilterType.WHITELIST, field_values=["1"], filter_type=common_filters.StringFilterType.EQUALS_TO
+        )
+        assert sig_type_filter.passes(raw_sql_arch_line='{"SQLARCH":{"details":{"sigT":"TCA"},"sigT":1},"date":"2025-07-21T13:06:13.490+02:00","tags":["SQLARCH"]}', parent=archive_source)
+
+    @pytest.mark.parametrize(
+        "date_min, date_max, expected_passes",
+        [
+            ("2025-07-21T13:00:00.000", "2025-07-21T13:10:00.000", True),
+            ("2025-07-21T13:10:00.000", "2025-07-21T13:20:00.000", False),
+        ],
+    )
+    def test_date_between_filter(self, archive_source: decode_archive.ArchiveSource, date_min: str, date_max: str, expected_passes: bool) -> None:
+        dates_filter = decode_archive.DatesFilter.DateBetweenFilter(date_min=parser.parse(date_min), date_max=parser.parse(date_max))
+        assert dates_filter.passes(raw_sql_arch_line=archive_line_str_message_ats_pae_action_set, parent=archive_source) == expected_passes
+
+
 class IgnoredTestDecodeOneLineWithoutXml:
     def test_decode_basic_fields_zc_ats_tracking_status(self) -> None:
         archive_line = decode_archive.SqlArchArchiveLine(full_raw_archive_line=archive_line_str_message_zc_ats_tracking_status, parent=None)
@@ -1,11 +1,12 @@
 import datetime
+import pathlib
 
 import pytest
 
-from typing import List
+from typing import Callable, Dict, List
 
 from common import file_utils
-from stsloganalyzis.cck import decode_cck
+from stsloganalyzis.cck import decode_cck, decode_cck_improved_memory
 
 decode_mpro_trace_date_data = [
     (
@@ -21,3 +22,90 @@ class TestCckMproTraceLine:
 
         cck_mpro_trace_line = decode_cck.CckMproTraceLine(full_raw_line=full_raw_line_str)
         assert cck_mpro_trace_line.decoded_timestamp == expected_timestamp
+
+
+cck_mpro_trace_file_lines = [
+    "[2026/01/27 15/34/41/32] 8055 11 Main [tem@6182]Liaison 25A - La liaison n'a pas pu être démarré, on va reessayer plus tard\n",
+    "[2026/01/27 15/34/42/00] 8055 11 Main [tem@6182]Liaison 25A - changement d'état : OK => KO\n",
+    "[2026/01/27 15/34/43/00] 8055 11 Main [tem@6182]Liaison 12 - le msg a un problème de 'enchainement numero protocolaire'\n",
+    "line without date nor liaison\n",
+    "[2026/01/27 15/34/45/50] 8055 11 Main [tem@6182]Liaison 25A - changement d'état : KO => OK\n",
+]
+
+
+CCK_MPRO_TRACE_FOLDER_FACTORY_TYPE = Callable[[Dict[str, List[str]]], str]
+
+
+@pytest.fixture(name="cck_mpro_trace_folder_factory", params=["\n", "\r\n"], ids=["LF", "CRLF"])
+def cck_mpro_trace_folder_factory_fixture(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest) -> CCK_MPRO_TRACE_FOLDER_FACTORY_TYPE:
+    """Writes the lines of each trace file with Unix, then Windows line endings, and returns the folder"""
+    # "ANSI" code page only exists on Windows
+    monkeypatch.setattr(decode_cck_improved_memory, "CCK_MPRO_TRACE_FILE_ENCODING", "cp1252")
+
+    def write_cck_mpro_trace_files(lines_by_file_name: Dict[str, List[str]]) -> str:
+        for file_name, lines in lines_by_file_name.items():
+            (tmp_path / file_name).write_text("".join(lines), encoding="cp1252", newline=request.param)
+        return str(tmp_path)
+
+    return write_cck_mpro_trace_files
+
+
+class TestCckMproCompactTraceFile:
+    @pytest.fixture(name="cck_mpro_trace_folder_fixture")
+    def cck_mpro_trace_folder(self, cck_mpro_trace_folder_factory: CCK_MPRO_TRACE_FOLDER_FACTORY_TYPE) -> str:
+        return cck_mpro_trace_folder_factory({"Traces_MPRO.txt": cck_mpro_trace_file_lines})
+
+    def test_same_events_as_full_loading(self, cck_mpro_trace_folder_fixture: str) -> None:
+        full_library = decode_cck_improved_memory.CckMproTraceLibrary(name="full").load_folder(cck_mpro_trace_folder_fixture)
+        compact_library = decode_cck_improved_memory.CckMproTraceLibrary(name="compact", compact_lines=True).load_folder(cck_mpro_trace_folder_fixture)
+
+        assert not compact_library.all_processed_lines
+        assert len(compact_library.all_problem_enchainement_numero_protocolaire) == len(full_library.all_problem_enchainement_numero_protocolaire) == 1
+        assert len(compact_library.all_temporary_loss_link) == len(full_library.all_temporary_loss_link) == 1
+        assert compact_library._get_lines_time_range() == full_library._get_lines_time_range()
+
+        lines_count_per_liaison = {liaison.identifier if liaison else None: count for liaison, count in compact_library.get_lines_count_per_liaison().items()}
+        assert lines_count_per_liaison == {"25A": 3, "12": 1, None: 1}
+
+    def test_raw_lines_read_again_from_file(self, cck_mpro_trace_folder_fixture: str) -> None:
+        compact_library = decode_cck_improved_memory.CckMproTraceLibrary(name="compact", compact_lines=True).load_folder(cck_mpro_trace_folder_fixture)
+        compact_file = compact_library.all_compact_processed_files[0]
+        assert compact_file.read_raw_lines(range(len(compact_file))) == cck_mpro_trace_file_lines
+        assert compact_file.get_decoded_timestamp(3) is None
+
+        trace_lines = compact_library.get_trace_lines(event_flags=decode_cck_improved_memory.CckMproLineEventFlag.CHANGEMENT_ETAT_LIAISON)
+        assert [trace_line.line_number for trace_line in trace_lines] == [2, 5]
+        assert trace_lines[1].decoded_timestamp == datetime.datetime(year=2026, month=1, day=27, hour=15, minute=34, second=45, microsecond=500000)
+        assert trace_lines[1].liaison_id == "25A"
+        assert not compact_library.liaison_by_identifier["25A"].all_lines
+
+
+class TestCckMproTraceLibraryParallelLoad:
+    @pytest.fixture(name="cck_mpro_trace_folder_with_several_files_fixture")
+    def cck_mpro_trace_folder_with_several_files(self, cck_mpro_trace_folder_factory: CCK_MPRO_TRACE_FOLDER_FACTORY_TYPE) -> str:
+        # Link 25A is lost in first file and back to normal in second file
+        return cck_mpro_trace_folder_factory({"Traces_MPRO_1.txt": cck_mpro_trace_file_lines[:4], "Traces_MPRO_2.txt": cck_mpro_trace_file_lines[4:] + cck_mpro_trace_file_lines[1:3]})
+
+    def test_same_events_as_sequential_loading(self, cck_mpro_trace_folder_with_several_files_fixture: str) -> None:
+        sequential_library = decode_cck_improved_memory.CckMproTraceLibrary(name="sequential", compact_lines=True).load_folder(cck_mpro_trace_folder_with_several_files_fixture)
+        parallel_library = decode_cck_improved_memory.CckMproTraceLibrary(name="parallel", compact_lines=True, parallel_load=True, parallel_load_max_workers=2).load_folder(
+            cck_mpro_trace_folder_with_several_files_fixture
+        )
+
+        assert [compact_file.file_name for compact_file in parallel_library.all_compact_processed_files] == ["Traces_MPRO_1.txt", "Traces_MPRO_2.txt"]
+        assert [liaison.identifier for liaison in parallel_library.all_liaisons] == ["25A", "12"]
+        assert {liaison.identifier if liaison else None: count for liaison, count in parallel_library.get_lines_count_per_liaison().items()} == {"25A": 4, "12": 2, None: 1}
+        assert parallel_library._get_lines_time_range() == sequential_library._get_lines_time_range()
+
+        assert len(parallel_library.all_problem_enchainement_numero_protocolaire) == len(sequential_library.all_problem_enchainement_numero_protocolaire) == 2
+        assert len(parallel_library.all_problem_enchainement_numero_protocolaire_per_link[parallel_library.liaison_by_identifier["12"]]) == 2
+        assert len(parallel_library.all_changement_etats_liaisons_mpro_per_link[parallel_library.liaison_by_identifier["25A"]]) == 3
+
+        assert len(parallel_library.all_temporary_loss_link) == len(sequential_library.all_temporary_loss_link) == 1
+        temporary_loss_link = parallel_library.all_temporary_loss_link[0]
+        assert (temporary_loss_link.loss_link_event.trace_line.parent_file.file_name, temporary_loss_link.loss_link_event.trace_line.line_number) == ("Traces_MPRO_1.txt", 2)
+        assert (temporary_loss_link.link_back_to_normal_event.trace_line.parent_file.file_name, temporary_loss_link.link_back_to_normal_event.trace_line.line_number) == ("Traces_MPRO_2.txt", 1)
+
+    def test_parallel_load_requires_compact_lines(self) -> None:
+        with pytest.raises(AssertionError):
+            decode_cck_improved_memory.CckMproTraceLibrary(name="parallel", parallel_load=True)
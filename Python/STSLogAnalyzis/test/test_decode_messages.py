@@ -76,6 +76,53 @@ class TestDecodeSimpleFakeMessages:
         with pytest.raises(AssertionError, match=r".*supported*"):
             xml_message_decoder.decode_xml_fields_in_message_hexadecimal(message_number=995, hexadecimal_content=hexa_content_as_str)
 
+    @pytest.mark.parametrize("build_fields_and_records_objects", [True, False])
+    def test_message_with_selector_bitset_and_records_with_dimension(self, build_fields_and_records_objects: bool) -> None:
+        xml_message_decoder = decode_xml_message.XmlMessageDecoder(xml_directory_path=r"Input_for_tests\Xml", build_fields_and_records_objects=build_fields_and_records_objects)
+        decoded_message = xml_message_decoder.decode_xml_fields_in_message_hexadecimal(message_number=993, hexadecimal_content="01 2A 3F C5 01 02")
+        assert decoded_message
+        assert not decoded_message.not_decoded_because_error_fields_names
+        assert decoded_message.is_correctly_and_completely_decoded()
+        assert decoded_message.decoded_fields_flat_directory == {
+            "Type": 1,
+            "TypeOneValue": 42,
+            "Item_0_ItemValue": 3,
+            "Item_0_ItemFlags": "1111",
+            "Item_0_ItemFlags_0": 1,
+            "Item_0_ItemFlags_1": 1,
+            "Item_0_ItemFlags_2": 1,
+            "Item_0_ItemFlags_3": 1,
+            "Item_1_ItemValue": 12,
+            "Item_1_ItemFlags": "0101",
+            "Item_1_ItemFlags_0": 0,
+            "Item_1_ItemFlags_1": 1,
+            "Item_1_ItemFlags_2": 0,
+            "Item_1_ItemFlags_3": 1,
+            "TableValue_0": 1,
+            "TableValue_1": 2,
+        }
+        assert bool(decoded_message.all_fields_by_name) == build_fields_and_records_objects
+
+    def test_selector_not_triggered(self) -> None:
+        xml_message_decoder = decode_xml_message.XmlMessageDecoder(xml_directory_path=r"Input_for_tests\Xml")
+        decoded_message = xml_message_decoder.decode_xml_fields_in_message_hexadecimal(message_number=993, hexadecimal_content="02 3F C5 01 02")
+        assert decoded_message
+        assert decoded_message.is_correctly_and_completely_decoded()
+        assert "TypeOneValue" not in decoded_message.decoded_fields_flat_directory
+        item_records = decoded_message.all_records_by_name["Item"]
+        assert isinstance(item_records, list)
+        assert len(item_records) == 2
+        item_value_field = item_records[1].all_fields_unit_by_name["ItemValue"]
+        assert isinstance(item_value_field, decode_xml_message.DecodedXmlMessage.XmlMessageFieldUnit)
+        assert item_value_field.value == 12
+
+    def test_decoding_plan_is_compiled_once(self) -> None:
+        xml_message_decoder = decode_xml_message.XmlMessageDecoder(xml_directory_path=r"Input_for_tests\Xml")
+        decoding_plan = xml_message_decoder.get_decoding_plan(message_number=998)
+        assert decoding_plan
+        xml_message_decoder.decode_xml_fields_in_message_hexadecimal(message_number=998, hexadecimal_content="01 02")
+        assert xml_message_decoder.get_decoding_plan(message_number=998) is decoding_plan
+
 
 class TestDecodeCbtcMessage205withRecordWithDimension:
 
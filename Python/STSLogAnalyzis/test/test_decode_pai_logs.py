@@ -0,0 +1,154 @@
+import datetime
+import os
+import pathlib
+
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from stsloganalyzis.pai import decode_pai_logs
+
+MAINT_FILES_LINES = {
+    "maint_1.txt": [
+        ("10:00:00.00", "OUV_SESSION", "PUPITRE_1 Session operateur"),
+        ("10:00:01.00", "DEB_ALA", "MCCS_1 MCCS A HS"),
+        ("10:00:02.00", "DEB_ALA", "PAS_12 Defaut alimentation"),
+        ("10:00:03.00", "DEB_ALA", "PAS_12 Defaut alimentation"),
+        ("10:00:04.00", "EVT_ALA", "PAS_13 Evenement"),
+        ("10:00:05.00", "FIN_ALA", "PAS_12 Defaut alimentation"),
+        ("10:00:06.00", "FIN_ALA", "PAS_14 Defaut sans debut"),
+    ],
+    "maint_2.txt": [
+        ("10:00:07.00", "FIN_ALA", "MCCS_1 MCCS A HS"),
+        ("10:00:08.00", "DEB_ALA", "PAS_15 Defaut communication"),
+        ("10:00:09.00", "FERM_SESSION", "PUPITRE_1 Session operateur"),
+        ("09:59:00.00", "EVT_ALA", "PAS_13 Evenement"),
+        ("10:00:10.00", "DEB_ALA", "PAS_12 Defaut alimentation"),
+    ],
+}
+
+
+@pytest.fixture(name="maint_library")
+def maint_library_fixture(tmp_path: pathlib.Path) -> decode_pai_logs.TerminalTechniqueArchivesMaintLibrary:
+    for file_index, (file_name, lines) in enumerate(MAINT_FILES_LINES.items()):
+        file_full_path = tmp_path / file_name
+        file_full_path.write_text("".join(f"2025-12-29\t{line_time}\t{alarm_type}\t{alarm_full_text}\n" for line_time, alarm_type, alarm_full_text in lines))
+        # Files are loaded from older to newer
+        os.utime(file_full_path, (1_000_000 + file_index, 1_000_000 + file_index))
+
+    return decode_pai_logs.TerminalTechniqueArchivesMaintLibrary(name="PAI").load_folder(str(tmp_path))
+
+
+def pair_alarms_with_linear_lookup(all_lines: List[decode_pai_logs.TerminalTechniqueArchivesMaintLogLine]) -> Tuple[Dict[int, Optional[int]], List[int]]:
+    """Previous implementation: opened alarms in a list, searched by text for each closing line.
+    Returns the raise line index closed by each closing line index, and the raise lines indexes still opened"""
+    currently_opened_lines: List[decode_pai_logs.TerminalTechniqueArchivesMaintLogLine] = []
+    raise_line_index_by_end_line_index: Dict[int, Optional[int]] = {}
+    for line in all_lines:
+        if line.alarm_type in [decode_pai_logs.AlarmLineType.FIN_ALA, decode_pai_logs.AlarmLineType.FERM_SESSION]:
+            found_unclosed_lines = [opened_line for opened_line in currently_opened_lines if opened_line.alarm_full_text == line.alarm_full_text]
+            while len(found_unclosed_lines) > 1:
+                currently_opened_lines.remove(found_unclosed_lines[0])
+                found_unclosed_lines = [opened_line for opened_line in currently_opened_lines if opened_line.alarm_full_text == line.alarm_full_text]
+            if found_unclosed_lines:
+                currently_opened_lines.remove(found_unclosed_lines[0])
+                raise_line_index_by_end_line_index[line.line_index_in_library] = found_unclosed_lines[0].line_index_in_library
+            else:
+                raise_line_index_by_end_line_index[line.line_index_in_library] = None
+        elif line.alarm_type in [decode_pai_logs.AlarmLineType.DEB_ALA, decode_pai_logs.AlarmLineType.OUV_SESSION]:
+            currently_opened_lines.append(line)
+    return raise_line_index_by_end_line_index, [opened_line.line_index_in_library for opened_line in currently_opened_lines]
+
+
+class TestOpenedAlarmsIndex:
+    def test_closed_alarms_match_linear_lookup(self, maint_library: decode_pai_logs.TerminalTechniqueArchivesMaintLibrary) -> None:
+        expected_raise_line_index_by_end_line_index, _ = pair_alarms_with_linear_lookup(maint_library.all_processed_lines)
+
+        raise_line_index_by_end_line_index: Dict[int, Optional[int]] = {}
+        for line in maint_library.all_processed_lines:
+            if line.alarm_type in [decode_pai_logs.AlarmLineType.FIN_ALA, decode_pai_logs.AlarmLineType.FERM_SESSION]:
+                assert line.alarm.end_alarm_line is line
+                raise_line_index_by_end_line_index[line.line_index_in_library] = None if line.alarm in maint_library.ignored_end_alarms_without_alarm_begin else line.alarm.raise_line.line_index_in_library
+
+        assert raise_line_index_by_end_line_index == expected_raise_line_index_by_end_line_index
+        # Re-opened alarm closed once: the most recent raise is closed
+        assert raise_line_index_by_end_line_index[5] == 3
+        # Session and alarm closed in the next file
+        assert raise_line_index_by_end_line_index[7] == 1
+        assert raise_line_index_by_end_line_index[9] == 0
+        assert [alarm.full_text for alarm in maint_library.ignored_end_alarms_without_alarm_begin] == ["PAS_14 Defaut sans debut\n"]
+
+    def test_opened_alarms_match_linear_lookup(self, maint_library: decode_pai_logs.TerminalTechniqueArchivesMaintLibrary) -> None:
+        _, expected_opened_raise_lines_indexes = pair_alarms_with_linear_lookup(maint_library.all_processed_lines)
+
+        opened_raise_lines_indexes = sorted(alarm.raise_line.line_index_in_library for alarms in maint_library.currently_opened_alarms_by_full_text.values() for alarm in alarms)
+        assert opened_raise_lines_indexes == expected_opened_raise_lines_indexes == [8, 11]
+        assert maint_library.get_currently_opened_alarms_count() == 2
+        assert all(alarm.end_alarm_line is None for alarms in maint_library.currently_opened_alarms_by_full_text.values() for alarm in alarms)
+
+    def test_pop_unknown_alarm_text(self, maint_library: decode_pai_logs.TerminalTechniqueArchivesMaintLibrary) -> None:
+        assert maint_library.pop_currently_opened_alarms("PAS_99 Alarme inconnue\n") == []
+        assert maint_library.get_currently_opened_alarms_count() == 2
+
+
+class TestEquipmentsIndex:
+    def test_equipments_match_linear_lookup(self, maint_library: decode_pai_logs.TerminalTechniqueArchivesMaintLibrary) -> None:
+        assert [equipment.name for equipment in maint_library.equipments_with_alarms] == ["PUPITRE_1", "MCCS_1", "PAS_12", "PAS_13", "PAS_14", "PAS_15"]
+        for equipment_name in ["PUPITRE_1", "MCCS_1", "PAS_12", "PAS_13", "PAS_14", "PAS_15"]:
+            equipments_found = [equipment for equipment in maint_library.equipments_with_alarms if equipment.name == equipment_name]
+            assert len(equipments_found) == 1
+            assert maint_library.get_or_create_equipment_with_alarms(equipment_name) is equipments_found[0]
+        assert [len(equipment.alarms) for equipment in maint_library.equipments_with_alarms] == [1, 1, 3, 2, 1, 1]
+
+    def test_unknown_equipment_is_created_once(self, maint_library: decode_pai_logs.TerminalTechniqueArchivesMaintLibrary) -> None:
+        assert not [equipment for equipment in maint_library.equipments_with_alarms if equipment.name == "PAS_99"]
+
+        equipment = maint_library.get_or_create_equipment_with_alarms("PAS_99")
+        assert equipment.name == "PAS_99"
+        assert not equipment.alarms
+        assert maint_library.get_or_create_equipment_with_alarms("PAS_99") is equipment
+        assert [equipment for equipment in maint_library.equipments_with_alarms if equipment.name == "PAS_99"] == [equipment]
+
+
+def get_lines_context_with_linear_lookup(
+    all_lines: List[decode_pai_logs.TerminalTechniqueArchivesMaintLogLine], line: decode_pai_logs.TerminalTechniqueArchivesMaintLogLine, lines_before: int, lines_after: int
+) -> List[decode_pai_logs.TerminalTechniqueArchivesMaintLogLine]:
+    """Previous implementation: line searched in all lines of library"""
+    line_index = next(line_index for line_index, other_line in enumerate(all_lines) if other_line is line)
+    return all_lines[max(0, line_index - lines_before) : line_index + lines_after + 1]
+
+
+class TestLinesContext:
+    @pytest.mark.parametrize("lines_before, lines_after", [(0, 0), (2, 2), (3, 1), (20, 20)])
+    def test_context_matches_linear_lookup(self, maint_library: decode_pai_logs.TerminalTechniqueArchivesMaintLibrary, lines_before: int, lines_after: int) -> None:
+        for line in maint_library.all_processed_lines:
+            assert maint_library.get_lines_context(line, lines_before=lines_before, lines_after=lines_after) == get_lines_context_with_linear_lookup(
+                maint_library.all_processed_lines, line, lines_before=lines_before, lines_after=lines_after
+            )
+
+    def test_context_at_files_boundaries(self, maint_library: decode_pai_logs.TerminalTechniqueArchivesMaintLibrary) -> None:
+        first_line = maint_library.all_processed_lines[0]
+        last_line = maint_library.all_processed_lines[-1]
+        last_line_of_first_file = maint_library.all_processed_files[0].last_line
+        assert last_line_of_first_file
+
+        assert maint_library.get_lines_context(first_line, lines_before=3, lines_after=1) == maint_library.all_processed_lines[0:2]
+        assert maint_library.get_lines_context(last_line, lines_before=1, lines_after=3) == maint_library.all_processed_lines[-2:]
+        # Context crosses the boundary between files
+        assert [(line.parent_file.file_name, line.line_number_inside_file) for line in maint_library.get_lines_context(last_line_of_first_file, lines_before=1, lines_after=1)] == [
+            ("maint_1.txt", 6),
+            ("maint_1.txt", 7),
+            ("maint_2.txt", 1),
+        ]
+
+    def test_context_limited_by_time_delta(self, maint_library: decode_pai_logs.TerminalTechniqueArchivesMaintLibrary) -> None:
+        back_to_past_line = maint_library.all_back_to_past_detected[0].next_line
+        expected_context = [
+            line
+            for line in get_lines_context_with_linear_lookup(maint_library.all_processed_lines, back_to_past_line, lines_before=2, lines_after=2)
+            if abs(line.decoded_timestamp - back_to_past_line.decoded_timestamp) <= datetime.timedelta(seconds=30)
+        ]
+
+        context = maint_library.get_lines_context(back_to_past_line, lines_before=2, lines_after=2, max_time_delta=datetime.timedelta(seconds=30))
+        assert context == expected_context == [back_to_past_line]
+        assert maint_library.get_lines_context_as_text(back_to_past_line, lines_before=2, lines_after=2, max_time_delta=datetime.timedelta(seconds=30)) == "2025-12-29\t09:59:00.00\tEVT_ALA\tPAS_13 Evenement"
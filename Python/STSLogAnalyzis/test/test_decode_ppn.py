@@ -1,5 +1,7 @@
+import pathlib
 import pytest
 
+from datetime import datetime
 from typing import cast
 
 from stsloganalyzis.ppn import ppn_log
@@ -118,6 +120,56 @@ class TestDecodeOnePpnLogLine:
         assert ppn_log_line.unisig_messages
 
 
+class TestDecodePpnLogLineFields:
+    # Decoding fields does not use the library
+    NO_LIBRARY = cast(upper_layer_libraries.UpperLayerDecodingLibrary, None)
+
+    def test_decode_fields_of_usual_layout(self) -> None:
+        ppn_log_line = ppn_log.ProfibusLogLine.decode_raw_log_line(
+            line="2026-05-28 12:37:05:492 kppn 1.3.3: [99:44 => 5:44] Sending PROFIBUS message [num:4138][rt:2363][mode:SDA][len:23] 76 c5 01 05\n", upper_layer_decoding_library=self.NO_LIBRARY
+        )
+        assert ppn_log_line
+        assert ppn_log_line.timestamp == datetime(2026, 5, 28, 12, 37, 5, 492000)
+        assert ppn_log_line.source == (99 << 16) | 44
+        assert ppn_log_line.target == (5 << 16) | 44
+        assert ppn_log_line.sequence == 4138
+        assert ppn_log_line.mode == ppn_log.SendingMode.SDA
+        assert ppn_log_line.length == 23
+        assert ppn_log_line.bytes_hexa == "76 c5 01 05"
+
+    def test_decode_fields_of_other_layout(self) -> None:
+        ppn_log_line = ppn_log.ProfibusLogLine.decode_raw_log_line(
+            line="1970-01-01 2:18:14:65 kppn 1.3.3: [len:4][mode:SDN] [99:33 <= 2:33] Received [num:12] 1e 85 01 05", upper_layer_decoding_library=self.NO_LIBRARY
+        )
+        assert ppn_log_line
+        assert ppn_log_line.timestamp == datetime(1970, 1, 1, 2, 18, 14, 650000)
+        assert ppn_log_line.source == (2 << 16) | 33
+        assert ppn_log_line.target == (99 << 16) | 33
+        assert ppn_log_line.sequence == 12
+        assert ppn_log_line.mode == ppn_log.SendingMode.SDN
+        assert ppn_log_line.length == 4
+        assert ppn_log_line.bytes_hexa == "1e 85 01 05"
+
+    def test_ignored_lines(self) -> None:
+        assert ppn_log.ProfibusLogLine.decode_raw_log_line(line="2026-05-28 12:37:05:492 kppn", upper_layer_decoding_library=self.NO_LIBRARY) is None
+        assert (
+            ppn_log.ProfibusLogLine.decode_raw_log_line(
+                line="2026-05-28 12:37:05:492 kppn 1.3.3: [99:44 => 5:44] Sending PROFIBUS message [num:4138][mode:SRD][len:2] 76 c5", upper_layer_decoding_library=self.NO_LIBRARY
+            )
+            is None
+        )
+
+    def test_iterate_lines_by_batches(self, tmp_path: pathlib.Path) -> None:
+        file_full_path = tmp_path / "ppn.log"
+        file_full_path.write_text(
+            "".join(f"2026-05-28 12:37:05:{sequence:03d} kppn 1.3.3: [99:44 => 5:44] Sending PROFIBUS message [num:{sequence}][mode:SDA][len:1] 76\n" for sequence in range(25)) + "bad line\n",
+            encoding="utf-8",
+        )
+        batches = list(ppn_log.iterate_ppn_log_lines_batches(file_full_path=str(file_full_path), upper_layer_decoding_library=self.NO_LIBRARY, batch_size=10))
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        assert [ppn_log_line.sequence for batch in batches for ppn_log_line in batch] == list(range(25))
+
+
 class TestNextUnisigS58Library:
     def test_load_json(self, next_unisig_58_library_fixture: upper_layer_libraries.UpperLayerDecodingLibrary) -> None:
         assert next_unisig_58_library_fixture is not None
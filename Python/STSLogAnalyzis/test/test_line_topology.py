@@ -1,9 +1,12 @@
+import dataclasses
+from pathlib import Path
+
 import pytest
 
 from logger import logger_config
 
-from stsloganalyzis.topology import line_topology
-from typing import cast
+from stsloganalyzis.topology import line_topology, topology_snapshot
+from typing import Dict, List, Sequence, Tuple, cast
 
 
 @pytest.fixture(scope="session", name="next_line_fixture")
@@ -21,6 +24,131 @@ def next_line() -> line_topology.Line:
     return cast("line_topology.Line", line)
 
 
+@pytest.fixture(name="small_line_fixture")
+def small_line(small_line_csv_files_fixture: Dict[str, Path]) -> line_topology.Line:
+    line: line_topology.Line = line_topology.Line.load_from_csv(ignore_tracking_blocks_without_circuits=False, **small_line_csv_files_fixture)
+    return line
+
+
+class TestTrackingBlockBySegmentAndAbscissa:
+    def test_bounds_of_each_tracking_block(self, small_line_fixture: line_topology.Line) -> None:
+        line = small_line_fixture
+        for abscissa, expected_tracking_block_id in [(0, "TB_1"), (299, "TB_1"), (300, "TB_2"), (599, "TB_2"), (600, "TB_3"), (999, "TB_3")]:
+            tracking_block = line.get_tracking_block_by_segment_and_abscissa(segment=1, abscissa=abscissa)
+            assert tracking_block is not None
+            assert tracking_block.identifier == expected_tracking_block_id
+
+    def test_same_result_as_full_scan(self, small_line_fixture: line_topology.Line) -> None:
+        line = small_line_fixture
+        for segment in line.segments:
+            for abscissa in range(0, segment.length_in_cm, 50):
+                matches = [relation for relation in line.tracking_block_on_segments if relation.segment == segment and relation.abs_begin <= abscissa < relation.abs_end]
+                if len(matches) == 1:
+                    assert line.get_tracking_block_by_segment_and_abscissa(segment=segment, abscissa=abscissa) == matches[0].tracking_block
+
+    def test_no_tracking_block_at_segment_end(self, small_line_fixture: line_topology.Line) -> None:
+        line = small_line_fixture
+        assert line.get_tracking_block_by_segment_and_abscissa(segment="SEG_1", abscissa=1000) is None
+
+    def test_overlapping_tracking_blocks_are_rejected(self, small_line_fixture: line_topology.Line) -> None:
+        line = small_line_fixture
+        tracking_block = line.get_tracking_block_by_segment_and_abscissa(segment=2, abscissa=100)
+        assert tracking_block is not None
+        assert tracking_block.identifier == "TB_4"
+        with pytest.raises(ValueError):
+            line.get_tracking_block_by_segment_and_abscissa(segment=2, abscissa=450)
+
+    def test_track_circuit(self, small_line_fixture: line_topology.Line) -> None:
+        line = small_line_fixture
+        track_circuit = line.get_track_circuit_by_segment_and_abscissa(segment=1, abscissa=700)
+        assert track_circuit is not None
+        assert track_circuit.identifier == "TC_B"
+        assert line_topology.ExactLocation(line.get_segment(1), 700).get_track_circuit_id_none_if_no() == "TC_B"
+
+
+class TestDistancesOnSmallLine:
+    def test_to_next_segment(self, small_line_fixture: line_topology.Line) -> None:
+        line = small_line_fixture
+        origin = line_topology.ExactLocation(line.get_segment(1), 200)
+        destination = line_topology.ExactLocation(line.get_segment(2), 300)
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.INCREASING_OFFSET) == 1100
+        assert line.get_distance_in_cm_between_to_locations(destination, origin, line_topology.SegmentDirection.DECREASING_OFFSET) == 1100
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.DECREASING_OFFSET) is None
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.BOTH) == 1100
+
+    def test_maximum_distance(self, small_line_fixture: line_topology.Line) -> None:
+        line = small_line_fixture
+        origin = line_topology.ExactLocation(line.get_segment(1), 200)
+        destination = line_topology.ExactLocation(line.get_segment(2), 300)
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.INCREASING_OFFSET, maximum_distance_in_cm=800) is None
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.INCREASING_OFFSET, maximum_distance_in_cm=801) == 1100
+
+    def test_maximum_distance_stops_path_search(self, small_line_fixture: line_topology.Line) -> None:
+        line = small_line_fixture
+        origin = line_topology.ExactLocation(line.get_segment(1), 200)
+        destination = line_topology.ExactLocation(line.get_segment(3), 100)
+        # Segment 2 (1000 cm) is not crossed within 1000 cm: path search stops before reaching segment 3, and this result is only cached for this maximum distance
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.INCREASING_OFFSET, maximum_distance_in_cm=1000) is None
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.INCREASING_OFFSET, maximum_distance_in_cm=1800) is None
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.INCREASING_OFFSET, maximum_distance_in_cm=1801) == 800 + 1000 + 400
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.INCREASING_OFFSET, maximum_distance_in_cm=1000) is None
+
+    def test_through_segment_in_opposite_direction(self, small_line_fixture: line_topology.Line) -> None:
+        line = small_line_fixture
+        origin = line_topology.ExactLocation(line.get_segment(1), 200)
+        destination = line_topology.ExactLocation(line.get_segment(3), 100)
+        assert line.get_distance_in_cm_between_to_locations(origin, destination, line_topology.SegmentDirection.INCREASING_OFFSET) == 800 + 1000 + 400
+        assert line.get_distance_in_cm_between_to_locations(destination, origin, line_topology.SegmentDirection.INCREASING_OFFSET) == 400 + 1000 + 800
+
+
+
+def get_fields_values(topology_element: line_topology.TopologyElement) -> Dict[str, object]:
+    """Referenced topology elements are replaced by their identifiers"""
+
+    def to_comparable(value: object) -> object:
+        if isinstance(value, line_topology.TopologyElement):
+            return value.identifier
+        if isinstance(value, list):
+            return [to_comparable(item) for item in value]
+        return value
+
+    return {field.name: to_comparable(getattr(topology_element, field.name)) for field in dataclasses.fields(topology_element)}
+
+
+class TestTopologySnapshot:
+    def test_line_loaded_from_snapshot_is_identical(self, small_line_csv_files_fixture: Dict[str, Path], tmp_path: Path) -> None:
+        snapshot_directory_path = str(tmp_path / "snapshot")
+        line_from_csv = topology_snapshot.load_line_from_csv_with_snapshot(
+            snapshot_directory_path=snapshot_directory_path, ignore_tracking_blocks_without_circuits=False, **small_line_csv_files_fixture
+        )
+        line_from_snapshot = topology_snapshot.load_line_from_csv_with_snapshot(
+            snapshot_directory_path=snapshot_directory_path, ignore_tracking_blocks_without_circuits=False, **small_line_csv_files_fixture
+        )
+        assert len(list(Path(snapshot_directory_path).iterdir())) == 1
+
+        elements_pairs: List[Tuple[Sequence[line_topology.TopologyElement], Sequence[line_topology.TopologyElement]]] = [
+            (line_from_csv.segments, line_from_snapshot.segments),
+            (line_from_csv.track_circuits, line_from_snapshot.track_circuits),
+            (line_from_csv.tracking_blocks, line_from_snapshot.tracking_blocks),
+            (list(line_from_csv.switches.values()), list(line_from_snapshot.switches.values())),
+        ]
+        for line_from_csv_elements, line_from_snapshot_elements in elements_pairs:
+            assert [get_fields_values(element) for element in line_from_csv_elements] == [get_fields_values(element) for element in line_from_snapshot_elements]
+
+        assert [get_fields_values(relation) for relation in line_from_csv.tracking_block_on_segments] == [get_fields_values(relation) for relation in line_from_snapshot.tracking_block_on_segments]
+        assert line_from_snapshot.get_segment(2).upstream_normal == line_from_snapshot.get_segment(1)
+        assert line_from_snapshot.get_segment(3).downstream_normal_same_direction is False
+
+    def test_snapshot_rebuilt_when_csv_changes(self, small_line_csv_files_fixture: Dict[str, Path], tmp_path: Path) -> None:
+        snapshot_directory_path = str(tmp_path / "snapshot")
+        topology_snapshot.load_line_from_csv_with_snapshot(snapshot_directory_path=snapshot_directory_path, ignore_tracking_blocks_without_circuits=False, **small_line_csv_files_fixture)
+        with open(small_line_csv_files_fixture["switches_csv_full_path"], mode="a", encoding="utf-8") as switches_csv_file:
+            switches_csv_file.write("SW_2;2;N;R;;0;DOWN\n")
+        line = topology_snapshot.load_line_from_csv_with_snapshot(snapshot_directory_path=snapshot_directory_path, ignore_tracking_blocks_without_circuits=False, **small_line_csv_files_fixture)
+        assert "SW_2" in line.switches
+        assert len(list(Path(snapshot_directory_path).iterdir())) == 2
+
+
 class TestNextData:
     def test_tracking_blocks_are_created(self, next_line_fixture: line_topology.Line) -> None:
         line = next_line_fixture
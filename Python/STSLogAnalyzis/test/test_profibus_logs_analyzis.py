@@ -0,0 +1,67 @@
+import datetime
+import gzip
+import pathlib
+
+from typing import List
+
+from stsloganalyzis.ppn import profibus_logs_analyzis
+
+LOG_LINES_TIMES = ["10:00:00:000", "10:00:00:100", "10:00:00:200", "09:59:59:500", "09:59:59:600", "10:00:00:300", "10:00:05:000"]
+
+
+def create_cab_logs(directory_path: pathlib.Path, log_files_names: List[str]) -> profibus_logs_analyzis.CabLogs:
+    return profibus_logs_analyzis.CabLogs(log_files_directory_path=str(directory_path), log_files_names=log_files_names, log_files_prefix=None, label="cab")
+
+
+def write_log_lines(file_full_path: pathlib.Path, log_lines_times: List[str]) -> None:
+    file_content = "".join(f"2025-02-10 {log_line_time} kppn 1.3.3: value {index}\n" for index, log_line_time in enumerate(log_lines_times))
+    if file_full_path.suffix == ".gz":
+        with gzip.open(file_full_path, "wt") as f:
+            f.write(file_content)
+    else:
+        file_full_path.write_text(file_content)
+
+
+class TestReadLogFile:
+    def test_sessions_split_by_invalid_timestamps(self, tmp_path: pathlib.Path) -> None:
+        write_log_lines(tmp_path / "ethernet.log.gz", ["10:00:00:000", "10:00:00:100", "not_a_time", "10:00:01:000"])
+
+        log_sessions = profibus_logs_analyzis.read_log_file(str(tmp_path / "ethernet.log.gz"), create_cab_logs(tmp_path, []))
+        assert [log_session.get_log_lines_count() for log_session in log_sessions] == [2, 1]
+
+        log_line = log_sessions[1].get_log_line(0)
+        assert log_line.timestamp == datetime.datetime(2025, 2, 10, 10, 0, 1)
+        assert log_line.log_value == "1.3.3: value 3"
+        assert log_line.file_name == "ethernet.log.gz"
+        assert log_line.file_line_number == 4
+        assert log_line.log_session is log_sessions[1]
+
+
+class TestDetectMissingLogs:
+    def test_going_back_to_past_group_and_missing_logs(self, tmp_path: pathlib.Path) -> None:
+        write_log_lines(tmp_path / "ethernet.log", LOG_LINES_TIMES)
+
+        log_sessions = profibus_logs_analyzis.process_all_logs(create_cab_logs(tmp_path, ["ethernet.log"]))
+        assert len(log_sessions) == 1
+        log_session = log_sessions[0]
+
+        assert len(log_session.going_back_to_past_groups) == 1
+        going_back_to_past_group = log_session.going_back_to_past_groups[0]
+        assert going_back_to_past_group.approximative_past_timestamp == datetime.datetime(2025, 2, 10, 9, 59, 59, 500000)
+        assert going_back_to_past_group.approximative_present_timestamp == datetime.datetime(2025, 2, 10, 10, 0, 0, 200000)
+        assert [event.after_going_back_to_past_log_line.file_line_number for event in going_back_to_past_group.going_back_to_past_single_events] == [4, 5]
+        assert going_back_to_past_group.get_log_lines_with_wrongly_past_timestamp() == 2
+
+        assert len(log_session.missing_logs_events) == 1
+        missing_logs = log_session.missing_logs_events[0]
+        assert missing_logs.previous_log_line.file_line_number == 6
+        assert missing_logs.next_log_line.file_line_number == 7
+        assert missing_logs.missing_log_period == datetime.timedelta(seconds=4, milliseconds=700)
+
+    def test_parallel_processing_of_cabs(self, tmp_path: pathlib.Path) -> None:
+        write_log_lines(tmp_path / "ethernet.log", LOG_LINES_TIMES)
+        cabs_logs = [create_cab_logs(tmp_path, ["ethernet.log"]), create_cab_logs(tmp_path, ["ethernet.log", "ethernet.log"])]
+
+        log_sessions = profibus_logs_analyzis.process_all_cabs_logs(cabs_logs, parallel=True, max_workers=2)
+        assert [log_session.cab_log for log_session in log_sessions] == [cabs_logs[0], cabs_logs[1], cabs_logs[1]]
+        assert [len(log_session.missing_logs_events) for log_session in log_sessions] == [1, 1, 1]
@@ -0,0 +1,72 @@
+import datetime
+import random
+
+from typing import Dict, List, Tuple
+
+from stsloganalyzis.common import time_intervals_binning
+
+START_TIME = datetime.datetime(year=2026, month=1, day=27, hour=15, minute=34, second=41, microsecond=320000)
+
+
+def count_by_comparing_each_interval(
+    timestamps: List[datetime.datetime], start_time: datetime.datetime, end_time: datetime.datetime, interval_minutes: int
+) -> Dict[Tuple[datetime.datetime, datetime.datetime], int]:
+    interval_counts: Dict[Tuple[datetime.datetime, datetime.datetime], int] = {}
+    current_time = start_time
+    while current_time <= end_time:
+        interval_counts[(current_time, current_time + datetime.timedelta(minutes=interval_minutes))] = 0
+        current_time += datetime.timedelta(minutes=interval_minutes)
+
+    for timestamp in timestamps:
+        for interval_start, interval_end in interval_counts.keys():
+            if interval_start <= timestamp < interval_end:
+                interval_counts[(interval_start, interval_end)] += 1
+                break
+    return interval_counts
+
+
+class TestTimeIntervals:
+    def test_intervals(self) -> None:
+        time_intervals = time_intervals_binning.TimeIntervals(start_time=START_TIME, end_time=START_TIME + datetime.timedelta(minutes=20), interval_minutes=10)
+        assert time_intervals.intervals_count == 3
+        assert time_intervals.intervals[0] == (START_TIME, START_TIME + datetime.timedelta(minutes=10))
+        assert time_intervals.intervals[-1] == (START_TIME + datetime.timedelta(minutes=20), START_TIME + datetime.timedelta(minutes=30))
+
+    def test_timestamps_on_bounds_and_outside(self) -> None:
+        time_intervals = time_intervals_binning.TimeIntervals(start_time=START_TIME, end_time=START_TIME + datetime.timedelta(minutes=15), interval_minutes=10)
+        timestamps = [
+            START_TIME - datetime.timedelta(microseconds=1),
+            START_TIME,
+            START_TIME + datetime.timedelta(minutes=10) - datetime.timedelta(microseconds=1),
+            START_TIME + datetime.timedelta(minutes=10),
+            START_TIME + datetime.timedelta(minutes=20),
+        ]
+        assert list(time_intervals.get_interval_indexes(timestamps)) == [-1, 0, 0, 1, -1]
+        assert time_intervals.count_by_interval(timestamps) == [2, 1]
+        assert time_intervals.count_by_interval([]) == [0, 0]
+
+    def test_same_counts_as_comparing_each_interval(self) -> None:
+        random_generator = random.Random(0)
+        end_time = START_TIME + datetime.timedelta(days=2)
+        timestamps = [START_TIME + datetime.timedelta(microseconds=random_generator.randrange(-(10**9), 2 * 24 * 3600 * 10**6 + 10**9)) for _ in range(2000)]
+
+        for interval_minutes in [1, 7, 60]:
+            time_intervals = time_intervals_binning.TimeIntervals(start_time=START_TIME, end_time=end_time, interval_minutes=interval_minutes)
+            assert dict(zip(time_intervals.intervals, time_intervals.count_by_interval(timestamps))) == count_by_comparing_each_interval(
+                timestamps=timestamps, start_time=START_TIME, end_time=end_time, interval_minutes=interval_minutes
+            )
+
+    def test_series_ordered_by_first_non_empty_interval(self) -> None:
+        time_intervals = time_intervals_binning.TimeIntervals(start_time=START_TIME, end_time=START_TIME + datetime.timedelta(minutes=30), interval_minutes=10)
+        counts_by_series = time_intervals.count_by_interval_for_each_series(
+            {
+                "late": [START_TIME + datetime.timedelta(minutes=25)],
+                "empty": [],
+                "outside": [START_TIME + datetime.timedelta(hours=1)],
+                "early": [START_TIME, START_TIME + datetime.timedelta(minutes=35)],
+                "early_too": [START_TIME + datetime.timedelta(minutes=1)],
+            }
+        )
+        assert list(counts_by_series.keys()) == ["early", "early_too", "late"]
+        assert counts_by_series["early"] == [1, 0, 0, 1]
+        assert counts_by_series["late"] == [0, 0, 1, 0]